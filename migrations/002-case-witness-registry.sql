@@ -0,0 +1,61 @@
+-- ============================================================================
+-- CaseIntel AI Agents - Case Witness Registry
+-- ============================================================================
+-- Adds a canonical witness registry per case and links each witness mention
+-- to its canonical witness, so "J. Smith", "John Smith" and "SMITH, JOHN"
+-- are one witness.
+--
+-- Run after 001-create-agents-tables.sql. Safe to re-run.
+-- Existing mentions are linked by: python scripts/backfill_witness_registry.py
+-- ============================================================================
+
+-- ============================================================================
+-- 1. CASE WITNESSES TABLE
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS case_witnesses (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+
+    -- Foreign keys
+    case_id UUID NOT NULL REFERENCES cases(id) ON DELETE CASCADE,
+
+    -- Identity
+    canonical_name VARCHAR(500) NOT NULL,
+    -- Most complete form seen, e.g. "John Smith"
+
+    normalized_name VARCHAR(500) NOT NULL,
+    -- Lowercase, no punctuation, titles or suffixes, "first last" order
+
+    block_key VARCHAR(20) NOT NULL,
+    -- Soundex code of the surname; candidate matches are looked up by it
+
+    aliases JSONB DEFAULT '[]'::jsonb,
+    role VARCHAR(100),
+    mention_count INTEGER NOT NULL DEFAULT 0,
+
+    -- Metadata
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Indexes for performance
+CREATE UNIQUE INDEX IF NOT EXISTS idx_case_witnesses_case_normalized ON case_witnesses(case_id, normalized_name);
+CREATE INDEX IF NOT EXISTS idx_case_witnesses_case_block ON case_witnesses(case_id, block_key);
+
+DROP TRIGGER IF EXISTS update_case_witnesses_updated_at ON case_witnesses;
+CREATE TRIGGER update_case_witnesses_updated_at
+    BEFORE UPDATE ON case_witnesses
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- ============================================================================
+-- 2. LINK WITNESS MENTIONS
+-- ============================================================================
+
+ALTER TABLE witness_mentions
+    ADD COLUMN IF NOT EXISTS witness_id UUID REFERENCES case_witnesses(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_witness_mentions_case_witness ON witness_mentions(case_id, witness_id);
+
+COMMENT ON TABLE case_witnesses IS 'Canonical witnesses per case; witness_mentions.witness_id references them';
+COMMENT ON COLUMN witness_mentions.witness_id IS 'Canonical case witness this mention was resolved to';
@@ -0,0 +1,35 @@
+-- ============================================================================
+-- CaseIntel AI Agents - Case Timeline and Witness Query Indexes
+-- ============================================================================
+-- Composite indexes behind the paginated case timeline and witness
+-- endpoints, so filtered pages and keyset cursors are index range scans
+-- instead of per-request scans and sorts of every row in the case.
+--
+-- Run after 002-case-witness-registry.sql. Safe to re-run.
+-- On a large live table, run each statement with CREATE INDEX CONCURRENTLY
+-- outside a transaction instead.
+-- ============================================================================
+
+-- ============================================================================
+-- 1. TIMELINE EVENTS
+-- ============================================================================
+
+-- Date order, date ranges and (event_date, id) cursors
+CREATE INDEX IF NOT EXISTS idx_timeline_events_case_date_id
+    ON agent_timeline_events(case_id, event_date, id);
+
+-- Same, filtered by significance
+CREATE INDEX IF NOT EXISTS idx_timeline_events_case_significance_date_id
+    ON agent_timeline_events(case_id, significance, event_date, id);
+
+-- ============================================================================
+-- 2. WITNESS MENTIONS
+-- ============================================================================
+
+-- Grouping key of the witness summary (canonical witness, or name for
+-- mentions not yet linked) in mention order; must match the query expression
+CREATE INDEX IF NOT EXISTS idx_witness_mentions_case_key_created
+    ON witness_mentions(case_id, (COALESCE(CAST(witness_id AS VARCHAR), witness_name)), created_at, id);
+
+ANALYZE agent_timeline_events;
+ANALYZE witness_mentions;
@@ -0,0 +1,55 @@
+-- ============================================================================
+-- CaseIntel AI Agents - Case Stats
+-- ============================================================================
+-- Adds one materialized stats row per case: document, hot document,
+-- privilege recommendation and document type counts. Rows are updated in the
+-- same transaction that stores each analysis result, so the case stats
+-- endpoint is a primary-key lookup instead of a scan of analysis_results.
+--
+-- Run after 003-case-query-indexes.sql. Safe to re-run.
+-- Existing cases are filled in by: python scripts/backfill_case_stats.py
+-- ============================================================================
+
+-- ============================================================================
+-- 1. CASE STATS TABLE
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS case_stats (
+    case_id UUID PRIMARY KEY REFERENCES cases(id) ON DELETE CASCADE,
+
+    -- Counts (latest analysis result per document)
+    document_count INTEGER NOT NULL DEFAULT 0,
+    hot_doc_count INTEGER NOT NULL DEFAULT 0,
+    hot_doc_severities JSONB DEFAULT '{}'::jsonb,
+    -- {"critical": 3, "high": 12, ...}
+
+    privilege_recommendations JSONB DEFAULT '{}'::jsonb,
+    -- {"privileged": 40, "not_privileged": 850, "needs_review": 7}
+
+    document_types JSONB DEFAULT '{}'::jsonb,
+    -- {"email": 900, "contract": 31, ...}
+
+    -- Metadata
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+DROP TRIGGER IF EXISTS update_case_stats_updated_at ON case_stats;
+CREATE TRIGGER update_case_stats_updated_at
+    BEFORE UPDATE ON case_stats
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- ============================================================================
+-- 2. SUPPORTING INDEXES
+-- ============================================================================
+
+-- Previous result of a re-analyzed document, whose counts are replaced
+CREATE INDEX IF NOT EXISTS idx_analysis_results_case_document_created
+    ON analysis_results(case_id, document_id, created_at DESC);
+
+-- Top witnesses returned with the stats
+CREATE INDEX IF NOT EXISTS idx_case_witnesses_case_mentions
+    ON case_witnesses(case_id, mention_count DESC, id);
+
+COMMENT ON TABLE case_stats IS 'Materialized per-case analysis counts, updated with each stored analysis result';
@@ -0,0 +1,62 @@
+"""
+Backfill materialized case stats from stored analysis results.
+Cases analyzed before the case_stats table existed have no stats row; this
+rebuilds each case's row from the latest result per document. Safe to
+re-run, and also repairs a case whose counts have drifted.
+
+Usage:
+    python scripts/backfill_case_stats.py [--case-id <case_id>]
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.db import get_db_context
+from src.models.database import AnalysisResult
+from src.services.case_stats import case_stats
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill(case_id: str = None) -> int:
+    """
+    Rebuild case stats rows.
+    
+    Args:
+        case_id: Optional case to restrict the backfill to
+        
+    Returns:
+        int: Number of cases that failed
+    """
+    with get_db_context() as db:
+        query = db.query(AnalysisResult.case_id)
+        if case_id:
+            query = query.filter(AnalysisResult.case_id == case_id)
+        case_ids = [row[0] for row in query.distinct().all()]
+    
+    failed = 0
+    for case in case_ids:
+        try:
+            # One transaction per case; the stats row stays locked while it is rebuilt
+            with get_db_context() as db:
+                stats = case_stats.rebuild(db, case)
+                logger.info(f"Case {case}: {stats.document_count} documents, {stats.hot_doc_count} hot")
+        except Exception as e:
+            logger.error(f"Case stats backfill failed for case {case}: {str(e)}")
+            failed += 1
+    
+    logger.info(f"✅ Rebuilt stats for {len(case_ids) - failed} cases ({failed} failed)")
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill materialized case stats")
+    parser.add_argument("--case-id", help="Only backfill this case")
+    args = parser.parse_args()
+    
+    sys.exit(1 if backfill(args.case_id) else 0)
@@ -0,0 +1,73 @@
+"""
+Backfill the per-case document summary index from stored analysis results.
+Documents analysed before the summary index existed only have chunks in the
+vector store; this embeds the latest AnalysisResult.summary of each document.
+
+Usage:
+    python scripts/backfill_summary_index.py [--case-id <case_id>]
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.db import get_db_context
+from src.models.database import AnalysisResult
+from src.rag.embeddings import vector_store
+from src.rag.filters import analysis_chunk_metadata
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill(case_id: str = None) -> int:
+    """
+    Index the latest summary of every analysed document.
+    
+    Args:
+        case_id: Optional case to restrict the backfill to
+        
+    Returns:
+        int: Number of documents that failed to index
+    """
+    indexed = failed = 0
+    with get_db_context() as db:
+        query = db.query(AnalysisResult).filter(AnalysisResult.summary.isnot(None))
+        if case_id:
+            query = query.filter(AnalysisResult.case_id == case_id)
+        
+        # Newest first, so the first result seen per document is the latest analysis
+        seen = set()
+        for result in query.order_by(AnalysisResult.created_at.desc()).yield_per(500):
+            key = (str(result.case_id), str(result.document_id))
+            if key in seen:
+                continue
+            seen.add(key)
+            
+            state = {
+                "dates": (result.document_metadata or {}).get("dates", []),
+                "privilege_flags": result.privilege_flags,
+                "privilege_recommendation": result.privilege_recommendation,
+                "is_hot_doc": result.is_hot_doc,
+                "hot_doc_score": result.hot_doc_score,
+                "hot_doc_severity": result.hot_doc_severity
+            }
+            metadata = {"document_type": result.document_type, **analysis_chunk_metadata(state)}
+            if vector_store.upsert_document_summary(key[0], key[1], result.summary, metadata):
+                indexed += 1
+            else:
+                failed += 1
+    
+    logger.info(f"✅ Indexed {indexed} document summaries ({failed} failed)")
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the document summary index")
+    parser.add_argument("--case-id", help="Only backfill this case")
+    args = parser.parse_args()
+    
+    sys.exit(1 if backfill(args.case_id) else 0)
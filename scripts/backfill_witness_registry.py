@@ -0,0 +1,84 @@
+"""
+Backfill the case witness registry from stored witness mentions.
+Mentions stored before the registry existed have no witness_id; this
+resolves their names case by case (oldest first) and links them, so the
+witness map groups them by canonical witness.
+
+Usage:
+    python scripts/backfill_witness_registry.py [--case-id <case_id>]
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func
+from src.services.db import get_db_context
+from src.models.database import WitnessMention
+from src.services.witness_registry import witness_registry, normalize_name
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill(case_id: str = None) -> int:
+    """
+    Link unresolved witness mentions to canonical case witnesses.
+    
+    Args:
+        case_id: Optional case to restrict the backfill to
+        
+    Returns:
+        int: Number of cases that failed
+    """
+    with get_db_context() as db:
+        query = db.query(WitnessMention.case_id).filter(WitnessMention.witness_id.is_(None))
+        if case_id:
+            query = query.filter(WitnessMention.case_id == case_id)
+        case_ids = [row[0] for row in query.distinct().all()]
+    
+    linked = failed = 0
+    for case in case_ids:
+        try:
+            # One transaction per case; the registry locks the case while resolving
+            with get_db_context() as db:
+                rows = db.query(
+                    WitnessMention.witness_name,
+                    func.min(WitnessMention.role),
+                    func.count(WitnessMention.id),
+                    func.min(WitnessMention.created_at)
+                ).filter(
+                    WitnessMention.case_id == case,
+                    WitnessMention.witness_id.is_(None)
+                ).group_by(WitnessMention.witness_name).order_by(func.min(WitnessMention.created_at)).all()
+                
+                witnesses = [{"name": name, "role": role, "mention_count": count} for name, role, count, _ in rows]
+                case_witnesses = witness_registry.resolve(db, case, witnesses)
+                db.flush()
+                
+                for name, case_witness in case_witnesses.items():
+                    linked += db.query(WitnessMention).filter(
+                        WitnessMention.case_id == case,
+                        WitnessMention.witness_name == name,
+                        WitnessMention.witness_id.is_(None)
+                    ).update(
+                        {"witness_id": case_witness.id, "normalized_name": normalize_name(name)},
+                        synchronize_session=False
+                    )
+        except Exception as e:
+            logger.error(f"Witness backfill failed for case {case}: {str(e)}")
+            failed += 1
+    
+    logger.info(f"✅ Linked {linked} witness mentions across {len(case_ids)} cases ({failed} failed)")
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the case witness registry")
+    parser.add_argument("--case-id", help="Only backfill this case")
+    args = parser.parse_args()
+    
+    sys.exit(1 if backfill(args.case_id) else 0)
@@ -0,0 +1,189 @@
+"""
+Case timeline and witness query benchmark on synthetic rows.
+
+Inserts --rows synthetic timeline events and --mentions synthetic witness
+mentions into an existing case, then times the legacy endpoint queries
+(load every row, build the response in Python) against the paginated SQL
+queries: first page, a page deep into the case via its cursor, date-range
+and significance filters, and the witness summary. Synthetic rows are
+deleted afterwards unless --keep is given (needs Postgres with migrations
+001-003 applied).
+
+Usage:
+    python scripts/benchmark_case_queries.py --case-id <case_id> [--rows 1000000] [--mentions 200000]
+"""
+import sys
+import os
+import argparse
+import random
+import time
+import uuid
+from datetime import date, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from src.services.db import get_db_context
+from src.models.database import AgentTimelineEvent, WitnessMention
+from src.services.case_queries import timeline_page, witness_summary, SIGNIFICANCE_LEVELS
+import logging
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 10000
+FIRST_DATE = date(2015, 1, 1)
+DAYS = 3650
+CREATED_BY = "benchmark"
+SURNAMES = ["Smith", "Chen", "Garcia", "Okafor", "Novak", "Patel", "Kowalski", "Haddad", "Larsen", "Moreau"]
+GIVEN_NAMES = ["John", "Mary", "Mike", "Ana", "Wei", "Priya", "Tomas", "Leila", "Erik", "Claire"]
+
+
+def insert_rows(case_id: str, rows: int, mentions: int, seed: int):
+    """Insert synthetic timeline events and witness mentions in batches."""
+    rng = random.Random(seed)
+    names = [f"{given} {surname}" for surname in SURNAMES for given in GIVEN_NAMES]
+    
+    with get_db_context() as db:
+        for start in range(0, rows, BATCH_SIZE):
+            db.execute(AgentTimelineEvent.__table__.insert(), [
+                {
+                    "id": uuid.uuid4(),
+                    "case_id": case_id,
+                    "event_date": FIRST_DATE + timedelta(days=rng.randrange(DAYS)),
+                    "event_description": f"Synthetic event {start + i}",
+                    "significance": rng.choice(SIGNIFICANCE_LEVELS),
+                    "source_page": rng.randint(1, 50),
+                    "created_by": CREATED_BY
+                }
+                for i in range(min(BATCH_SIZE, rows - start))
+            ])
+        for start in range(0, mentions, BATCH_SIZE):
+            # Skewed so a few witnesses have most of the mentions
+            db.execute(WitnessMention.__table__.insert(), [
+                {
+                    "id": uuid.uuid4(),
+                    "case_id": case_id,
+                    "witness_name": names[min(int(rng.paretovariate(1.2)) - 1, len(names) - 1)],
+                    "role": "witness",
+                    "context": f"Synthetic mention {start + i}",
+                    "page_number": rng.randint(1, 50),
+                    "mention_type": CREATED_BY
+                }
+                for i in range(min(BATCH_SIZE, mentions - start))
+            ])
+    
+    with get_db_context() as db:
+        db.execute(text("ANALYZE agent_timeline_events"))
+        db.execute(text("ANALYZE witness_mentions"))
+
+
+def delete_rows(case_id: str):
+    """Delete the synthetic rows."""
+    with get_db_context() as db:
+        db.query(AgentTimelineEvent).filter(
+            AgentTimelineEvent.case_id == case_id, AgentTimelineEvent.created_by == CREATED_BY
+        ).delete(synchronize_session=False)
+        db.query(WitnessMention).filter(
+            WitnessMention.case_id == case_id, WitnessMention.mention_type == CREATED_BY
+        ).delete(synchronize_session=False)
+
+
+def legacy_timeline(db, case_id: str):
+    """Timeline as the endpoint built it before pagination."""
+    events = db.query(AgentTimelineEvent).filter(
+        AgentTimelineEvent.case_id == case_id
+    ).order_by(AgentTimelineEvent.event_date).all()
+    return [
+        {
+            "id": str(event.id),
+            "date": event.event_date.isoformat(),
+            "event": event.event_description,
+            "document_id": str(event.document_id) if event.document_id else None,
+            "source_page": event.source_page,
+            "significance": event.significance,
+            "created_by": event.created_by
+        }
+        for event in events
+    ]
+
+
+def legacy_witnesses(db, case_id: str):
+    """Witness map as the endpoint built it before SQL aggregation."""
+    witnesses = {}
+    for mention in db.query(WitnessMention).filter(WitnessMention.case_id == case_id).all():
+        witness = witnesses.setdefault(mention.witness_name, {"name": mention.witness_name, "mentions": []})
+        witness["mentions"].append({
+            "document_id": str(mention.document_id) if mention.document_id else None,
+            "context": mention.context,
+            "page": mention.page_number
+        })
+    return list(witnesses.values())
+
+
+def timed(label: str, fn, repeat: int = 3):
+    """Run fn in a fresh session, print the best of repeat runs and return its result."""
+    best = None
+    for _ in range(repeat):
+        with get_db_context() as db:
+            started = time.perf_counter()
+            result = fn(db)
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<48} {best * 1e3:10.1f}ms")
+    return result
+
+
+def run(case_id: str, pages: int, skip_legacy: bool):
+    """Time the legacy and paginated queries."""
+    if not skip_legacy:
+        timed("legacy timeline (all rows)", lambda db: legacy_timeline(db, case_id), repeat=1)
+        timed("legacy witnesses (all rows)", lambda db: legacy_witnesses(db, case_id), repeat=1)
+    
+    page = timed("timeline first page (with total_count)", lambda db: timeline_page(db, case_id))
+    cursor = page["next_cursor"]
+    with get_db_context() as db:
+        for _ in range(pages - 2):
+            if not cursor:
+                break
+            cursor = timeline_page(db, case_id, cursor=cursor)["next_cursor"]
+    if cursor:
+        timed(f"timeline page {pages} via cursor", lambda db: timeline_page(db, case_id, cursor=cursor))
+    timed(
+        "timeline one quarter, first page",
+        lambda db: timeline_page(db, case_id, start_date=date(2020, 1, 1), end_date=date(2020, 3, 31))
+    )
+    timed("timeline critical only, first page", lambda db: timeline_page(db, case_id, significance=["critical"]))
+    
+    summary = timed("witness summary first page", lambda db: witness_summary(db, case_id))
+    if summary["next_cursor"]:
+        timed(
+            "witness summary second page",
+            lambda db: witness_summary(db, case_id, cursor=summary["next_cursor"])
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Case timeline and witness query benchmark")
+    parser.add_argument("--case-id", required=True, help="Existing case to insert synthetic rows into")
+    parser.add_argument("--rows", type=int, default=1000000, help="Synthetic timeline events")
+    parser.add_argument("--mentions", type=int, default=200000, help="Synthetic witness mentions")
+    parser.add_argument("--pages", type=int, default=100, help="Depth of the deep timeline page")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--skip-legacy", action="store_true", help="Do not time the unpaginated queries")
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic rows")
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    insert_rows(args.case_id, args.rows, args.mentions, args.seed)
+    print(f"inserted {args.rows} events and {args.mentions} mentions in {time.perf_counter() - started:.0f}s")
+    try:
+        run(args.case_id, args.pages, args.skip_legacy)
+    finally:
+        if not args.keep:
+            delete_rows(args.case_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Fused vs per-agent benchmark for Agents 2-4.
+Replays the same documents through the per-agent path (MetadataExtractor,
+PrivilegeChecker and HotDocDetector as three calls) and through the fused
+path (FusedAnalyzer, one call), and reports input/output tokens, mean
+latency and fallback rate, plus the savings.
+
+Needs Bedrock access. A fused run that falls back to the individual agents
+is charged for the failed fused call and all three fallback calls.
+
+Usage:
+    python scripts/benchmark_fused_agents.py [--documents 5] [--no-prompt-cache]
+"""
+import sys
+import os
+import argparse
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.metadata_extractor import MetadataExtractor
+from src.agents.privilege_checker import PrivilegeChecker
+from src.agents.hot_doc_detector import HotDocDetector
+from src.agents.fused_analyzer import FusedAnalyzer
+from scripts.benchmark_prompt_cache import SAMPLE_DOCUMENTS
+import logging
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
+
+def usage_total(agents) -> dict:
+    """Sum cumulative usage across agents."""
+    totals = {field: 0 for field in TOKEN_FIELDS}
+    for agent in agents:
+        usage = agent.get_usage()
+        for field in TOKEN_FIELDS:
+            totals[field] += usage[field]
+    return totals
+
+
+def replay(run, agents, documents) -> dict:
+    """
+    Run one path over documents and collect token usage and latency.
+    
+    Args:
+        run: Callable taking a pipeline state and returning state fields
+        agents: Every agent the path may call, for usage accounting
+        documents: Document texts
+        
+    Returns:
+        Dict of token totals, total latency in seconds and fallbacks
+    """
+    before = usage_total(agents)
+    totals = {"latency": 0.0, "fallbacks": 0}
+    for i, text in enumerate(documents):
+        state = {
+            "raw_text": text,
+            "job_id": f"bench_{i}",
+            "case_id": "bench_case",
+            "document_id": f"bench_doc_{i}",
+            "document_type": "other"
+        }
+        started = time.perf_counter()
+        result = run(state)
+        totals["latency"] += time.perf_counter() - started
+        if result.get("analysis_mode") == "fused_fallback":
+            totals["fallbacks"] += 1
+    after = usage_total(agents)
+    for field in TOKEN_FIELDS:
+        totals[field] = after[field] - before[field]
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fused vs per-agent benchmark")
+    parser.add_argument("--documents", type=int, default=len(SAMPLE_DOCUMENTS), help="Documents replayed per path")
+    parser.add_argument("--no-prompt-cache", action="store_true", help="Disable prompt caching on every agent")
+    args = parser.parse_args()
+    
+    metadata_extractor = MetadataExtractor()
+    privilege_checker = PrivilegeChecker()
+    hot_doc_detector = HotDocDetector()
+    fused = FusedAnalyzer(metadata_extractor, privilege_checker, hot_doc_detector)
+    agents = (metadata_extractor, privilege_checker, hot_doc_detector, fused)
+    if args.no_prompt_cache:
+        for agent in agents:
+            agent.prompt_cache = False
+    
+    def per_agent(state):
+        result = {}
+        for agent in (metadata_extractor, privilege_checker, hot_doc_detector):
+            result.update(agent.run({**state, **result}))
+        return result
+    
+    documents = [SAMPLE_DOCUMENTS[i % len(SAMPLE_DOCUMENTS)] for i in range(args.documents)]
+    print(
+        f"{'path':<10} {'input':>8} {'output':>8} {'read':>8} {'write':>8} "
+        f"{'billed-eq':>10} {'mean ms':>9} {'fallbacks':>9}"
+    )
+    results = {}
+    for name, run in (("per_agent", per_agent), ("fused", fused.run)):
+        totals = replay(run, agents, documents)
+        # Cache reads bill at 10% and writes at 125% of the input price
+        billed = (
+            totals["input_tokens"]
+            + 0.1 * totals["cache_read_input_tokens"]
+            + 1.25 * totals["cache_creation_input_tokens"]
+        )
+        mean_latency = totals["latency"] / len(documents)
+        results[name] = (billed, totals["output_tokens"], mean_latency)
+        print(
+            f"{name:<10} {totals['input_tokens']:>8} {totals['output_tokens']:>8} "
+            f"{totals['cache_read_input_tokens']:>8} {totals['cache_creation_input_tokens']:>8} "
+            f"{billed:>10.0f} {mean_latency * 1000:>9.0f} {totals['fallbacks']:>9}"
+        )
+    
+    (billed_split, output_split, latency_split) = results["per_agent"]
+    (billed_fused, output_fused, latency_fused) = results["fused"]
+    print(
+        f"fused savings: {100 * (1 - billed_fused / billed_split) if billed_split else 0:.0f}% input cost, "
+        f"{100 * (1 - output_fused / output_split) if output_split else 0:.0f}% output tokens, "
+        f"{(latency_split - latency_fused) * 1000:.0f}ms mean latency"
+    )
+
+
+if __name__ == "__main__":
+    main()
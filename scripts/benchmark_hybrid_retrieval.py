@@ -0,0 +1,131 @@
+"""
+Recall@k benchmark for dense, BM25 and hybrid retrieval.
+Builds a synthetic labeled corpus (Bates numbers, section numbers, surnames and
+paraphrase queries) in a temporary case, runs every query through each
+retriever and reports recall@k.
+"""
+import sys
+import os
+import random
+import uuid
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.rag.embeddings import vector_store
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SURNAMES = ["Okafor", "Lindqvist", "Marchetti", "Haddad", "Novak", "Tanaka", "Brennan", "Castillo"]
+TOPICS = [
+    ("the valve assembly failed pressure testing", "Did the valve fail its pressure test?"),
+    ("shipments were delayed because of a supplier shortage", "Why were deliveries late?"),
+    ("the board approved the recall budget", "Who signed off on recall spending?"),
+    ("engineering knew about the defect in January", "When did engineers first learn of the defect?"),
+    ("the warranty excludes damage from misuse", "Is misuse covered by the warranty?"),
+    ("invoices were paid sixty days late", "Were payments made on time?")
+]
+
+
+def build_corpus(num_docs: int = 120, seed: int = 7):
+    """
+    Build synthetic chunks and labeled queries.
+    
+    Args:
+        num_docs: Number of chunks to generate
+        seed: Random seed
+    
+    Returns:
+        Tuple of (chunks, queries) where each query is (text, relevant_chunk_index, kind)
+    """
+    rng = random.Random(seed)
+    chunks = []
+    queries = []
+    
+    for i in range(num_docs):
+        bates = f"ACME_{100000 + i:08d}"
+        section = f"{rng.randint(1, 15)}.{rng.randint(1, 9)}"
+        surname = rng.choice(SURNAMES)
+        statement, paraphrase = rng.choice(TOPICS)
+        text = (
+            f"Bates {bates}. Under Section {section}, {surname} stated that {statement}. "
+            f"This memo was circulated to the operations team for review."
+        )
+        chunks.append({
+            "text": text,
+            "document_id": f"bench_doc_{i}",
+            "chunk_index": 0,
+            "document_type": "memo"
+        })
+        
+        kind = i % 3
+        if kind == 0:
+            queries.append((f"Find document {bates}", i, "bates"))
+        elif kind == 1:
+            queries.append((f"What did {surname} say in section {section} about this?", i, "section"))
+        else:
+            queries.append((f"{paraphrase} ({bates})", i, "paraphrase"))
+    
+    return chunks, queries
+
+
+def recall_at_k(ranked_ids, relevant_id, k):
+    """Return 1.0 if the relevant ID is within the top k, else 0.0."""
+    return 1.0 if relevant_id in ranked_ids[:k] else 0.0
+
+
+def run_benchmark(ks=(1, 5, 10)):
+    """
+    Run the benchmark and log recall@k per retriever.
+    
+    Args:
+        ks: Cutoffs to report
+    """
+    case_id = f"bench_{uuid.uuid4().hex[:8]}"
+    chunks, queries = build_corpus()
+    max_k = max(ks)
+    
+    try:
+        if not vector_store.add_document_chunks(case_id, chunks):
+            logger.error("Failed to index benchmark corpus")
+            return False
+        
+        # Single-chunk documents, so chunk IDs map 1:1 to document IDs
+        lexical_index = vector_store._get_lexical_index(case_id)
+        totals = {name: {k: 0.0 for k in ks} for name in ("dense", "bm25", "hybrid")}
+        
+        for query, relevant, _ in queries:
+            relevant_doc = f"bench_doc_{relevant}"
+            
+            dense = vector_store.search_similar_chunks(case_id, query, top_k=max_k)
+            dense_ids = [c["metadata"].get("document_id") for c in dense]
+            
+            lexical_ids = [chunk_id.rsplit("_", 1)[0] for chunk_id, _ in lexical_index.search(query, top_k=max_k)]
+            
+            hybrid = vector_store.hybrid_search(case_id, query, top_k=max_k)
+            hybrid_ids = [c["metadata"].get("document_id") for c in hybrid]
+            
+            for k in ks:
+                totals["dense"][k] += recall_at_k(dense_ids, relevant_doc, k)
+                totals["bm25"][k] += recall_at_k(lexical_ids, relevant_doc, k)
+                totals["hybrid"][k] += recall_at_k(hybrid_ids, relevant_doc, k)
+        
+        logger.info(f"\n{len(queries)} queries over {len(chunks)} chunks")
+        logger.info("retriever  " + "  ".join(f"R@{k:<4}" for k in ks))
+        for name, by_k in totals.items():
+            logger.info(f"{name:<10} " + "  ".join(f"{by_k[k] / len(queries):.3f}" for k in ks))
+        return True
+    
+    finally:
+        vector_store.delete_case_collection(case_id)
+
+
+if __name__ == "__main__":
+    logger.info("=" * 60)
+    logger.info("CaseIntel AI Agents - Hybrid Retrieval Benchmark")
+    logger.info("=" * 60)
+    
+    if not run_benchmark():
+        sys.exit(1)
@@ -0,0 +1,137 @@
+"""
+Privilege pre-screen benchmark: precision/recall and throughput.
+Screens a labelled corpus and reports, treating "candidate" as the positive
+prediction, precision and recall against the privileged label, the share of
+documents that take the fast path (no model call), and screen latency.
+
+Without --labels it uses a synthetic corpus built from templates: privileged
+documents (banners, outside-counsel emails, work product, case attorneys
+named without any banner) and non-privileged business documents, some with
+confidentiality footers. With --labels it reads a JSONL file of
+{"text": ..., "privileged": true|false, "case_id": optional}.
+
+Usage:
+    python scripts/benchmark_privilege_screen.py [--documents 2000] [--labels labelled.jsonl]
+"""
+import sys
+import os
+import argparse
+import json
+import random
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.privilege_screen import PrivilegeScreen
+import logging
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+CASE_ID = "bench_case"
+CASE_ATTORNEYS = ["Rachel Ames", "Victor Lindqvist"]
+CASE_FIRMS = ["Harlow Brandt"]
+CASE_DOMAINS = ["hbpartners.com"]
+
+PRIVILEGED_TEMPLATES = [
+    "PRIVILEGED & CONFIDENTIAL - ATTORNEY-CLIENT COMMUNICATION\nFrom: {person}\nTo: Rachel Ames\n\n"
+    "Rachel, attached are the {topic} figures you asked for. Let me know how you want us to respond.",
+    "From: v.lindqvist@hbpartners.com\nTo: {person}\nSubject: {topic}\n\n"
+    "As discussed, do not circulate the {topic} analysis until we have reviewed it.",
+    "ATTORNEY WORK PRODUCT - PREPARED IN ANTICIPATION OF LITIGATION\n\nSummary of interviews regarding {topic}.",
+    "{person},\n\nVictor Lindqvist asked that we hold the {topic} report until Friday. He will walk the board through it.",
+    "From: {person}\nTo: Legal Department\nSubject: {topic}\n\nCan legal weigh in on whether we must disclose the {topic} results?"
+]
+
+NON_PRIVILEGED_TEMPLATES = [
+    "Invoice {number}\nBill to: Northwind Distribution\nItems: {topic} assemblies\nAmount due: ${number}.00",
+    "From: {person}\nTo: Operations\nSubject: {topic}\n\nShipping the {topic} units on Tuesday; dock 4 is reserved.",
+    "Meeting notes - {topic}\nAttendees: {person}, QA, Procurement\nActions: rerun the pressure test, update the BOM.",
+    "From: {person}\nSubject: {topic}\n\nNumbers attached.\n\nThis email and any attachments are confidential "
+    "and intended solely for the addressee.",
+    "Daily production report\nLine 3 output: {number} units\nScrap: 2.1%\nDowntime: 14 minutes ({topic} changeover)"
+]
+
+PEOPLE = ["Dana Whitfield", "Mark Okafor", "Priya Raman", "Tom Becker", "Lena Fischer"]
+TOPICS = ["valve recall", "Q3 forecast", "supplier audit", "pressure test", "warranty claims"]
+
+
+def synthetic_corpus(size: int, privileged_share: float, seed: int = 11):
+    """
+    Build a labelled synthetic corpus.
+    
+    Args:
+        size: Number of documents
+        privileged_share: Share of privileged documents
+        seed: Random seed
+        
+    Returns:
+        List of (text, privileged, case_id)
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        privileged = rng.random() < privileged_share
+        template = rng.choice(PRIVILEGED_TEMPLATES if privileged else NON_PRIVILEGED_TEMPLATES)
+        text = template.format(person=rng.choice(PEOPLE), topic=rng.choice(TOPICS), number=rng.randint(1000, 99999))
+        corpus.append((text, privileged, CASE_ID))
+    return corpus
+
+
+def load_labels(path: str):
+    """Read a JSONL file of {"text", "privileged", "case_id"} records."""
+    corpus = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                corpus.append((record["text"], bool(record["privileged"]), record.get("case_id")))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Privilege pre-screen precision/recall and throughput")
+    parser.add_argument("--documents", type=int, default=2000, help="Synthetic corpus size")
+    parser.add_argument("--privileged-share", type=float, default=0.15, help="Share of privileged synthetic documents")
+    parser.add_argument("--labels", help="JSONL file of labelled documents instead of the synthetic corpus")
+    args = parser.parse_args()
+    
+    screen = PrivilegeScreen(terms_dir="")
+    if args.labels:
+        corpus = load_labels(args.labels)
+    else:
+        corpus = synthetic_corpus(args.documents, args.privileged_share)
+        screen.register_case_terms(CASE_ID, attorneys=CASE_ATTORNEYS, firms=CASE_FIRMS, domains=CASE_DOMAINS)
+    
+    # Build each case's automaton before timing
+    for case_id in {case_id for _, _, case_id in corpus}:
+        screen.screen("", case_id)
+    
+    tp = fp = fn = tn = 0
+    latencies = []
+    started = time.perf_counter()
+    for text, privileged, case_id in corpus:
+        result = screen.screen(text, case_id)
+        latencies.append(result["elapsed_us"])
+        if result["candidate"]:
+            tp, fp = tp + privileged, fp + (not privileged)
+        else:
+            fn, tn = fn + privileged, tn + (not privileged)
+    elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    print(f"documents: {len(corpus)}  privileged: {tp + fn}  candidates: {tp + fp}")
+    print(f"precision: {precision:.3f}  recall: {recall:.3f}  (tp={tp} fp={fp} fn={fn} tn={tn})")
+    print(f"fast path (no model call): {(fn + tn) / len(corpus):.1%} of documents")
+    print(
+        f"screen latency: mean {sum(latencies) / len(latencies):.1f}us, "
+        f"p99 {latencies[int(0.99 * (len(latencies) - 1))]:.1f}us, "
+        f"throughput {len(corpus) / elapsed:,.0f} documents/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Memory, QPS and recall@10 benchmark for quantized vector storage.
+Compares float32, float16 and int8 NumPy collections (with and without
+full-precision re-ranking) on synthetic clustered embeddings.
+"""
+import sys
+import os
+import argparse
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from src.rag.vector_backends import NumpyBackend
+from scripts.benchmark_vector_backends import synthetic_embeddings
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CONFIGS = [
+    ("float32", "none", 1),
+    ("float16", "float16", 1),
+    ("float16+rerank", "float16", 4),
+    ("int8", "int8", 1),
+    ("int8+rerank", "int8", 4)
+]
+
+
+def search_bytes(collection) -> int:
+    """Bytes scanned per full query: the quantized matrix (plus scales) or the float32 matrix."""
+    if collection.quantization == "none":
+        return os.path.getsize(collection._vectors_path)
+    size = os.path.getsize(collection._quantized_path)
+    if os.path.exists(collection._scales_path):
+        size += os.path.getsize(collection._scales_path)
+    return size
+
+
+def run_benchmark(num_vectors: int, dim: int, num_queries: int, k: int = 10):
+    """Run every configuration and log a comparison table."""
+    corpus, queries = synthetic_embeddings(num_vectors, dim, num_queries)
+    ground_truth = np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+    ids = [str(i) for i in range(num_vectors)]
+    
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, quantization, rerank_factor in CONFIGS:
+            backend = NumpyBackend(
+                os.path.join(tmp, name),
+                ivf_min_rows=0,
+                quantization=quantization,
+                rerank_factor=rerank_factor
+            )
+            collection = backend.create_collection("bench")
+            for offset in range(0, num_vectors, 5000):
+                collection.upsert(ids=ids[offset:offset + 5000], embeddings=corpus[offset:offset + 5000].tolist())
+            
+            collection.query(query_embeddings=[queries[0].tolist()], n_results=k)
+            hits = 0
+            start = time.perf_counter()
+            for i, query in enumerate(queries):
+                result = collection.query(query_embeddings=[query.tolist()], n_results=k)
+                hits += len(set(int(x) for x in result["ids"][0]) & set(ground_truth[i]))
+            elapsed = time.perf_counter() - start
+            
+            rows.append((name, search_bytes(collection), len(queries) / elapsed, hits / (len(queries) * k)))
+    
+    logger.info(f"\n{num_vectors} vectors x {dim} dims, {num_queries} queries")
+    logger.info(f"{'storage':<16} {'search MB':>10} {'QPS':>9} {'recall@10':>10}")
+    for name, size, qps, recall in rows:
+        logger.info(f"{name:<16} {size / 1e6:>10.1f} {qps:>9.1f} {recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark quantized vector storage")
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    
+    run_benchmark(args.vectors, args.dim, args.queries)
@@ -0,0 +1,153 @@
+"""
+Pre-filter routing throughput benchmark.
+Routes a document mix (the .txt files in --dir, plus synthetic calendar
+invites, auto-replies, spam and blank pages at --junk-share) and reports the
+tier distribution, routing overhead, agent calls avoided and the projected
+pipeline throughput with and without routing, from per-call latencies of
+the Haiku- and Sonnet-backed agents.
+
+With --bedrock it runs the real pipeline over the mix with routing off and
+then on and reports measured documents per minute instead (needs Bedrock).
+
+Usage:
+    python scripts/benchmark_routing.py [--dir test_documents] [--junk-share 0.4] [--bedrock]
+"""
+import sys
+import os
+import argparse
+import asyncio
+import random
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.workflows import routing
+from src.workflows.routing import route_document
+import logging
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+JUNK_DOCUMENTS = {
+    "calendar_invite": (
+        "From: Dana Whitfield <dwhitfield@acme.com>\nTo: Engineering Leads\nSubject: Invitation: Weekly sync @ Tue 10am\n\n"
+        "Invitation: Weekly sync\nWhen: Tuesday 10:00 AM-10:30 AM (Eastern Time)\nWhere: Conference Room B\n"
+        "Join Zoom Meeting https://acme.zoom.us/j/123456789\nMeeting ID: 123 456 789\nAdd to calendar: Google / Outlook / Yahoo"
+    ),
+    "auto_reply": (
+        "From: Mark Okafor <mokafor@acme.com>\nTo: Dana Whitfield <dwhitfield@acme.com>\nSubject: Automatic reply: Q3 numbers\n\n"
+        "Thank you for your email. I am currently out of the office with limited access to email and will respond when I return "
+        "on Monday. For urgent matters please contact the operations desk at extension 4410."
+    ),
+    "spam": (
+        "From: Deals <news@vendor-mail.com>\nTo: dwhitfield@acme.com\nSubject: 40% off industrial fittings this week\n\n"
+        "View this email in your browser\nOur biggest sale of the season is here: 40% off valves, fittings and gaskets. "
+        "Limited time offer, ends Friday.\nYou are receiving this because you signed up at vendor.com.\nUnsubscribe | Manage preferences"
+    ),
+    "blank": "\n\n   Page 14   \n\n\n"
+}
+
+# Agents by model tier in the default configuration
+HAIKU_AGENTS = ("classifier", "metadata", "cross_reference")
+SONNET_AGENTS = ("privilege", "hot_doc", "content")
+
+
+def load_mix(directory: str, junk_share: float, size: int, seed: int = 7):
+    """
+    Build a document mix.
+    
+    Args:
+        directory: Directory of substantive .txt documents
+        junk_share: Share of synthetic low-value documents
+        size: Documents in the mix
+        seed: Random seed
+        
+    Returns:
+        List of document texts
+    """
+    substantive = [p.read_text(errors="ignore") for p in sorted(Path(directory).glob("*.txt"))]
+    if not substantive:
+        raise SystemExit(f"No .txt documents in {directory}")
+    rng = random.Random(seed)
+    junk = list(JUNK_DOCUMENTS.values())
+    return [rng.choice(junk) if rng.random() < junk_share else rng.choice(substantive) for _ in range(size)]
+
+
+def projected_seconds(decision, haiku: float, sonnet: float) -> float:
+    """Projected pipeline time for one routed document."""
+    seconds = 0.0
+    for agent in HAIKU_AGENTS + SONNET_AGENTS:
+        if agent in decision["skip"]:
+            continue
+        if agent in SONNET_AGENTS and agent not in decision["downgrade"]:
+            seconds += sonnet
+        else:
+            seconds += haiku
+    return seconds
+
+
+def run_offline(documents, haiku: float, sonnet: float):
+    """Route the mix locally and project throughput."""
+    tiers = {"full": 0, "light": 0, "skip": 0}
+    skipped_calls = sonnet_avoided = 0
+    routed_seconds = 0.0
+    started = time.perf_counter()
+    decisions = [route_document({"raw_text": text}) for text in documents]
+    overhead = (time.perf_counter() - started) / len(documents)
+    
+    for decision in decisions:
+        tiers[decision["tier"]] += 1
+        skipped_calls += len(decision["skip"])
+        sonnet_avoided += sum(1 for agent in SONNET_AGENTS if agent in decision["skip"] or agent in decision["downgrade"])
+        routed_seconds += projected_seconds(decision, haiku, sonnet)
+    baseline_seconds = len(documents) * (len(HAIKU_AGENTS) * haiku + len(SONNET_AGENTS) * sonnet)
+    
+    print(f"documents: {len(documents)}  tiers: " + ", ".join(f"{tier}={count}" for tier, count in tiers.items()))
+    print(f"routing overhead: {overhead * 1e6:.0f}us per document")
+    print(f"agent calls skipped: {skipped_calls}, Sonnet calls avoided: {sonnet_avoided}")
+    print(
+        f"projected throughput: {len(documents) / baseline_seconds * 3600:.0f} -> "
+        f"{len(documents) / routed_seconds * 3600:.0f} documents/hour per worker "
+        f"({baseline_seconds / routed_seconds:.2f}x; Haiku {haiku:.1f}s, Sonnet {sonnet:.1f}s per call)"
+    )
+
+
+async def run_bedrock(documents):
+    """Run the real pipeline with routing off and on."""
+    from src.workflows.discovery_pipeline import run_pipeline
+    
+    for enabled in (False, True):
+        routing.ROUTING_ENABLED = enabled
+        started = time.perf_counter()
+        for i, text in enumerate(documents):
+            await run_pipeline(
+                document_url=f"bench://{i}",
+                case_id="bench_case",
+                job_id=f"bench_{'on' if enabled else 'off'}_{i}",
+                raw_text=text
+            )
+        elapsed = time.perf_counter() - started
+        print(f"routing {'on' if enabled else 'off':<4} {len(documents) / elapsed * 60:6.2f} documents/minute ({elapsed:.0f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-filter routing throughput benchmark")
+    parser.add_argument("--dir", default="test_documents", help="Directory of substantive .txt documents")
+    parser.add_argument("--junk-share", type=float, default=0.4, help="Share of low-value documents in the mix")
+    parser.add_argument("--documents", type=int, default=500, help="Documents in the mix")
+    parser.add_argument("--haiku-s", type=float, default=3.0, help="Mean Haiku-backed agent call (s)")
+    parser.add_argument("--sonnet-s", type=float, default=8.0, help="Mean Sonnet-backed agent call (s)")
+    parser.add_argument("--bedrock", action="store_true", help="Run the real pipeline instead of projecting")
+    args = parser.parse_args()
+    
+    documents = load_mix(args.dir, args.junk_share, args.documents)
+    if args.bedrock:
+        asyncio.run(run_bedrock(documents))
+    else:
+        run_offline(documents, args.haiku_s, args.sonnet_s)
+
+
+if __name__ == "__main__":
+    main()
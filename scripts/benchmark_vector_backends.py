@@ -0,0 +1,112 @@
+"""
+QPS and recall@10 benchmark for the vector backends.
+Indexes synthetic clustered embeddings into ChromaDB, NumPy brute force and
+NumPy IVF, and compares each against exact ground truth.
+"""
+import sys
+import os
+import argparse
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from src.rag.vector_backends import ChromaBackend, NumpyBackend, normalize_rows
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def synthetic_embeddings(num_vectors: int, dim: int, num_queries: int, seed: int = 0):
+    """
+    Generate clustered unit vectors and held-out queries near the clusters.
+    
+    Args:
+        num_vectors: Corpus size
+        dim: Embedding dimension
+        num_queries: Number of queries
+        seed: Random seed
+    
+    Returns:
+        Tuple of (corpus, queries) float32 matrices
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(16, num_vectors // 500), dim))
+    corpus = centers[rng.integers(0, len(centers), num_vectors)] + 0.3 * rng.normal(size=(num_vectors, dim))
+    queries = centers[rng.integers(0, len(centers), num_queries)] + 0.3 * rng.normal(size=(num_queries, dim))
+    return normalize_rows(corpus), normalize_rows(queries)
+
+
+def bench_backend(name, backend, corpus, queries, ground_truth, k=10, batch_size=5000):
+    """
+    Index the corpus into a fresh collection and measure QPS and recall@k.
+    
+    Returns:
+        Dict with index time, QPS and recall
+    """
+    collection = backend.create_collection(f"bench_{name}")
+    ids = [str(i) for i in range(len(corpus))]
+    
+    start = time.perf_counter()
+    for offset in range(0, len(corpus), batch_size):
+        collection.upsert(
+            ids=ids[offset:offset + batch_size],
+            embeddings=corpus[offset:offset + batch_size].tolist()
+        )
+    index_seconds = time.perf_counter() - start
+    
+    # Warm up (IVF training happens on first query)
+    collection.query(query_embeddings=[queries[0].tolist()], n_results=k)
+    
+    hits = 0
+    start = time.perf_counter()
+    for i, query in enumerate(queries):
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k)
+        hits += len(set(int(x) for x in result["ids"][0]) & set(ground_truth[i]))
+    query_seconds = time.perf_counter() - start
+    
+    return {
+        "index_s": index_seconds,
+        "qps": len(queries) / query_seconds,
+        "recall": hits / (len(queries) * k)
+    }
+
+
+def run_benchmark(num_vectors: int, dim: int, num_queries: int, nprobe: int, skip_chroma: bool):
+    """Run all backends and log a comparison table."""
+    corpus, queries = synthetic_embeddings(num_vectors, dim, num_queries)
+    ground_truth = np.argsort(-(queries @ corpus.T), axis=1)[:, :10]
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if not skip_chroma:
+            results["chroma"] = bench_backend(
+                "chroma", ChromaBackend(os.path.join(tmp, "chroma")), corpus, queries, ground_truth
+            )
+        results["numpy"] = bench_backend(
+            "numpy", NumpyBackend(os.path.join(tmp, "numpy"), ivf_min_rows=0), corpus, queries, ground_truth
+        )
+        results["numpy_ivf"] = bench_backend(
+            "numpy_ivf", NumpyBackend(os.path.join(tmp, "ivf"), ivf_min_rows=1, nprobe=nprobe),
+            corpus, queries, ground_truth
+        )
+    
+    logger.info(f"\n{num_vectors} vectors x {dim} dims, {num_queries} queries")
+    logger.info(f"{'backend':<10} {'index s':>8} {'QPS':>9} {'recall@10':>10}")
+    for name, r in results.items():
+        logger.info(f"{name:<10} {r['index_s']:>8.2f} {r['qps']:>9.1f} {r['recall']:>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark vector backends")
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--skip-chroma", action="store_true", help="Run without chromadb installed")
+    args = parser.parse_args()
+    
+    run_benchmark(args.vectors, args.dim, args.queries, args.nprobe, args.skip_chroma)
@@ -0,0 +1,209 @@
+"""
+Ask AI load test: p50/p95/p99 latency at N concurrent askers.
+
+Without --url the test runs in-process against a simulated Ask AI call
+(blocking sleep standing in for embedding, vector search and Claude) and
+compares calling it inline on the event loop, as the route used to, with
+the bounded executor with request coalescing. Event-loop lag is measured
+alongside, since a blocked loop stalls every other request in the replica.
+
+With --url it drives a running service over HTTP instead.
+"""
+import sys
+import os
+import argparse
+import asyncio
+import random
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.ask_executor import AskExecutor, question_key
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUESTIONS = [
+    "When did they know about the defect?",
+    "Who approved the recall budget?",
+    "Were invoices paid on time?",
+    "What does Section 4.2 say about liability?",
+    "Did the valve fail its pressure test?",
+    "Who was copied on the March memo?"
+]
+
+
+def percentile(values, pct: float) -> float:
+    """
+    Nearest-rank percentile.
+    
+    Args:
+        values: Samples
+        pct: Percentile (0-100)
+        
+    Returns:
+        Percentile value
+    """
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, latencies, elapsed: float, extra: str = ""):
+    """Print latency percentiles and throughput."""
+    print(
+        f"{name:<22} n={len(latencies):<5} p50={percentile(latencies, 50) * 1000:8.1f}ms "
+        f"p95={percentile(latencies, 95) * 1000:8.1f}ms p99={percentile(latencies, 99) * 1000:8.1f}ms "
+        f"throughput={len(latencies) / elapsed:7.1f} req/s {extra}"
+    )
+
+
+def simulated_ask(case_id: str, question: str, latency: float, jitter: float) -> dict:
+    """Blocking stand-in for rag_retriever.ask_question."""
+    time.sleep(max(0.0, random.gauss(latency, jitter)))
+    return {"answer": f"Answer to {question}", "sources": [], "confidence": 0.5}
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.01):
+    """Sample how late the event loop wakes up; returns the worst lag."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+def pick_question(rng: random.Random, asker_id: int, number: int, repeat_share: float) -> str:
+    """A common question with probability repeat_share, otherwise one only this asker asks."""
+    if rng.random() < repeat_share:
+        return rng.choice(QUESTIONS)
+    return f"{rng.choice(QUESTIONS)} (asker {asker_id}, question {number})"
+
+
+async def run_in_process(
+    mode: str,
+    askers: int,
+    requests_per_asker: int,
+    latency: float,
+    jitter: float,
+    workers: int,
+    repeat_share: float
+):
+    """
+    Run the simulated load in one mode. Askers are closed-loop: each issues
+    its next question as soon as the previous answer arrives, and latency is
+    measured from issue to answer, so time spent waiting for a blocked event
+    loop counts.
+    
+    Args:
+        mode: "inline" (blocking on the event loop) or "executor"
+        askers: Concurrent askers
+        requests_per_asker: Questions per asker
+        latency: Mean simulated upstream latency in seconds
+        jitter: Standard deviation of the simulated latency
+        workers: Executor worker threads
+        repeat_share: Share of questions drawn from the common set
+    """
+    executor = AskExecutor(max_workers=workers, max_pending=askers * requests_per_asker)
+    latencies = []
+    test_started = time.perf_counter()
+    
+    async def asker(asker_id: int):
+        rng = random.Random(asker_id)
+        issued = test_started
+        for number in range(requests_per_asker):
+            question = pick_question(rng, asker_id, number, repeat_share)
+            if mode == "inline":
+                simulated_ask("case_load", question, latency, jitter)
+            else:
+                await executor.run(
+                    question_key("case_load", question),
+                    simulated_ask, "case_load", question, latency, jitter
+                )
+            answered = time.perf_counter()
+            latencies.append(answered - issued)
+            issued = answered
+            await asyncio.sleep(0)
+    
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    await asyncio.gather(*(asker(i) for i in range(askers)))
+    elapsed = time.perf_counter() - test_started
+    stop.set()
+    worst_lag = await lag_task
+    executor.shutdown()
+    
+    stats = executor.stats()
+    extra = f"loop_lag_max={worst_lag * 1000:.0f}ms"
+    if mode == "executor":
+        extra += f" upstream_calls={stats['submitted']} coalesced={stats['coalesced']}"
+    summarize(mode, latencies, elapsed, extra)
+
+
+async def run_http(url: str, api_key: str, case_id: str, askers: int, requests_per_asker: int, repeat_share: float):
+    """
+    Drive a running service's POST /api/v1/ask.
+    
+    Args:
+        url: Service base URL
+        api_key: API key
+        case_id: Case with indexed documents
+        askers: Concurrent askers
+        requests_per_asker: Questions per asker
+        repeat_share: Share of questions drawn from the common set
+    """
+    import httpx
+    
+    latencies = []
+    errors = 0
+    
+    async def asker(client, asker_id: int):
+        nonlocal errors
+        rng = random.Random(asker_id)
+        for number in range(requests_per_asker):
+            started = time.perf_counter()
+            response = await client.post(
+                f"{url.rstrip('/')}/api/v1/ask",
+                json={"case_id": case_id, "question": pick_question(rng, asker_id, number, repeat_share)},
+                headers={"X-API-Key": api_key}
+            )
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+    
+    async with httpx.AsyncClient(timeout=300.0) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(asker(client, i) for i in range(askers)))
+        elapsed = time.perf_counter() - started
+    summarize("http", latencies, elapsed, f"errors={errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ask AI concurrency load test")
+    parser.add_argument("--askers", type=int, default=50, help="Concurrent askers")
+    parser.add_argument("--requests", type=int, default=4, help="Questions per asker")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated upstream latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Simulated latency std dev (s)")
+    parser.add_argument("--workers", type=int, default=8, help="Executor worker threads")
+    parser.add_argument("--repeat-share", type=float, default=0.3, help="Share of commonly asked questions")
+    parser.add_argument("--url", help="Load test a running service instead of the simulation")
+    parser.add_argument("--api-key", default=os.getenv("CASEINTEL_API_KEY", ""), help="API key for --url")
+    parser.add_argument("--case-id", default="case123", help="Case to ask about with --url")
+    args = parser.parse_args()
+    
+    if args.url:
+        asyncio.run(run_http(args.url, args.api_key, args.case_id, args.askers, args.requests, args.repeat_share))
+        return
+    
+    print(f"{args.askers} askers x {args.requests} questions, simulated upstream {args.latency * 1000:.0f}ms")
+    for mode in ("inline", "executor"):
+        asyncio.run(run_in_process(
+            mode, args.askers, args.requests, args.latency, args.jitter, args.workers, args.repeat_share
+        ))
+
+
+if __name__ == "__main__":
+    main()
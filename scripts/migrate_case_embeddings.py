@@ -0,0 +1,50 @@
+"""
+Re-embed a case's vector collection at a new embedding dimension/normalization.
+The live collection keeps serving searches until the re-embedded copy is swapped in.
+
+Usage:
+    python scripts/migrate_case_embeddings.py <case_id> --dimensions 512 [--no-normalize]
+
+Prefer POST /api/v1/case/{case_id}/embeddings while the API is running, so the
+swap is serialized against the API's own writes to the case.
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.rag.embeddings import vector_store
+from src.rag.embedders import TITAN_V2_DIMENSIONS
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-embed a case at a new embedding dimension")
+    parser.add_argument("case_id", help="Case identifier")
+    parser.add_argument("--dimensions", type=int, required=True, help=f"One of {TITAN_V2_DIMENSIONS} for Titan v2")
+    parser.add_argument("--no-normalize", action="store_true", help="Store unnormalized embeddings")
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+    
+    normalize = not args.no_normalize
+    current = vector_store.get_embedding_settings(args.case_id)
+    logger.info(f"Current settings for case {args.case_id}: {current}")
+    
+    status = vector_store.configure_case_embeddings(args.case_id, args.dimensions, normalize)
+    if status == "migrating":
+        logger.error(f"❌ An embedding migration is already running for case {args.case_id}")
+        sys.exit(1)
+    if status != "migration_required":
+        logger.info(f"✅ Case {args.case_id}: {status}")
+        sys.exit(0)
+    
+    if vector_store.migrate_case_embeddings(args.case_id, args.dimensions, normalize, args.batch_size):
+        logger.info(f"✅ Case {args.case_id} migrated to {args.dimensions} dimensions")
+    else:
+        logger.error(f"❌ Migration failed for case {args.case_id}")
+        sys.exit(1)
@@ -65,7 +65,9 @@ def verify_tables(conn):
         'analysis_results',
         'agent_timeline_events',
         'witness_mentions',
-        'agent_execution_logs'
+        'agent_execution_logs',
+        'case_witnesses',
+        'case_stats'
     ]
     
     try:
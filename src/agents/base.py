@@ -5,11 +5,24 @@ All agents inherit from this class for consistent error handling and API calls.
 import boto3
 import json
 import os
-from typing import Optional
+import threading
+from typing import Optional, Iterator, Dict, Any
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Bedrock prompt caching of the static prefix (tool schema + system prompt)
+PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() == "true"
+# Model ID fragments of Claude models that accept cache_control on Bedrock
+PROMPT_CACHE_MODELS = tuple(
+    m.strip() for m in os.getenv(
+        "PROMPT_CACHE_MODELS",
+        "claude-3-5-haiku,claude-3-7-sonnet,claude-sonnet-4,claude-opus-4,claude-haiku-4-5"
+    ).split(",") if m.strip()
+)
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
 
 class BaseAgent:
     """
@@ -28,6 +41,10 @@ class BaseAgent:
         """
         self.name = name
         self.model_id = model_id or "anthropic.claude-sonnet-4-5-20250929-v1:0"
+        self.prompt_cache = PROMPT_CACHE_ENABLED and any(m in self.model_id for m in PROMPT_CACHE_MODELS)
+        self.usage = {"calls": 0, **{field: 0 for field in USAGE_FIELDS}}
+        self.last_usage: Dict[str, int] = {}
+        self._usage_lock = threading.Lock()
         
         # Initialize Bedrock client
         try:
@@ -54,6 +71,36 @@ class BaseAgent:
         """
         raise NotImplementedError(f"{self.name} must implement run() method")
 
+    def _record_usage(self, result: dict):
+        """
+        Accumulate token usage, including prompt-cache reads and writes, from a response.
+        
+        Args:
+            result: Parsed Bedrock response body
+        """
+        usage = result.get("usage") or {}
+        call_usage = {field: int(usage.get(field) or 0) for field in USAGE_FIELDS}
+        with self._usage_lock:
+            self.last_usage = call_usage
+            self.usage["calls"] += 1
+            for field, value in call_usage.items():
+                self.usage[field] += value
+        if call_usage["cache_read_input_tokens"] or call_usage["cache_creation_input_tokens"]:
+            logger.debug(
+                f"{self.name}: prompt cache read {call_usage['cache_read_input_tokens']}, "
+                f"write {call_usage['cache_creation_input_tokens']}, uncached {call_usage['input_tokens']} tokens"
+            )
+
+    def get_usage(self) -> Dict[str, Any]:
+        """
+        Get cumulative token usage for this agent.
+        
+        Returns:
+            Dict with calls, input/output tokens and cache read/write tokens
+        """
+        with self._usage_lock:
+            return dict(self.usage)
+
     def _call_claude(self, system_prompt: str, user_prompt: str, max_tokens: int = 4096) -> str:
         """
         Call Claude via AWS Bedrock with text prompts.
@@ -82,12 +129,56 @@ class BaseAgent:
             )
             
             result = json.loads(response["body"].read())
+            self._record_usage(result)
             return result["content"][0]["text"]
             
         except Exception as e:
             logger.error(f"{self.name}: Bedrock API call failed: {str(e)}")
             raise
 
+    def _stream_claude(self, system_prompt: str, user_prompt: str, max_tokens: int = 4096) -> Iterator[str]:
+        """
+        Call Claude via Bedrock response streaming, yielding text as it arrives.
+        
+        Args:
+            system_prompt: System instructions for Claude
+            user_prompt: User message/content to analyze
+            max_tokens: Maximum tokens in response
+            
+        Yields:
+            str: Text deltas of Claude's response
+        """
+        try:
+            logger.debug(f"{self.name}: Calling Bedrock Claude streaming API")
+            
+            body = json.dumps({
+                "anthropic_version": "bedrock-2023-05-31",
+                "max_tokens": max_tokens,
+                "system": system_prompt,
+                "messages": [{"role": "user", "content": user_prompt}]
+            })
+            
+            response = self.client.invoke_model_with_response_stream(
+                modelId=self.model_id,
+                body=body
+            )
+            
+            for event in response["body"]:
+                chunk = event.get("chunk")
+                if not chunk:
+                    continue
+                payload = json.loads(chunk["bytes"])
+                if payload.get("type") == "content_block_delta":
+                    delta = payload.get("delta", {})
+                    if delta.get("type") == "text_delta":
+                        yield delta.get("text", "")
+                elif payload.get("type") == "message_stop":
+                    break
+                    
+        except Exception as e:
+            logger.error(f"{self.name}: Bedrock streaming call failed: {str(e)}")
+            raise
+
     def _call_claude_structured(
         self, 
         system_prompt: str, 
@@ -98,6 +189,11 @@ class BaseAgent:
         """
         Call Claude via Bedrock with tool_use to get structured JSON output.
         
+        When the model supports prompt caching, the system prompt is sent as a
+        cacheable block. Bedrock caches the whole prefix up to that breakpoint
+        (tool definitions, then system prompt), so repeated calls only pay
+        full price for the user message.
+        
         Args:
             system_prompt: System instructions for Claude
             user_prompt: User message/content to analyze
@@ -110,10 +206,14 @@ class BaseAgent:
         try:
             logger.debug(f"{self.name}: Calling Bedrock Claude API with structured output")
             
+            system = system_prompt
+            if self.prompt_cache:
+                system = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+            
             body = json.dumps({
                 "anthropic_version": "bedrock-2023-05-31",
                 "max_tokens": max_tokens,
-                "system": system_prompt,
+                "system": system,
                 "messages": [{"role": "user", "content": user_prompt}],
                 "tools": [{
                     "name": "structured_output",
@@ -129,6 +229,7 @@ class BaseAgent:
             )
             
             result = json.loads(response["body"].read())
+            self._record_usage(result)
             
             # Extract tool use response
             for block in result.get("content", []):
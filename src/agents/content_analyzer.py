@@ -3,6 +3,7 @@ Agent 5: Content Analyzer
 Generates comprehensive summaries, extracts key facts, identifies legal issues, and drafts narratives.
 """
 from src.agents.base import BaseAgent
+from typing import Optional
 import logging
 import os
 
@@ -136,9 +137,16 @@ class ContentAnalyzer(BaseAgent):
     Agent 5: Provides comprehensive content analysis and narrative drafting.
     """
     
-    def __init__(self):
+    def __init__(self, model_id: Optional[str] = None):
+        """
+        Initialize the content analyzer.
+        
+        Args:
+            model_id: Bedrock model ID override (e.g. a lighter model for
+                      low-value documents); defaults to MODEL_CONTENT
+        """
         # Use Sonnet 4.5 for complex content analysis
-        model_id = os.getenv("MODEL_CONTENT", "us.anthropic.claude-3-5-sonnet-20241022-v2:0")
+        model_id = model_id or os.getenv("MODEL_CONTENT", "us.anthropic.claude-3-5-sonnet-20241022-v2:0")
         super().__init__(name="ContentAnalyzer", model_id=model_id)
     
     def run(self, state: dict) -> dict:
@@ -200,7 +200,7 @@ class CrossReferenceEngine(BaseAgent):
             
             raw_text = state.get("raw_text", "")
             case_id = state.get("case_id", "")
-            job_id = state.get("job_id", "")
+            document_id = state.get("document_id") or state.get("job_id", "")
             
             # Get context from prior agents
             summary = state.get("summary", "")
@@ -219,7 +219,7 @@ class CrossReferenceEngine(BaseAgent):
                         case_id=case_id,
                         query_text=summary,
                         top_k=5,
-                        exclude_doc_id=job_id
+                        exclude_doc_id=document_id
                     )
                     if related_docs:
                         related_docs_context = "\n\nRelated documents in this case:\n"
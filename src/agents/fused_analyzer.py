@@ -0,0 +1,186 @@
+"""
+Fused Analyzer: Agents 2-4 in one call
+Extracts metadata, checks privilege and detects hot docs from a single
+structured call, so the document prefix is sent to Bedrock once instead of
+three times. Falls back to the individual agents when the combined output
+does not match the schema.
+"""
+from src.agents.base import BaseAgent
+from src.agents.metadata_extractor import MetadataExtractor, METADATA_SYSTEM_PROMPT, METADATA_SCHEMA
+from src.agents.privilege_checker import PrivilegeChecker, PRIVILEGE_SYSTEM_PROMPT, PRIVILEGE_SCHEMA
+from src.agents.hot_doc_detector import HotDocDetector, HOT_DOC_SYSTEM_PROMPT, HOT_DOC_SCHEMA
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Characters of the document sent in the fused call (the largest per-agent sample)
+FUSED_TEXT_LIMIT = int(os.getenv("FUSED_TEXT_LIMIT", "16000"))
+# Output budget for all three sections together
+FUSED_MAX_TOKENS = int(os.getenv("FUSED_MAX_TOKENS", "8192"))
+
+# Section name -> (schema, system prompt) of the agent it replaces
+FUSED_SECTIONS = {
+    "metadata": (METADATA_SCHEMA, METADATA_SYSTEM_PROMPT),
+    "privilege": (PRIVILEGE_SCHEMA, PRIVILEGE_SYSTEM_PROMPT),
+    "hot_doc": (HOT_DOC_SCHEMA, HOT_DOC_SYSTEM_PROMPT)
+}
+
+# System prompt combining the three agents' instructions
+FUSED_SYSTEM_PROMPT = """You are an expert legal document analyst performing three independent reviews of the same document in a single pass.
+
+Complete every review and return each one in its own section of the structured output:
+- "metadata": dates, people, entities and locations (REVIEW 1)
+- "privilege": privilege and confidentiality determination (REVIEW 2)
+- "hot_doc": hot document assessment (REVIEW 3)
+
+Apply each review's guidelines independently; do not let one review's conclusion change another's.
+
+=== REVIEW 1: METADATA EXTRACTION ===
+
+{metadata}
+
+=== REVIEW 2: PRIVILEGE REVIEW ===
+
+{privilege}
+
+=== REVIEW 3: HOT DOCUMENT DETECTION ===
+
+{hot_doc}""".format(
+    metadata=METADATA_SYSTEM_PROMPT,
+    privilege=PRIVILEGE_SYSTEM_PROMPT,
+    hot_doc=HOT_DOC_SYSTEM_PROMPT
+)
+
+# JSON schema for structured output: one property per section
+FUSED_SCHEMA = {
+    "type": "object",
+    "properties": {section: schema for section, (schema, _) in FUSED_SECTIONS.items()},
+    "required": list(FUSED_SECTIONS)
+}
+
+
+class FusedOutputError(Exception):
+    """Raised when the combined output does not match FUSED_SCHEMA."""
+    pass
+
+
+def validate_fused_output(result: dict):
+    """
+    Check that every section is present with its required fields.
+    
+    Args:
+        result: Structured output of the fused call
+        
+    Raises:
+        FusedOutputError: If a section or required field is missing
+    """
+    for section, (schema, _) in FUSED_SECTIONS.items():
+        output = result.get(section)
+        if not isinstance(output, dict):
+            raise FusedOutputError(f"Missing section {section!r}")
+        missing = [field for field in schema.get("required", []) if field not in output]
+        if missing:
+            raise FusedOutputError(f"Section {section!r} missing required fields {missing}")
+
+
+class FusedAnalyzer(BaseAgent):
+    """
+    Agents 2-4 fused: metadata, privilege and hot doc outputs from one call.
+    """
+    
+    def __init__(
+        self,
+        metadata_extractor: MetadataExtractor,
+        privilege_checker: PrivilegeChecker,
+        hot_doc_detector: HotDocDetector
+    ):
+        """
+        Initialize the fused analyzer.
+        
+        Args:
+            metadata_extractor: Agent 2, used to parse output and as fallback
+            privilege_checker: Agent 3, used to parse output and as fallback
+            hot_doc_detector: Agent 4, used to parse output and as fallback
+        """
+        # Use Sonnet: the fused call replaces two Sonnet-backed agents
+        model_id = os.getenv("MODEL_FUSED", "us.anthropic.claude-3-5-sonnet-20241022-v2:0")
+        super().__init__(name="FusedAnalyzer", model_id=model_id)
+        self.metadata_extractor = metadata_extractor
+        self.privilege_checker = privilege_checker
+        self.hot_doc_detector = hot_doc_detector
+    
+    def analyze(self, state: dict) -> dict:
+        """
+        Run the fused call without falling back.
+        
+        Args:
+            state: Pipeline state containing raw_text, document_type and case_id
+            
+        Returns:
+            dict: State fields of Agents 2, 3 and 4
+            
+        Raises:
+            FusedOutputError: If the output does not match the schema
+        """
+        raw_text = state.get("raw_text", "")
+        document_type = state.get("document_type", "other")
+        case_id = state.get("case_id", "")
+        text_sample = raw_text[:FUSED_TEXT_LIMIT]
+        
+        user_prompt = f"""Review this {document_type} document:
+
+{text_sample}
+
+Case ID: {case_id}
+Document Type: {document_type}
+
+Complete all three reviews:
+1. Extract ALL dates, people, entities, and locations with complete context and source citations.
+2. Identify any attorney-client privilege, work product, or confidentiality concerns. Err on the side of caution.
+3. Identify any content that would require immediate attorney attention, with specific excerpts."""
+        
+        result = self._call_claude_structured(
+            system_prompt=FUSED_SYSTEM_PROMPT,
+            user_prompt=user_prompt,
+            schema=FUSED_SCHEMA,
+            max_tokens=FUSED_MAX_TOKENS
+        )
+        validate_fused_output(result)
+        
+        try:
+            return {
+                **self.metadata_extractor.parse_output(result["metadata"]),
+                **self.privilege_checker.parse_output(result["privilege"]),
+                **self.hot_doc_detector.parse_output(result["hot_doc"])
+            }
+        except (ValueError, TypeError, AttributeError) as e:
+            raise FusedOutputError(f"Invalid section value: {str(e)}")
+    
+    def run(self, state: dict) -> dict:
+        """
+        Run Agents 2-4 as one call, splitting back into individual calls on
+        schema failure.
+        
+        Args:
+            state: Pipeline state containing raw_text and document_type
+            
+        Returns:
+            dict: State fields of Agents 2, 3 and 4 plus analysis_mode
+                  ("fused" or "fused_fallback")
+        """
+        if state.get("raw_text"):
+            try:
+                logger.info(f"Running fused analysis for job {state.get('job_id')}")
+                result = self.analyze(state)
+                result["analysis_mode"] = "fused"
+                return result
+            except Exception as e:
+                logger.warning(f"Fused analysis failed, falling back to individual agents: {str(e)}")
+        
+        # Each agent handles its own errors and empty text
+        result = {}
+        for agent in (self.metadata_extractor, self.privilege_checker, self.hot_doc_detector):
+            result.update(agent.run({**state, **result}))
+        result["analysis_mode"] = "fused_fallback"
+        return result
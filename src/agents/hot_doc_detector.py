@@ -194,25 +194,7 @@ Provide specific excerpts and explain their significance."""
                 max_tokens=8192
             )
             
-            is_hot_doc = result.get("is_hot_doc", False)
-            score = result.get("score", 0.0)
-            severity = result.get("severity", "low")
-            flags = result.get("flags", [])
-            
-            if is_hot_doc:
-                logger.warning(
-                    f"HOT DOC DETECTED: score={score:.2f}, severity={severity}, "
-                    f"flags={len(flags)}"
-                )
-            else:
-                logger.info("No hot doc issues detected")
-            
-            return {
-                "is_hot_doc": is_hot_doc,
-                "hot_doc_reasons": flags,
-                "hot_doc_score": score,
-                "hot_doc_severity": severity
-            }
+            return self.parse_output(result)
             
         except Exception as e:
             logger.error(f"Hot doc detection failed: {str(e)}")
@@ -222,3 +204,33 @@ Provide specific excerpts and explain their significance."""
                 "hot_doc_score": 0.0,
                 "hot_doc_severity": "low"
             }
+    
+    def parse_output(self, result: dict) -> dict:
+        """
+        Convert structured output into state fields.
+        
+        Args:
+            result: Output matching HOT_DOC_SCHEMA
+            
+        Returns:
+            dict: is_hot_doc, hot_doc_reasons, hot_doc_score and hot_doc_severity
+        """
+        is_hot_doc = result.get("is_hot_doc", False)
+        score = result.get("score", 0.0)
+        severity = result.get("severity", "low")
+        flags = result.get("flags", [])
+        
+        if is_hot_doc:
+            logger.warning(
+                f"HOT DOC DETECTED: score={score:.2f}, severity={severity}, "
+                f"flags={len(flags)}"
+            )
+        else:
+            logger.info("No hot doc issues detected")
+        
+        return {
+            "is_hot_doc": is_hot_doc,
+            "hot_doc_reasons": flags,
+            "hot_doc_score": score,
+            "hot_doc_severity": severity
+        }
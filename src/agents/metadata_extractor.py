@@ -3,11 +3,15 @@ Agent 2: Metadata Extractor
 Extracts dates, people, entities, and locations from legal documents.
 """
 from src.agents.base import BaseAgent
+from src.agents.metadata_prepass import metadata_prepass, format_spans, merge_annotations, METADATA_PREPASS_ENABLED
 import logging
 import os
 
 logger = logging.getLogger(__name__)
 
+# Output budget when the model only annotates pre-extracted spans
+METADATA_PREPASS_MAX_TOKENS = int(os.getenv("METADATA_PREPASS_MAX_TOKENS", "4096"))
+
 # System prompt for metadata extraction
 METADATA_SYSTEM_PROMPT = """You are an expert legal document analyst specializing in metadata extraction.
 
@@ -111,6 +115,73 @@ METADATA_SCHEMA = {
     "required": ["dates", "people", "entities", "locations"]
 }
 
+# JSON schema when a local pre-pass has already extracted spans: annotations by span id,
+# false positives to drop, and items the pre-pass missed in the full METADATA_SCHEMA form
+METADATA_ANNOTATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "dates": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string", "description": "Pre-extracted date id (e.g. 'D1')"},
+                    "context": {"type": "string", "description": "What happened on this date"},
+                    "date_type": {"type": "string", "description": "Type of date (e.g., 'execution', 'incident', 'filing')"}
+                },
+                "required": ["id", "context"]
+            }
+        },
+        "people": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string", "description": "Pre-extracted person id (e.g. 'P1')"},
+                    "role": {"type": "string", "description": "Their role (plaintiff, attorney, witness, etc.)"},
+                    "title": {"type": ["string", "null"], "description": "Professional title or credentials"}
+                },
+                "required": ["id", "role"]
+            }
+        },
+        "entities": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string", "description": "Pre-extracted entity id (e.g. 'E1')"},
+                    "type": {"type": "string", "description": "Entity type (corporation, LLC, government, etc.)"},
+                    "role": {"type": "string", "description": "Role in the document/case"}
+                },
+                "required": ["id", "role"]
+            }
+        },
+        "locations": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string", "description": "Pre-extracted location id (e.g. 'L1')"},
+                    "context": {"type": "string", "description": "Why this location is mentioned"},
+                    "location_type": {"type": "string", "description": "Type (city, state, address, venue, etc.)"}
+                },
+                "required": ["id", "context"]
+            }
+        },
+        "drop": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "Ids of pre-extracted items that are not real dates, people, entities or locations"
+        },
+        "additional": {
+            "type": "object",
+            "description": "Items the pre-pass missed, in full",
+            "properties": METADATA_SCHEMA["properties"]
+        }
+    },
+    "required": ["dates", "people", "entities", "locations", "additional"]
+}
+
 
 class MetadataExtractor(BaseAgent):
     """
@@ -151,6 +222,20 @@ class MetadataExtractor(BaseAgent):
             # For now, use first 16000 chars for metadata extraction
             text_sample = raw_text[:16000] if len(raw_text) > 16000 else raw_text
             
+            if METADATA_PREPASS_ENABLED:
+                try:
+                    spans = metadata_prepass.extract(text_sample, state.get("case_id"))
+                except Exception as e:
+                    logger.error(f"Metadata pre-pass failed, running full extraction: {str(e)}")
+                    spans = {"count": 0}
+                if spans["count"]:
+                    try:
+                        return self._annotate(spans, text_sample, document_type)
+                    except Exception as e:
+                        # The local values are still better than no metadata
+                        logger.error(f"Metadata annotation failed, keeping pre-extracted values: {str(e)}")
+                        return self.parse_output(merge_annotations(spans, {}))
+            
             user_prompt = f"""Extract all metadata from this {document_type} document:
 
 {text_sample}
@@ -166,23 +251,7 @@ Be thorough and comprehensive."""
                 max_tokens=8192  # More tokens for comprehensive extraction
             )
             
-            dates = result.get("dates", [])
-            people = result.get("people", [])
-            entities = result.get("entities", [])
-            locations = result.get("locations", [])
-            
-            logger.info(
-                f"Metadata extraction complete: "
-                f"{len(dates)} dates, {len(people)} people, "
-                f"{len(entities)} entities, {len(locations)} locations"
-            )
-            
-            return {
-                "dates": dates,
-                "people": people,
-                "entities": entities,
-                "locations": locations
-            }
+            return self.parse_output(result)
             
         except Exception as e:
             logger.error(f"Metadata extraction failed: {str(e)}")
@@ -192,3 +261,68 @@ Be thorough and comprehensive."""
                 "entities": [],
                 "locations": []
             }
+    
+    def _annotate(self, spans: dict, text_sample: str, document_type: str) -> dict:
+        """
+        Have Claude annotate pre-extracted spans instead of extracting everything.
+        
+        Args:
+            spans: Output of MetadataPrepass.extract
+            text_sample: Document text the spans were extracted from
+            document_type: Document type from Agent 1
+            
+        Returns:
+            dict: dates, people, entities and locations
+        """
+        logger.info(f"Metadata pre-pass found {spans['count']} spans in {spans['elapsed_us']:.0f}us")
+        
+        user_prompt = f"""Extract all metadata from this {document_type} document:
+
+{text_sample}
+
+A local pre-pass already extracted these items (dates are normalized):
+
+{format_spans(spans)}
+
+For each pre-extracted item, return only its id with the missing fields: context and date_type for dates,
+role and title for people, type and role for entities, context and location_type for locations.
+List ids that are not real dates, people, entities or locations under "drop".
+Put anything the pre-pass missed (every location it did not list, people named only by surname or title,
+relative dates, organizations without a corporate suffix) under "additional", in full."""
+        
+        result = self._call_claude_structured(
+            system_prompt=METADATA_SYSTEM_PROMPT,
+            user_prompt=user_prompt,
+            schema=METADATA_ANNOTATION_SCHEMA,
+            max_tokens=METADATA_PREPASS_MAX_TOKENS
+        )
+        
+        return self.parse_output(merge_annotations(spans, result))
+    
+    def parse_output(self, result: dict) -> dict:
+        """
+        Convert structured output into state fields.
+        
+        Args:
+            result: Output matching METADATA_SCHEMA
+            
+        Returns:
+            dict: dates, people, entities and locations
+        """
+        dates = result.get("dates", [])
+        people = result.get("people", [])
+        entities = result.get("entities", [])
+        locations = result.get("locations", [])
+        
+        logger.info(
+            f"Metadata extraction complete: "
+            f"{len(dates)} dates, {len(people)} people, "
+            f"{len(entities)} entities, {len(locations)} locations"
+        )
+        
+        return {
+            "dates": dates,
+            "people": people,
+            "entities": entities,
+            "locations": locations
+        }
@@ -0,0 +1,563 @@
+"""
+Local deterministic metadata pre-pass.
+Finds dates (normalized to ISO 8601), email-header participants, capitalized
+name candidates, organization names and the case's known people, entities
+and locations before MetadataExtractor calls the model. The model then only
+annotates the pre-extracted spans (roles, types, context) and adds what the
+pre-pass missed, instead of writing every item out in full.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import date
+import os
+import re
+import threading
+import time
+import logging
+
+from src.agents.privilege_screen import KeywordAutomaton
+
+logger = logging.getLogger(__name__)
+
+METADATA_PREPASS_ENABLED = os.getenv("METADATA_PREPASS_ENABLED", "true").lower() == "true"
+# Maximum pre-extracted spans of each kind listed in the prompt
+METADATA_PREPASS_MAX_SPANS = int(os.getenv("METADATA_PREPASS_MAX_SPANS", "40"))
+# Seconds before a case's known-entity gazetteer is reloaded
+METADATA_GAZETTEER_TTL_SECONDS = int(os.getenv("METADATA_GAZETTEER_TTL_SECONDS", "300"))
+
+MAX_CONTEXT_CHARS = 160
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12
+}
+MONTH = r"\b(?P<month>Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)"
+
+# Date formats, tried in order; a later pattern never overrides an earlier overlapping match
+DATE_PATTERNS = [
+    re.compile(r"\b(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})\b"),
+    re.compile(MONTH + r"\.?\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?,?\s+(?P<year>\d{4})\b", re.IGNORECASE),
+    re.compile(r"\b(?P<day>\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?" + MONTH + r"\.?,?\s+(?P<year>\d{4})\b", re.IGNORECASE),
+    re.compile(r"\b(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4}|\d{2})\b")
+]
+
+# Email header lines (also inside quoted replies)
+HEADER = re.compile(r"^[ \t>]*(?P<field>From|To|Cc|Bcc|Sent|Date|Subject)[ \t]*:[ \t]*(?P<value>.*)$", re.IGNORECASE | re.MULTILINE)
+ADDRESS = re.compile(r'(?P<name>[^<>;]*?)\s*<(?P<email>[^<>\s]+@[^<>\s]+)>|(?P<bare>[\w.+-]+@[\w-]+(?:\.[\w-]+)+)')
+HEADER_ROLES = {"from": "sender", "to": "recipient", "cc": "cc recipient", "bcc": "bcc recipient"}
+
+# Organization names ending in a corporate suffix, e.g. "Global Manufacturing Inc."
+ENTITY_SUFFIXES = {
+    "inc": "corporation", "incorporated": "corporation", "corp": "corporation", "corporation": "corporation",
+    "company": "corporation", "co": "corporation", "ltd": "corporation", "limited": "corporation",
+    "llc": "LLC", "l.l.c": "LLC", "llp": "partnership", "l.l.p": "partnership", "lp": "partnership",
+    "pllc": "professional LLC", "partners": "partnership", "group": "corporation", "holdings": "corporation",
+    "associates": "partnership"
+}
+ENTITY = re.compile(
+    r"\b(?P<name>(?:(?:[A-Z][\w&'-]*|&)\.?[ \t]+){1,4}?)(?:,[ \t]*)?(?P<suffix>"
+    + "|".join(re.escape(form) for suffix in sorted(ENTITY_SUFFIXES, key=len, reverse=True) for form in {suffix.title(), suffix.upper()})
+    + r")\b\.?"
+)
+
+# Capitalized name candidates: "Sarah Johnson", "John Q. Public", "Mr. Smith"
+NAME_WORD = r"(?:Mc|Mac|O')?[A-Z][a-z]+(?:-[A-Z][a-z]+)?"
+NAME = re.compile(
+    r"\b(?:(?P<title>Mr|Mrs|Ms|Dr|Judge|Hon|Prof)\.?[ \t]+(?P<titled>" + NAME_WORD + r"(?:[ \t]+" + NAME_WORD + r"){0,2})"
+    r"|(?P<name>" + NAME_WORD + r"(?:[ \t]+[A-Z]\.)?(?:[ \t]+" + NAME_WORD + r"){1,2}))\b"
+)
+
+TITLES = {"mr", "mrs", "ms", "dr", "judge", "hon", "prof"}
+
+# Capitalized words that are not part of a person's name: function words, roles, headings, dates
+NON_NAME_WORDS = {
+    "the", "this", "that", "these", "those", "a", "an", "and", "or", "of", "for", "in", "on", "at", "by", "with",
+    "dear", "hi", "hello", "re", "fw", "fwd", "subject", "please", "thanks", "thank", "regards", "best", "sincerely",
+    "from", "to", "cc", "bcc", "sent", "date", "attn", "attention", "per", "our", "we", "i", "you", "he", "she",
+    "they", "it", "if", "when", "as", "all", "any", "each", "no", "not", "yes", "whereas", "now", "therefore",
+    "agreement", "section", "article", "exhibit", "schedule", "page", "case", "court", "county", "state", "states",
+    "united", "street", "avenue", "road", "suite", "room", "building", "floor", "department", "team", "office",
+    "following", "according", "regarding", "after", "before", "during", "since", "about", "under", "over",
+    "general", "chief", "head", "vice", "president", "director", "manager", "officer", "counsel", "engineer",
+    "engineering", "legal", "executive", "board", "committee", "management", "ceo", "cfo", "coo", "vp",
+    "analysis", "strategy", "report", "memo", "memorandum", "summary", "notes", "events", "timeline", "records",
+    "file", "copy", "plan", "policy", "review", "update", "overview", "background", "conclusion", "recommendation",
+    "product", "safety", "quality", "operations", "sales", "marketing", "finance", "compliance", "research",
+    "development", "support", "customer", "services", "human", "resources",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "january", "february", "march", "april", "may", "june", "july", "august", "september", "october",
+    "november", "december"
+}
+
+
+def iso_date(match: "re.Match") -> Optional[str]:
+    """
+    Normalize a date match to ISO 8601.
+    
+    Args:
+        match: Match from one of DATE_PATTERNS
+        
+    Returns:
+        YYYY-MM-DD, or None if the match is not a valid calendar date
+    """
+    month = match.group("month")
+    month = int(month) if month.isdigit() else MONTHS[month[:3].lower()]
+    year = int(match.group("year"))
+    if year < 100:
+        year += 2000 if year < 70 else 1900
+    try:
+        return date(year, month, int(match.group("day"))).isoformat()
+    except ValueError:
+        return None
+
+
+def clean_name(name: str) -> str:
+    """
+    Normalize whitespace and "Last, First" order in a person's name.
+    
+    Args:
+        name: Raw name, e.g. "SMITH, John" or "Jane  Doe"
+        
+    Returns:
+        Name in "First Last" order
+    """
+    name = " ".join(name.strip(" \t\"',;").split())
+    parts = [part.strip() for part in name.split(",")]
+    if len(parts) == 2 and all(parts):
+        # "Smith, John" is reordered; "John Smith, CEO" loses the trailing title
+        name = f"{parts[1]} {parts[0]}" if " " not in parts[0] else parts[0]
+    return name
+
+
+def split_title(name: str) -> Tuple[Optional[str], str]:
+    """
+    Split a leading honorific off a name.
+    
+    Args:
+        name: Name such as "Dr. Robert Martinez"
+        
+    Returns:
+        (title such as "Dr." or None, remaining name)
+    """
+    first, _, rest = name.partition(" ")
+    if rest and first.lower().rstrip(".") in TITLES:
+        return f"{first.rstrip('.')}.", rest
+    return None, name
+
+
+def strip_non_name_words(words: List[str], vocabulary: Iterable[str] = ()) -> List[str]:
+    """
+    Drop leading and trailing capitalized words that are not part of a name.
+    
+    Args:
+        words: Candidate name words
+        vocabulary: Words the document also uses in lower case (ordinary
+                    words, such as "safety" in "Product Safety")
+                    
+    Returns:
+        Remaining words
+    """
+    def ordinary(word: str) -> bool:
+        word = word.lower().rstrip(".")
+        return word in NON_NAME_WORDS or word in vocabulary
+    
+    while words and ordinary(words[0]):
+        words = words[1:]
+    while words and ordinary(words[-1]):
+        words = words[:-1]
+    return words
+
+
+def locate(text: str, name: str) -> List[int]:
+    """
+    Find the character offsets of a name, ignoring case and the whitespace
+    or punctuation between its words.
+    
+    Args:
+        text: Document text
+        name: Name to find
+        
+    Returns:
+        Offsets of each occurrence
+    """
+    words = re.findall(r"\w+", name)
+    if not words:
+        return []
+    pattern = r"\b" + r"\W{1,3}".join(re.escape(word) for word in words) + r"\b"
+    return [match.start() for match in re.finditer(pattern, text, re.IGNORECASE)]
+
+
+def appearance(text: str, offset: int) -> Tuple[Optional[int], str]:
+    """
+    Describe where an offset falls: its page (form-feed separated) when the
+    text has pages, otherwise its line.
+    
+    Args:
+        text: Document text
+        offset: Character offset
+        
+    Returns:
+        (page number or None, description such as "page 2" or "line 14")
+    """
+    if "\f" in text:
+        page = text.count("\f", 0, offset) + 1
+        return page, f"page {page}"
+    return None, f"line {text.count(chr(10), 0, offset) + 1}"
+
+
+def line_at(text: str, offset: int) -> str:
+    """Get the line containing an offset, trimmed to MAX_CONTEXT_CHARS."""
+    start = text.rfind("\n", 0, offset) + 1
+    end = text.find("\n", offset)
+    line = " ".join(text[start:end if end != -1 else len(text)].split())
+    return line[:MAX_CONTEXT_CHARS]
+
+
+class MetadataPrepass:
+    """
+    Deterministic extraction of dates, email participants, names and
+    organizations, plus per-case gazetteer matches.
+    """
+    
+    def __init__(self, ttl_seconds: int = METADATA_GAZETTEER_TTL_SECONDS, max_spans: int = METADATA_PREPASS_MAX_SPANS):
+        """
+        Initialize the pre-pass.
+        
+        Args:
+            ttl_seconds: Seconds before a case's gazetteer is reloaded
+            max_spans: Maximum spans of each kind returned
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_spans = max_spans
+        self._registered: Dict[str, List[Tuple[str, str, Optional[str]]]] = {}
+        self._gazetteers: Dict[str, Tuple[float, KeywordAutomaton, Dict[str, Tuple[str, str, Optional[str]]]]] = {}
+        self._lock = threading.Lock()
+    
+    def register_case_entities(
+        self,
+        case_id: str,
+        people: Iterable[str] = (),
+        entities: Iterable[str] = (),
+        locations: Iterable[str] = ()
+    ):
+        """
+        Add known people, organizations and locations for a case.
+        
+        Args:
+            case_id: Case identifier
+            people: Person names
+            entities: Organization names
+            locations: Location names
+        """
+        known = [(name, "person", None) for name in people]
+        known += [(name, "entity", None) for name in entities]
+        known += [(name, "location", None) for name in locations]
+        with self._lock:
+            self._registered.setdefault(case_id, []).extend(known)
+            self._gazetteers.pop(case_id, None)
+    
+    def _load_case_entities(self, case_id: str) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        Collect a case's known names: registered ones plus the witnesses and
+        organizations stored by earlier analyses.
+        
+        Args:
+            case_id: Case identifier
+            
+        Returns:
+            (name, kind, role) triples
+        """
+        known = list(self._registered.get(case_id, []))
+        
+        try:
+            from src.services.db import get_db_context
+            from src.models.database import WitnessMention
+            
+            with get_db_context() as db:
+                rows = db.query(WitnessMention.witness_name, WitnessMention.role, WitnessMention.organization).filter(
+                    WitnessMention.case_id == case_id
+                ).distinct().all()
+            for name, role, organization in rows:
+                known.append((name, "person", role))
+                if organization:
+                    known.append((organization, "entity", None))
+        except Exception as e:
+            logger.debug(f"No stored entities for case {case_id}: {str(e)}")
+        
+        return known
+    
+    def _gazetteer(self, case_id: str) -> Tuple[KeywordAutomaton, Dict[str, Tuple[str, str, Optional[str]]]]:
+        """Get a case's gazetteer automaton and normalized-term lookup, rebuilding it after the TTL."""
+        with self._lock:
+            cached = self._gazetteers.get(case_id)
+            if cached and time.monotonic() - cached[0] < self.ttl_seconds:
+                return cached[1], cached[2]
+        
+        lookup = {}
+        for name, kind, role in self._load_case_entities(case_id):
+            if name and name.strip():
+                lookup.setdefault(" ".join(name.lower().split()), (" ".join(name.split()), kind, role))
+        automaton = KeywordAutomaton((term, kind) for term, (_, kind, _) in lookup.items())
+        with self._lock:
+            self._gazetteers[case_id] = (time.monotonic(), automaton, lookup)
+        return automaton, lookup
+    
+    def extract(self, text: str, case_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Extract candidate spans from a document.
+        
+        Args:
+            text: Document text (the same sample the model sees)
+            case_id: Case whose gazetteer applies
+            
+        Returns:
+            Dict with dates, people, entities and locations (each span has an
+            id such as "D1" or "P3"), count and elapsed_us
+        """
+        started = time.perf_counter()
+        text = text or ""
+        vocabulary = set(re.findall(r"\b[a-z][a-z'-]+\b", text))
+        taken: List[Tuple[int, int]] = []
+        
+        def free(start: int, end: int) -> bool:
+            return all(end <= s or start >= e for s, e in taken)
+        
+        # Dates
+        dates, seen_dates = [], set()
+        for pattern in DATE_PATTERNS:
+            for match in pattern.finditer(text):
+                if not free(match.start(), match.end()):
+                    continue
+                value = iso_date(match)
+                if value is None:
+                    continue
+                taken.append(match.span())
+                context = line_at(text, match.start())
+                if (value, context) in seen_dates:
+                    continue
+                seen_dates.add((value, context))
+                page, _ = appearance(text, match.start())
+                dates.append({"date": value, "text": match.group(0), "context": context, "source_page": page, "date_type": None, "offset": match.start()})
+        dates.sort(key=lambda item: item["offset"])
+        
+        # Email headers
+        people: Dict[str, Dict[str, Any]] = {}
+        entities: Dict[str, Dict[str, Any]] = {}
+        locations: Dict[str, Dict[str, Any]] = {}
+        
+        def add(bucket: Dict[str, Dict[str, Any]], name: str, **fields):
+            key = " ".join(re.findall(r"\w+", name.lower()))
+            if not key:
+                return
+            item = bucket.setdefault(key, {"name": name})
+            for field, value in fields.items():
+                if value and not item.get(field):
+                    item[field] = value
+        
+        for match in HEADER.finditer(text):
+            field = match.group("field").lower()
+            value = match.group("value")
+            taken.append(match.span("value"))
+            if field in ("sent", "date"):
+                for pattern in DATE_PATTERNS:
+                    found = pattern.search(value)
+                    if found and iso_date(found):
+                        for item in dates:
+                            if item["offset"] == match.start("value") + found.start():
+                                item["date_type"] = "sent"
+                        break
+                continue
+            if field == "subject":
+                continue
+            role = HEADER_ROLES[field]
+            addresses = list(ADDRESS.finditer(value))
+            if addresses:
+                for address in addresses:
+                    email = address.group("email") or address.group("bare")
+                    title, name = split_title(clean_name(address.group("name") or ""))
+                    if name and "@" not in name:
+                        add(people, name, role=role, title=title, email=email, source="header")
+            else:
+                for name in value.split(";"):
+                    title, name = split_title(clean_name(name))
+                    words = name.split()
+                    if 0 < len(words) <= 4 and strip_non_name_words(words, vocabulary) == words:
+                        add(people, name, role=role, title=title, source="header")
+        
+        # Gazetteer: names already known for the case take precedence over patterns
+        if case_id:
+            automaton, lookup = self._gazetteer(case_id)
+            for hit in automaton.find(text):
+                name, kind, role = lookup[hit["term"]]
+                bucket = {"person": people, "entity": entities, "location": locations}[kind]
+                add(bucket, name, role=role, source="gazetteer")
+        
+        # Organizations with corporate suffixes
+        for match in ENTITY.finditer(text):
+            if not free(match.start(), match.end()):
+                continue
+            words = strip_non_name_words(match.group("name").split())
+            if not words:
+                continue
+            suffix = match.group("suffix")
+            name = " ".join(words) + (", " if "," in match.group(0) else " ") + suffix + ("." if match.group(0).endswith(".") else "")
+            taken.append(match.span())
+            if " ".join(re.findall(r"\w+", name.lower())) not in people:
+                add(entities, name, type=ENTITY_SUFFIXES[suffix.lower()], source="pattern")
+        
+        # Capitalized name candidates
+        known = {key for bucket in (entities, locations) for key in bucket}
+        for match in NAME.finditer(text):
+            if not free(match.start(), match.end()):
+                continue
+            title = match.group("title")
+            words = strip_non_name_words((match.group("titled") or match.group("name")).split(), vocabulary)
+            if len(words) < (1 if title else 2) or any(word.lower() in vocabulary for word in words):
+                continue
+            name = " ".join(words)
+            if " ".join(re.findall(r"\w+", name.lower())) in known:
+                continue
+            add(people, name, title=f"{title}." if title else None, source="pattern")
+        
+        spans = {"dates": [], "people": [], "entities": [], "locations": []}
+        for item in dates[:self.max_spans]:
+            del item["offset"]
+            spans["dates"].append({"id": f"D{len(spans['dates']) + 1}", **item})
+        for kind, bucket, prefix in (("people", people, "P"), ("entities", entities, "E"), ("locations", locations, "L")):
+            found = []
+            for item in bucket.values():
+                offsets = locate(text, item["name"])
+                if not offsets and item.get("source") == "pattern":
+                    continue
+                item["mentions"] = max(len(offsets), 1)
+                item["first_appearance"] = appearance(text, offsets[0])[1] if offsets else None
+                item["offset"] = offsets[0] if offsets else len(text)
+                found.append(item)
+            found.sort(key=lambda item: item.pop("offset"))
+            spans[kind] = [{"id": f"{prefix}{i + 1}", **item} for i, item in enumerate(found[:self.max_spans])]
+        
+        spans["count"] = sum(len(spans[kind]) for kind in ("dates", "people", "entities", "locations"))
+        spans["elapsed_us"] = round((time.perf_counter() - started) * 1e6, 1)
+        return spans
+    
+    def invalidate(self, case_id: Optional[str] = None):
+        """
+        Drop cached gazetteers so known names are reloaded.
+        
+        Args:
+            case_id: Case to invalidate, or None for all cases
+        """
+        with self._lock:
+            if case_id is None:
+                self._gazetteers.clear()
+            else:
+                self._gazetteers.pop(case_id, None)
+
+
+def format_spans(spans: Dict[str, Any]) -> str:
+    """
+    Render pre-extracted spans as a compact list for the prompt.
+    
+    Args:
+        spans: Output of MetadataPrepass.extract
+        
+    Returns:
+        One line per span, grouped by kind
+    """
+    lines = []
+    if spans["dates"]:
+        lines.append("DATES:")
+        lines += [f'{item["id"]} {item["date"]} "{item["text"]}" in: {item["context"]}' for item in spans["dates"]]
+    if spans["people"]:
+        lines.append("PEOPLE:")
+        for item in spans["people"]:
+            detail = ", ".join(value for value in (item.get("email"), item.get("role"), item.get("title")) if value)
+            lines.append(f"{item['id']} {item['name']}" + (f" ({detail})" if detail else ""))
+    if spans["entities"]:
+        lines.append("ENTITIES:")
+        lines += [f"{item['id']} {item['name']}" + (f" ({item['type']})" if item.get("type") else "") for item in spans["entities"]]
+    if spans["locations"]:
+        lines.append("LOCATIONS:")
+        lines += [f"{item['id']} {item['name']}" for item in spans["locations"]]
+    return "\n".join(lines)
+
+
+def merge_annotations(spans: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, List[dict]]:
+    """
+    Combine pre-extracted spans with the model's annotations into the
+    METADATA_SCHEMA shape. Spans the model did not annotate keep their local
+    values; spans listed in "drop" are discarded; "additional" items are
+    appended unless they duplicate a span.
+    
+    Args:
+        spans: Output of MetadataPrepass.extract
+        result: Model output with dates, people, entities, locations
+                (annotations keyed by span id), drop and additional
+                
+    Returns:
+        dict: dates, people, entities and locations
+    """
+    result = result or {}
+    dropped = set(result.get("drop") or [])
+    notes = {
+        note.get("id"): note
+        for kind in ("dates", "people", "entities", "locations")
+        for note in result.get(kind) or []
+        if isinstance(note, dict)
+    }
+    
+    def annotated(item: dict, fields: Iterable[str]) -> dict:
+        note = notes.get(item["id"], {})
+        return {field: note.get(field) or item.get(field) for field in fields}
+    
+    merged = {
+        "dates": [
+            {**annotated(item, ("context", "date_type")), "date": item["date"], "source_page": item["source_page"]}
+            for item in spans["dates"] if item["id"] not in dropped
+        ],
+        "people": [
+            {
+                **annotated(item, ("role", "title")),
+                "name": item["name"],
+                "mentions": item["mentions"],
+                "first_appearance": item["first_appearance"],
+                **({"email": item["email"]} if item.get("email") else {})
+            }
+            for item in spans["people"] if item["id"] not in dropped
+        ],
+        "entities": [
+            {**annotated(item, ("type", "role")), "name": item["name"]}
+            for item in spans["entities"] if item["id"] not in dropped
+        ],
+        "locations": [
+            {**annotated(item, ("context", "location_type")), "name": item["name"]}
+            for item in spans["locations"] if item["id"] not in dropped
+        ]
+    }
+    
+    # Defaults for required fields the model left empty
+    for item in merged["people"]:
+        item["role"] = item["role"] or "unknown"
+    for item in merged["entities"]:
+        item["type"] = item["type"] or "organization"
+        item["role"] = item["role"] or "unknown"
+    for item in merged["locations"]:
+        item["context"] = item["context"] or "mentioned"
+    
+    additional = result.get("additional") or {}
+    for kind in ("dates", "people", "entities", "locations"):
+        if kind == "dates":
+            seen = {(item["date"], item["context"]) for item in merged[kind]}
+            key = lambda item: (item.get("date"), item.get("context"))
+        else:
+            seen = {item["name"].lower() for item in merged[kind]}
+            key = lambda item: (item.get("name") or "").lower()
+        for item in additional.get(kind) or []:
+            if isinstance(item, dict) and key(item) not in seen:
+                seen.add(key(item))
+                merged[kind].append(item)
+    
+    return merged
+
+
+# Singleton instance
+metadata_prepass = MetadataPrepass()
@@ -3,6 +3,7 @@ Agent 3: Privilege Checker
 Scans for attorney-client privilege, work product, and confidentiality issues.
 """
 from src.agents.base import BaseAgent
+from src.agents.privilege_screen import privilege_screen, PRIVILEGE_SCREEN_ENABLED, PRIVILEGE_SCREEN_CONFIDENCE
 from src.workflows.state import PrivilegeFlag
 import logging
 import os
@@ -142,12 +143,38 @@ class PrivilegeChecker(BaseAgent):
                     "privilege_recommendation": "not_privileged"
                 }
             
+            # Local pre-screen: only candidates (and a QC sample) go to the model
+            screen = None
+            hints = ""
+            if PRIVILEGE_SCREEN_ENABLED:
+                screen = privilege_screen.screen(raw_text, state.get("case_id"))
+                sample_key = str(state.get("document_id") or state.get("job_id") or "")
+                screen["sampled"] = not screen["candidate"] and privilege_screen.sampled(sample_key)
+                screen["fast_path"] = not screen["candidate"] and not screen["sampled"]
+                screen["needs_sampling"] = screen["fast_path"]
+                if screen["fast_path"]:
+                    logger.info(f"Privilege pre-screen found no markers in {screen['elapsed_us']:.0f}us, skipping model review")
+                    return {
+                        "privilege_flags": [PrivilegeFlag.NONE],
+                        "privilege_reasoning": (
+                            "Local pre-screen found no attorney, law firm, privilege or confidentiality markers; "
+                            "not reviewed by the model. Needs sampling for quality control."
+                        ),
+                        "privilege_confidence": PRIVILEGE_SCREEN_CONFIDENCE,
+                        "privileged_excerpts": [],
+                        "privilege_recommendation": "not_privileged",
+                        "privilege_screen": screen
+                    }
+                if screen["hits"]:
+                    terms = sorted({hit["term"] for hit in screen["hits"]})
+                    hints = f"\n\nLocal pre-screen markers (verify in context, they are not conclusive): {', '.join(terms)}"
+            
             # Use first 12000 chars for privilege checking
             text_sample = raw_text[:12000] if len(raw_text) > 12000 else raw_text
             
             user_prompt = f"""Analyze this {document_type} document for privilege and confidentiality issues:
 
-{text_sample}
+{text_sample}{hints}
 
 Identify any attorney-client privilege, work product, or confidentiality concerns.
 Err on the side of caution - flag potential privilege issues for review."""
@@ -160,31 +187,9 @@ Err on the side of caution - flag potential privilege issues for review."""
                 max_tokens=6144
             )
             
-            # Extract and convert privilege flags
-            privilege_flags_raw = result.get("privilege_flags", ["none"])
-            privilege_flags = [PrivilegeFlag(flag) for flag in privilege_flags_raw]
-            
-            confidence = result.get("confidence", 0.0)
-            reasoning = result.get("reasoning", "")
-            excerpts = result.get("privileged_excerpts", [])
-            recommendation = result.get("recommendation", "review_required")
-            
-            # Log privilege findings
-            if PrivilegeFlag.NONE not in privilege_flags:
-                logger.warning(
-                    f"Privilege flags detected: {privilege_flags} "
-                    f"(confidence: {confidence:.2f}, recommendation: {recommendation})"
-                )
-            else:
-                logger.info("No privilege issues detected")
-            
-            return {
-                "privilege_flags": privilege_flags,
-                "privilege_reasoning": reasoning,
-                "privilege_confidence": confidence,
-                "privileged_excerpts": excerpts,
-                "privilege_recommendation": recommendation
-            }
+            output = self.parse_output(result)
+            output["privilege_screen"] = screen
+            return output
             
         except Exception as e:
             logger.error(f"Privilege checking failed: {str(e)}")
@@ -196,3 +201,43 @@ Err on the side of caution - flag potential privilege issues for review."""
                 "privileged_excerpts": [],
                 "privilege_recommendation": "review_required"
             }
+    
+    def parse_output(self, result: dict) -> dict:
+        """
+        Convert structured output into state fields.
+        
+        Args:
+            result: Output matching PRIVILEGE_SCHEMA
+            
+        Returns:
+            dict: privilege_flags, privilege_reasoning, privilege_confidence,
+                  privileged_excerpts and privilege_recommendation
+                  
+        Raises:
+            ValueError: If the output contains an unknown privilege flag
+        """
+        # Extract and convert privilege flags
+        privilege_flags_raw = result.get("privilege_flags", ["none"])
+        privilege_flags = [PrivilegeFlag(flag) for flag in privilege_flags_raw]
+        
+        confidence = result.get("confidence", 0.0)
+        reasoning = result.get("reasoning", "")
+        excerpts = result.get("privileged_excerpts", [])
+        recommendation = result.get("recommendation", "review_required")
+        
+        # Log privilege findings
+        if PrivilegeFlag.NONE not in privilege_flags:
+            logger.warning(
+                f"Privilege flags detected: {privilege_flags} "
+                f"(confidence: {confidence:.2f}, recommendation: {recommendation})"
+            )
+        else:
+            logger.info("No privilege issues detected")
+        
+        return {
+            "privilege_flags": privilege_flags,
+            "privilege_reasoning": reasoning,
+            "privilege_confidence": confidence,
+            "privileged_excerpts": excerpts,
+            "privilege_recommendation": recommendation
+        }
@@ -0,0 +1,296 @@
+"""
+Local deterministic privilege pre-screen.
+Rules out documents with no sign of counsel before PrivilegeChecker sends
+them to Sonnet: no attorney or law-firm names from the case's list, no
+law-firm email domains, no privilege/confidentiality banners. Documents with
+zero hits get a fast-path "not_privileged, needs sampling" result; only
+candidates (and a small QC sample) reach the model.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import string
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+PRIVILEGE_SCREEN_ENABLED = os.getenv("PRIVILEGE_SCREEN_ENABLED", "true").lower() == "true"
+# Share of zero-hit documents still sent to the model, to monitor screen recall
+PRIVILEGE_SCREEN_SAMPLE_RATE = float(os.getenv("PRIVILEGE_SCREEN_SAMPLE_RATE", "0.02"))
+# Confidence reported for fast-path results
+PRIVILEGE_SCREEN_CONFIDENCE = float(os.getenv("PRIVILEGE_SCREEN_CONFIDENCE", "0.7"))
+# Optional directory of per-case term lists: <case_id>.json with attorneys, firms and domains
+PRIVILEGE_TERMS_DIR = os.getenv("PRIVILEGE_TERMS_DIR", "")
+# Seconds before a case's term list is reloaded
+PRIVILEGE_TERMS_TTL_SECONDS = int(os.getenv("PRIVILEGE_TERMS_TTL_SECONDS", "300"))
+
+MAX_REPORTED_HITS = 20
+
+# Punctuation treated as a word separator (ASCII plus common typographic marks)
+SEPARATORS = str.maketrans({ch: " " for ch in string.punctuation + "\u2018\u2019\u201c\u201d\u2013\u2014\u2022\u00a7\u00b6"})
+END = ""
+
+# Case-independent vocabulary: privilege banners, counsel, confidentiality markings, firm suffixes
+GENERIC_TERMS = {
+    "banner": [
+        "privileged", "privileged and confidential", "privileged & confidential", "privileged communication",
+        "attorney-client", "attorney-client privilege", "work product", "attorney work product",
+        "prepared at the request of counsel", "prepared at the direction of counsel", "prepared by counsel",
+        "in anticipation of litigation", "legal advice"
+    ],
+    "counsel": [
+        "attorney", "attorneys", "counsel", "general counsel", "in-house counsel", "lawyer", "lawyers", "esq",
+        "legal department", "legal team", "legal dept"
+    ],
+    "confidential": ["confidential", "confidentiality"],
+    "firm": ["llp", "l.l.p.", "pllc", "law firm", "law offices", "law office", "law group"]
+}
+
+# Law-firm style email domains (e.g. @smithlaw.com, @acme-legal.com)
+FIRM_DOMAIN = re.compile(r"@[\w-]*(?:law|legal|llp|attorneys?)[\w-]*\.[a-z]{2,}", re.IGNORECASE)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lower-cased word tokens.
+    
+    Args:
+        text: Text to tokenize
+        
+    Returns:
+        Tokens, with punctuation treated as whitespace
+    """
+    return text.lower().translate(SEPARATORS).split()
+
+
+class KeywordAutomaton:
+    """
+    Multi-pattern matcher over word tokens.
+    
+    Terms are stored in a trie keyed by lower-cased word tokens. A scan
+    tokenizes the text once and walks the trie from each token, taking the
+    longest term that starts there, so matching is linear in the number of
+    tokens and independent of how many terms the case has. Matches fall on
+    word boundaries, and any whitespace or punctuation between words matches
+    ("Jane\\n Doe" matches "Jane Doe", "ops@hb.com" contains "hb.com").
+    """
+    
+    def __init__(self, terms: Iterable[Tuple[str, str]]):
+        """
+        Build the automaton.
+        
+        Args:
+            terms: (term, kind) pairs, e.g. ("Jane Doe", "attorney")
+        """
+        self.root: Dict[str, Any] = {}
+        self.size = 0
+        for term, kind in terms:
+            tokens = tokenize(term)
+            if len("".join(tokens)) < 3:
+                continue
+            node = self.root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            if END not in node:
+                node[END] = (" ".join(term.lower().split()), kind)
+                self.size += 1
+    
+    def find(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Find term occurrences, longest match first at each position.
+        
+        Args:
+            text: Text to scan
+            
+        Returns:
+            Hits with term, kind and position (token index), in text order
+        """
+        tokens = tokenize(text)
+        root = self.root
+        # Most documents share no token with any term start: skip the walk
+        if root.keys().isdisjoint(tokens):
+            return []
+        hits = []
+        i, n = 0, len(tokens)
+        while i < n:
+            node = root.get(tokens[i])
+            if node is None:
+                i += 1
+                continue
+            match, j = None, i
+            while node is not None:
+                j += 1
+                if END in node:
+                    match = (node[END], j)
+                node = node.get(tokens[j]) if j < n else None
+            if match is None:
+                i += 1
+                continue
+            (term, kind), end = match
+            hits.append({"term": term, "kind": kind, "position": i})
+            i = end
+        return hits
+
+
+class PrivilegeScreen:
+    """
+    Per-case privilege pre-screen: generic and case terms in one automaton,
+    plus law-firm email domains.
+    """
+    
+    def __init__(self, terms_dir: str = PRIVILEGE_TERMS_DIR, ttl_seconds: int = PRIVILEGE_TERMS_TTL_SECONDS):
+        """
+        Initialize the screen.
+        
+        Args:
+            terms_dir: Optional directory of <case_id>.json term lists
+            ttl_seconds: Seconds before a case's terms are reloaded
+        """
+        self.terms_dir = terms_dir
+        self.ttl_seconds = ttl_seconds
+        self._registered: Dict[str, List[Tuple[str, str]]] = {}
+        self._automata: Dict[str, Tuple[float, KeywordAutomaton]] = {}
+        self._lock = threading.Lock()
+    
+    def register_case_terms(
+        self,
+        case_id: str,
+        attorneys: Iterable[str] = (),
+        firms: Iterable[str] = (),
+        domains: Iterable[str] = ()
+    ):
+        """
+        Add attorney names, law firms and firm email domains for a case.
+        
+        Args:
+            case_id: Case identifier
+            attorneys: Attorney names
+            firms: Law firm names
+            domains: Law firm email domains (e.g. "smithlaw.com")
+        """
+        terms = [(name, "attorney") for name in attorneys]
+        terms += [(firm, "firm") for firm in firms]
+        terms += [(domain.lstrip("@"), "domain") for domain in domains]
+        with self._lock:
+            self._registered.setdefault(case_id, []).extend(terms)
+            self._automata.pop(case_id, None)
+    
+    def _load_case_terms(self, case_id: str) -> List[Tuple[str, str]]:
+        """
+        Collect a case's terms: registered, from the terms file, and the
+        attorneys and their organizations seen in earlier analyses.
+        
+        Args:
+            case_id: Case identifier
+            
+        Returns:
+            (term, kind) pairs
+        """
+        terms = list(self._registered.get(case_id, []))
+        
+        if self.terms_dir:
+            path = os.path.join(self.terms_dir, f"{case_id}.json")
+            if os.path.exists(path):
+                try:
+                    with open(path) as f:
+                        data = json.load(f)
+                    terms += [(name, "attorney") for name in data.get("attorneys", [])]
+                    terms += [(firm, "firm") for firm in data.get("firms", [])]
+                    terms += [(domain.lstrip("@"), "domain") for domain in data.get("domains", [])]
+                except Exception as e:
+                    logger.error(f"Failed to read privilege terms for case {case_id}: {str(e)}")
+        
+        try:
+            from src.services.db import get_db_context
+            from src.models.database import WitnessMention
+            
+            with get_db_context() as db:
+                rows = db.query(WitnessMention.witness_name, WitnessMention.organization).filter(
+                    WitnessMention.case_id == case_id,
+                    WitnessMention.role.ilike("%attorney%") | WitnessMention.role.ilike("%counsel%")
+                ).distinct().all()
+            for name, organization in rows:
+                terms.append((name, "attorney"))
+                if organization:
+                    terms.append((organization, "firm"))
+        except Exception as e:
+            logger.debug(f"No stored attorney list for case {case_id}: {str(e)}")
+        
+        return terms
+    
+    def _automaton(self, case_id: Optional[str]) -> KeywordAutomaton:
+        """Get the automaton for a case (generic terms only without one), rebuilding it after the TTL."""
+        case_id = case_id or ""
+        with self._lock:
+            cached = self._automata.get(case_id)
+            if cached and time.monotonic() - cached[0] < self.ttl_seconds:
+                return cached[1]
+        
+        terms = [(term, kind) for kind, words in GENERIC_TERMS.items() for term in words]
+        if case_id:
+            terms += self._load_case_terms(case_id)
+        automaton = KeywordAutomaton(terms)
+        with self._lock:
+            self._automata[case_id] = (time.monotonic(), automaton)
+        return automaton
+    
+    def screen(self, text: str, case_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Screen a document for privilege candidates.
+        
+        Args:
+            text: Document text
+            case_id: Case whose attorney/firm list applies
+            
+        Returns:
+            Dict with candidate (any hit), hit_count, hits (first
+            MAX_REPORTED_HITS) and elapsed_us
+        """
+        started = time.perf_counter()
+        text = text or ""
+        hits = self._automaton(case_id).find(text)
+        hits.extend({"term": match.group(0).lower(), "kind": "domain", "position": None} for match in FIRM_DOMAIN.finditer(text))
+        
+        return {
+            "candidate": bool(hits),
+            "hit_count": len(hits),
+            "hits": hits[:MAX_REPORTED_HITS],
+            "elapsed_us": round((time.perf_counter() - started) * 1e6, 1)
+        }
+    
+    def sampled(self, key: str, rate: float = PRIVILEGE_SCREEN_SAMPLE_RATE) -> bool:
+        """
+        Deterministically pick zero-hit documents for model review (QC sample).
+        
+        Args:
+            key: Stable document key (document_id or job_id)
+            rate: Share of documents sampled
+            
+        Returns:
+            bool: Whether this document is in the sample
+        """
+        if rate <= 0 or not key:
+            return False
+        bucket = int(hashlib.sha1(key.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+        return bucket < rate
+    
+    def invalidate(self, case_id: Optional[str] = None):
+        """
+        Drop cached automata so term lists are reloaded.
+        
+        Args:
+            case_id: Case to invalidate, or None for all cases
+        """
+        with self._lock:
+            if case_id is None:
+                self._automata.clear()
+            else:
+                self._automata.pop(case_id, None)
+
+
+# Singleton instance
+privilege_screen = PrivilegeScreen()
@@ -117,6 +117,10 @@ async def shutdown_event():
     from src.services.notifications import notification_service
     await notification_service.close()
     
+    # Let running Ask AI calls finish
+    from src.services.ask_executor import ask_executor
+    ask_executor.shutdown()
+    
     logger.info("Service shutdown complete")
 
 
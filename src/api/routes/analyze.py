@@ -2,23 +2,40 @@
 Document analysis endpoints.
 """
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from src.models.schemas import AnalyzeRequest, AnalyzeResponse, AskAIRequest, AskAIResponse
+from src.models.schemas import (
+    AnalyzeRequest, AnalyzeResponse, AskAIRequest, AskAIResponse,
+    EmbeddingSettingsRequest, EmbeddingSettingsResponse, AnswerCacheStatsResponse
+)
 from src.models.database import AnalysisJob, AnalysisResult, AgentTimelineEvent, WitnessMention
 from src.api.dependencies import verify_api_key, get_db_session
-from src.workflows.discovery_pipeline import run_pipeline
+from src.workflows.discovery_pipeline import run_pipeline, models_used
 from src.services.s3 import s3_service
 from src.services.notifications import notification_service
 from src.rag.chunking import document_chunker
 from src.rag.embeddings import vector_store
+from src.rag.embedders import EmbeddingError, EmbedderMismatchError
+from src.rag.filters import analysis_chunk_metadata, build_where
 from src.rag.retrieval import rag_retriever
+from src.rag.answer_cache import answer_cache
+from src.services.ask_executor import ask_executor, question_key, AskOverloadedError
+from src.services.witness_registry import witness_registry, witness_appearances, normalize_name
+from src.services.case_stats import case_stats
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 import uuid
+import os
+import json
 from datetime import datetime
 import logging
 import asyncio
 
 logger = logging.getLogger(__name__)
 
+# Vector indexing is idempotent per document, so a failed sync is simply retried
+VECTOR_INDEX_ATTEMPTS = int(os.getenv("VECTOR_INDEX_ATTEMPTS", "3"))
+VECTOR_INDEX_RETRY_SECONDS = float(os.getenv("VECTOR_INDEX_RETRY_SECONDS", "2"))
+
 router = APIRouter(prefix="/api/v1", tags=["analysis"], dependencies=[Depends(verify_api_key)])
 
 
@@ -43,6 +60,7 @@ async def process_document_pipeline(
     """
     from src.services.db import get_db_context
     
+    completed = False
     try:
         logger.info(f"Starting pipeline processing for job {job_id}")
         
@@ -75,18 +93,56 @@ async def process_document_pipeline(
             case_id=case_id,
             job_id=job_id,
             raw_text=raw_text,
-            rag_retriever=rag_retriever
+            rag_retriever=rag_retriever,
+            document_id=document_id
         )
         
+        # Extract document type value (handle enum)
+        doc_type = final_state.get("document_type")
+        if hasattr(doc_type, 'value'):
+            doc_type_str = doc_type.value
+        else:
+            doc_type_str = str(doc_type).replace("DocumentType.", "").lower()
+        
+        # Add to vector store for RAG (keyed by document, so re-analysis only re-embeds the delta).
+        # Indexed before the results are committed: a job is only marked completed
+        # once its document is searchable, and a committed job is never failed.
+        if raw_text and final_state.get("document_type"):
+            chunks = document_chunker.chunk_document(
+                text=raw_text,
+                document_type=doc_type_str,
+                document_id=document_id,
+                case_id=case_id
+            )
+            # Copy privilege/hot-doc/date-range results onto chunks for pre-filtering
+            document_metadata = analysis_chunk_metadata(final_state)
+            for chunk in chunks:
+                chunk.update(document_metadata)
+            for attempt in range(1, VECTOR_INDEX_ATTEMPTS + 1):
+                try:
+                    if vector_store.add_document_chunks(case_id=case_id, chunks=chunks):
+                        break
+                    error = "storage error"
+                except EmbedderMismatchError:
+                    # The case was embedded by another embedder; retrying cannot help
+                    raise
+                except EmbeddingError as e:
+                    error = str(e)
+                if attempt == VECTOR_INDEX_ATTEMPTS:
+                    raise RuntimeError(f"Vector indexing failed after {attempt} attempts: {error}")
+                logger.warning(f"Vector indexing failed for job {job_id} (attempt {attempt}: {error}), retrying")
+                await asyncio.sleep(VECTOR_INDEX_RETRY_SECONDS * 2 ** (attempt - 1))
+        
+        # Document-level summary index for summary lookups and related-document search.
+        # Routed-out documents only carry the routing placeholder, which is not indexed.
+        content_skipped = "content" in (final_state.get("routing") or {}).get("skip", [])
+        if final_state.get("summary") and not content_skipped:
+            summary_metadata = {"document_type": doc_type_str, **analysis_chunk_metadata(final_state)}
+            if not vector_store.upsert_document_summary(case_id, document_id, final_state["summary"], summary_metadata):
+                logger.warning(f"Summary indexing failed for job {job_id}; related-document search falls back to chunks")
+        
         # Store results in database
         with get_db_context() as db:
-            # Extract document type value (handle enum)
-            doc_type = final_state.get("document_type")
-            if hasattr(doc_type, 'value'):
-                doc_type_str = doc_type.value
-            else:
-                doc_type_str = str(doc_type).replace("DocumentType.", "").lower()
-            
             result = AnalysisResult(
                 job_id=job_id,
                 document_id=document_id,
@@ -121,8 +177,11 @@ async def process_document_pipeline(
                     "timeline": final_state.get("timeline_events", []),
                     "witnesses": final_state.get("witness_mentions", []),
                     "consistency_flags": final_state.get("consistency_flags", [])
-                }
+                },
+                models_used=models_used(final_state)
             )
+            # Case stats first: it replaces the document's previous result, if any
+            case_stats.record(db, result)
             db.add(result)
             
             # Store timeline events
@@ -138,13 +197,22 @@ async def process_document_pipeline(
                 )
                 db.add(timeline_event)
             
-            # Store witness mentions
-            for witness in final_state.get("witness_mentions", []):
-                for appearance in witness.get("appearances", []):
+            # Store witness mentions, linked to canonical case witnesses; one row
+            # per appearance the registry counts, replacing a previous analysis'
+            witnesses = [
+                {**witness, "mention_count": None, "appearances": witness_appearances(witness)}
+                for witness in final_state.get("witness_mentions", [])
+            ]
+            case_witnesses = witness_registry.resolve(db, case_id, witnesses, document_id=document_id)
+            for witness in witnesses:
+                case_witness = case_witnesses.get(witness.get("name"))
+                for appearance in witness["appearances"]:
                     mention = WitnessMention(
                         case_id=case_id,
                         document_id=document_id,
                         witness_name=witness.get("name"),
+                        normalized_name=normalize_name(witness.get("name")) or None,
+                        witness_id=case_witness.id if case_witness else None,
                         role=witness.get("role"),
                         context=appearance.get("context"),
                         page_number=appearance.get("page")
@@ -160,16 +228,7 @@ async def process_document_pipeline(
                 job.current_agent = None
             
             db.commit()
-        
-        # Add to vector store for RAG
-        if raw_text and final_state.get("document_type"):
-            chunks = document_chunker.chunk_document(
-                text=raw_text,
-                document_type=str(final_state.get("document_type")),
-                document_id=job_id,
-                case_id=case_id
-            )
-            vector_store.add_document_chunks(case_id=case_id, chunks=chunks)
+        completed = True
         
         # Send completion notification
         if callback_url:
@@ -199,6 +258,10 @@ async def process_document_pipeline(
         logger.info(f"Pipeline processing completed for job {job_id}")
         
     except Exception as e:
+        if completed:
+            # Results are stored; a failed notification does not fail the job
+            logger.error(f"Post-completion step failed for job {job_id}: {str(e)}")
+            return
         logger.error(f"Pipeline processing failed for job {job_id}: {str(e)}")
         
         # Update job with error
@@ -296,6 +359,23 @@ async def analyze_document(
         raise HTTPException(status_code=500, detail=f"Failed to queue analysis: {str(e)}")
 
 
+def _validate_filters(filters: Optional[Dict[str, Any]]) -> None:
+    """
+    Reject an invalid chunk filter DSL up front; retrieval treats search
+    errors as "no results", which would hide the mistake.
+    
+    Args:
+        filters: Chunk filter DSL from the request
+        
+    Raises:
+        HTTPException: 400 if the filters cannot be translated
+    """
+    try:
+        build_where(filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filters: {str(e)}")
+
+
 @router.post("/ask", response_model=AskAIResponse)
 async def ask_ai_question(
     request: AskAIRequest,
@@ -304,24 +384,149 @@ async def ask_ai_question(
     """
     Ask AI a question about case documents.
     Uses RAG to retrieve relevant context and generate an answer.
+    The blocking RAG call runs on the bounded Ask AI executor; identical
+    questions in flight for the same case share one call.
     """
+    _validate_filters(request.filters)
+    
     try:
         logger.info(f"Processing AI question for case {request.case_id}")
         
-        # Use RAG retriever to answer question
-        result = rag_retriever.ask_question(
+        # Use RAG retriever to answer question, off the event loop
+        result = await ask_executor.run(
+            question_key(request.case_id, request.question, filters=request.filters, top_k=10),
+            rag_retriever.ask_question,
             case_id=request.case_id,
             question=request.question,
-            top_k=10
+            top_k=10,
+            filters=request.filters
         )
         
         return AskAIResponse(
             question=request.question,
             answer=result["answer"],
             sources=result["sources"],
-            confidence=result["confidence"]
+            confidence=result["confidence"],
+            retrieval=result.get("retrieval"),
+            cache=result.get("cache")
         )
         
+    except AskOverloadedError as e:
+        logger.warning(f"Rejected AI question for case {request.case_id}: {str(e)}")
+        raise HTTPException(status_code=503, detail="Too many questions in progress, retry shortly")
     except Exception as e:
         logger.error(f"Failed to process AI question: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to process question: {str(e)}")
+
+
+def _sse_frame(event: str, data: Dict[str, Any]) -> str:
+    """
+    Format one Server-Sent Event.
+    
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+        
+    Returns:
+        str: SSE frame with the event name and a JSON data line
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _sse_events(events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> AsyncIterator[str]:
+    """
+    Format RAG stream events as Server-Sent Events.
+    
+    Args:
+        events: (event, data) tuples from RAGRetriever.stream_question
+        
+    Yields:
+        str: SSE frames; an "error" frame if the stream fails
+    """
+    try:
+        async for event, data in events:
+            yield _sse_frame(event, data)
+    except Exception as e:
+        logger.error(f"AI answer stream failed: {str(e)}")
+        yield _sse_frame("error", {"detail": f"An error occurred while processing your question: {str(e)}"})
+
+
+@router.post("/ask/stream")
+async def ask_ai_question_stream(
+    request: AskAIRequest,
+    _: str = Depends(verify_api_key)
+):
+    """
+    Ask AI a question and stream the answer as Server-Sent Events.
+    Sends a "sources" event once retrieval finishes, then "token" events
+    as the answer is generated, and finally "done" (or "error").
+    The stream runs on the bounded Ask AI executor; identical questions in
+    flight for the same case share one stream.
+    """
+    _validate_filters(request.filters)
+    logger.info(f"Streaming AI question for case {request.case_id}")
+    
+    try:
+        events = ask_executor.stream(
+            question_key(request.case_id, request.question, filters=request.filters, top_k=10),
+            rag_retriever.stream_question,
+            case_id=request.case_id,
+            question=request.question,
+            top_k=10,
+            filters=request.filters
+        )
+    except AskOverloadedError as e:
+        logger.warning(f"Rejected streamed AI question for case {request.case_id}: {str(e)}")
+        raise HTTPException(status_code=503, detail="Too many questions in progress, retry shortly")
+    
+    return StreamingResponse(
+        _sse_events(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/ask/cache/stats", response_model=AnswerCacheStatsResponse)
+async def get_answer_cache_stats(
+    case_id: str = None,
+    _: str = Depends(verify_api_key)
+):
+    """
+    Get semantic answer cache hit-rate metrics, for one case or all cases.
+    """
+    return AnswerCacheStatsResponse(case_id=case_id, **answer_cache.stats(case_id))
+
+
+@router.post("/case/{case_id}/embeddings", response_model=EmbeddingSettingsResponse)
+async def update_case_embeddings(
+    case_id: str,
+    request: EmbeddingSettingsRequest,
+    background_tasks: BackgroundTasks
+):
+    """
+    Change the embedding dimension and normalization for a case.
+    Empty cases switch immediately; cases with vectors are re-embedded in the
+    background while search keeps using the current vectors. While a
+    migration of the case is running, no other is queued ("migrating").
+    """
+    try:
+        status = vector_store.configure_case_embeddings(case_id, request.dimensions, request.normalize)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if status == "migration_required":
+        background_tasks.add_task(
+            vector_store.migrate_case_embeddings,
+            case_id=case_id,
+            dimensions=request.dimensions,
+            normalize=request.normalize
+        )
+        status = "migrating"
+        logger.info(f"Queued embedding migration for case {case_id} to {request.dimensions} dimensions")
+    
+    return EmbeddingSettingsResponse(
+        case_id=case_id,
+        embedding_dimensions=request.dimensions,
+        embedding_normalize=request.normalize,
+        status=status
+    )
@@ -1,16 +1,25 @@
 """
 Status and results endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from src.models.schemas import (
-    StatusResponse, ResultsResponse, TimelineResponse, WitnessResponse,
-    ClassificationResult, MetadataResult, PrivilegeResult, HotDocResult,
-    AnalysisResult, CrossReferenceResult
+    StatusResponse, ResultsResponse, TimelineResponse, WitnessResponse, CaseStatsResponse,
+    ResultsBatchRequest, ResultsBatchResponse
 )
-from src.models.database import AnalysisJob, AnalysisResult as DBAnalysisResult, AgentTimelineEvent, WitnessMention
+from src.models.database import AnalysisJob
 from src.api.dependencies import verify_api_key, get_db_session
-from typing import List
+from src.services.case_queries import (
+    timeline_page, witness_summary, InvalidCursorError, SIGNIFICANCE_LEVELS,
+    TIMELINE_PAGE_SIZE, TIMELINE_MAX_PAGE_SIZE, WITNESS_PAGE_SIZE, WITNESS_MAX_PAGE_SIZE, WITNESS_MENTIONS_PER_WITNESS
+)
+from src.services.case_stats import case_stats, CASE_STATS_TOP_WITNESSES
+from src.services.job_results import (
+    parse_fields, load_results, build_response, UnknownFieldError, READY_STATUSES, RESULTS_BATCH_MAX_JOBS
+)
+from typing import List, Optional
+from datetime import date
+import uuid
 import logging
 
 logger = logging.getLogger(__name__)
@@ -69,137 +78,129 @@ async def get_job_status(
 @router.get("/results/{job_id}", response_model=ResultsResponse)
 async def get_job_results(
     job_id: str,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db_session)
 ):
     """
-    Get the complete analysis results for a job.
-    Only available after job is completed.
+    Get the analysis results for a job.
+    Only available after job is completed. Pass fields (comma-separated
+    sections, e.g. fields=classification,hot_doc) to load and return only
+    those sections.
     """
     try:
-        job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+        sections = parse_fields(fields)
+        row = next(iter(load_results(db, [job_id], sections).values()), None)
         
-        if not job:
+        if not row:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        if job.status not in ["completed", "failed"]:
+        if row.status not in READY_STATUSES:
             raise HTTPException(
                 status_code=400,
-                detail=f"Job is still {job.status}. Results not yet available."
+                detail=f"Job is still {row.status}. Results not yet available."
             )
         
-        # Get analysis results
-        result = db.query(DBAnalysisResult).filter(DBAnalysisResult.job_id == job_id).first()
-        
-        if not result:
+        if row.result_id is None:
             raise HTTPException(status_code=404, detail="Results not found")
         
-        # Build response
-        response = ResultsResponse(
-            job_id=str(job.id),
-            case_id=str(job.case_id),
-            status=job.status,
-            started_at=job.started_at,
-            completed_at=job.completed_at,
-            errors=[]
-        )
-        
-        # Add classification results
-        if result.document_type:
-            response.classification = ClassificationResult(
-                document_type=result.document_type,
-                confidence=result.classification_confidence or 0.0,
-                reasoning=result.classification_reasoning or "",
-                sub_type=result.document_sub_type
-            )
+        return build_response(row, sections)
         
-        # Add metadata results
-        if result.document_metadata:
-            metadata = result.document_metadata if isinstance(result.document_metadata, dict) else {}
-            response.metadata = MetadataResult(
-                dates=metadata.get("dates", []),
-                people=metadata.get("people", []),
-                entities=metadata.get("entities", []),
-                locations=metadata.get("locations", [])
-            )
-        
-        # Add privilege results
-        if result.privilege_flags:
-            response.privilege = PrivilegeResult(
-                flags=result.privilege_flags,
-                confidence=result.privilege_confidence or 0.0,
-                reasoning=result.privilege_reasoning or "",
-                recommendation=result.privilege_recommendation or "review_required",
-                excerpts=[]
-            )
-        
-        # Add hot doc results
-        response.hot_doc = HotDocResult(
-            is_hot_doc=result.is_hot_doc,
-            score=result.hot_doc_score or 0.0,
-            severity=result.hot_doc_severity or "low",
-            flags=result.hot_doc_data.get("flags", []) if result.hot_doc_data else []
-        )
+    except UnknownFieldError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get job results: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve results: {str(e)}")
+
+
+@router.post("/results:batchGet", response_model=ResultsBatchResponse)
+async def batch_get_job_results(
+    request: ResultsBatchRequest,
+    db: Session = Depends(get_db_session)
+):
+    """
+    Get the analysis results for many jobs in one request.
+    Loads all jobs and results with a single joined query; results are
+    returned in request order, with unknown jobs and jobs still running
+    listed separately instead of failing the batch.
+    """
+    try:
+        sections = parse_fields(request.fields)
+        job_ids = list(dict.fromkeys(request.job_ids))
+        if len(job_ids) > RESULTS_BATCH_MAX_JOBS:
+            raise HTTPException(status_code=400, detail=f"At most {RESULTS_BATCH_MAX_JOBS} job IDs per request")
         
-        # Add analysis results
-        if result.summary:
-            response.analysis = AnalysisResult(
-                summary=result.summary,
-                key_facts=result.key_facts or [],
-                legal_issues=result.legal_issues or [],
-                draft_narrative=result.draft_narrative or "",
-                evidence_gaps=result.evidence_gaps or []
-            )
+        # Malformed IDs cannot match a job; the rest are compared in canonical form
+        canonical = {}
+        for job_id in job_ids:
+            try:
+                canonical[job_id] = str(uuid.UUID(job_id))
+            except ValueError:
+                pass
+        rows = load_results(db, list(canonical.values()), sections) if canonical else {}
         
-        # Add cross-reference results
-        if result.cross_references:
-            response.cross_references = CrossReferenceResult(
-                related_documents=result.cross_references.get("related_docs", []),
-                timeline_events=result.cross_references.get("timeline", []),
-                witness_mentions=result.cross_references.get("witnesses", []),
-                consistency_flags=result.cross_references.get("consistency_flags", [])
-            )
+        response = ResultsBatchResponse()
+        for job_id in job_ids:
+            row = rows.get(canonical.get(job_id))
+            if not row or (row.status in READY_STATUSES and row.result_id is None):
+                response.not_found.append(job_id)
+            elif row.status not in READY_STATUSES:
+                response.pending.append(job_id)
+            else:
+                response.results.append(build_response(row, sections))
         
         return response
         
+    except UnknownFieldError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to get job results: {str(e)}")
+        logger.error(f"Failed to batch get job results: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve results: {str(e)}")
 
 
 @router.get("/case/{case_id}/timeline", response_model=TimelineResponse)
 async def get_case_timeline(
     case_id: str,
+    limit: int = Query(TIMELINE_PAGE_SIZE, ge=1, le=TIMELINE_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    significance: Optional[List[str]] = Query(None),
     db: Session = Depends(get_db_session)
 ):
     """
     Get the timeline of events for a case.
-    Aggregates timeline events from all analyzed documents.
+    Aggregates timeline events from all analyzed documents, ordered by date,
+    one page at a time; pass next_cursor back as cursor for the next page.
     """
     try:
-        events = db.query(AgentTimelineEvent).filter(
-            AgentTimelineEvent.case_id == case_id
-        ).order_by(AgentTimelineEvent.event_date).all()
-        
-        event_list = []
-        for event in events:
-            event_list.append({
-                "id": str(event.id),
-                "date": event.event_date.isoformat(),
-                "event": event.event_description,
-                "document_id": str(event.document_id) if event.document_id else None,
-                "source_page": event.source_page,
-                "significance": event.significance,
-                "created_by": event.created_by
-            })
+        if significance and not set(significance) <= set(SIGNIFICANCE_LEVELS):
+            raise HTTPException(status_code=400, detail=f"significance must be one of {', '.join(SIGNIFICANCE_LEVELS)}")
+        
+        page = timeline_page(
+            db,
+            case_id,
+            limit=limit,
+            cursor=cursor,
+            start_date=start_date,
+            end_date=end_date,
+            significance=significance
+        )
         
         return TimelineResponse(
             case_id=case_id,
-            events=event_list,
-            total_count=len(event_list)
+            events=page["events"],
+            total_count=page["total_count"],
+            next_cursor=page["next_cursor"]
         )
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get case timeline: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve timeline: {str(e)}")
@@ -208,42 +209,49 @@ async def get_case_timeline(
 @router.get("/case/{case_id}/witnesses", response_model=WitnessResponse)
 async def get_case_witnesses(
     case_id: str,
+    limit: int = Query(WITNESS_PAGE_SIZE, ge=1, le=WITNESS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    mentions: int = Query(WITNESS_MENTIONS_PER_WITNESS, ge=1, le=1000),
     db: Session = Depends(get_db_session)
 ):
     """
     Get the witness map for a case.
-    Shows all witnesses and their mentions across documents.
+    Shows witnesses grouped by canonical witness (mentions stored before the
+    registry existed are grouped by name until backfilled), most mentioned
+    first, with each witness's first `mentions` mentions across documents.
     """
     try:
-        mentions = db.query(WitnessMention).filter(
-            WitnessMention.case_id == case_id
-        ).all()
-        
-        # Group by witness name
-        witness_map = {}
-        for mention in mentions:
-            name = mention.witness_name
-            if name not in witness_map:
-                witness_map[name] = {
-                    "name": name,
-                    "role": mention.role,
-                    "mentions": []
-                }
-            
-            witness_map[name]["mentions"].append({
-                "document_id": str(mention.document_id) if mention.document_id else None,
-                "context": mention.context,
-                "page": mention.page_number
-            })
-        
-        witness_list = list(witness_map.values())
+        page = witness_summary(db, case_id, limit=limit, cursor=cursor, mentions_per_witness=mentions)
         
         return WitnessResponse(
             case_id=case_id,
-            witnesses=witness_list,
-            total_count=len(witness_list)
+            witnesses=page["witnesses"],
+            total_count=page["total_count"],
+            next_cursor=page["next_cursor"]
         )
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get case witnesses: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve witnesses: {str(e)}")
+
+
+@router.get("/case/{case_id}/stats", response_model=CaseStatsResponse)
+async def get_case_stats(
+    case_id: str,
+    top_witnesses: int = Query(CASE_STATS_TOP_WITNESSES, ge=0, le=100),
+    db: Session = Depends(get_db_session)
+):
+    """
+    Get dashboard counts for a case.
+    Reads the case's materialized stats row (hot documents by severity,
+    privilege recommendations, document types) and its most mentioned
+    witnesses; nothing is aggregated per request.
+    """
+    try:
+        return CaseStatsResponse(case_id=case_id, **case_stats.get(db, case_id, top_witnesses))
+        
+    except Exception as e:
+        logger.error(f"Failed to get case stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve case stats: {str(e)}")
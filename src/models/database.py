@@ -145,6 +145,61 @@ class AgentTimelineEvent(Base):
         return f"<AgentTimelineEvent(id={self.id}, case_id={self.case_id}, event_date={self.event_date})>"
 
 
+class CaseWitness(Base):
+    """
+    Canonical witness registry per case.
+    Each distinct person is one row; mentions reference it through witness_id.
+    """
+    __tablename__ = "case_witnesses"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    
+    # Foreign keys (constraints exist in DB, not enforced by SQLAlchemy)
+    case_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    
+    # Identity
+    canonical_name = Column(String(500), nullable=False)  # Most complete form seen, e.g. "John Smith"
+    normalized_name = Column(String(500), nullable=False)  # Unique per case, e.g. "john smith"
+    block_key = Column(String(20), nullable=False)  # Soundex of the surname, for candidate lookup
+    aliases = Column(JSONB, nullable=True)  # Other forms seen: ["J. Smith", "SMITH, JOHN"]
+    role = Column(String(100), nullable=True)
+    
+    mention_count = Column(Integer, default=0, nullable=False)
+    
+    # Metadata
+    created_at = Column(TIMESTAMP(timezone=True), default=func.now(), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<CaseWitness(id={self.id}, canonical_name={self.canonical_name}, case_id={self.case_id})>"
+
+
+class CaseStats(Base):
+    """
+    Materialized analysis counts per case.
+    Updated in the same transaction as each stored analysis result; counts
+    cover the latest result per document.
+    """
+    __tablename__ = "case_stats"
+    
+    # Foreign keys (constraints exist in DB, not enforced by SQLAlchemy)
+    case_id = Column(UUID(as_uuid=True), primary_key=True)
+    
+    # Counts
+    document_count = Column(Integer, default=0, nullable=False)
+    hot_doc_count = Column(Integer, default=0, nullable=False)
+    hot_doc_severities = Column(JSONB, nullable=True)  # {"critical": 3, "high": 12, ...}
+    privilege_recommendations = Column(JSONB, nullable=True)  # {"privileged": 40, "needs_review": 7, ...}
+    document_types = Column(JSONB, nullable=True)  # {"email": 900, "contract": 31, ...}
+    
+    # Metadata
+    created_at = Column(TIMESTAMP(timezone=True), default=func.now(), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<CaseStats(case_id={self.case_id}, document_count={self.document_count})>"
+
+
 class WitnessMention(Base):
     """
     Tracks witness mentions across all documents in a case.
@@ -161,6 +216,7 @@ class WitnessMention(Base):
     # Witness data
     witness_name = Column(String(500), nullable=False, index=True)
     normalized_name = Column(String(500), nullable=True, index=True)  # For matching
+    witness_id = Column(UUID(as_uuid=True), nullable=True, index=True)  # Canonical CaseWitness
     role = Column(String(100), nullable=True)  # plaintiff, defendant, witness, expert, attorney
     organization = Column(String(500), nullable=True)
     
@@ -53,12 +53,48 @@ class AskAIRequest(BaseModel):
     """Request to ask AI a question about case documents."""
     case_id: str = Field(..., description="Case identifier")
     question: str = Field(..., description="Question to ask about the case documents")
+    filters: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Optional chunk filters, e.g. {\"privileged\": false, \"date_from\": \"2023-01-01\", \"date_to\": \"2023-12-31\"}"
+    )
     
     class Config:
         json_schema_extra = {
             "example": {
                 "case_id": "case123",
-                "question": "What evidence do we have of prior knowledge of the defect?"
+                "question": "What evidence do we have of prior knowledge of the defect?",
+                "filters": {"privileged": False, "date_from": "2023-01-01", "date_to": "2023-12-31"}
+            }
+        }
+
+
+class EmbeddingSettingsRequest(BaseModel):
+    """Request to change a case's embedding dimension and normalization."""
+    dimensions: int = Field(..., description="Embedding output dimension (Titan v2: 256, 512 or 1024)")
+    normalize: bool = Field(True, description="Whether embeddings are unit-normalized")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "dimensions": 512,
+                "normalize": True
+            }
+        }
+
+
+class ResultsBatchRequest(BaseModel):
+    """Request for the analysis results of many jobs."""
+    job_ids: List[str] = Field(..., min_length=1, description="Job identifiers")
+    fields: Optional[List[str]] = Field(
+        None,
+        description="Results sections to return (classification, metadata, privilege, hot_doc, analysis, cross_references); all if omitted"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "job_ids": ["550e8400-e29b-41d4-a716-446655440000", "6fa459ea-ee8a-4ca4-894e-db77e160355e"],
+                "fields": ["classification", "hot_doc"]
             }
         }
 
@@ -177,18 +213,39 @@ class ResultsResponse(BaseModel):
     errors: List[Dict[str, Any]] = Field(default_factory=list)
 
 
+class ResultsBatchResponse(BaseModel):
+    """Analysis results for many jobs."""
+    results: List[ResultsResponse] = Field(default_factory=list)  # In request order
+    not_found: List[str] = Field(default_factory=list)  # Unknown jobs, or finished without results
+    pending: List[str] = Field(default_factory=list)  # Jobs still queued or processing
+
+
 class TimelineResponse(BaseModel):
-    """Timeline events for a case."""
+    """One page of timeline events for a case."""
     case_id: str
     events: List[Dict[str, Any]]
-    total_count: int
+    total_count: Optional[int] = None  # Matching events; first page only
+    next_cursor: Optional[str] = None  # Pass as cursor for the next page; None on the last page
 
 
 class WitnessResponse(BaseModel):
-    """Witness map for a case."""
+    """One page of the witness map for a case."""
     case_id: str
     witnesses: List[Dict[str, Any]]
-    total_count: int
+    total_count: Optional[int] = None  # Witnesses; first page only
+    next_cursor: Optional[str] = None  # Pass as cursor for the next page; None on the last page
+
+
+class CaseStatsResponse(BaseModel):
+    """Aggregate analysis counts for a case."""
+    case_id: str
+    document_count: int
+    hot_doc_count: int
+    hot_docs_by_severity: Dict[str, int] = Field(default_factory=dict)
+    privilege_recommendations: Dict[str, int] = Field(default_factory=dict)
+    document_types: Dict[str, int] = Field(default_factory=dict)
+    top_witnesses: List[Dict[str, Any]] = Field(default_factory=list)
+    updated_at: Optional[datetime] = None
 
 
 class AskAIResponse(BaseModel):
@@ -197,6 +254,32 @@ class AskAIResponse(BaseModel):
     answer: str
     sources: List[Dict[str, Any]] = Field(default_factory=list)
     confidence: float = Field(..., ge=0.0, le=1.0)
+    retrieval: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Retrieved, re-ranked and packed chunk and token counts"
+    )
+    cache: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Semantic answer cache hit, similarity and matched question"
+    )
+
+
+class AnswerCacheStatsResponse(BaseModel):
+    """Semantic answer cache metrics."""
+    case_id: Optional[str] = None
+    hits: int
+    misses: int
+    invalidated: int
+    entries: int
+    hit_rate: float = Field(..., ge=0.0, le=1.0)
+
+
+class EmbeddingSettingsResponse(BaseModel):
+    """Embedding settings of a case and whether a re-embedding migration was started."""
+    case_id: str
+    embedding_dimensions: int
+    embedding_normalize: bool
+    status: str = Field(..., description="unchanged, configured or migrating")
 
 
 class HealthResponse(BaseModel):
@@ -0,0 +1,195 @@
+"""
+Per-case semantic cache for Ask AI answers.
+Questions are matched by embedding similarity, so rephrasings of a question
+already answered for the case ("when did they know about the defect?")
+return the cached answer without retrieval or a Claude call. Entries are
+tied to the case's content version and are dropped once documents change.
+"""
+from typing import List, Dict, Any, Optional
+import json
+import os
+import threading
+import time
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+# Minimum cosine similarity between question embeddings for a hit
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "256"))  # per case
+
+
+def cache_key(**params: Any) -> str:
+    """
+    Build the key of the request parameters that must match for a hit
+    (filters, top_k and so on), independent of dict ordering.
+    
+    Args:
+        **params: Request parameters
+        
+    Returns:
+        str: Canonical key
+    """
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+class SemanticAnswerCache:
+    """
+    In-memory semantic answer cache, one bounded LRU list per case.
+    """
+    
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES
+    ):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Entry lifetime
+            max_entries: Entries kept per case (least recently used are evicted)
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else array
+    
+    def _count(self, case_id: str, field: str, amount: int = 1):
+        """Increment a per-case counter (caller holds the lock)."""
+        stats = self._stats.setdefault(case_id, {"hits": 0, "misses": 0, "invalidated": 0})
+        stats[field] += amount
+    
+    def lookup(
+        self,
+        case_id: str,
+        question_embedding: List[float],
+        version: str,
+        key: str = ""
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer to a similar question.
+        
+        Args:
+            case_id: Case identifier
+            question_embedding: Embedding of the new question
+            version: Current content version of the case
+            key: Request parameter key (see cache_key)
+            
+        Returns:
+            Dict with the cached "result", "question" and "similarity", or None
+        """
+        query = self._unit(question_embedding)
+        now = time.monotonic()
+        with self._lock:
+            entries = self._entries.get(case_id, [])
+            live = [e for e in entries if e["version"] == version and now - e["created"] < self.ttl_seconds]
+            if len(live) != len(entries):
+                self._count(case_id, "invalidated", len(entries) - len(live))
+                self._entries[case_id] = live
+            
+            best, best_similarity = None, self.threshold
+            for entry in live:
+                if entry["key"] != key or entry["vector"].shape != query.shape:
+                    continue
+                similarity = float(np.dot(entry["vector"], query))
+                if similarity >= best_similarity:
+                    best, best_similarity = entry, similarity
+            
+            if best is None:
+                self._count(case_id, "misses")
+                return None
+            
+            self._count(case_id, "hits")
+            live.remove(best)
+            live.append(best)  # most recently used last
+            return {"result": best["result"], "question": best["question"], "similarity": best_similarity}
+    
+    def store(
+        self,
+        case_id: str,
+        question: str,
+        question_embedding: List[float],
+        version: str,
+        result: Dict[str, Any],
+        key: str = ""
+    ):
+        """
+        Cache an answer.
+        
+        Args:
+            case_id: Case identifier
+            question: Question as asked
+            question_embedding: Embedding of the question
+            version: Case content version the answer was generated from
+            result: Answer payload to return on a hit
+            key: Request parameter key (see cache_key)
+        """
+        entry = {
+            "question": question,
+            "vector": self._unit(question_embedding),
+            "version": version,
+            "key": key,
+            "result": result,
+            "created": time.monotonic()
+        }
+        with self._lock:
+            entries = self._entries.setdefault(case_id, [])
+            entries.append(entry)
+            if len(entries) > self.max_entries:
+                del entries[:len(entries) - self.max_entries]
+    
+    def invalidate(self, case_id: Optional[str] = None):
+        """
+        Drop cached answers for one case, or for all cases.
+        
+        Args:
+            case_id: Case identifier (None clears everything)
+        """
+        with self._lock:
+            case_ids = [case_id] if case_id is not None else list(self._entries)
+            for cid in case_ids:
+                dropped = self._entries.pop(cid, [])
+                if dropped:
+                    self._count(cid, "invalidated", len(dropped))
+    
+    def stats(self, case_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get hit-rate metrics.
+        
+        Args:
+            case_id: Case identifier (None aggregates all cases)
+            
+        Returns:
+            Dict with hits, misses, invalidated, entries and hit_rate
+        """
+        with self._lock:
+            case_ids = [case_id] if case_id is not None else list(set(self._stats) | set(self._entries))
+            totals = {"hits": 0, "misses": 0, "invalidated": 0}
+            for cid in case_ids:
+                for field, value in self._stats.get(cid, {}).items():
+                    totals[field] += value
+            entries = sum(len(self._entries.get(cid, [])) for cid in case_ids)
+        lookups = totals["hits"] + totals["misses"]
+        return {
+            **totals,
+            "entries": entries,
+            "hit_rate": totals["hits"] / lookups if lookups else 0.0
+        }
+
+
+# Singleton instance
+answer_cache = SemanticAnswerCache()
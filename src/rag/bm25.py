@@ -0,0 +1,182 @@
+"""
+BM25 lexical index and reciprocal rank fusion for hybrid retrieval.
+Catches exact-match queries (Bates numbers, section numbers, surnames)
+that dense similarity routinely misses.
+"""
+from collections import Counter
+from typing import List, Dict, Tuple, Iterable, Optional
+import heapq
+import math
+import re
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keeps identifiers whole: "ACME_00001234", "4.2", "O'Brien", "2024-CV-1234"
+TOKEN_PATTERN = re.compile(r"\w+(?:['.\-]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase and split text into BM25 terms.
+    
+    Args:
+        text: Text to tokenize
+    
+    Returns:
+        List of terms
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Incremental in-memory BM25 inverted index for one case.
+    Chunks can be added and removed at any time; scoring statistics are
+    maintained incrementally so no rebuild is needed.
+    """
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize an empty index.
+        
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}  # term -> {chunk_id: tf}
+        self.doc_lengths: Dict[str, int] = {}
+        self.doc_terms: Dict[str, List[str]] = {}  # chunk_id -> terms, for removal
+        self.total_length = 0
+        self._lock = threading.RLock()
+    
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+    
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self.doc_lengths
+    
+    def add(self, chunk_id: str, text: str):
+        """
+        Add or replace a chunk in the index.
+        
+        Args:
+            chunk_id: Chunk identifier (same ID as in the vector store)
+            text: Chunk text
+        """
+        terms = Counter(tokenize(text))
+        with self._lock:
+            if chunk_id in self.doc_lengths:
+                self.remove(chunk_id)
+            for term, tf in terms.items():
+                self.postings.setdefault(term, {})[chunk_id] = tf
+            length = sum(terms.values())
+            self.doc_lengths[chunk_id] = length
+            self.doc_terms[chunk_id] = list(terms)
+            self.total_length += length
+    
+    def add_many(self, items: Iterable[Tuple[str, str]]):
+        """
+        Add several (chunk_id, text) pairs.
+        
+        Args:
+            items: Iterable of (chunk_id, text)
+        """
+        for chunk_id, text in items:
+            self.add(chunk_id, text)
+    
+    def remove(self, chunk_id: str):
+        """
+        Remove a chunk from the index (no-op if absent).
+        
+        Args:
+            chunk_id: Chunk identifier
+        """
+        with self._lock:
+            length = self.doc_lengths.pop(chunk_id, None)
+            if length is None:
+                return
+            self.total_length -= length
+            for term in self.doc_terms.pop(chunk_id, ()):
+                postings = self.postings.get(term)
+                if postings is None:
+                    continue
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self.postings[term]
+    
+    def remove_many(self, chunk_ids: Iterable[str]):
+        """
+        Remove several chunks.
+        
+        Args:
+            chunk_ids: Chunk identifiers
+        """
+        for chunk_id in chunk_ids:
+            self.remove(chunk_id)
+    
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        allowed_ids: Optional[set] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Score chunks against a query with BM25.
+        
+        Args:
+            query: Query text
+            top_k: Number of results
+            allowed_ids: Optional set restricting which chunk IDs may be returned
+        
+        Returns:
+            List of (chunk_id, score), best first
+        """
+        with self._lock:
+            n = len(self.doc_lengths)
+            if n == 0:
+                return []
+            avg_length = self.total_length / n
+            scores: Dict[str, float] = {}
+            
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings.items():
+                    if allowed_ids is not None and chunk_id not in allowed_ids:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[chunk_id] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[str]],
+    k: int = 60,
+    weights: Optional[List[float]] = None
+) -> List[Tuple[str, float]]:
+    """
+    Merge several ranked ID lists with reciprocal rank fusion.
+    
+    score(id) = sum over rankings of weight / (k + rank), rank starting at 1.
+    
+    Args:
+        rankings: Ranked lists of IDs, best first
+        k: RRF damping constant (60 is the standard choice)
+        weights: Optional per-ranking weights
+    
+    Returns:
+        List of (id, fused_score), best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -3,11 +3,44 @@ Document chunking strategies for legal documents.
 Respects document structure and legal-specific patterns.
 """
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
+from src.rag.email_threads import email_thread_parser
 
 logger = logging.getLogger(__name__)
 
+# Contract headers: "ARTICLE IV", "Section 2.1", "2.1 Term", "1. POSITION", "(a)"
+CONTRACT_HEADER_PATTERN = re.compile(
+    r"^(?P<header>[ \t]*(?:"
+    r"(?:ARTICLE|Article)\s+(?P<article>[IVXLC]+|\d+)\b(?![ \t]*[a-z])"
+    r"|(?:SECTION|Section|§)\s*(?P<section>\d+(?:\.\d+)*)\.?(?![ \t]*[a-z])"
+    r"|(?P<bare>\d{1,3}(?:\.\d+)*)(?:\.|(?=\s))(?=\s+[A-Z(])"
+    r"|\((?P<sub>[a-z]|[ivx]+)\)(?=\s)"
+    r"))(?P<rest>[^\n]*)",
+    re.MULTILINE
+)
+
+# Section bodies shorter than this are carried onto their first child chunk
+MIN_SECTION_TOKENS = 50
+
+# Transcript page headers: "Page 12", "Page 12 of 300" or a right-aligned "12"
+TRANSCRIPT_PAGE_PATTERN = re.compile(
+    r"^(?:\s*\[?Page\s+(?P<page>\d{1,5})(?:\s+of\s+\d+)?\]?|\s{10,}(?P<bare>\d{1,5}))\s*$",
+    re.IGNORECASE
+)
+
+# Transcript line numbers in the left margin (1-25 per page)
+TRANSCRIPT_LINE_PATTERN = re.compile(r"^\s{0,8}(\d{1,2})(?:\s+(.*))?$")
+
+# Question/answer markers: "Q.", "A:", "Q   ", "QUESTION:"
+TRANSCRIPT_QA_PATTERN = re.compile(r"^(Q|A|QUESTION|ANSWER)(?:\s*[.:]|\s{2,}|\t)\s*(.*)$")
+
+# Examining attorney: "BY MR. JONES:", "EXAMINATION BY MS. LEE:"
+TRANSCRIPT_EXAMINER_PATTERN = re.compile(
+    r"^(?:(?:CROSS-|DIRECT |RE-?DIRECT |RE-?CROSS )?EXAMINATION\s+)?BY\s+(MR|MS|MRS|DR)\.?\s+([A-Z][A-Za-z'-]+)",
+    re.IGNORECASE
+)
+
 
 class DocumentChunker:
     """
@@ -69,60 +102,168 @@ class DocumentChunker:
     ) -> List[Dict[str, Any]]:
         """
         Chunk a contract by clauses/sections.
-        Preserves numbered sections and doesn't split mid-clause.
+        Builds an Article -> Section -> subsection tree from the headers, keeps
+        the header text with its clause, and records the section path in metadata.
         """
         chunks = []
         
-        # Split by section headers (e.g., "1.", "Section 1", "Article I")
-        section_pattern = r'(?:^|\n)(?:Section|Article|SECTION|ARTICLE)?\s*[\dIVXivx]+\.?\s+[A-Z]'
-        sections = re.split(section_pattern, text)
-        
-        current_chunk = ""
-        current_section = None
-        page_num = 1
-        
-        for i, section in enumerate(sections):
-            if not section.strip():
-                continue
+        for section_text, node in self._contract_units(text):
+            pieces = [section_text]
+            if len(section_text) // 4 > self.chunk_size:
+                # Oversized clause: split by paragraphs, repeating the header for context
+                header = section_text.split("\n", 1)[0].strip()
+                pieces = self._split_by_paragraphs(section_text)
+                pieces = [pieces[0]] + [f"{header} (cont.)\n{p}" for p in pieces[1:]]
             
-            # Estimate tokens (rough: 1 token ≈ 4 characters)
-            section_tokens = len(section) // 4
-            current_tokens = len(current_chunk) // 4
-            
-            if current_tokens + section_tokens > self.chunk_size and current_chunk:
-                # Save current chunk
+            for piece in pieces:
                 chunks.append({
-                    "text": current_chunk.strip(),
+                    "text": piece.strip(),
                     "document_id": document_id,
                     "case_id": case_id,
                     "document_type": "contract",
                     "chunk_index": len(chunks),
-                    "section": current_section,
-                    "page": page_num
+                    "section": node["path"],
+                    "section_number": node["number"],
+                    "section_title": node["title"],
+                    "article": node["article"],
+                    "page": 1
                 })
-                
-                # Start new chunk with overlap
-                overlap_text = current_chunk[-self.chunk_overlap * 4:] if self.chunk_overlap else ""
-                current_chunk = overlap_text + section
+        
+        logger.info(f"Chunked contract into {len(chunks)} chunks")
+        return chunks
+    
+    def _parse_contract_sections(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Parse contract headers into a flat, document-ordered list of section nodes.
+        
+        Each node carries its level, label, title, the character span of its own
+        body (up to the next header) and the index of its parent node, so the
+        list doubles as an Article -> Section -> subsection tree.
+        """
+        nodes = []
+        stack = []  # indices of open ancestors
+        last_letter = None
+        
+        for match in CONTRACT_HEADER_PATTERN.finditer(text):
+            if match.group("article"):
+                kind, number = "article", match.group("article")
+                label = f"Article {number.upper()}"
+                level = 0
+                last_letter = None
+            elif match.group("section") or match.group("bare"):
+                kind, number = "section", match.group("section") or match.group("bare")
+                label = f"Section {number}"
+                level = number.count(".") + 1
+                last_letter = None
             else:
-                current_chunk += section
+                kind, number = "subsection", match.group("sub")
+                label = f"({number})"
+                parent_level = next(
+                    (nodes[i]["level"] for i in reversed(stack) if nodes[i]["kind"] != "subsection"),
+                    0
+                )
+                # "(i)" is a letter when it follows "(h)", otherwise a roman numeral
+                is_roman = bool(re.fullmatch(r"[ivx]+", number)) and not (
+                    len(number) == 1 and last_letter and ord(number) == ord(last_letter) + 1
+                )
+                level = parent_level + (2 if is_roman else 1)
+                if not is_roman:
+                    last_letter = number
             
-            current_section = f"Section {i}"
-        
-        # Add final chunk
-        if current_chunk.strip():
-            chunks.append({
-                "text": current_chunk.strip(),
-                "document_id": document_id,
-                "case_id": case_id,
-                "document_type": "contract",
-                "chunk_index": len(chunks),
-                "section": current_section,
-                "page": page_num
+            while stack and nodes[stack[-1]]["level"] >= level:
+                stack.pop()
+            
+            parent = stack[-1] if stack else None
+            path = f"{nodes[parent]['path']} > {label}" if parent is not None else label
+            article = next(
+                (nodes[i]["number"] for i in stack if nodes[i]["kind"] == "article"),
+                number if kind == "article" else None
+            )
+            
+            nodes.append({
+                "kind": kind,
+                "level": level,
+                "number": number,
+                "title": self._section_title(match.group("rest"), text, match.end()),
+                "path": path,
+                "article": article,
+                "parent": parent,
+                "start": match.start("header"),
+                "end": len(text)
             })
+            if len(nodes) > 1:
+                nodes[-2]["end"] = match.start("header")
+            stack.append(len(nodes) - 1)
         
-        logger.info(f"Chunked contract into {len(chunks)} chunks")
-        return chunks
+        return nodes
+    
+    def _contract_units(self, text: str):
+        """
+        Yield (text, node) retrieval units for a contract.
+        
+        A section is emitted whole, subsections included, when it fits in the
+        chunk budget; otherwise its own body is emitted and its children are
+        emitted separately. Header-only bodies (e.g. "ARTICLE II - TERM") are
+        carried forward onto the first child so the header text is never lost.
+        """
+        nodes = self._parse_contract_sections(text)
+        if not nodes:
+            yield text, {"path": None, "number": None, "title": None, "article": None}
+            return
+        
+        preamble = text[:nodes[0]["start"]]
+        if preamble.strip():
+            yield preamble, {"path": "Preamble", "number": None, "title": None, "article": None}
+        
+        # End of each node's subtree = start of the next node that is not a descendant
+        subtree_end = [node["end"] for node in nodes]
+        for i in range(len(nodes) - 1, -1, -1):
+            parent = nodes[i]["parent"]
+            if parent is not None:
+                subtree_end[parent] = max(subtree_end[parent], subtree_end[i])
+        
+        carry = ""
+        i = 0
+        while i < len(nodes):
+            node = nodes[i]
+            whole = text[node["start"]:subtree_end[i]]
+            
+            if node["kind"] != "article" and (len(carry) + len(whole)) // 4 <= self.chunk_size:
+                yield carry + whole, node
+                carry = ""
+                # Skip descendants, they were emitted with this node
+                end = subtree_end[i]
+                i += 1
+                while i < len(nodes) and nodes[i]["start"] < end:
+                    i += 1
+                continue
+            
+            body = text[node["start"]:node["end"]]
+            has_children = i + 1 < len(nodes) and nodes[i + 1]["parent"] == i
+            if has_children and len(body) // 4 < MIN_SECTION_TOKENS:
+                carry += body
+            else:
+                yield carry + body, node
+                carry = ""
+            i += 1
+        
+        if carry.strip():
+            yield carry, nodes[-1]
+    
+    @staticmethod
+    def _section_title(rest: str, text: str, header_end: int) -> Optional[str]:
+        """
+        Extract a short section title from the text following a header number.
+        Falls back to an all-caps line directly below a bare "ARTICLE II" header.
+        """
+        rest = rest.strip().lstrip("-–—:. ").strip()
+        if not rest:
+            next_line = text[header_end:header_end + 200].strip().split("\n", 1)[0].strip()
+            if next_line and next_line.isupper() and not CONTRACT_HEADER_PATTERN.match(next_line):
+                return next_line[:100]
+            return None
+        title = re.split(r"[:.]\s", rest + " ", maxsplit=1)[0].strip().rstrip(":.")
+        return title[:100]
     
     def _chunk_deposition(
         self,
@@ -131,65 +272,126 @@ class DocumentChunker:
         case_id: str
     ) -> List[Dict[str, Any]]:
         """
-        Chunk a deposition by Q&A exchanges.
-        Keeps question-answer pairs together.
+        Chunk a deposition transcript by Q&A exchanges.
+        Keeps question-answer pairs together and cites each chunk by its
+        transcript page:line range.
         """
-        chunks = []
-        
-        # Split by Q: or A: patterns
-        qa_pattern = r'(?:^|\n)([QA]):\s*'
-        parts = re.split(qa_pattern, text)
-        
-        current_chunk = ""
-        current_qa_pair = ""
-        page_num = 1
+        exchanges = self._parse_transcript(text)
+        if not any(exchange["is_qa"] for exchange in exchanges):
+            # Not a Q/A transcript after all - fall back to paragraph chunking
+            return self._chunk_generic(text, document_id, case_id, "deposition")
         
-        for i in range(1, len(parts), 2):
-            if i + 1 >= len(parts):
-                break
-            
-            qa_type = parts[i]  # 'Q' or 'A'
-            qa_text = parts[i + 1]
-            
-            qa_line = f"{qa_type}: {qa_text}"
-            
-            # Keep Q&A pairs together
-            if qa_type == "Q":
-                current_qa_pair = qa_line
-            else:  # 'A'
-                current_qa_pair += "\n" + qa_line
-                
-                # Check if we should create a chunk
-                tokens = len(current_chunk + current_qa_pair) // 4
-                if tokens > self.chunk_size and current_chunk:
-                    chunks.append({
-                        "text": current_chunk.strip(),
-                        "document_id": document_id,
-                        "case_id": case_id,
-                        "document_type": "deposition",
-                        "chunk_index": len(chunks),
-                        "page": page_num
-                    })
-                    current_chunk = current_qa_pair
-                else:
-                    current_chunk += "\n" + current_qa_pair
-                
-                current_qa_pair = ""
+        chunks = []
+        current = []  # transcript lines: (page, line, text)
+        current_tokens = 0
+        examined_by = None
         
-        # Add final chunk
-        if current_chunk.strip():
+        def flush():
+            if not current:
+                return
+            (start_page, start_line, _), (end_page, end_line, _) = current[0], current[-1]
             chunks.append({
-                "text": current_chunk.strip(),
+                "text": "\n".join(line_text for _, _, line_text in current),
                 "document_id": document_id,
                 "case_id": case_id,
                 "document_type": "deposition",
                 "chunk_index": len(chunks),
-                "page": page_num
+                "page": start_page,
+                "line": start_line,
+                "page_end": end_page,
+                "line_end": end_line,
+                "citation": f"{start_page}:{start_line}-{end_page}:{end_line}",
+                "examined_by": examined_by
             })
         
+        for exchange in exchanges:
+            lines = exchange["lines"]
+            tokens = sum(len(line_text) for _, _, line_text in lines) // 4
+            
+            if current and (current_tokens + tokens > self.chunk_size or exchange["examined_by"] != examined_by):
+                flush()
+                current, current_tokens = [], 0
+            examined_by = exchange["examined_by"]
+            
+            if tokens > self.chunk_size:
+                # A single runaway answer: split it on line boundaries
+                for line in lines:
+                    if current and current_tokens + len(line[2]) // 4 > self.chunk_size:
+                        flush()
+                        current, current_tokens = [], 0
+                    current.append(line)
+                    current_tokens += len(line[2]) // 4
+                continue
+            
+            current.extend(lines)
+            current_tokens += tokens
+        
+        flush()
+        
         logger.info(f"Chunked deposition into {len(chunks)} chunks")
         return chunks
     
+    def _parse_transcript(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Parse a transcript into Q/A exchanges in a single pass over its lines.
+        
+        Tracks the page from page headers ("Page 12", a right-aligned page number
+        or a form feed) and the line from the transcript's own line numbers,
+        counting lines within the page when the transcript has none. Colloquy,
+        objections and exhibit markings stay with the exchange they interrupt.
+        
+        Returns:
+            List of exchanges: {lines: [(page, line, text)], is_qa, examined_by, ...}
+        """
+        exchanges = []
+        exchange = None
+        page, line_counter = 1, 0
+        examined_by = None
+        
+        for raw_line in text.splitlines():
+            if "\f" in raw_line:
+                page, line_counter = page + 1, 0
+                raw_line = raw_line.replace("\f", "")
+            
+            page_match = TRANSCRIPT_PAGE_PATTERN.match(raw_line)
+            if page_match:
+                page = int(page_match.group("page") or page_match.group("bare"))
+                line_counter = 0
+                continue
+            
+            line_match = TRANSCRIPT_LINE_PATTERN.match(raw_line)
+            if line_match:
+                line_counter = int(line_match.group(1))
+                content = (line_match.group(2) or "").strip()
+            else:
+                line_counter += 1
+                content = raw_line.strip()
+            
+            if not content:
+                continue
+            
+            examiner_match = TRANSCRIPT_EXAMINER_PATTERN.match(content)
+            if examiner_match:
+                examined_by = f"{examiner_match.group(1).title()}. {examiner_match.group(2).title()}"
+            
+            qa_match = TRANSCRIPT_QA_PATTERN.match(content)
+            if qa_match:
+                marker = qa_match.group(1)[0].upper()
+                content = f"{marker}: {qa_match.group(2).strip()}"
+            
+            # A new examiner opens a new exchange; so does a question, unless it
+            # directly follows the "BY MR. X:" line that introduced it
+            is_question = bool(qa_match) and content[0] == "Q"
+            if exchange is None or examiner_match or (is_question and not exchange["awaiting_question"]):
+                exchange = {"lines": [], "is_qa": False, "examined_by": examined_by, "awaiting_question": False}
+                exchanges.append(exchange)
+            
+            exchange["lines"].append((page, line_counter, content))
+            exchange["is_qa"] = exchange["is_qa"] or bool(qa_match)
+            exchange["awaiting_question"] = bool(examiner_match)
+        
+        return exchanges
+    
     def _chunk_email(
         self,
         text: str,
@@ -198,29 +400,36 @@ class DocumentChunker:
     ) -> List[Dict[str, Any]]:
         """
         Chunk an email thread.
-        Keeps individual emails intact, doesn't split a single email.
+        Embeds only the novel content of each message (quoted history and
+        signatures stripped), with thread and reply-parent metadata.
         """
         chunks = []
         
-        # Split by email headers (From:, To:, Subject:)
-        email_pattern = r'(?:^|\n)(?:From|FROM):\s*'
-        emails = re.split(email_pattern, text)
-        
-        for i, email in enumerate(emails):
-            if not email.strip():
+        for message in email_thread_parser.parse(text):
+            if not message["body"]:
                 continue
             
-            # Each email is a chunk (unless extremely long)
-            email_text = f"From: {email}" if i > 0 else email
-            
-            chunks.append({
-                "text": email_text.strip(),
-                "document_id": document_id,
-                "case_id": case_id,
-                "document_type": "email",
-                "chunk_index": len(chunks),
-                "email_index": i
-            })
+            header = "\n".join(
+                f"{label}: {message[key]}"
+                for label, key in (("From", "from"), ("Date", "date"), ("Subject", "subject"))
+                if message.get(key)
+            )
+            for piece in self._split_by_paragraphs(message["body"]):
+                chunks.append({
+                    "text": f"{header}\n\n{piece.strip()}" if header else piece.strip(),
+                    "document_id": document_id,
+                    "case_id": case_id,
+                    "document_type": "email",
+                    "chunk_index": len(chunks),
+                    "email_index": message["position"],
+                    "message_id": message["message_id"],
+                    "parent_message_id": message["parent_message_id"],
+                    "thread_id": message["thread_id"],
+                    "email_from": message["from"],
+                    "email_to": message["to"],
+                    "email_date": message["date"],
+                    "subject": message["subject"]
+                })
         
         logger.info(f"Chunked email thread into {len(chunks)} chunks")
         return chunks
@@ -237,27 +446,36 @@ class DocumentChunker:
         """
         chunks = []
         
-        # Split by paragraphs (double newline)
-        paragraphs = text.split("\n\n")
+        for piece in self._split_by_paragraphs(text):
+            chunks.append({
+                "text": piece.strip(),
+                "document_id": document_id,
+                "case_id": case_id,
+                "document_type": document_type,
+                "chunk_index": len(chunks),
+                "page": 1
+            })
         
+        logger.info(f"Chunked document into {len(chunks)} chunks")
+        return chunks
+    
+    def _split_by_paragraphs(self, text: str) -> List[str]:
+        """
+        Split text into pieces of roughly chunk_size tokens on paragraph
+        boundaries, carrying chunk_overlap tokens between consecutive pieces.
+        """
+        pieces = []
         current_chunk = ""
-        page_num = 1
         
-        for para in paragraphs:
+        # Split by paragraphs (double newline)
+        for para in text.split("\n\n"):
             if not para.strip():
                 continue
             
             tokens = len(current_chunk + para) // 4
             
             if tokens > self.chunk_size and current_chunk:
-                chunks.append({
-                    "text": current_chunk.strip(),
-                    "document_id": document_id,
-                    "case_id": case_id,
-                    "document_type": document_type,
-                    "chunk_index": len(chunks),
-                    "page": page_num
-                })
+                pieces.append(current_chunk)
                 
                 # Add overlap
                 overlap_text = current_chunk[-self.chunk_overlap * 4:] if self.chunk_overlap else ""
@@ -265,19 +483,10 @@ class DocumentChunker:
             else:
                 current_chunk += "\n\n" + para if current_chunk else para
         
-        # Add final chunk
         if current_chunk.strip():
-            chunks.append({
-                "text": current_chunk.strip(),
-                "document_id": document_id,
-                "case_id": case_id,
-                "document_type": document_type,
-                "chunk_index": len(chunks),
-                "page": page_num
-            })
+            pieces.append(current_chunk)
         
-        logger.info(f"Chunked document into {len(chunks)} chunks")
-        return chunks
+        return pieces
 
 
 # Singleton instance
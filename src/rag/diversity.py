@@ -0,0 +1,126 @@
+"""
+Document-level aggregation and diversification of chunk search results.
+Related-document lookups care about distinct documents, not chunks: one long
+document can otherwise fill every slot of a chunk-level top-k.
+"""
+from typing import List, Dict, Any
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_SCORING_MODES = ("max", "sum")
+
+
+def chunk_relevance(chunk: Dict[str, Any]) -> float:
+    """
+    Convert a chunk's distance (2 - 2 * cosine) to a 0-1 relevance.
+    
+    Args:
+        chunk: Search result with "distance"
+        
+    Returns:
+        float: Relevance (cosine similarity clipped to 0-1)
+    """
+    distance = chunk.get("distance")
+    if distance is None:
+        return 0.0
+    return max(0.0, min(1.0, 1.0 - distance / 2.0))
+
+
+def aggregate_by_document(chunks: List[Dict[str, Any]], scoring: str = "max") -> List[Dict[str, Any]]:
+    """
+    Group chunk hits by document and score each document.
+    
+    Args:
+        chunks: Chunk search results with metadata.document_id and distance
+        scoring: "max" (best chunk) or "sum" (all matching chunks, rewarding
+                 documents that match in several places)
+                 
+    Returns:
+        Documents, best first: dicts with document_id, score, relevance
+        (best chunk), best_chunk and matched_chunks
+        
+    Raises:
+        ValueError: If the scoring mode is unknown
+    """
+    if scoring not in DOCUMENT_SCORING_MODES:
+        raise ValueError(f"Unknown document scoring {scoring!r}, expected one of {DOCUMENT_SCORING_MODES}")
+    
+    documents: Dict[str, Dict[str, Any]] = {}
+    for chunk in chunks:
+        doc_id = chunk.get("metadata", {}).get("document_id")
+        if not doc_id:
+            continue
+        relevance = chunk_relevance(chunk)
+        document = documents.get(doc_id)
+        if document is None:
+            documents[doc_id] = {
+                "document_id": doc_id,
+                "score": relevance,
+                "relevance": relevance,
+                "best_chunk": chunk,
+                "matched_chunks": 1
+            }
+            continue
+        document["matched_chunks"] += 1
+        if scoring == "sum":
+            document["score"] += relevance
+        if relevance > document["relevance"]:
+            document["relevance"] = relevance
+            document["best_chunk"] = chunk
+            if scoring == "max":
+                document["score"] = relevance
+    
+    return sorted(documents.values(), key=lambda d: d["score"], reverse=True)
+
+
+def mmr_select(
+    documents: List[Dict[str, Any]],
+    embeddings: Dict[str, List[float]],
+    top_k: int,
+    lambda_mult: float = 0.7
+) -> List[Dict[str, Any]]:
+    """
+    Maximal marginal relevance: pick documents that are relevant to the query
+    but not near-duplicates of documents already picked.
+    
+    Args:
+        documents: Scored documents, best first (see aggregate_by_document)
+        embeddings: document_id -> representative embedding (best chunk)
+        top_k: Number of documents to select
+        lambda_mult: Trade-off, 1.0 = pure relevance, 0.0 = pure diversity
+        
+    Returns:
+        Selected documents, in selection order
+    """
+    if len(documents) <= 1 or not embeddings:
+        return documents[:top_k]
+    
+    max_score = max(d["score"] for d in documents) or 1.0
+    vectors = {}
+    for doc in documents:
+        vector = embeddings.get(doc["document_id"])
+        if vector is not None:
+            array = np.asarray(vector, dtype=np.float32)
+            norm = float(np.linalg.norm(array))
+            vectors[doc["document_id"]] = array / norm if norm else array
+    
+    selected: List[Dict[str, Any]] = []
+    remaining = list(documents)
+    while remaining and len(selected) < top_k:
+        best, best_value = None, -np.inf
+        for doc in remaining:
+            redundancy = 0.0
+            vector = vectors.get(doc["document_id"])
+            if vector is not None:
+                for chosen in selected:
+                    other = vectors.get(chosen["document_id"])
+                    if other is not None:
+                        redundancy = max(redundancy, float(np.dot(vector, other)))
+            value = lambda_mult * doc["score"] / max_score - (1.0 - lambda_mult) * redundancy
+            if value > best_value:
+                best, best_value = doc, value
+        selected.append(best)
+        remaining.remove(best)
+    return selected
@@ -0,0 +1,222 @@
+"""
+Email thread parsing for retrieval.
+Splits a thread into individual messages, strips quoted history and
+signatures, and links each message to the one it replies to, so each
+message's novel content is embedded exactly once.
+"""
+import hashlib
+import re
+from typing import List, Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Header lines of an email message ("From: ...", "Sent: ...")
+HEADER_PATTERN = re.compile(r"^\s*(From|Sent|Date|To|Cc|Bcc|Subject)\s*:\s*(.*)$", re.IGNORECASE)
+
+# Separators that introduce an older message in top-posted threads
+SEPARATOR_PATTERN = re.compile(
+    r"^\s*-{2,}\s*(?:Original Message|Forwarded message|Forwarded by.*)\s*-{2,}\s*$",
+    re.IGNORECASE
+)
+
+# Reply attribution: "On Mon, Mar 4, 2024 at 9:12 AM, Jane Doe <jane@x.com> wrote:"
+ATTRIBUTION_PATTERN = re.compile(r"^\s*On\s+(?P<date>.+?),\s*(?P<sender>[^,]+?)\s+wrote:\s*$", re.IGNORECASE)
+
+# Signature delimiter and mobile footers
+SIGNATURE_DELIMITER_PATTERN = re.compile(r"^--\s*$")
+MOBILE_FOOTER_PATTERN = re.compile(r"^\s*Sent from my \w+", re.IGNORECASE)
+SIGN_OFF_PATTERN = re.compile(
+    r"^\s*(?:best|kind|warm|many)?\s*(?:regards|thanks|thank you|sincerely|cheers|best)\s*[,.!]?\s*$",
+    re.IGNORECASE
+)
+
+# Reply/forward prefixes removed when grouping messages into threads
+SUBJECT_PREFIX_PATTERN = re.compile(r"^\s*(?:(?:re|fw|fwd|aw)\s*(?:\[\d+\])?\s*:\s*)+", re.IGNORECASE)
+
+
+class EmailThreadParser:
+    """
+    Parses an email thread document into de-quoted messages.
+    """
+    
+    def __init__(self, max_signature_lines: int = 6):
+        """
+        Initialize the parser.
+        
+        Args:
+            max_signature_lines: Maximum lines after a sign-off that are still
+                treated as a signature block
+        """
+        self.max_signature_lines = max_signature_lines
+    
+    def parse(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Parse an email thread into messages, newest first.
+        
+        Quoted replies ("> ...") are parsed recursively as the parent message,
+        and a message that appears more than once in the thread (quoted and as
+        its own header block) is kept only once.
+        
+        Args:
+            text: Raw email thread text
+        
+        Returns:
+            List of message dicts: {message_id, parent_message_id, thread_id,
+            position, from, to, cc, date, subject, body}
+        """
+        messages = []
+        seen = {}
+        for message in self._parse_block(text.splitlines(), sender=None, date=None):
+            kept = seen.get(message["message_id"])
+            if kept:
+                # Quoted copies lack To/Subject; take them from the full header block
+                for key, value in message.items():
+                    if kept.get(key) is None:
+                        kept[key] = value
+                continue
+            seen[message["message_id"]] = message
+            messages.append(message)
+        
+        # Threads are top-posted: each message replies to the one after it
+        thread_id = self._thread_id(messages)
+        for i, message in enumerate(messages):
+            message["position"] = i
+            message["thread_id"] = thread_id
+            message["parent_message_id"] = messages[i + 1]["message_id"] if i + 1 < len(messages) else None
+        
+        return messages
+    
+    def _parse_block(
+        self,
+        lines: List[str],
+        sender: Optional[str],
+        date: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Parse a run of lines (a whole thread or one quoted reply) into messages.
+        
+        Args:
+            lines: Lines of the block, with one level of quoting already removed
+            sender: Sender from the reply attribution, if the block was quoted
+            date: Date from the reply attribution, if the block was quoted
+        """
+        messages = []
+        headers = {"from": sender, "date": date}
+        body = []
+        quoted = []
+        attribution = {}
+        in_headers = False
+        
+        def finish():
+            novel = self._strip_signature(body)
+            if novel or any(headers.get(k) for k in ("subject", "to")):
+                messages.append(self._build_message(headers, novel))
+            if quoted:
+                messages.extend(self._parse_block(
+                    [re.sub(r"^\s*>\s?", "", line) for line in quoted],
+                    sender=attribution.get("sender"),
+                    date=attribution.get("date")
+                ))
+        
+        for line in lines:
+            if line.lstrip().startswith(">"):
+                quoted.append(line)
+                in_headers = False
+                continue
+            
+            if SEPARATOR_PATTERN.match(line):
+                if body or quoted or headers.get("from"):
+                    finish()
+                headers, body, quoted, attribution = {}, [], [], {}
+                in_headers = False
+                continue
+            
+            header_match = HEADER_PATTERN.match(line)
+            if header_match:
+                name = header_match.group(1).lower()
+                if name == "sent":
+                    name = "date"
+                # A From: line after body text starts the next (older) message
+                if name == "from" and (body or quoted or headers.get("subject")):
+                    finish()
+                    headers, body, quoted, attribution = {}, [], [], {}
+                if name == "from" or in_headers:
+                    headers[name] = header_match.group(2).strip()
+                    in_headers = True
+                    continue
+            
+            if in_headers and not line.strip():
+                in_headers = False
+                continue
+            in_headers = False
+            
+            attribution_match = ATTRIBUTION_PATTERN.match(line)
+            if attribution_match:
+                attribution = attribution_match.groupdict()
+                continue
+            
+            body.append(line)
+        
+        finish()
+        return messages
+    
+    def _strip_signature(self, lines: List[str]) -> str:
+        """
+        Remove signature blocks and mobile footers from a message body.
+        
+        Cuts at a "--" delimiter, or at the last sign-off ("Best regards,")
+        when only a few short lines follow it.
+        """
+        kept = []
+        for line in lines:
+            if SIGNATURE_DELIMITER_PATTERN.match(line):
+                break
+            if MOBILE_FOOTER_PATTERN.match(line):
+                continue
+            kept.append(line)
+        
+        while kept and not kept[-1].strip():
+            kept.pop()
+        
+        for i in range(len(kept) - 1, max(-1, len(kept) - self.max_signature_lines - 2), -1):
+            if SIGN_OFF_PATTERN.match(kept[i]):
+                tail = [line for line in kept[i + 1:] if line.strip()]
+                if len(tail) <= self.max_signature_lines and all(len(line.strip()) <= 60 for line in tail):
+                    kept = kept[:i]
+                break
+        
+        return "\n".join(kept).strip()
+    
+    def _build_message(self, headers: Dict[str, Optional[str]], body: str) -> Dict[str, Any]:
+        """Build a message dict with a content-derived message ID."""
+        # "Jane Doe <jane@x.com>" and the attribution "Jane Doe" are the same sender
+        sender = re.sub(r"<[^>]*>|[\"']", "", headers.get("from") or "").strip().lower()
+        fingerprint = "\n".join([sender or (headers.get("from") or "").lower(), " ".join(body.lower().split())])
+        return {
+            "message_id": hashlib.sha256(fingerprint.encode()).hexdigest()[:16],
+            "from": headers.get("from"),
+            "to": headers.get("to"),
+            "cc": headers.get("cc"),
+            "date": headers.get("date"),
+            "subject": headers.get("subject"),
+            "body": body
+        }
+    
+    def _thread_id(self, messages: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        Derive a thread ID from the normalized subject, so the same
+        conversation produced in several documents groups together.
+        """
+        subject = next((m["subject"] for m in reversed(messages) if m.get("subject")), None)
+        if subject:
+            key = SUBJECT_PREFIX_PATTERN.sub("", subject).strip().lower()
+        elif messages:
+            key = messages[-1]["message_id"]
+        else:
+            return None
+        return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+# Singleton instance
+email_thread_parser = EmailThreadParser()
@@ -0,0 +1,262 @@
+"""
+Embedding backends for the vector store.
+Bedrock (Amazon Titan or Cohere) is the production embedder. The local
+hashing embedder is deterministic and needs no network, for offline
+development, tests and benchmarks; it must be selected explicitly and is
+never used as a fallback.
+"""
+from typing import List, Optional, Tuple
+import hashlib
+import json
+import math
+import os
+import logging
+from src.rag.bm25 import tokenize
+
+logger = logging.getLogger(__name__)
+
+# "bedrock" (production) or "local" (offline hashing vectorizer)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "bedrock")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "amazon.titan-embed-text-v2:0")
+AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
+
+# Bedrock call attempts (botocore adaptive retry handles throttling and 5xx)
+EMBEDDING_MAX_ATTEMPTS = int(os.getenv("EMBEDDING_MAX_ATTEMPTS", "5"))
+
+# Output dimensions per Bedrock embedding model ID prefix; the last entry is
+# the model's default. Only Titan v2 takes a requested dimension.
+MODEL_DIMENSIONS = {
+    "amazon.titan-embed-text-v2": (256, 512, 1024),
+    "amazon.titan-embed-text-v1": (1536,),
+    "amazon.titan-embed-g1-text-02": (1536,),
+    "cohere.embed-english-v3": (1024,),
+    "cohere.embed-multilingual-v3": (1024,)
+}
+
+# Default for models missing from MODEL_DIMENSIONS
+FALLBACK_DIMENSIONS = 1024
+
+
+def model_dimensions(model_id: str) -> Optional[Tuple[int, ...]]:
+    """
+    Look up the output dimensions a Bedrock embedding model supports.
+    
+    Args:
+        model_id: Bedrock model ID (with or without a version suffix)
+        
+    Returns:
+        tuple or None: Supported dimensions, None for an unknown model
+    """
+    for prefix, dimensions in MODEL_DIMENSIONS.items():
+        if model_id.lower().startswith(prefix):
+            return dimensions
+    return None
+
+
+def default_dimensions(model_id: str) -> int:
+    """
+    Get the dimension a Bedrock embedding model returns by default.
+    
+    Args:
+        model_id: Bedrock model ID
+        
+    Returns:
+        int: Default output dimension (FALLBACK_DIMENSIONS for an unknown model)
+    """
+    dimensions = model_dimensions(model_id)
+    return dimensions[-1] if dimensions else FALLBACK_DIMENSIONS
+
+
+class EmbeddingError(Exception):
+    """Raised when an embedding cannot be produced. Never replaced by a dummy vector."""
+    pass
+
+
+class EmbedderMismatchError(EmbeddingError):
+    """Raised when a collection's vectors came from a different embedder."""
+    pass
+
+
+class BedrockEmbedder:
+    """
+    Embeddings from AWS Bedrock (Amazon Titan or Cohere).
+    """
+    
+    def __init__(self, model_id: str = EMBEDDING_MODEL, max_attempts: int = EMBEDDING_MAX_ATTEMPTS):
+        """
+        Initialize the Bedrock runtime client with adaptive retries.
+        
+        Args:
+            model_id: Bedrock embedding model ID
+            max_attempts: Attempts per call before EmbeddingError is raised
+        """
+        import boto3
+        from botocore.config import Config
+        
+        self.model_id = model_id
+        self.name = f"bedrock:{model_id}"
+        self.dimensions = model_dimensions(model_id)
+        self.default_dimensions = default_dimensions(model_id)
+        self.client = boto3.client(
+            "bedrock-runtime",
+            region_name=AWS_REGION,
+            config=Config(retries={"max_attempts": max_attempts, "mode": "adaptive"})
+        )
+    
+    def validate_dimensions(self, dimensions: int):
+        """
+        Check that the model can produce the requested dimension. Models
+        missing from MODEL_DIMENSIONS are not checked.
+        
+        Raises:
+            ValueError: If the dimension is not supported
+        """
+        if self.dimensions and dimensions not in self.dimensions:
+            raise ValueError(f"{self.model_id} supports dimensions {self.dimensions}, got {dimensions}")
+    
+    def embed(self, text: str, dimensions: int, normalize: bool = True) -> List[float]:
+        """
+        Embed text with Bedrock.
+        
+        Args:
+            text: Text to embed
+            dimensions: Output dimension (see MODEL_DIMENSIONS)
+            normalize: Whether Titan v2 should unit-normalize the vector
+            
+        Returns:
+            List[float]: Embedding vector
+            
+        Raises:
+            EmbeddingError: If the call fails after retries, or a known model
+                            returns a vector of the wrong dimension
+        """
+        try:
+            # Prepare request based on model type
+            if "titan-embed-text-v2" in self.model_id.lower():
+                # Titan v2 supports reduced dimensions and normalization
+                body = json.dumps({
+                    "inputText": text,
+                    "dimensions": dimensions,
+                    "normalize": normalize
+                })
+            elif "titan" in self.model_id.lower():
+                # Amazon Titan Embeddings
+                body = json.dumps({
+                    "inputText": text
+                })
+            elif "cohere" in self.model_id.lower():
+                # Cohere Embeddings
+                body = json.dumps({
+                    "texts": [text],
+                    "input_type": "search_document"
+                })
+            else:
+                raise ValueError(f"Unsupported embedding model: {self.model_id}")
+            
+            # Call Bedrock
+            response = self.client.invoke_model(
+                modelId=self.model_id,
+                body=body
+            )
+            
+            # Parse response
+            response_body = json.loads(response["body"].read())
+            
+            if "titan" in self.model_id.lower():
+                # Titan returns: {"embedding": [...], "inputTextTokenCount": N}
+                embedding = response_body["embedding"]
+            else:
+                # Cohere returns: {"embeddings": [[...]], "id": "...", "texts": [...]}
+                embedding = response_body["embeddings"][0]
+                
+        except Exception as e:
+            logger.error(f"Failed to generate embedding with {self.model_id}: {str(e)}")
+            raise EmbeddingError(f"Bedrock embedding failed: {str(e)}") from e
+        
+        if self.dimensions and len(embedding) != dimensions:
+            raise EmbeddingError(f"Model returned {len(embedding)} dimensions, collection expects {dimensions}")
+        return embedding
+
+
+class HashingEmbedder:
+    """
+    Deterministic local embedder: the hashing trick over word unigrams and
+    bigrams with sublinear TF and a length-based IDF proxy, signed hashing to
+    reduce collisions, L2-normalized. Captures lexical overlap only, which is
+    enough to exercise retrieval code paths offline.
+    """
+    
+    name = "local:hashing-v1"
+    default_dimensions = FALLBACK_DIMENSIONS
+    
+    def validate_dimensions(self, dimensions: int):
+        """
+        Check the dimension is usable.
+        
+        Raises:
+            ValueError: If the dimension is not positive
+        """
+        if dimensions <= 0:
+            raise ValueError(f"Embedding dimension must be positive, got {dimensions}")
+    
+    @staticmethod
+    def _bucket(feature: str, dimensions: int):
+        """Map a feature to (index, sign) with a stable hash."""
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % dimensions, 1.0 if (value >> 63) & 1 else -1.0
+    
+    def embed(self, text: str, dimensions: int, normalize: bool = True) -> List[float]:
+        """
+        Embed text locally.
+        
+        Args:
+            text: Text to embed
+            dimensions: Output dimension
+            normalize: Whether to unit-normalize the vector
+            
+        Returns:
+            List[float]: Embedding vector
+        """
+        terms = tokenize(text)
+        features = {}
+        for term in terms:
+            features[term] = features.get(term, 0) + 1
+        for first, second in zip(terms, terms[1:]):
+            bigram = f"{first} {second}"
+            features[bigram] = features.get(bigram, 0) + 1
+        
+        vector = [0.0] * dimensions
+        for feature, tf in features.items():
+            index, sign = self._bucket(feature, dimensions)
+            # Longer tokens (identifiers, names) are rarer: weight them up
+            idf = math.log(2 + len(feature))
+            vector[index] += sign * (1 + math.log(tf)) * idf
+        
+        if normalize:
+            norm = math.sqrt(sum(v * v for v in vector))
+            if norm:
+                vector = [v / norm for v in vector]
+        return vector
+
+
+def create_embedder(name: Optional[str] = None):
+    """
+    Create the configured embedder.
+    
+    Args:
+        name: "bedrock" or "local" (defaults to EMBEDDING_BACKEND)
+        
+    Returns:
+        BedrockEmbedder or HashingEmbedder
+        
+    Raises:
+        ValueError: If the embedder name is unknown
+    """
+    name = name or EMBEDDING_BACKEND
+    if name == "bedrock":
+        return BedrockEmbedder()
+    if name == "local":
+        logger.warning("Using the local hashing embedder; vectors are not comparable with Bedrock collections")
+        return HashingEmbedder()
+    raise ValueError(f"Unsupported embedding backend: {name}")
@@ -1,42 +1,82 @@
 """
-Vector embeddings and storage using ChromaDB.
+Vector embeddings and storage using ChromaDB (or the NumPy backend).
 Supports case-isolated collections for document retrieval.
-Uses AWS Bedrock for embeddings (Amazon Titan or Cohere).
+Uses AWS Bedrock for embeddings (Amazon Titan or Cohere), or the local
+hashing embedder when explicitly selected (see src.rag.embedders).
 """
-import chromadb
-from chromadb.config import Settings
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import os
 import logging
-import boto3
-import json
+import hashlib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from src.rag.filters import to_chroma_metadata, build_where, combine_where
+from src.rag.bm25 import BM25Index, reciprocal_rank_fusion
+from src.rag.vector_backends import create_vector_backend, VECTOR_BACKEND
+from src.rag.embedders import (
+    create_embedder, default_dimensions, EmbeddingError, EmbedderMismatchError, EMBEDDING_MODEL
+)
 
 logger = logging.getLogger(__name__)
 
-# ChromaDB configuration
-CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
-EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "amazon.titan-embed-text-v2:0")
-AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
+# Default output size and normalization for new case collections; unset uses
+# the embedder's default dimension
+# (embedders and storage backends are configured in src.rag.embedders / src.rag.vector_backends)
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS") or 0) or None
+EMBEDDING_NORMALIZE = os.getenv("EMBEDDING_NORMALIZE", "true").lower() == "true"
+
+# Collections created before the embedder was recorded were all embedded with
+# Bedrock at the model's default dimension
+LEGACY_EMBEDDER = f"bedrock:{EMBEDDING_MODEL}"
+LEGACY_DIMENSIONS = default_dimensions(EMBEDDING_MODEL)
+
+# Chunks re-embedded per batch when migrating a case to new settings
+MIGRATION_BATCH_SIZE = int(os.getenv("EMBEDDING_MIGRATION_BATCH_SIZE", "64"))
+# A migration marker older than this is treated as abandoned (its worker died)
+MIGRATION_TIMEOUT_SECONDS = int(os.getenv("EMBEDDING_MIGRATION_TIMEOUT_SECONDS", "86400"))
+
+# Live collection metadata recording the migration in progress
+MIGRATION_KEYS = ("embedding_migration", "embedding_migration_started")
+
+# Hybrid retrieval: candidates fetched from each retriever before rank fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Per-case document summary index: collection name suffix
+SUMMARY_SUFFIX = "__summaries"
 
 
 class VectorStore:
     """
-    Vector store using ChromaDB for document embeddings.
-    Each case gets its own collection for data isolation.
+    Vector store for document embeddings, backed by ChromaDB or NumPy
+    (VECTOR_BACKEND). Each case gets its own collection for data isolation.
     """
     
-    def __init__(self):
-        """Initialize ChromaDB client and AWS Bedrock for embeddings."""
-        self.client = chromadb.Client(Settings(
-            persist_directory=CHROMA_PERSIST_DIR,
-            anonymized_telemetry=False
-        ))
-        self.bedrock_client = boto3.client(
-            "bedrock-runtime",
-            region_name=AWS_REGION
-        )
-        self.embedding_model = EMBEDDING_MODEL
-        logger.info(f"Initialized ChromaDB at {CHROMA_PERSIST_DIR}")
+    def __init__(self, backend=None, embedder=None):
+        """
+        Initialize the vector backend and the embedder.
+        
+        Args:
+            backend: Optional backend instance (defaults to VECTOR_BACKEND)
+            embedder: Optional embedder instance (defaults to EMBEDDING_BACKEND)
+        """
+        self.backend = backend or create_vector_backend(VECTOR_BACKEND)
+        self.embedder = embedder or create_embedder()
+        self.embedding_model = self.embedder.name
+        self.embedding_dimensions = EMBEDDING_DIMENSIONS or self.embedder.default_dimensions
+        
+        # Per-case BM25 indexes, with the case version each reflects
+        self._lexical_indexes: Dict[str, Tuple[str, BM25Index]] = {}
+        self._lexical_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-search")
+        
+        # Serializes writes to a case against an embedding migration's swap
+        self._case_locks: Dict[str, threading.Lock] = {}
+        self._case_locks_guard = threading.Lock()
+        
+        logger.info(f"Using {self.backend.name} vector backend")
         logger.info(f"Using embedding model: {self.embedding_model}")
     
     def _get_collection_name(self, case_id: str) -> str:
@@ -56,80 +96,258 @@ class VectorStore:
     def _get_or_create_collection(self, case_id: str):
         """
         Get or create a collection for a case.
+        New collections record the default embedding settings in their metadata.
         
         Args:
             case_id: Case identifier
             
         Returns:
-            Collection: ChromaDB collection
+            Collection: ChromaDB or NumPy collection
         """
         collection_name = self._get_collection_name(case_id)
         try:
-            collection = self.client.get_collection(name=collection_name)
+            collection = self.backend.get_collection(collection_name)
             logger.debug(f"Retrieved existing collection: {collection_name}")
         except Exception:
-            collection = self.client.create_collection(
+            collection = self.backend.create_collection(
                 name=collection_name,
-                metadata={"case_id": case_id}
+                metadata={"case_id": case_id, **self._embedding_metadata(self.embedding_dimensions, EMBEDDING_NORMALIZE)}
             )
             logger.info(f"Created new collection: {collection_name}")
         
         return collection
     
-    def _generate_embedding(self, text: str) -> List[float]:
+    def _get_summary_collection(self, case_id: str, create: bool = True):
         """
-        Generate embedding for text using AWS Bedrock.
-        Supports Amazon Titan and Cohere embedding models.
+        Get the document summary index of a case: one vector per document.
+        It shares the embedding settings of the case collection, so one query
+        embedding serves both.
         
         Args:
-            text: Text to embed
+            case_id: Case identifier
+            create: Create the index if it does not exist
             
         Returns:
-            List[float]: Embedding vector
+            Collection, or None if it does not exist and create is False
         """
+        name = f"{self._get_collection_name(case_id)}{SUMMARY_SUFFIX}"
         try:
-            # Prepare request based on model type
-            if "titan" in self.embedding_model.lower():
-                # Amazon Titan Embeddings
-                body = json.dumps({
-                    "inputText": text
-                })
-            elif "cohere" in self.embedding_model.lower():
-                # Cohere Embeddings
-                body = json.dumps({
-                    "texts": [text],
-                    "input_type": "search_document"
-                })
-            else:
-                raise ValueError(f"Unsupported embedding model: {self.embedding_model}")
+            return self.backend.get_collection(name)
+        except Exception:
+            if not create:
+                return None
+            case_collection = self._get_or_create_collection(case_id)
+            collection = self.backend.create_collection(
+                name=name,
+                metadata={"case_id": case_id, "index": "summaries", **self._collection_embedding_settings(case_collection)}
+            )
+            logger.info(f"Created summary index: {name}")
+            return collection
+    
+    def _case_lock(self, case_id: str) -> threading.Lock:
+        """
+        Get the write lock for a case.
+        
+        Args:
+            case_id: Case identifier
+            
+        Returns:
+            threading.Lock: Per-case lock
+        """
+        with self._case_locks_guard:
+            return self._case_locks.setdefault(self._get_collection_name(case_id), threading.Lock())
+    
+    def case_version(self, case_id: str) -> str:
+        """
+        Get the content version of a case. It changes whenever chunks are
+        added, changed or removed, so anything derived from the case's
+        documents can tell when it is stale. The version is stored in the
+        collection metadata, so it survives restarts and is shared by every
+        process using the same store.
+        
+        Args:
+            case_id: Case identifier
+            
+        Returns:
+            str: Version token ("" for a case with no collection or no writes yet)
+        """
+        try:
+            collection = self.backend.get_collection(self._get_collection_name(case_id))
+        except Exception:
+            return ""
+        return (collection.metadata or {}).get("content_version", "")
+    
+    def _bump_case_version(self, case_id: str):
+        """
+        Mark the contents of a case as changed. A random token rather than a
+        counter, so concurrent writers in different processes cannot end up
+        with the same version for different contents.
+        """
+        collection = self._get_or_create_collection(case_id)
+        previous = (collection.metadata or {}).get("content_version", "")
+        version = uuid.uuid4().hex
+        collection.modify(metadata={**(collection.metadata or {}), "content_version": version})
+        
+        # This process applied its own write to its BM25 index; the index stays
+        # current unless another process wrote since it was last checked
+        collection_name = self._get_collection_name(case_id)
+        with self._lexical_lock:
+            cached = self._lexical_indexes.get(collection_name)
+            if cached is not None and cached[0] == previous:
+                self._lexical_indexes[collection_name] = (version, cached[1])
+            elif cached is not None:
+                del self._lexical_indexes[collection_name]
+    
+    def _embedding_metadata(self, dimensions: int, normalize: bool) -> Dict[str, Any]:
+        """
+        Build the collection metadata that records how its vectors were produced.
+        
+        Args:
+            dimensions: Embedding output dimension
+            normalize: Whether embeddings are unit-normalized
+            
+        Returns:
+            Dict of collection metadata fields
+            
+        Raises:
+            ValueError: If the embedder does not support the requested dimension
+        """
+        self.embedder.validate_dimensions(dimensions)
+        return {"embedder": self.embedder.name, "embedding_dimensions": dimensions, "embedding_normalize": normalize}
+    
+    def get_embedding_settings(self, case_id: str) -> Dict[str, Any]:
+        """
+        Get the embedder, dimension and normalization recorded for a case.
+        
+        Args:
+            case_id: Case identifier
+            
+        Returns:
+            Dict with embedder, embedding_dimensions and embedding_normalize
+        """
+        return self._collection_embedding_settings(self._get_or_create_collection(case_id))
+    
+    @staticmethod
+    def _collection_embedding_settings(collection) -> Dict[str, Any]:
+        """
+        Read embedding settings from collection metadata.
+        Collections created before settings were recorded used Bedrock at the model's default dimension.
+        
+        Args:
+            collection: Case collection
             
-            # Call Bedrock
-            response = self.bedrock_client.invoke_model(
-                modelId=self.embedding_model,
-                body=body
+        Returns:
+            Dict with embedder, embedding_dimensions and embedding_normalize
+        """
+        metadata = collection.metadata or {}
+        return {
+            "embedder": metadata.get("embedder", LEGACY_EMBEDDER),
+            "embedding_dimensions": int(metadata.get("embedding_dimensions", LEGACY_DIMENSIONS)),
+            "embedding_normalize": bool(metadata.get("embedding_normalize", True))
+        }
+    
+    def _embed_for_collection(self, collection, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts with the settings recorded on a collection, so documents and
+        queries for a case always share one vector space.
+        
+        Args:
+            collection: Case collection
+            texts: Texts to embed
+            
+        Returns:
+            List of embedding vectors
+            
+        Raises:
+            EmbedderMismatchError: If the collection was built by a different embedder
+            EmbeddingError: If an embedding cannot be produced
+        """
+        settings = self._collection_embedding_settings(collection)
+        if settings["embedder"] != self.embedder.name:
+            raise EmbedderMismatchError(
+                f"Collection {collection.name} was embedded with {settings['embedder']}, "
+                f"not {self.embedder.name}; re-embed the case before using this embedder"
             )
+        return [
+            self._generate_embedding(text, settings["embedding_dimensions"], settings["embedding_normalize"])
+            for text in texts
+        ]
+    
+    def _get_lexical_index(self, case_id: str, collection=None) -> BM25Index:
+        """
+        Get the BM25 index for a case, building it from the collection on first use
+        (e.g. after a restart with a persisted ChromaDB) and rebuilding it when
+        the case version shows another process (a second worker, a seeding or
+        backfill script) has written to the case since.
+        
+        Args:
+            case_id: Case identifier
+            collection: Optional already-open collection for the case
             
-            # Parse response
-            response_body = json.loads(response["body"].read())
+        Returns:
+            BM25Index: Lexical index for the case
+        """
+        collection_name = self._get_collection_name(case_id)
+        collection = collection or self._get_or_create_collection(case_id)
+        version = (collection.metadata or {}).get("content_version", "")
+        with self._lexical_lock:
+            cached = self._lexical_indexes.get(collection_name)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            index = BM25Index()
+            existing = collection.get(include=["documents"])
+            index.add_many(zip(existing["ids"], existing["documents"] or []))
+            self._lexical_indexes[collection_name] = (version, index)
+            logger.info(f"Built BM25 index for case {case_id} ({len(index)} chunks)")
+        return index
+    
+    def _generate_embedding(
+        self,
+        text: str,
+        dimensions: Optional[int] = None,
+        normalize: bool = EMBEDDING_NORMALIZE
+    ) -> List[float]:
+        """
+        Generate embedding for text with the configured embedder.
+        Failures raise EmbeddingError; there is no fallback vector.
+        
+        Args:
+            text: Text to embed
+            dimensions: Output dimension (defaults to the store's dimension)
+            normalize: Whether to unit-normalize the vector
             
-            if "titan" in self.embedding_model.lower():
-                # Titan returns: {"embedding": [...], "inputTextTokenCount": N}
-                embedding = response_body["embedding"]
-            elif "cohere" in self.embedding_model.lower():
-                # Cohere returns: {"embeddings": [[...]], "id": "...", "texts": [...]}
-                embedding = response_body["embeddings"][0]
+        Returns:
+            List[float]: Embedding vector
+        """
+        return self.embedder.embed(text, dimensions or self.embedding_dimensions, normalize)
+    
+    @staticmethod
+    def _content_hash(text: str) -> str:
+        """
+        Hash chunk text for change detection.
+        
+        Args:
+            text: Chunk text
             
-            return embedding
+        Returns:
+            str: Short SHA-256 hex digest
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    
+    def _chunk_id(self, document_id: str, text: str) -> str:
+        """
+        Build a stable chunk ID from the document ID and chunk content.
+        The same text in the same document always maps to the same ID,
+        so re-analysis updates chunks in place instead of duplicating them.
+        
+        Args:
+            document_id: Document identifier
+            text: Chunk text
             
-        except Exception as e:
-            logger.error(f"Failed to generate embedding: {str(e)}")
-            # Fallback to dummy embedding for development
-            logger.warning("Using fallback dummy embedding")
-            import hashlib
-            text_hash = hashlib.md5(text.encode()).hexdigest()
-            dummy_embedding = [float(int(text_hash[i:i+2], 16)) / 255.0 for i in range(0, 32, 2)]
-            dummy_embedding = dummy_embedding * 64  # Extend to 1024 dimensions for Titan
-            return dummy_embedding[:1024]
+        Returns:
+            str: Chunk ID
+        """
+        return f"{document_id}_{self._content_hash(text)}"
     
     def add_document_chunks(
         self,
@@ -137,60 +355,149 @@ class VectorStore:
         chunks: List[Dict[str, Any]]
     ) -> bool:
         """
-        Add document chunks to the vector store.
+        Add or update document chunks in the vector store.
+        
+        Idempotent per document: chunks are diffed against what is already
+        stored for each document ID, only new or changed chunks are embedded,
+        unchanged chunks get their metadata refreshed, and chunks that no
+        longer exist in the document are deleted.
         
         Args:
             case_id: Case identifier
             chunks: List of chunk dictionaries with text and metadata
             
         Returns:
-            bool: True if successful
+            bool: True if successful, False on a storage error
+            
+        Raises:
+            EmbeddingError: If chunks cannot be embedded (EmbedderMismatchError
+                            when the case was embedded by a different embedder,
+                            which retrying cannot fix)
         """
         try:
-            collection = self._get_or_create_collection(case_id)
-            
-            # Prepare data for ChromaDB
-            ids = []
-            documents = []
-            metadatas = []
-            embeddings = []
-            
-            for chunk in chunks:
-                chunk_id = f"{chunk['document_id']}_chunk_{chunk['chunk_index']}"
-                ids.append(chunk_id)
-                documents.append(chunk["text"])
+            with self._case_lock(case_id):
+                collection = self._get_or_create_collection(case_id)
                 
-                # Metadata (exclude text to avoid duplication)
-                metadata = {k: v for k, v in chunk.items() if k != "text"}
-                # Convert all values to strings for ChromaDB compatibility
-                metadata = {k: str(v) if v is not None else "" for k, v in metadata.items()}
-                metadatas.append(metadata)
+                # Group by document so each document is diffed independently
+                chunks_by_document = {}
+                for chunk in chunks:
+                    chunks_by_document.setdefault(chunk["document_id"], []).append(chunk)
                 
-                # Generate embedding
-                embedding = self._generate_embedding(chunk["text"])
-                embeddings.append(embedding)
-            
-            # Add to collection
-            collection.add(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas,
-                embeddings=embeddings
-            )
-            
-            logger.info(f"Added {len(chunks)} chunks to collection for case {case_id}")
-            return True
+                embedded = unchanged = deleted = 0
+                for document_id, document_chunks in chunks_by_document.items():
+                    existing = collection.get(where={"document_id": document_id}, include=[])
+                    existing_ids = set(existing["ids"])
+                    
+                    new_ids, new_documents, new_metadatas = [], [], []
+                    kept_ids, kept_metadatas = [], []
+                    seen_ids = set()
+                    
+                    for chunk in document_chunks:
+                        chunk_id = self._chunk_id(document_id, chunk["text"])
+                        if chunk_id in seen_ids:
+                            # Identical text repeated within the document
+                            continue
+                        seen_ids.add(chunk_id)
+                        
+                        # Metadata (exclude text to avoid duplication)
+                        metadata = {k: v for k, v in chunk.items() if k != "text"}
+                        metadata["content_hash"] = self._content_hash(chunk["text"])
+                        # Keep native int/float/bool types so they stay range-filterable
+                        metadata = to_chroma_metadata(metadata)
+                        
+                        if chunk_id in existing_ids:
+                            kept_ids.append(chunk_id)
+                            kept_metadatas.append(metadata)
+                        else:
+                            new_ids.append(chunk_id)
+                            new_documents.append(chunk["text"])
+                            new_metadatas.append(metadata)
+                    
+                    # Embed only the delta
+                    if new_ids:
+                        collection.upsert(
+                            ids=new_ids,
+                            documents=new_documents,
+                            metadatas=new_metadatas,
+                            embeddings=self._embed_for_collection(collection, new_documents)
+                        )
+                    
+                    # Unchanged text: chunk_index/page may have shifted, no re-embed
+                    if kept_ids:
+                        collection.update(ids=kept_ids, metadatas=kept_metadatas)
+                    
+                    removed_ids = list(existing_ids - seen_ids)
+                    if removed_ids:
+                        collection.delete(ids=removed_ids)
+                    
+                    # Keep the lexical index in step with the collection
+                    lexical_index = self._get_lexical_index(case_id, collection)
+                    lexical_index.add_many(zip(new_ids, new_documents))
+                    lexical_index.remove_many(removed_ids)
+                    
+                    embedded += len(new_ids)
+                    unchanged += len(kept_ids)
+                    deleted += len(removed_ids)
+                
+                self._bump_case_version(case_id)
+                logger.info(
+                    f"Synced {len(chunks_by_document)} documents for case {case_id}: "
+                    f"{embedded} embedded, {unchanged} unchanged, {deleted} deleted"
+                )
+                return True
             
+        except EmbeddingError:
+            raise
         except Exception as e:
             logger.error(f"Failed to add chunks to vector store: {str(e)}")
             return False
     
+    def embed_query(self, case_id: str, query_text: str) -> List[float]:
+        """
+        Embed a query in a case's vector space.
+        
+        Args:
+            case_id: Case identifier
+            query_text: Query text
+            
+        Returns:
+            List[float]: Query embedding
+            
+        Raises:
+            EmbeddingError: If the query cannot be embedded
+        """
+        return self._embed_for_collection(self._get_or_create_collection(case_id), [query_text])[0]
+    
+    def get_chunk_embeddings(self, case_id: str, chunk_ids: List[str]) -> Dict[str, List[float]]:
+        """
+        Fetch stored embeddings for chunks.
+        
+        Args:
+            case_id: Case identifier
+            chunk_ids: Chunk IDs
+            
+        Returns:
+            Dict of chunk ID to embedding (missing IDs are omitted)
+        """
+        if not chunk_ids:
+            return {}
+        try:
+            collection = self._get_or_create_collection(case_id)
+            fetched = collection.get(ids=list(chunk_ids), include=["embeddings"])
+            return {chunk_id: list(vector) for chunk_id, vector in zip(fetched["ids"], fetched["embeddings"])}
+            
+        except Exception as e:
+            logger.error(f"Failed to fetch chunk embeddings: {str(e)}")
+            return {}
+    
     def search_similar_chunks(
         self,
         case_id: str,
         query_text: str,
         top_k: int = 5,
-        filter_metadata: Optional[Dict[str, Any]] = None
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for similar document chunks.
@@ -199,7 +506,10 @@ class VectorStore:
             case_id: Case identifier
             query_text: Query text
             top_k: Number of results to return
-            filter_metadata: Optional metadata filters
+            filter_metadata: Optional raw ChromaDB where-clause
+            filters: Optional filter DSL (see src.rag.filters.build_where), e.g.
+                     {"privileged": False, "date_from": "2023-01-01", "date_to": "2023-12-31"}
+            query_embedding: Precomputed query embedding (see embed_query)
             
         Returns:
             List of matching chunks with metadata
@@ -207,14 +517,16 @@ class VectorStore:
         try:
             collection = self._get_or_create_collection(case_id)
             
-            # Generate query embedding
-            query_embedding = self._generate_embedding(query_text)
+            # Generate query embedding in the case's vector space
+            if query_embedding is None:
+                query_embedding = self._embed_for_collection(collection, [query_text])[0]
             
             # Search
+            # Filters are applied inside the index, before the top_k cut
             results = collection.query(
                 query_embeddings=[query_embedding],
                 n_results=top_k,
-                where=filter_metadata
+                where=combine_where(filter_metadata, build_where(filters))
             )
             
             # Format results
@@ -222,6 +534,7 @@ class VectorStore:
             if results["documents"] and len(results["documents"]) > 0:
                 for i in range(len(results["documents"][0])):
                     chunks.append({
+                        "id": results["ids"][0][i],
                         "text": results["documents"][0][i],
                         "metadata": results["metadatas"][0][i],
                         "distance": results["distances"][0][i] if "distances" in results else None
@@ -230,10 +543,92 @@ class VectorStore:
             logger.info(f"Found {len(chunks)} similar chunks for query in case {case_id}")
             return chunks
             
+        except EmbeddingError:
+            # An unembeddable query must not look like "no matching documents"
+            raise
         except Exception as e:
             logger.error(f"Failed to search vector store: {str(e)}")
             return []
     
+    def hybrid_search(
+        self,
+        case_id: str,
+        query_text: str,
+        top_k: int = 10,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search with dense vectors and BM25 concurrently, merged by reciprocal rank fusion.
+        Dense search handles paraphrase; BM25 catches exact tokens such as Bates
+        numbers, section numbers and surnames.
+        
+        Args:
+            case_id: Case identifier
+            query_text: Query text
+            top_k: Number of results to return
+            filter_metadata: Optional raw ChromaDB where-clause
+            filters: Optional filter DSL (see src.rag.filters.build_where)
+            query_embedding: Precomputed query embedding (see embed_query)
+            
+        Returns:
+            List of matching chunks with metadata, "rrf_score" and per-retriever ranks
+        """
+        try:
+            collection = self._get_or_create_collection(case_id)
+            candidates = max(top_k, HYBRID_CANDIDATES)
+            
+            dense_future = self._executor.submit(
+                self.search_similar_chunks,
+                case_id, query_text, candidates, filter_metadata, filters, query_embedding
+            )
+            
+            lexical_hits = self._get_lexical_index(case_id, collection).search(query_text, top_k=candidates)
+            lexical_ids = [chunk_id for chunk_id, _ in lexical_hits]
+            where = combine_where(filter_metadata, build_where(filters))
+            if where and lexical_ids:
+                # Apply the same metadata filters to the lexical candidates
+                allowed = set(collection.get(ids=lexical_ids, where=where, include=[])["ids"])
+                lexical_ids = [chunk_id for chunk_id in lexical_ids if chunk_id in allowed]
+            
+            dense_chunks = dense_future.result()
+            dense_ids = [chunk["id"] for chunk in dense_chunks]
+            
+            fused = reciprocal_rank_fusion([dense_ids, lexical_ids], k=RRF_K)[:top_k]
+            
+            by_id = {chunk["id"]: chunk for chunk in dense_chunks}
+            missing = [chunk_id for chunk_id, _ in fused if chunk_id not in by_id]
+            if missing:
+                fetched = collection.get(ids=missing, include=["documents", "metadatas"])
+                for chunk_id, text, metadata in zip(fetched["ids"], fetched["documents"], fetched["metadatas"]):
+                    by_id[chunk_id] = {"id": chunk_id, "text": text, "metadata": metadata, "distance": None}
+            
+            dense_rank = {chunk_id: rank for rank, chunk_id in enumerate(dense_ids, start=1)}
+            lexical_rank = {chunk_id: rank for rank, chunk_id in enumerate(lexical_ids, start=1)}
+            
+            chunks = []
+            for chunk_id, score in fused:
+                if chunk_id not in by_id:
+                    continue
+                chunk = dict(by_id[chunk_id])
+                chunk["rrf_score"] = score
+                chunk["dense_rank"] = dense_rank.get(chunk_id)
+                chunk["lexical_rank"] = lexical_rank.get(chunk_id)
+                chunks.append(chunk)
+            
+            logger.info(
+                f"Hybrid search in case {case_id}: {len(dense_ids)} dense + "
+                f"{len(lexical_ids)} lexical candidates -> {len(chunks)} results"
+            )
+            return chunks
+            
+        except EmbeddingError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed hybrid search: {str(e)}")
+            return []
+    
     def delete_document(self, case_id: str, document_id: str) -> bool:
         """
         Delete all chunks for a document.
@@ -245,19 +640,421 @@ class VectorStore:
         Returns:
             bool: True if successful
         """
+        try:
+            with self._case_lock(case_id):
+                collection = self._get_or_create_collection(case_id)
+                
+                # Delete all chunks with this document_id
+                existing = collection.get(where={"document_id": document_id}, include=[])
+                collection.delete(
+                    where={"document_id": document_id}
+                )
+                self._get_lexical_index(case_id, collection).remove_many(existing["ids"])
+                summaries = self._get_summary_collection(case_id, create=False)
+                if summaries is not None:
+                    summaries.delete(ids=[document_id])
+                self._bump_case_version(case_id)
+            
+            logger.info(f"Deleted document {document_id} from case {case_id}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to delete document from vector store: {str(e)}")
+            return False
+    
+    def upsert_document_summary(
+        self,
+        case_id: str,
+        document_id: str,
+        summary: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Index a document's summary (one vector per document).
+        Unchanged summaries are not re-embedded; metadata is refreshed.
+        
+        Args:
+            case_id: Case identifier
+            document_id: Document identifier
+            summary: Document summary text
+            metadata: Optional document-level metadata (document_type, privilege, ...)
+            
+        Returns:
+            bool: True if successful
+        """
+        if not summary:
+            return False
+        try:
+            with self._case_lock(case_id):
+                collection = self._get_summary_collection(case_id)
+                entry = to_chroma_metadata({
+                    **(metadata or {}),
+                    "document_id": document_id,
+                    "content_hash": self._content_hash(summary)
+                })
+                
+                existing = collection.get(ids=[document_id], include=["metadatas"])
+                if existing["ids"] and (existing["metadatas"][0] or {}).get("content_hash") == entry["content_hash"]:
+                    collection.update(ids=[document_id], metadatas=[entry])
+                else:
+                    collection.upsert(
+                        ids=[document_id],
+                        documents=[summary],
+                        metadatas=[entry],
+                        embeddings=self._embed_for_collection(collection, [summary])
+                    )
+            
+            logger.info(f"Indexed summary of document {document_id} in case {case_id}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to index document summary: {str(e)}")
+            return False
+    
+    def get_document_summary(self, case_id: str, document_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a document's indexed summary (no embedding call).
+        
+        Args:
+            case_id: Case identifier
+            document_id: Document identifier
+            
+        Returns:
+            Dict with document_id, summary and metadata, or None if not indexed
+        """
+        try:
+            collection = self._get_summary_collection(case_id, create=False)
+            if collection is None:
+                return None
+            fetched = collection.get(ids=[document_id], include=["documents", "metadatas"])
+            if not fetched["ids"]:
+                return None
+            return {"document_id": document_id, "summary": fetched["documents"][0], "metadata": fetched["metadatas"][0]}
+            
+        except Exception as e:
+            logger.error(f"Failed to get document summary: {str(e)}")
+            return None
+    
+    def search_document_summaries(
+        self,
+        case_id: str,
+        query_text: str,
+        top_k: int = 5,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search the summary index: one hit per document.
+        
+        Args:
+            case_id: Case identifier
+            query_text: Query text
+            top_k: Number of documents to return
+            filter_metadata: Optional where-clause on document metadata
+            query_embedding: Precomputed query embedding (see embed_query)
+            
+        Returns:
+            List of dicts with document_id, summary, metadata and distance
+        """
+        try:
+            collection = self._get_summary_collection(case_id, create=False)
+            if collection is None or collection.count() == 0:
+                return []
+            if query_embedding is None:
+                query_embedding = self._embed_for_collection(collection, [query_text])[0]
+            
+            results = collection.query(
+                query_embeddings=[query_embedding],
+                n_results=min(top_k, collection.count()),
+                where=filter_metadata
+            )
+            
+            hits = []
+            if results["ids"] and results["ids"][0]:
+                for i in range(len(results["ids"][0])):
+                    hits.append({
+                        "document_id": results["ids"][0][i],
+                        "summary": results["documents"][0][i],
+                        "metadata": results["metadatas"][0][i],
+                        "distance": results["distances"][0][i] if results.get("distances") else None
+                    })
+            return hits
+            
+        except EmbeddingError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to search summary index: {str(e)}")
+            return []
+    
+    def get_summary_embeddings(self, case_id: str, document_ids: List[str]) -> Dict[str, List[float]]:
+        """
+        Fetch stored summary embeddings.
+        
+        Args:
+            case_id: Case identifier
+            document_ids: Document identifiers
+            
+        Returns:
+            Dict of document ID to summary embedding (missing IDs are omitted)
+        """
+        try:
+            collection = self._get_summary_collection(case_id, create=False)
+            if collection is None or not document_ids:
+                return {}
+            fetched = collection.get(ids=list(document_ids), include=["embeddings"])
+            return {doc_id: list(vector) for doc_id, vector in zip(fetched["ids"], fetched["embeddings"])}
+            
+        except Exception as e:
+            logger.error(f"Failed to fetch summary embeddings: {str(e)}")
+            return {}
+    
+    def get_document_chunks(self, case_id: str, document_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get a document's chunks in document order (no embedding call).
+        
+        Args:
+            case_id: Case identifier
+            document_id: Document identifier
+            limit: Optional maximum number of chunks, from the start of the document
+            
+        Returns:
+            List of chunks with id, text and metadata
+        """
         try:
             collection = self._get_or_create_collection(case_id)
+            fetched = collection.get(where={"document_id": document_id}, include=["documents", "metadatas"])
+            chunks = [
+                {"id": chunk_id, "text": text, "metadata": metadata}
+                for chunk_id, text, metadata in zip(fetched["ids"], fetched["documents"], fetched["metadatas"])
+            ]
+            chunks.sort(key=lambda c: (c["metadata"] or {}).get("chunk_index", 0))
+            return chunks[:limit]
+            
+        except Exception as e:
+            logger.error(f"Failed to get document chunks: {str(e)}")
+            return []
+    
+    def configure_case_embeddings(self, case_id: str, dimensions: int, normalize: bool = True) -> str:
+        """
+        Set the embedding dimension and normalization for a case.
+        An empty case is switched immediately; a case with vectors must be
+        re-embedded with migrate_case_embeddings.
+        
+        Args:
+            case_id: Case identifier
+            dimensions: Embedding output dimension
+            normalize: Whether embeddings are unit-normalized
+            
+        Returns:
+            str: "unchanged", "configured", "migration_required", or
+                 "migrating" while a migration of the case is running
             
-            # Delete all chunks with this document_id
-            collection.delete(
-                where={"document_id": document_id}
+        Raises:
+            ValueError: If the model does not support the requested dimension
+        """
+        settings = self._embedding_metadata(dimensions, normalize)
+        with self._case_lock(case_id):
+            collection = self._get_or_create_collection(case_id)
+            if self._active_migration(collection):
+                return "migrating"
+            if self._collection_embedding_settings(collection) == settings:
+                return "unchanged"
+            summaries = self._get_summary_collection(case_id, create=False)
+            if collection.count() > 0 or (summaries is not None and summaries.count() > 0):
+                return "migration_required"
+            collection.modify(metadata={**(collection.metadata or {}), **settings})
+            if summaries is not None:
+                summaries.modify(metadata={**(summaries.metadata or {}), **settings})
+            logger.info(f"Configured embeddings for case {case_id}: {settings}")
+            return "configured"
+    
+    @staticmethod
+    def _active_migration(collection) -> Optional[str]:
+        """
+        Get the migration running on a case collection.
+        
+        Args:
+            collection: Live case collection
+            
+        Returns:
+            str: Migration ID, or None if there is none (or it was abandoned)
+        """
+        metadata = collection.metadata or {}
+        started = metadata.get("embedding_migration_started")
+        if not metadata.get("embedding_migration") or started is None:
+            return None
+        if time.time() - float(started) > MIGRATION_TIMEOUT_SECONDS:
+            return None
+        return metadata["embedding_migration"]
+    
+    def _claim_migration(self, case_id: str) -> Optional[str]:
+        """
+        Record a new migration on the live collection, unless one is running.
+        The marker lives in the collection metadata, so other processes see it.
+        
+        Args:
+            case_id: Case identifier
+            
+        Returns:
+            str: New migration ID, or None if another migration is running
+        """
+        with self._case_lock(case_id):
+            collection = self._get_or_create_collection(case_id)
+            if self._active_migration(collection):
+                return None
+            migration_id = uuid.uuid4().hex
+            collection.modify(metadata={
+                **(collection.metadata or {}),
+                "embedding_migration": migration_id,
+                "embedding_migration_started": time.time()
+            })
+            return migration_id
+    
+    def _release_migration(self, case_id: str, migration_id: str):
+        """Clear a failed migration's marker, if it is still the recorded one."""
+        with self._case_lock(case_id):
+            collection = self._get_or_create_collection(case_id)
+            metadata = collection.metadata or {}
+            if metadata.get("embedding_migration") == migration_id:
+                collection.modify(metadata={k: v for k, v in metadata.items() if k not in MIGRATION_KEYS})
+    
+    @staticmethod
+    def _shadow_name(name: str, dimensions: int, normalize: bool) -> str:
+        """Name of the shadow collection a migration to the given settings copies into."""
+        return f"{name}__migrating_{dimensions}_{'norm' if normalize else 'raw'}"
+    
+    def _copy_reembedded(self, source, target, ids: List[str], dimensions: int, normalize: bool, batch_size: int):
+        """
+        Copy chunks between collections, re-embedding their text.
+        
+        Args:
+            source: Collection to read from
+            target: Collection to write to
+            ids: Chunk IDs to copy
+            dimensions: Target embedding dimension
+            normalize: Target normalization
+            batch_size: Chunks per batch
+        """
+        for start in range(0, len(ids), batch_size):
+            batch = source.get(ids=ids[start:start + batch_size], include=["documents", "metadatas"])
+            if not batch["ids"]:
+                continue
+            target.upsert(
+                ids=batch["ids"],
+                documents=batch["documents"],
+                metadatas=batch["metadatas"],
+                embeddings=[self._generate_embedding(text, dimensions, normalize) for text in batch["documents"]]
             )
+    
+    def _swap_collections(self, name: str, shadow_name: str):
+        """
+        Replace a collection with its shadow. The old collection is renamed
+        aside and only deleted once the shadow holds its name, so a failure
+        at any step leaves one complete copy under the live name.
+        
+        Args:
+            name: Live collection name
+            shadow_name: Shadow collection to take over the name
+        """
+        retired_name = f"{name}__retired"
+        try:
+            self.backend.delete_collection(retired_name)
+        except Exception:
+            pass  # No leftover from an interrupted swap
+        
+        self.backend.rename_collection(name, retired_name)
+        try:
+            self.backend.rename_collection(shadow_name, name)
+        except Exception:
+            self.backend.rename_collection(retired_name, name)
+            raise
+        
+        try:
+            self.backend.delete_collection(retired_name)
+        except Exception as e:
+            logger.warning(f"Failed to delete retired collection {retired_name}: {str(e)}")
+    
+    def migrate_case_embeddings(
+        self,
+        case_id: str,
+        dimensions: int,
+        normalize: bool = True,
+        batch_size: int = MIGRATION_BATCH_SIZE
+    ) -> bool:
+        """
+        Re-embed a case at a new dimension/normalization without downtime.
+        
+        Chunks (and document summaries) are copied into shadow collections
+        while the live collections keep serving. Under the case write lock,
+        writes made during the copy are caught up, then the shadows replace
+        the live collections; the old collections are deleted last.
+        
+        The migration is recorded on the live collection first; while it
+        runs, other migrations of the case refuse to start and
+        configure_case_embeddings reports "migrating".
+        
+        Args:
+            case_id: Case identifier
+            dimensions: New embedding output dimension
+            normalize: New normalization setting
+            batch_size: Chunks re-embedded per batch
             
-            logger.info(f"Deleted document {document_id} from case {case_id}")
+        Returns:
+            bool: True if successful
+        """
+        migration_id = None
+        try:
+            settings = self._embedding_metadata(dimensions, normalize)
+            migration_id = self._claim_migration(case_id)
+            if migration_id is None:
+                logger.warning(f"An embedding migration is already running for case {case_id}, not starting another")
+                return False
+            
+            sources = [self._get_or_create_collection(case_id)]
+            summaries = self._get_summary_collection(case_id, create=False)
+            if summaries is not None:
+                sources.append(summaries)
+            
+            shadows = []
+            for source in sources:
+                shadow_name = self._shadow_name(source.name, dimensions, normalize)
+                try:
+                    self.backend.delete_collection(shadow_name)
+                except Exception:
+                    pass  # No leftover from an interrupted migration
+                metadata = {k: v for k, v in (source.metadata or {}).items() if k not in MIGRATION_KEYS}
+                shadow = self.backend.create_collection(name=shadow_name, metadata={**metadata, **settings})
+                
+                all_ids = source.get(include=[])["ids"]
+                logger.info(f"Migrating {len(all_ids)} entries of {source.name} to {settings}")
+                self._copy_reembedded(source, shadow, all_ids, dimensions, normalize, batch_size)
+                shadows.append(shadow)
+            
+            with self._case_lock(case_id):
+                for source, shadow in zip(sources, shadows):
+                    # Catch up with entries added, removed or re-tagged during the copy
+                    live = source.get(include=["metadatas"])
+                    copied_ids = set(shadow.get(include=[])["ids"])
+                    live_ids = set(live["ids"])
+                    self._copy_reembedded(source, shadow, list(live_ids - copied_ids), dimensions, normalize, batch_size)
+                    if copied_ids - live_ids:
+                        shadow.delete(ids=list(copied_ids - live_ids))
+                    for start in range(0, len(live["ids"]), batch_size):
+                        shadow.update(
+                            ids=live["ids"][start:start + batch_size],
+                            metadatas=live["metadatas"][start:start + batch_size]
+                        )
+                    
+                    self._swap_collections(source.name, shadow.name)
+                self._bump_case_version(case_id)
+            
+            logger.info(f"Migrated case {case_id} embeddings to {settings}")
             return True
             
         except Exception as e:
-            logger.error(f"Failed to delete document from vector store: {str(e)}")
+            logger.error(f"Failed to migrate case embeddings: {str(e)}")
+            if migration_id:
+                self._release_migration(case_id, migration_id)
             return False
     
     def delete_case_collection(self, case_id: str) -> bool:
@@ -272,7 +1069,14 @@ class VectorStore:
         """
         try:
             collection_name = self._get_collection_name(case_id)
-            self.client.delete_collection(name=collection_name)
+            self.backend.delete_collection(collection_name)
+            try:
+                self.backend.delete_collection(f"{collection_name}{SUMMARY_SUFFIX}")
+            except Exception:
+                pass  # Case never had a summary index
+            with self._lexical_lock:
+                self._lexical_indexes.pop(collection_name, None)
+            # No collection, no version: the case reads as empty again
             logger.info(f"Deleted collection for case {case_id}")
             return True
             
@@ -0,0 +1,274 @@
+"""
+Typed chunk metadata and a small filter DSL for vector search.
+Keeps metadata in native types so ChromaDB can range-filter inside the
+index, instead of over-fetching and filtering in Python.
+"""
+from datetime import date, datetime
+from enum import Enum
+from typing import Dict, Any, List, Optional
+import json
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# DSL operator suffixes ("hot_doc_score__gte") mapped to ChromaDB operators
+FILTER_OPERATORS = {
+    "eq": "$eq",
+    "ne": "$ne",
+    "gt": "$gt",
+    "gte": "$gte",
+    "lt": "$lt",
+    "lte": "$lte",
+    "in": "$in",
+    "nin": "$nin"
+}
+
+# Metadata fields stored as YYYYMMDD integers so they can be range-filtered
+DATE_FIELDS = {"date_start", "date_end"}
+
+ISO_DATE_PATTERN = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+
+
+def date_to_int(value: Any) -> Optional[int]:
+    """
+    Convert a date, datetime or ISO date string to a YYYYMMDD integer.
+    
+    Args:
+        value: Date-like value
+    
+    Returns:
+        int or None if the value is not a recognisable date
+    """
+    if isinstance(value, (date, datetime)):
+        return value.year * 10000 + value.month * 100 + value.day
+    if isinstance(value, int):
+        return value
+    match = ISO_DATE_PATTERN.match(str(value or "").strip())
+    if not match:
+        return None
+    year, month, day = (int(part) for part in match.groups())
+    return year * 10000 + month * 100 + day
+
+
+def filter_date(key: str, value: Any) -> int:
+    """
+    Convert a date filter value to a YYYYMMDD integer, strictly.
+    
+    Unlike date_to_int (used on extracted metadata, where unparseable dates
+    are dropped), filter values come from requests and must be real dates.
+    
+    Args:
+        key: Filter key, for the error message
+        value: date, datetime, ISO date string or YYYYMMDD integer
+    
+    Returns:
+        int: YYYYMMDD
+    
+    Raises:
+        ValueError: If the value is not a valid date
+    """
+    if isinstance(value, (date, datetime)):
+        return date_to_int(value)
+    try:
+        if isinstance(value, int) and not isinstance(value, bool):
+            date(value // 10000, value // 100 % 100, value % 100)
+            return value
+        if isinstance(value, str):
+            return date_to_int(date.fromisoformat(value.strip()))
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid date for filter {key}: {value!r}, expected YYYY-MM-DD")
+
+
+def to_chroma_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Sanitize chunk metadata for ChromaDB without losing types.
+    
+    str/int/float/bool are kept as-is so they stay filterable, None values are
+    dropped (ChromaDB rejects them), and anything else is JSON-encoded.
+    
+    Args:
+        metadata: Raw chunk metadata
+    
+    Returns:
+        Dict of ChromaDB-compatible metadata
+    """
+    clean = {}
+    for key, value in metadata.items():
+        if value is None:
+            continue
+        if isinstance(value, Enum):
+            # str Enums (DocumentType, PrivilegeFlag)
+            clean[key] = value.value
+        elif isinstance(value, (str, int, float, bool)):
+            clean[key] = value
+        else:
+            clean[key] = json.dumps(value, default=str)
+    return clean
+
+
+def analysis_chunk_metadata(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build document-level metadata from pipeline output to copy onto every chunk.
+    
+    Args:
+        state: Final pipeline state (or an equivalent dict of AnalysisResult fields)
+    
+    Returns:
+        Dict with privileged, privilege_recommendation, is_hot_doc,
+        hot_doc_score, hot_doc_severity, date_start and date_end
+    """
+    flags = [getattr(flag, "value", flag) for flag in state.get("privilege_flags") or []]
+    dates = [date_to_int(d.get("date")) for d in state.get("dates") or [] if isinstance(d, dict)]
+    dates = [d for d in dates if d]
+    
+    return {
+        "privileged": any(flag != "none" for flag in flags),
+        "privilege_recommendation": state.get("privilege_recommendation"),
+        "is_hot_doc": bool(state.get("is_hot_doc")),
+        "hot_doc_score": float(state.get("hot_doc_score") or 0.0),
+        "hot_doc_severity": state.get("hot_doc_severity"),
+        "date_start": min(dates) if dates else None,
+        "date_end": max(dates) if dates else None
+    }
+
+
+def build_where(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Translate the filter DSL into a ChromaDB where-clause.
+    
+    Keys are metadata fields with an optional operator suffix:
+        {"privileged": False}                     -> equality
+        {"hot_doc_score__gte": 0.7}               -> $gte
+        {"document_type__in": ["email", "memo"]}  -> $in
+        {"page__between": [10, 20]}               -> $gte and $lte
+    Plus date-range shortcuts matching documents whose dates overlap the range:
+        {"date_from": "2023-01-01", "date_to": "2023-12-31"}
+    
+    Args:
+        filters: Filter DSL dict
+    
+    Returns:
+        ChromaDB where-clause, or None if there are no filters
+    
+    Raises:
+        ValueError: If an operator suffix is not supported or a date is invalid
+    """
+    if not filters:
+        return None
+    
+    conditions: List[Dict[str, Any]] = []
+    for key, value in filters.items():
+        if key == "date_from":
+            conditions.append({"date_end": {"$gte": filter_date(key, value)}})
+            continue
+        if key == "date_to":
+            conditions.append({"date_start": {"$lte": filter_date(key, value)}})
+            continue
+        
+        field, _, op = key.partition("__")
+        op = op or "eq"
+        
+        if field in DATE_FIELDS:
+            value = [filter_date(key, v) for v in value] if isinstance(value, (list, tuple)) else filter_date(key, value)
+        
+        if op == "between":
+            low, high = value
+            conditions.append({field: {"$gte": low}})
+            conditions.append({field: {"$lte": high}})
+        elif op in FILTER_OPERATORS:
+            if op in ("in", "nin"):
+                value = list(value)
+            conditions.append({field: {FILTER_OPERATORS[op]: value}})
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+    
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def combine_where(*clauses: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    AND together several where-clauses, ignoring empty ones.
+    
+    Args:
+        clauses: ChromaDB where-clauses
+    
+    Returns:
+        Combined where-clause or None
+    """
+    parts = []
+    for clause in clauses:
+        if not clause:
+            continue
+        if len(clause) > 1:
+            # Plain {"a": 1, "b": 2} equality dicts are an implicit AND
+            parts.extend({k: v} for k, v in clause.items())
+        elif "$and" in clause:
+            parts.extend(clause["$and"])
+        else:
+            parts.append(clause)
+    
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    return {"$and": parts}
+
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluate a ChromaDB where-clause against one metadata dict in Python.
+    Used by backends that filter outside ChromaDB (see src.rag.vector_backends).
+    
+    Args:
+        metadata: Chunk metadata
+        where: ChromaDB where-clause ($and/$or, $eq/$ne/$gt/$gte/$lt/$lte/$in/$nin)
+    
+    Returns:
+        bool: True if the metadata satisfies the clause
+    """
+    if not where:
+        return True
+    
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+            continue
+        
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        value = metadata.get(key)
+        for op, expected in condition.items():
+            if op == "$eq":
+                ok = value == expected
+            elif op == "$ne":
+                ok = value != expected
+            elif op == "$in":
+                ok = value in expected
+            elif op == "$nin":
+                ok = value not in expected
+            elif value is None or isinstance(value, bool) != isinstance(expected, bool):
+                # Range operators only compare like with like, as ChromaDB does
+                ok = False
+            elif op == "$gt":
+                ok = value > expected
+            elif op == "$gte":
+                ok = value >= expected
+            elif op == "$lt":
+                ok = value < expected
+            elif op == "$lte":
+                ok = value <= expected
+            else:
+                raise ValueError(f"Unsupported where operator: {op}")
+            if not ok:
+                return False
+    
+    return True
@@ -0,0 +1,171 @@
+"""
+Re-ranking and context packing for Ask AI.
+Over-fetched hybrid candidates are re-scored with a cheap local scorer
+(query term coverage, phrase overlap, dense similarity and the fused rank)
+and packed into the prompt up to a token budget. Scoring runs under a
+per-request deadline; when it is exceeded the fused order is used as is.
+"""
+from typing import List, Dict, Any, Optional
+import math
+import os
+import time
+import logging
+from src.rag.bm25 import tokenize
+
+logger = logging.getLogger(__name__)
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() == "true"
+# Candidates fetched from hybrid search before re-ranking
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "40"))
+# Prompt tokens available for document excerpts
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+RERANK_DEADLINE_MS = int(os.getenv("RERANK_DEADLINE_MS", "250"))
+
+# Score weights: lexical coverage, phrase overlap, dense similarity, fused rank
+COVERAGE_WEIGHT = 0.45
+PHRASE_WEIGHT = 0.2
+DENSE_WEIGHT = 0.2
+PRIOR_WEIGHT = 0.15
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate token count (4 characters per token, as in chunking).
+    
+    Args:
+        text: Text to measure
+        
+    Returns:
+        Estimated token count
+    """
+    return max(1, len(text) // 4) if text else 0
+
+
+class Reranker:
+    """
+    Local re-ranker for retrieved chunks. No model calls: everything is
+    computed from the query, the chunk text and the retrieval scores.
+    """
+    
+    def __init__(self, deadline_ms: int = RERANK_DEADLINE_MS):
+        """
+        Initialize the re-ranker.
+        
+        Args:
+            deadline_ms: Default scoring deadline per request
+        """
+        self.deadline_ms = deadline_ms
+    
+    @staticmethod
+    def _bigrams(terms: List[str]) -> set:
+        return set(zip(terms, terms[1:]))
+    
+    def rerank(
+        self,
+        query: str,
+        chunks: List[Dict[str, Any]],
+        deadline_ms: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Re-score chunks against the query.
+        
+        Args:
+            query: User question
+            chunks: Candidates from hybrid search, in fused order
+            deadline_ms: Scoring deadline (defaults to the instance deadline)
+            
+        Returns:
+            Dict with "chunks" (best first, each with "rerank_score"), "reranked"
+            (number of chunks scored) and "degraded" (deadline exceeded, fused
+            order kept)
+        """
+        deadline_ms = self.deadline_ms if deadline_ms is None else deadline_ms
+        deadline = time.monotonic() + deadline_ms / 1000.0
+        
+        query_terms = tokenize(query)
+        unique_terms = set(query_terms)
+        if not chunks or not unique_terms:
+            return {"chunks": list(chunks), "reranked": 0, "degraded": False}
+        query_bigrams = self._bigrams(query_terms)
+        
+        # IDF over the candidate set: terms every candidate shares say little
+        chunk_terms = []
+        document_frequency = {term: 0 for term in unique_terms}
+        for chunk in chunks:
+            terms = tokenize(chunk.get("text", ""))
+            chunk_terms.append(terms)
+            for term in unique_terms.intersection(terms):
+                document_frequency[term] += 1
+            if time.monotonic() > deadline:
+                logger.warning(f"Re-rank deadline of {deadline_ms}ms exceeded; using fused order")
+                return {"chunks": list(chunks), "reranked": 0, "degraded": True}
+        
+        n = len(chunks)
+        idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+        total_idf = sum(idf.values()) or 1.0
+        max_prior = max((c.get("rrf_score") or 0.0) for c in chunks) or 1.0
+        
+        scored = []
+        for position, (chunk, terms) in enumerate(zip(chunks, chunk_terms)):
+            if time.monotonic() > deadline:
+                logger.warning(f"Re-rank deadline of {deadline_ms}ms exceeded; using fused order")
+                return {"chunks": list(chunks), "reranked": 0, "degraded": True}
+            
+            present = unique_terms.intersection(terms)
+            coverage = sum(idf[term] for term in present) / total_idf
+            phrase = len(query_bigrams & self._bigrams(terms)) / len(query_bigrams) if query_bigrams else 0.0
+            distance = chunk.get("distance")
+            dense = 1.0 - distance / 2.0 if distance is not None else 0.0
+            prior = (chunk.get("rrf_score") or 0.0) / max_prior
+            
+            score = (
+                COVERAGE_WEIGHT * coverage
+                + PHRASE_WEIGHT * phrase
+                + DENSE_WEIGHT * dense
+                + PRIOR_WEIGHT * prior
+            )
+            scored.append((score, position, {**chunk, "rerank_score": score}))
+        
+        # Ties keep the fused order
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return {"chunks": [chunk for _, _, chunk in scored], "reranked": len(scored), "degraded": False}
+
+
+def pack_context(
+    chunks: List[Dict[str, Any]],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    max_chunks: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Greedily take chunks in order until the token budget is spent. Chunks
+    that do not fit are skipped so a smaller later chunk can still be used;
+    duplicate texts are packed once.
+    
+    Args:
+        chunks: Chunks, best first
+        token_budget: Maximum estimated tokens across packed chunks
+        max_chunks: Optional cap on the number of packed chunks
+        
+    Returns:
+        Packed chunks, in input order
+    """
+    packed = []
+    used = 0
+    seen_texts = set()
+    for chunk in chunks:
+        if max_chunks is not None and len(packed) >= max_chunks:
+            break
+        text = chunk.get("text", "")
+        if text in seen_texts:
+            continue
+        tokens = estimate_tokens(text)
+        if used + tokens > token_budget:
+            continue
+        seen_texts.add(text)
+        packed.append(chunk)
+        used += tokens
+    return packed
+
+
+# Singleton instance
+reranker = Reranker()
@@ -2,12 +2,24 @@
 Document retrieval and RAG (Retrieval-Augmented Generation) for Ask AI functionality.
 """
 from src.rag.embeddings import vector_store
+from src.rag.rerank import reranker, pack_context, estimate_tokens, RERANK_ENABLED, RERANK_CANDIDATES, CONTEXT_TOKEN_BUDGET
+from src.rag.answer_cache import answer_cache, cache_key, ANSWER_CACHE_ENABLED
+from src.rag.diversity import aggregate_by_document, mmr_select, chunk_relevance
 from src.agents.base import BaseAgent
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+import os
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Related documents: initial over-fetch (x top_k) and ceiling for adaptive fetching
+RELATED_OVERFETCH = int(os.getenv("RELATED_OVERFETCH", "4"))
+RELATED_MAX_CANDIDATES = int(os.getenv("RELATED_MAX_CANDIDATES", "200"))
+RELATED_DOC_SCORING = os.getenv("RELATED_DOC_SCORING", "max")  # max | sum
+RELATED_MMR_ENABLED = os.getenv("RELATED_MMR_ENABLED", "false").lower() == "true"
+RELATED_MMR_LAMBDA = float(os.getenv("RELATED_MMR_LAMBDA", "0.7"))
+
 
 class RAGRetriever:
     """
@@ -17,6 +29,8 @@ class RAGRetriever:
     def __init__(self):
         """Initialize the RAG retriever."""
         self.vector_store = vector_store
+        self.reranker = reranker
+        self.answer_cache = answer_cache
         self.agent = BaseAgent(name="RAGRetriever")
     
     def find_related_documents(
@@ -24,55 +38,112 @@ class RAGRetriever:
         case_id: str,
         query_text: str,
         top_k: int = 5,
-        exclude_doc_id: Optional[str] = None
+        exclude_doc_id: Optional[str] = None,
+        scoring: str = RELATED_DOC_SCORING,
+        diversify: bool = RELATED_MMR_ENABLED,
+        mmr_lambda: float = RELATED_MMR_LAMBDA
     ) -> List[Dict[str, Any]]:
         """
         Find documents related to a query or document.
         Used by Agent 6 for cross-referencing.
         
+        The per-case summary index (one vector per document) is searched
+        first. Only when it yields fewer than top_k documents does the search
+        drill into chunks: chunk hits are aggregated per document, and the
+        candidate count doubles until top_k distinct documents are found or
+        the case runs out of chunks, so one long document cannot crowd out
+        the rest.
+        
         Args:
             case_id: Case identifier
             query_text: Query text or document summary
-            top_k: Number of results
+            top_k: Number of distinct documents to return
             exclude_doc_id: Optional document ID to exclude from results
+            scoring: Document score from its chunks, "max" or "sum"
+            diversify: Re-select documents with maximal marginal relevance
+            mmr_lambda: MMR relevance/diversity trade-off (1.0 = relevance only)
             
         Returns:
-            List of related document chunks
+            List of related documents, best first
         """
         try:
-            # Search vector store
-            chunks = self.vector_store.search_similar_chunks(
-                case_id=case_id,
-                query_text=query_text,
-                top_k=top_k * 2  # Get more, then filter
-            )
+            # Excluded document is filtered inside the index, before the top-k cut
+            where = {"document_id": {"$ne": exclude_doc_id}} if exclude_doc_id else None
+            query_embedding = self.vector_store.embed_query(case_id, query_text)
+            wanted = top_k * RELATED_OVERFETCH if diversify else top_k
+            
+            # Document level first: the summary index is one vector per document
+            documents = [
+                {
+                    "document_id": hit["document_id"],
+                    "score": chunk_relevance(hit),
+                    "relevance": chunk_relevance(hit),
+                    "summary": hit["summary"],
+                    "matched_chunks": 0
+                }
+                for hit in self.vector_store.search_document_summaries(
+                    case_id=case_id,
+                    query_text=query_text,
+                    top_k=wanted,
+                    filter_metadata=where,
+                    query_embedding=query_embedding
+                )
+            ]
+            summarized = {doc["document_id"] for doc in documents}
             
-            # Filter out excluded document
-            if exclude_doc_id:
-                chunks = [
-                    c for c in chunks 
-                    if c.get("metadata", {}).get("document_id") != exclude_doc_id
-                ]
+            chunks = []
+            if len(documents) < wanted:
+                # Drill into chunks for documents the summary index does not cover
+                fetch = top_k * RELATED_OVERFETCH
+                while True:
+                    chunks = self.vector_store.search_similar_chunks(
+                        case_id=case_id,
+                        query_text=query_text,
+                        top_k=fetch,
+                        filter_metadata=where,
+                        query_embedding=query_embedding
+                    )
+                    chunk_documents = [
+                        doc for doc in aggregate_by_document(chunks, scoring=scoring)
+                        if doc["document_id"] not in summarized
+                    ]
+                    if (len(documents) + len(chunk_documents) >= wanted or len(chunks) < fetch
+                            or fetch >= RELATED_MAX_CANDIDATES):
+                        break
+                    fetch = min(fetch * 2, RELATED_MAX_CANDIDATES)
+                for doc in chunk_documents:
+                    doc["summary"] = doc["best_chunk"].get("text", "")
+                documents = sorted(documents + chunk_documents, key=lambda d: d["score"], reverse=True)
             
-            # Limit to top_k
-            chunks = chunks[:top_k]
+            if diversify and len(documents) > top_k:
+                embeddings = self.vector_store.get_summary_embeddings(case_id, list(summarized))
+                chunk_embeddings = self.vector_store.get_chunk_embeddings(
+                    case_id, [doc["best_chunk"]["id"] for doc in documents if "best_chunk" in doc]
+                )
+                for doc in documents:
+                    if "best_chunk" in doc:
+                        embeddings[doc["document_id"]] = chunk_embeddings.get(doc["best_chunk"]["id"])
+                documents = mmr_select(documents, embeddings, top_k, lambda_mult=mmr_lambda)
+            else:
+                documents = documents[:top_k]
+            
+            logger.info(
+                f"Found {len(documents)} related documents in case {case_id} "
+                f"({len(summarized)} from summaries, {len(chunks)} chunks fetched)"
+            )
             
             # Format for Agent 6
-            related_docs = []
-            seen_docs = set()
-            
-            for chunk in chunks:
-                doc_id = chunk.get("metadata", {}).get("document_id")
-                if doc_id and doc_id not in seen_docs:
-                    seen_docs.add(doc_id)
-                    related_docs.append({
-                        "doc_id": doc_id,
-                        "title": f"Document {doc_id}",
-                        "summary": chunk.get("text", "")[:200] + "...",
-                        "relevance": 1.0 - (chunk.get("distance", 0) / 2.0)  # Convert distance to relevance
-                    })
-            
-            return related_docs
+            return [
+                {
+                    "doc_id": doc["document_id"],
+                    "title": f"Document {doc['document_id']}",
+                    "summary": doc["summary"][:200] + "...",
+                    "relevance": doc["relevance"],
+                    "score": doc["score"],
+                    "matched_chunks": doc["matched_chunks"]
+                }
+                for doc in documents
+            ]
             
         except Exception as e:
             logger.error(f"Failed to find related documents: {str(e)}")
@@ -82,7 +153,11 @@ class RAGRetriever:
         self,
         case_id: str,
         question: str,
-        top_k: int = 10
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        rerank: Optional[bool] = None,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        use_cache: Optional[bool] = None
     ) -> Dict[str, Any]:
         """
         Answer a question about case documents using RAG.
@@ -90,58 +165,38 @@ class RAGRetriever:
         Args:
             case_id: Case identifier
             question: User's question
-            top_k: Number of chunks to retrieve
+            top_k: Maximum number of chunks placed in the prompt
+            filters: Optional chunk filter DSL (see src.rag.filters.build_where)
+            rerank: Over-fetch and re-rank candidates (defaults to RERANK_ENABLED)
+            token_budget: Prompt tokens available for excerpts when re-ranking
+            use_cache: Answer similar earlier questions from the semantic cache
+                       (defaults to ANSWER_CACHE_ENABLED)
             
         Returns:
-            Dict with answer, sources, and confidence
+            Dict with answer, sources, confidence, retrieval and cache metadata
         """
         try:
             logger.info(f"Answering question for case {case_id}: {question}")
             
-            # Retrieve relevant chunks
-            chunks = self.vector_store.search_similar_chunks(
-                case_id=case_id,
-                query_text=question,
-                top_k=top_k
+            cache = self._lookup_cache(case_id, question, use_cache, top_k, filters, rerank, token_budget)
+            if cache["hit"]:
+                return {**cache["result"], "cache": cache["metadata"]}
+            
+            chunks, retrieval = self._retrieve_context(
+                case_id, question, top_k, filters, rerank, token_budget, cache["embedding"]
             )
             
             if not chunks:
-                return {
+                result = {
                     "answer": "I couldn't find any relevant information in the case documents to answer this question.",
                     "sources": [],
-                    "confidence": 0.0
+                    "confidence": 0.0,
+                    "retrieval": retrieval
                 }
+                self._store_cache(case_id, question, cache, result)
+                return {**result, "cache": cache["metadata"]}
             
-            # Build context from retrieved chunks
-            context = "\n\n---\n\n".join([
-                f"Document {c.get('metadata', {}).get('document_id', 'Unknown')} "
-                f"(Page {c.get('metadata', {}).get('page', 'N/A')}):\n{c.get('text', '')}"
-                for c in chunks
-            ])
-            
-            # System prompt for Q&A
-            system_prompt = """You are a legal AI assistant helping attorneys analyze case documents.
-
-Your task is to answer questions about case documents based on the provided context.
-
-Guidelines:
-1. Answer based ONLY on the provided document excerpts
-2. Cite specific documents and page numbers in your answer
-3. If the context doesn't contain enough information, say so clearly
-4. Be precise and factual - don't speculate or infer beyond what's stated
-5. Use legal terminology appropriately
-6. If there are contradictions in the documents, note them
-7. Provide a confidence score (0.0-1.0) based on how well the context supports your answer
-
-Format your response as a clear, well-structured answer with citations."""
-            
-            user_prompt = f"""Question: {question}
-
-Relevant document excerpts:
-
-{context}
-
-Please answer the question based on these excerpts. Include specific citations to documents and pages."""
+            system_prompt, user_prompt = self._build_prompts(question, chunks)
             
             # Get answer from Claude
             answer_text = self.agent._call_claude(
@@ -150,30 +205,21 @@ Please answer the question based on these excerpts. Include specific citations t
                 max_tokens=4096
             )
             
-            # Extract sources
-            sources = []
-            seen_docs = set()
-            for chunk in chunks:
-                doc_id = chunk.get("metadata", {}).get("document_id")
-                if doc_id and doc_id not in seen_docs:
-                    seen_docs.add(doc_id)
-                    sources.append({
-                        "document_id": doc_id,
-                        "document_type": chunk.get("metadata", {}).get("document_type", "unknown"),
-                        "page": chunk.get("metadata", {}).get("page"),
-                        "excerpt": chunk.get("text", "")[:200] + "..."
-                    })
+            sources = self._extract_sources(chunks)
             
             # Estimate confidence based on number and quality of sources
             confidence = min(1.0, len(chunks) / top_k * 0.8 + 0.2)
             
             logger.info(f"Generated answer with {len(sources)} sources (confidence: {confidence:.2f})")
             
-            return {
+            result = {
                 "answer": answer_text,
                 "sources": sources,
-                "confidence": confidence
+                "confidence": confidence,
+                "retrieval": retrieval
             }
+            self._store_cache(case_id, question, cache, result)
+            return {**result, "cache": cache["metadata"]}
             
         except Exception as e:
             logger.error(f"Failed to answer question: {str(e)}")
@@ -183,13 +229,307 @@ Please answer the question based on these excerpts. Include specific citations t
                 "confidence": 0.0
             }
     
+    def stream_question(
+        self,
+        case_id: str,
+        question: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        rerank: Optional[bool] = None,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        use_cache: Optional[bool] = None
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Answer a question as a stream of events: sources as soon as retrieval
+        finishes, then answer tokens as Claude produces them.
+        
+        Args:
+            case_id: Case identifier
+            question: User's question
+            top_k: Maximum number of chunks placed in the prompt
+            filters: Optional chunk filter DSL (see src.rag.filters.build_where)
+            rerank: Over-fetch and re-rank candidates (defaults to RERANK_ENABLED)
+            token_budget: Prompt tokens available for excerpts when re-ranking
+            use_cache: Answer similar earlier questions from the semantic cache
+                       (defaults to ANSWER_CACHE_ENABLED)
+                       
+        Yields:
+            (event, data) tuples: one "sources" event, "token" events, then
+            "done"; an "error" event replaces the rest if anything fails
+        """
+        try:
+            logger.info(f"Streaming answer for case {case_id}: {question}")
+            
+            cache = self._lookup_cache(case_id, question, use_cache, top_k, filters, rerank, token_budget)
+            if cache["hit"]:
+                result = cache["result"]
+                yield "sources", {
+                    "sources": result["sources"],
+                    "confidence": result["confidence"],
+                    "retrieval": result.get("retrieval"),
+                    "cache": cache["metadata"]
+                }
+                yield "token", {"text": result["answer"]}
+                yield "done", {"confidence": result["confidence"]}
+                return
+            
+            chunks, retrieval = self._retrieve_context(
+                case_id, question, top_k, filters, rerank, token_budget, cache["embedding"]
+            )
+            
+            if not chunks:
+                answer_text = "I couldn't find any relevant information in the case documents to answer this question."
+                yield "sources", {"sources": [], "confidence": 0.0, "retrieval": retrieval, "cache": cache["metadata"]}
+                yield "token", {"text": answer_text}
+                self._store_cache(case_id, question, cache, {
+                    "answer": answer_text, "sources": [], "confidence": 0.0, "retrieval": retrieval
+                })
+                yield "done", {"confidence": 0.0}
+                return
+            
+            sources = self._extract_sources(chunks)
+            confidence = min(1.0, len(chunks) / top_k * 0.8 + 0.2)
+            yield "sources", {"sources": sources, "confidence": confidence, "retrieval": retrieval, "cache": cache["metadata"]}
+            
+            system_prompt, user_prompt = self._build_prompts(question, chunks)
+            answer_parts = []
+            for text in self.agent._stream_claude(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                max_tokens=4096
+            ):
+                if text:
+                    answer_parts.append(text)
+                    yield "token", {"text": text}
+            
+            # Only complete answers are cached
+            self._store_cache(case_id, question, cache, {
+                "answer": "".join(answer_parts), "sources": sources, "confidence": confidence, "retrieval": retrieval
+            })
+            yield "done", {"confidence": confidence}
+            
+        except Exception as e:
+            logger.error(f"Failed to stream answer: {str(e)}")
+            yield "error", {"detail": f"An error occurred while processing your question: {str(e)}"}
+    
+    def _lookup_cache(
+        self,
+        case_id: str,
+        question: str,
+        use_cache: Optional[bool],
+        top_k: int,
+        filters: Optional[Dict[str, Any]],
+        rerank: Optional[bool],
+        token_budget: int
+    ) -> Dict[str, Any]:
+        """
+        Look a question up in the semantic answer cache.
+        The question embedding is kept so retrieval does not embed it again.
+        
+        Args:
+            case_id: Case identifier
+            question: User's question
+            use_cache: Whether to use the cache (defaults to ANSWER_CACHE_ENABLED)
+            top_k: Requested chunk count
+            filters: Requested chunk filters
+            rerank: Requested re-rank setting
+            token_budget: Requested token budget
+            
+        Returns:
+            Dict with "hit", "result" (on a hit), "embedding", "version", "key"
+            and "metadata" for the response
+        """
+        use_cache = ANSWER_CACHE_ENABLED if use_cache is None else use_cache
+        if not use_cache:
+            return {"hit": False, "embedding": None, "metadata": {"enabled": False, "hit": False}}
+        
+        # Read the version first: an answer built from older content is stored as stale
+        version = self.vector_store.case_version(case_id)
+        key = cache_key(
+            top_k=top_k,
+            filters=filters,
+            rerank=RERANK_ENABLED if rerank is None else rerank,
+            token_budget=token_budget
+        )
+        embedding = self.vector_store.embed_query(case_id, question)
+        cached = self.answer_cache.lookup(case_id, embedding, version, key)
+        if cached:
+            logger.info(f"Answer cache hit for case {case_id} (similarity {cached['similarity']:.3f})")
+            return {
+                "hit": True,
+                "result": cached["result"],
+                "embedding": embedding,
+                "metadata": {
+                    "enabled": True,
+                    "hit": True,
+                    "similarity": round(cached["similarity"], 4),
+                    "cached_question": cached["question"]
+                }
+            }
+        return {
+            "hit": False,
+            "embedding": embedding,
+            "version": version,
+            "key": key,
+            "metadata": {"enabled": True, "hit": False}
+        }
+    
+    def _store_cache(self, case_id: str, question: str, cache: Dict[str, Any], result: Dict[str, Any]):
+        """
+        Store an answer after a cache miss (no-op when the cache is disabled).
+        
+        Args:
+            case_id: Case identifier
+            question: User's question
+            cache: Lookup state from _lookup_cache
+            result: Answer payload
+        """
+        if cache["embedding"] is None:
+            return
+        self.answer_cache.store(case_id, question, cache["embedding"], cache["version"], result, cache["key"])
+    
+    def _build_prompts(self, question: str, chunks: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """
+        Build the system and user prompts for a question and its context chunks.
+        
+        Args:
+            question: User's question
+            chunks: Context chunks, in prompt order
+            
+        Returns:
+            Tuple of (system_prompt, user_prompt)
+        """
+        # Build context from retrieved chunks
+        context = "\n\n---\n\n".join([
+            f"Document {c.get('metadata', {}).get('document_id', 'Unknown')} "
+            f"(Page {c.get('metadata', {}).get('page', 'N/A')}):\n{c.get('text', '')}"
+            for c in chunks
+        ])
+        
+        # System prompt for Q&A
+        system_prompt = """You are a legal AI assistant helping attorneys analyze case documents.
+
+Your task is to answer questions about case documents based on the provided context.
+
+Guidelines:
+1. Answer based ONLY on the provided document excerpts
+2. Cite specific documents and page numbers in your answer
+3. If the context doesn't contain enough information, say so clearly
+4. Be precise and factual - don't speculate or infer beyond what's stated
+5. Use legal terminology appropriately
+6. If there are contradictions in the documents, note them
+7. Provide a confidence score (0.0-1.0) based on how well the context supports your answer
+
+Format your response as a clear, well-structured answer with citations."""
+        
+        user_prompt = f"""Question: {question}
+
+Relevant document excerpts:
+
+{context}
+
+Please answer the question based on these excerpts. Include specific citations to documents and pages."""
+        
+        return system_prompt, user_prompt
+    
+    def _extract_sources(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        List the distinct source documents of the context chunks.
+        
+        Args:
+            chunks: Context chunks
+            
+        Returns:
+            One source entry per document, in chunk order
+        """
+        sources = []
+        seen_docs = set()
+        for chunk in chunks:
+            doc_id = chunk.get("metadata", {}).get("document_id")
+            if doc_id and doc_id not in seen_docs:
+                seen_docs.add(doc_id)
+                sources.append({
+                    "document_id": doc_id,
+                    "document_type": chunk.get("metadata", {}).get("document_type", "unknown"),
+                    "page": chunk.get("metadata", {}).get("page"),
+                    "excerpt": chunk.get("text", "")[:200] + "..."
+                })
+        return sources
+    
+    def _retrieve_context(
+        self,
+        case_id: str,
+        question: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]],
+        rerank: Optional[bool],
+        token_budget: int,
+        query_embedding: Optional[List[float]] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Retrieve the chunks for the prompt, re-ranked and packed if enabled.
+        
+        Args:
+            case_id: Case identifier
+            question: User's question
+            top_k: Maximum number of chunks to return
+            filters: Optional chunk filter DSL
+            rerank: Whether to re-rank (defaults to RERANK_ENABLED)
+            token_budget: Token budget for packed chunks
+            query_embedding: Precomputed question embedding
+            
+        Returns:
+            Tuple of (chunks, retrieval metadata with chunk and token counts)
+        """
+        rerank = RERANK_ENABLED if rerank is None else rerank
+        
+        # Retrieve relevant chunks (dense + BM25, rank-fused)
+        candidates = self.vector_store.hybrid_search(
+            case_id=case_id,
+            query_text=question,
+            top_k=max(top_k, RERANK_CANDIDATES) if rerank else top_k,
+            filters=filters,
+            query_embedding=query_embedding
+        )
+        
+        reranked = 0
+        degraded = False
+        rerank_ms = 0.0
+        if rerank and candidates:
+            started = time.monotonic()
+            result = self.reranker.rerank(question, candidates)
+            rerank_ms = (time.monotonic() - started) * 1000
+            reranked, degraded = result["reranked"], result["degraded"]
+            chunks = pack_context(result["chunks"], token_budget=token_budget, max_chunks=top_k)
+        else:
+            chunks = candidates
+        
+        retrieval = {
+            "rerank_enabled": rerank,
+            "degraded": degraded,
+            "retrieved_chunks": len(candidates),
+            "retrieved_tokens": sum(estimate_tokens(c.get("text", "")) for c in candidates),
+            "reranked_chunks": reranked,
+            "packed_chunks": len(chunks),
+            "packed_tokens": sum(estimate_tokens(c.get("text", "")) for c in chunks),
+            "token_budget": token_budget if rerank else None,
+            "rerank_ms": round(rerank_ms, 2)
+        }
+        logger.info(
+            f"Retrieved {retrieval['retrieved_chunks']} chunks ({retrieval['retrieved_tokens']} tokens), "
+            f"packed {retrieval['packed_chunks']} ({retrieval['packed_tokens']} tokens)"
+        )
+        return chunks, retrieval
+    
     def get_document_summary(
         self,
         case_id: str,
         document_id: str
     ) -> Optional[str]:
         """
-        Get a summary of a specific document from the vector store.
+        Get a summary of a specific document.
+        Reads the analysed summary from the summary index; documents without
+        one fall back to the opening chunks. Neither path embeds anything.
         
         Args:
             case_id: Case identifier
@@ -199,19 +539,17 @@ Please answer the question based on these excerpts. Include specific citations t
             Document summary or None
         """
         try:
-            # Search for chunks from this document
-            chunks = self.vector_store.search_similar_chunks(
-                case_id=case_id,
-                query_text="summary overview",  # Generic query
-                top_k=3,
-                filter_metadata={"document_id": document_id}
-            )
+            indexed = self.vector_store.get_document_summary(case_id, document_id)
+            if indexed:
+                return indexed["summary"]
+            
+            # Not analysed yet: use the start of the document
+            chunks = self.vector_store.get_document_chunks(case_id, document_id, limit=2)
             
             if not chunks:
                 return None
             
-            # Combine first few chunks as summary
-            summary = " ".join([c.get("text", "") for c in chunks[:2]])
+            summary = " ".join([c.get("text", "") for c in chunks])
             return summary[:500] + "..." if len(summary) > 500 else summary
             
         except Exception as e:
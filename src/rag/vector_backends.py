@@ -0,0 +1,918 @@
+"""
+Storage backends for VectorStore.
+ChromaDB is the default. The NumPy backend keeps each case in a memory-mapped
+float32 matrix and answers queries with vectorized dot products, which beats
+Chroma's per-query overhead for cases up to a few hundred thousand chunks and
+does not need chromadb installed in workers.
+
+Both backends hand out collections with ChromaDB's collection interface
+(get/upsert/update/delete/query/count), so VectorStore is backend-agnostic.
+"""
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import math
+import os
+import shutil
+import threading
+import logging
+import numpy as np
+from src.rag.filters import matches_where
+
+logger = logging.getLogger(__name__)
+
+# Backend selection: "chroma" or "numpy"
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
+NUMPY_VECTOR_DIR = os.getenv("NUMPY_VECTOR_DIR", "./vector_index")
+
+# Rewrite a case's files once this fraction of its rows are tombstones
+NUMPY_COMPACT_RATIO = float(os.getenv("NUMPY_COMPACT_RATIO", "0.25"))
+
+# IVF coarse quantizer for large cases (0 disables)
+NUMPY_IVF_MIN_ROWS = int(os.getenv("NUMPY_IVF_MIN_ROWS", "50000"))
+NUMPY_IVF_NPROBE = int(os.getenv("NUMPY_IVF_NPROBE", "8"))
+
+# k-means training sample size per IVF list
+IVF_TRAIN_ROWS_PER_LIST = 256
+
+# Search-time vector storage: "none" (float32), "float16" or "int8" (per-vector scale).
+# Quantized vectors are scanned first; the top n_results * NUMPY_RERANK_FACTOR
+# candidates are re-scored against the full-precision file.
+NUMPY_QUANTIZATION = os.getenv("NUMPY_QUANTIZATION", "none")
+NUMPY_RERANK_FACTOR = int(os.getenv("NUMPY_RERANK_FACTOR", "4"))
+
+QUANTIZED_DTYPES = {"float16": np.float16, "int8": np.int8}
+
+# Rows converted to float32 at a time when scanning quantized vectors
+SCORE_BLOCK_ROWS = 2048
+
+DEFAULT_INCLUDE = ["metadatas", "documents"]
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize each row of a float32 matrix (zero rows are left as zero).
+    
+    Args:
+        vectors: (n, dim) matrix
+        
+    Returns:
+        np.ndarray: Normalized float32 matrix
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize(vectors: np.ndarray, quantization: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Quantize normalized float32 vectors for compact storage.
+    
+    int8 uses symmetric scalar quantization with one scale per vector
+    (max |x| / 127); float16 is a plain cast and needs no scale.
+    
+    Args:
+        vectors: (n, dim) float32 vectors
+        quantization: "float16" or "int8"
+        
+    Returns:
+        Tuple of (quantized vectors, per-vector float32 scales or None)
+        
+    Raises:
+        ValueError: If the quantization is not supported
+    """
+    if quantization == "float16":
+        return vectors.astype(np.float16), None
+    if quantization == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    raise ValueError(f"Unsupported quantization: {quantization}")
+
+
+class ChromaBackend:
+    """
+    ChromaDB client wrapper. ChromaDB collections already implement the
+    collection interface, so they are returned as-is.
+    """
+    
+    name = "chroma"
+    
+    def __init__(self, persist_dir: str = CHROMA_PERSIST_DIR):
+        """
+        Initialize the ChromaDB client.
+        
+        Args:
+            persist_dir: ChromaDB persistence directory
+        """
+        import chromadb
+        from chromadb.config import Settings
+        
+        self.client = chromadb.Client(Settings(
+            persist_directory=persist_dir,
+            anonymized_telemetry=False
+        ))
+        logger.info(f"Initialized ChromaDB at {persist_dir}")
+    
+    def get_collection(self, name: str):
+        """Get an existing collection (raises if it does not exist)."""
+        return self.client.get_collection(name=name)
+    
+    def create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None):
+        """Create a new collection."""
+        return self.client.create_collection(name=name, metadata=metadata)
+    
+    def delete_collection(self, name: str):
+        """Delete a collection."""
+        self.client.delete_collection(name=name)
+    
+    def rename_collection(self, name: str, new_name: str):
+        """Rename a collection."""
+        self.client.get_collection(name=name).modify(name=new_name)
+
+
+class IVFQuantizer:
+    """
+    Inverted-file coarse quantizer: spherical k-means centroids plus one
+    posting list of row numbers per centroid. Queries score only the rows in
+    the nprobe lists closest to the query.
+    """
+    
+    def __init__(self, nlist: int, nprobe: int = NUMPY_IVF_NPROBE):
+        """
+        Initialize an untrained quantizer.
+        
+        Args:
+            nlist: Number of centroids
+            nprobe: Number of lists scanned per query
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._arrays: List[Optional[np.ndarray]] = []
+    
+    def train(self, vectors: np.ndarray, iterations: int = 10, seed: int = 0):
+        """
+        Fit centroids with spherical k-means on a sample of normalized vectors.
+        
+        Args:
+            vectors: (n, dim) normalized vectors
+            iterations: k-means iterations
+            seed: Random seed for the sample and initial centroids
+        """
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(vectors), self.nlist * IVF_TRAIN_ROWS_PER_LIST)
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))])
+        centroids = sample[rng.choice(len(sample), self.nlist, replace=False)].copy()
+        
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(self.nlist):
+                members = sample[assignments == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = normalize_rows(centroids)
+        
+        self.centroids = centroids
+        self._lists = [[] for _ in range(self.nlist)]
+        self._arrays = [None] * self.nlist
+    
+    def add(self, first_row: int, vectors: np.ndarray, batch_size: int = 8192):
+        """
+        Assign consecutive rows to their nearest centroid.
+        
+        Args:
+            first_row: Row number of vectors[0]
+            vectors: (n, dim) normalized vectors
+            batch_size: Rows assigned per matrix product
+        """
+        for start in range(0, len(vectors), batch_size):
+            batch = np.asarray(vectors[start:start + batch_size])
+            for offset, c in enumerate(np.argmax(batch @ self.centroids.T, axis=1)):
+                self._lists[c].append(first_row + start + offset)
+                self._arrays[c] = None
+    
+    def candidates(self, query: np.ndarray) -> np.ndarray:
+        """
+        Get candidate rows for a normalized query vector.
+        
+        Args:
+            query: (dim,) normalized query
+            
+        Returns:
+            np.ndarray: Row numbers in the nprobe closest lists
+        """
+        nprobe = min(self.nprobe, self.nlist)
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        arrays = []
+        for c in probes:
+            if self._arrays[c] is None:
+                self._arrays[c] = np.asarray(self._lists[c], dtype=np.int64)
+            arrays.append(self._arrays[c])
+        return np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+
+
+class NumpyCollection:
+    """
+    One case's vectors in an append-only float32 file, memory-mapped for search.
+    
+    Files (per generation, switched atomically by compaction):
+        collection.json   - collection metadata, dimension, current generation
+        vectors.<gen>.f32 - raw row-major float32 vectors, append-only
+        vectors.<gen>.<q> - quantized copy (float16/int8) when quantization is on
+        scales.<gen>.f32  - per-vector int8 scales
+        rows.<gen>.jsonl  - append-only log of add/update/delete operations
+    Deletes and re-upserts tombstone the old row; compaction rewrites the
+    live rows into a new generation.
+    
+    With quantization on, queries scan only the quantized matrix, so the
+    float32 file is paged in just for the re-ranked shortlist.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        ivf_min_rows: int = NUMPY_IVF_MIN_ROWS,
+        nprobe: int = NUMPY_IVF_NPROBE,
+        quantization: str = NUMPY_QUANTIZATION,
+        rerank_factor: int = NUMPY_RERANK_FACTOR
+    ):
+        """
+        Open (or create) a collection directory.
+        
+        Args:
+            name: Collection name
+            path: Collection directory
+            metadata: Collection metadata for a new collection
+            ivf_min_rows: Live rows at which the IVF quantizer is used (0 disables)
+            nprobe: IVF lists scanned per query
+            quantization: "none", "float16" or "int8" for a new collection
+                (existing collections keep the setting they were created with)
+            rerank_factor: Shortlist size multiplier for full-precision re-ranking
+        """
+        if quantization != "none" and quantization not in QUANTIZED_DTYPES:
+            raise ValueError(f"Unsupported quantization: {quantization}")
+        self.name = name
+        self.path = path
+        self.metadata = metadata or {}
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self.quantization = quantization
+        self.rerank_factor = max(1, rerank_factor)
+        self.dim: Optional[int] = None
+        self.generation = 0
+        
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._alive: List[bool] = []
+        self._row_of: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._quantized: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._alive_mask: Optional[np.ndarray] = None
+        self._ivf: Optional[IVFQuantizer] = None
+        
+        if os.path.exists(self._meta_path):
+            self._load()
+        else:
+            os.makedirs(path, exist_ok=True)
+            self._write_meta()
+    
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, "collection.json")
+    
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, f"vectors.{self.generation}.f32")
+    
+    @property
+    def _quantized_path(self) -> str:
+        return os.path.join(self.path, f"vectors.{self.generation}.{self.quantization}")
+    
+    @property
+    def _scales_path(self) -> str:
+        return os.path.join(self.path, f"scales.{self.generation}.f32")
+    
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.path, f"rows.{self.generation}.jsonl")
+    
+    def _write_meta(self):
+        """Atomically write collection.json."""
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "name": self.name,
+                "metadata": self.metadata,
+                "dim": self.dim,
+                "generation": self.generation,
+                "quantization": self.quantization
+            }, f)
+        os.replace(tmp_path, self._meta_path)
+    
+    def _load(self):
+        """Load collection metadata and replay the row log."""
+        with open(self._meta_path) as f:
+            meta = json.load(f)
+        self.metadata = meta.get("metadata") or {}
+        self.dim = meta.get("dim")
+        self.generation = meta.get("generation", 0)
+        self.quantization = meta.get("quantization", "none")
+        
+        if os.path.exists(self._log_path):
+            self._replay_log()
+        
+        # Vectors are written before their log entries; cut off any torn tail
+        # so the next append lines up with the log
+        if self.dim:
+            self._truncate_vectors(len(self._ids))
+        
+        logger.info(f"Loaded NumPy collection {self.name}: {self.count()} live rows, {len(self._ids)} total")
+    
+    def _replay_log(self):
+        """
+        Apply the row log to the in-memory state.
+        
+        A final line that is incomplete or cannot be decoded was torn by a
+        crash mid-append and is truncated away, so the next append starts on
+        a fresh line.
+        
+        Raises:
+            ValueError: If a line before the last cannot be decoded
+        """
+        with open(self._log_path, "rb") as f:
+            lines = f.readlines()
+        
+        valid_bytes = 0
+        for i, line in enumerate(lines):
+            last = i == len(lines) - 1
+            entry, torn = None, last and not line.endswith(b"\n")
+            if line.strip() and not torn:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    if not last:
+                        raise ValueError(f"Row log of {self.name} is corrupt at line {i + 1}")
+                    torn = True
+            if torn:
+                logger.warning(f"Truncating torn tail of {self._log_path}: {len(line)} bytes")
+                os.truncate(self._log_path, valid_bytes)
+                break
+            if entry is not None:
+                self._apply(entry)
+            valid_bytes += len(line)
+    
+    def _truncate_vectors(self, rows: int):
+        """
+        Truncate the vector files to rows rows.
+        
+        Args:
+            rows: Number of rows the row log holds
+            
+        Raises:
+            ValueError: If a vector file is shorter than the row log
+        """
+        files = [(self._vectors_path, self.dim * 4)]
+        if self.quantization != "none":
+            files.append((self._quantized_path, self.dim * np.dtype(QUANTIZED_DTYPES[self.quantization]).itemsize))
+            if self.quantization == "int8":
+                files.append((self._scales_path, 4))
+        for path, row_bytes in files:
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size < rows * row_bytes:
+                raise ValueError(f"Vector file {os.path.basename(path)} for {self.name} is shorter than its row log")
+            if size > rows * row_bytes:
+                logger.warning(f"Truncating torn tail of {path}: {size - rows * row_bytes} bytes")
+                os.truncate(path, rows * row_bytes)
+    
+    def _apply(self, entry: Dict[str, Any]):
+        """Apply one log entry to the in-memory state."""
+        op = entry["op"]
+        chunk_id = entry["id"]
+        if op == "add":
+            self._tombstone(chunk_id)
+            self._row_of[chunk_id] = len(self._ids)
+            self._ids.append(chunk_id)
+            self._documents.append(entry.get("document"))
+            self._metadatas.append(entry.get("metadata") or {})
+            self._alive.append(True)
+        elif op == "update":
+            row = self._row_of.get(chunk_id)
+            if row is None:
+                return
+            if entry.get("metadata") is not None:
+                self._metadatas[row] = {**self._metadatas[row], **entry["metadata"]}
+            if entry.get("document") is not None:
+                self._documents[row] = entry["document"]
+        elif op == "delete":
+            self._tombstone(chunk_id)
+    
+    def _tombstone(self, chunk_id: str):
+        """Mark a chunk's current row dead."""
+        row = self._row_of.pop(chunk_id, None)
+        if row is not None:
+            self._alive[row] = False
+            self._alive_mask = None
+    
+    def _append_log(self, entries: List[Dict[str, Any]]):
+        """Append entries to the row log and apply them."""
+        with open(self._log_path, "a") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        for entry in entries:
+            self._apply(entry)
+    
+    def _get_matrix(self) -> np.ndarray:
+        """Memory-map the vector file (cached until the next append)."""
+        if self._matrix is None:
+            if not self._ids:
+                return np.empty((0, self.dim or 0), dtype=np.float32)
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(len(self._ids), self.dim))
+        return self._matrix
+    
+    def _get_quantized(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Memory-map the quantized vectors and scales (cached until the next append)."""
+        if self._quantized is None:
+            dtype = QUANTIZED_DTYPES[self.quantization]
+            if not self._ids:
+                return np.empty((0, self.dim or 0), dtype=dtype), None
+            self._quantized = np.memmap(self._quantized_path, dtype=dtype, mode="r", shape=(len(self._ids), self.dim))
+            if self.quantization == "int8":
+                self._scales = np.memmap(self._scales_path, dtype=np.float32, mode="r", shape=(len(self._ids),))
+        return self._quantized, self._scales
+    
+    def _write_vectors(self, vectors: np.ndarray, mode: str = "ab"):
+        """Write float32 vectors and, if enabled, their quantized copy."""
+        with open(self._vectors_path, mode) as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        if self.quantization != "none":
+            quantized, scales = quantize(vectors, self.quantization)
+            with open(self._quantized_path, mode) as f:
+                f.write(quantized.tobytes())
+            if scales is not None:
+                with open(self._scales_path, mode) as f:
+                    f.write(scales.tobytes())
+        self._matrix = None
+        self._quantized = None
+        self._scales = None
+    
+    def _get_alive_mask(self) -> np.ndarray:
+        """Boolean mask of live rows (cached until the next delete)."""
+        if self._alive_mask is None or len(self._alive_mask) != len(self._alive):
+            self._alive_mask = np.array(self._alive, dtype=bool)
+        return self._alive_mask
+    
+    def _rows_for(self, ids: Optional[List[str]], where: Optional[Dict[str, Any]]) -> List[int]:
+        """Resolve live rows matching optional IDs and where-clause."""
+        if ids is not None:
+            rows = [self._row_of[chunk_id] for chunk_id in ids if chunk_id in self._row_of]
+        else:
+            rows = [row for row, alive in enumerate(self._alive) if alive]
+        if where:
+            rows = [row for row in rows if matches_where(self._metadatas[row], where)]
+        return rows
+    
+    def count(self) -> int:
+        """Number of live chunks."""
+        return len(self._row_of)
+    
+    def modify(self, metadata: Optional[Dict[str, Any]] = None):
+        """Replace the collection metadata."""
+        with self._lock:
+            if metadata is not None:
+                self.metadata = metadata
+                self._write_meta()
+    
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ):
+        """
+        Insert or replace chunks. Replaced chunks are tombstoned and appended.
+        
+        Args:
+            ids: Chunk IDs
+            embeddings: Embedding vectors (normalized on write)
+            documents: Optional chunk texts
+            metadatas: Optional chunk metadata
+            
+        Raises:
+            ValueError: If embeddings are missing or have the wrong dimension
+        """
+        if not ids:
+            return
+        if embeddings is None:
+            raise ValueError("NumPy backend requires embeddings on upsert")
+        vectors = normalize_rows(embeddings)
+        
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._write_meta()
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match collection dimension {self.dim}")
+            
+            first_row = len(self._ids)
+            self._write_vectors(vectors)
+            self._append_log([
+                {
+                    "op": "add",
+                    "id": chunk_id,
+                    "document": documents[i] if documents else None,
+                    "metadata": metadatas[i] if metadatas else {}
+                }
+                for i, chunk_id in enumerate(ids)
+            ])
+            if self._ivf is not None:
+                self._ivf.add(first_row, vectors)
+            
+            self._maybe_compact()
+    
+    def update(
+        self,
+        ids: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        documents: Optional[List[str]] = None
+    ):
+        """
+        Update metadata and/or text of existing chunks without touching vectors.
+        
+        Args:
+            ids: Chunk IDs
+            metadatas: Optional metadata, merged into the stored metadata
+            documents: Optional replacement texts
+        """
+        with self._lock:
+            self._append_log([
+                {
+                    "op": "update",
+                    "id": chunk_id,
+                    "metadata": metadatas[i] if metadatas else None,
+                    "document": documents[i] if documents else None
+                }
+                for i, chunk_id in enumerate(ids)
+                if chunk_id in self._row_of
+            ])
+    
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None):
+        """
+        Tombstone chunks by ID and/or where-clause.
+        
+        Args:
+            ids: Optional chunk IDs
+            where: Optional where-clause
+        """
+        with self._lock:
+            rows = self._rows_for(ids, where)
+            if not rows:
+                return
+            self._append_log([{"op": "delete", "id": self._ids[row]} for row in rows])
+            self._maybe_compact()
+    
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetch chunks by ID and/or where-clause, in ChromaDB's result format.
+        
+        Args:
+            ids: Optional chunk IDs
+            where: Optional where-clause
+            include: Fields to return ("documents", "metadatas", "embeddings")
+            limit: Optional maximum number of results
+            
+        Returns:
+            Dict with ids, documents, metadatas and embeddings (None when not included)
+        """
+        include = DEFAULT_INCLUDE if include is None else include
+        with self._lock:
+            rows = self._rows_for(ids, where)[:limit]
+            matrix = self._get_matrix() if "embeddings" in include else None
+            return {
+                "ids": [self._ids[row] for row in rows],
+                "documents": [self._documents[row] for row in rows] if "documents" in include else None,
+                "metadatas": [self._metadatas[row] for row in rows] if "metadatas" in include else None,
+                "embeddings": [matrix[row].tolist() for row in rows] if matrix is not None else None
+            }
+    
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Nearest-neighbour search by dot product on normalized vectors.
+        
+        Distances are squared L2 between unit vectors (2 - 2 * cosine), the
+        same scale as ChromaDB's default l2 space.
+        
+        Args:
+            query_embeddings: Query vectors
+            n_results: Results per query
+            where: Optional where-clause applied before the top-k cut
+            include: Fields to return
+            
+        Returns:
+            Dict of per-query lists: ids, documents, metadatas, distances
+        """
+        include = DEFAULT_INCLUDE + ["distances"] if include is None else include
+        queries = normalize_rows(query_embeddings)
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        
+        with self._lock:
+            matrix = self._get_matrix()
+            mask = self._get_alive_mask()
+            if where:
+                mask = mask & np.fromiter(
+                    (alive and matches_where(metadata, where) for alive, metadata in zip(self._alive, self._metadatas)),
+                    dtype=bool,
+                    count=len(self._alive)
+                )
+            ivf = self._get_ivf()
+            
+            for query in queries:
+                rows, scores = self._search(matrix, mask, ivf, query, n_results)
+                results["ids"].append([self._ids[row] for row in rows])
+                results["documents"].append([self._documents[row] for row in rows])
+                results["metadatas"].append([self._metadatas[row] for row in rows])
+                results["distances"].append([float(2.0 - 2.0 * score) for score in scores])
+        
+        for field in ("documents", "metadatas", "distances"):
+            if field not in include:
+                results[field] = None
+        return results
+    
+    def _search(
+        self,
+        matrix: np.ndarray,
+        mask: np.ndarray,
+        ivf: Optional[IVFQuantizer],
+        query: np.ndarray,
+        n_results: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top rows for one query, best first, with their float32 scores.
+        
+        Stage one scores candidates (IVF lists or every live row) on the
+        quantized vectors when quantization is on; stage two re-scores the
+        shortlist at full precision.
+        """
+        shortlist = n_results * self.rerank_factor if self.quantization != "none" else n_results
+        
+        candidates = None
+        if ivf is not None:
+            candidates = ivf.candidates(query)
+            candidates = candidates[mask[candidates]]
+            # Too few survivors after filtering: fall back to a full scan
+            if len(candidates) < n_results:
+                candidates = None
+        
+        if candidates is None:
+            # Full scan: one matrix-vector product over the whole mmap, dead rows masked out
+            k = min(shortlist, int(mask.sum()))
+            if k == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            scores = self._approx_scores(matrix, query)
+            scores[~mask] = -np.inf
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            k = min(shortlist, len(candidates))
+            scores = self._approx_scores(matrix, query, candidates)
+            top = candidates[np.argpartition(-scores, k - 1)[:k]]
+        
+        exact = matrix[top] @ query
+        order = np.argsort(-exact)[:n_results]
+        return top[order], exact[order]
+    
+    def _approx_scores(self, matrix: np.ndarray, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Dot-product scores from the search-time representation.
+        
+        Args:
+            matrix: Full-precision matrix (used when quantization is off)
+            query: (dim,) normalized query
+            rows: Optional candidate rows (all rows if None)
+            
+        Returns:
+            np.ndarray: Scores aligned with rows
+        """
+        if self.quantization == "none":
+            return (matrix if rows is None else matrix[rows]) @ query
+        
+        quantized, scales = self._get_quantized()
+        if rows is not None:
+            scores = quantized[rows].astype(np.float32) @ query
+            return scores * scales[rows] if scales is not None else scores
+        
+        # Upcast cache-sized blocks into one reused float32 buffer
+        scores = np.empty(len(quantized), dtype=np.float32)
+        buffer = np.empty((min(SCORE_BLOCK_ROWS, len(quantized)), quantized.shape[1]), dtype=np.float32)
+        for start in range(0, len(quantized), SCORE_BLOCK_ROWS):
+            block = quantized[start:start + SCORE_BLOCK_ROWS]
+            buffer[:len(block)] = block
+            np.dot(buffer[:len(block)], query, out=scores[start:start + len(block)])
+        if scales is not None:
+            scores *= scales
+        return scores
+    
+    def _get_ivf(self) -> Optional[IVFQuantizer]:
+        """Train the IVF quantizer on first use once the case is large enough."""
+        if not self.ivf_min_rows or self.count() < self.ivf_min_rows:
+            return None
+        if self._ivf is None:
+            nlist = int(min(4096, max(16, math.sqrt(self.count()))))
+            ivf = IVFQuantizer(nlist, self.nprobe)
+            matrix = self._get_matrix()
+            # Read only the training sample from the memory map, not every live row
+            live_rows = np.flatnonzero(self._get_alive_mask())
+            sample_size = min(len(live_rows), nlist * IVF_TRAIN_ROWS_PER_LIST)
+            sample_rows = np.sort(np.random.default_rng(0).choice(live_rows, sample_size, replace=False))
+            ivf.train(matrix[sample_rows])
+            ivf.add(0, matrix)
+            self._ivf = ivf
+            logger.info(f"Trained IVF quantizer for {self.name}: {nlist} lists, nprobe={self.nprobe}")
+        return self._ivf
+    
+    def _maybe_compact(self):
+        """Compact once tombstones exceed NUMPY_COMPACT_RATIO of all rows."""
+        dead = len(self._ids) - self.count()
+        if dead and dead >= NUMPY_COMPACT_RATIO * len(self._ids):
+            self.compact()
+    
+    def compact(self):
+        """
+        Rewrite live rows into a new generation of files, then switch
+        collection.json to it. A crash before the switch leaves the old
+        generation intact.
+        """
+        with self._lock:
+            live_rows = [row for row, alive in enumerate(self._alive) if alive]
+            old_paths = [self._vectors_path, self._quantized_path, self._scales_path, self._log_path]
+            matrix = self._get_matrix()
+            
+            self.generation += 1
+            for start in range(0, max(len(live_rows), 1), 8192):
+                self._write_vectors(matrix[live_rows[start:start + 8192]], mode="wb" if start == 0 else "ab")
+            with open(self._log_path, "w") as f:
+                for row in live_rows:
+                    f.write(json.dumps({
+                        "op": "add",
+                        "id": self._ids[row],
+                        "document": self._documents[row],
+                        "metadata": self._metadatas[row]
+                    }) + "\n")
+            self._write_meta()
+            
+            self._ids = [self._ids[row] for row in live_rows]
+            self._documents = [self._documents[row] for row in live_rows]
+            self._metadatas = [self._metadatas[row] for row in live_rows]
+            self._alive = [True] * len(live_rows)
+            self._row_of = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+            self._matrix = None
+            self._quantized = None
+            self._scales = None
+            self._alive_mask = None
+            self._ivf = None
+            
+            for path in old_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            logger.info(f"Compacted NumPy collection {self.name} to {len(live_rows)} rows")
+
+
+class NumpyBackend:
+    """
+    File-backed NumPy vector backend: one NumpyCollection directory per case.
+    """
+    
+    name = "numpy"
+    
+    def __init__(
+        self,
+        root: str = NUMPY_VECTOR_DIR,
+        ivf_min_rows: int = NUMPY_IVF_MIN_ROWS,
+        nprobe: int = NUMPY_IVF_NPROBE,
+        quantization: str = NUMPY_QUANTIZATION,
+        rerank_factor: int = NUMPY_RERANK_FACTOR
+    ):
+        """
+        Initialize the backend.
+        
+        Args:
+            root: Directory holding one sub-directory per collection
+            ivf_min_rows: Live rows at which collections use IVF (0 disables)
+            nprobe: IVF lists scanned per query
+            quantization: Vector storage for new collections ("none", "float16", "int8")
+            rerank_factor: Shortlist size multiplier for full-precision re-ranking
+        """
+        self.root = root
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        self._collections: Dict[str, NumpyCollection] = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        logger.info(f"Initialized NumPy vector backend at {root}")
+    
+    def _open(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> NumpyCollection:
+        collection = NumpyCollection(
+            name,
+            os.path.join(self.root, name),
+            metadata=metadata,
+            ivf_min_rows=self.ivf_min_rows,
+            nprobe=self.nprobe,
+            quantization=self.quantization,
+            rerank_factor=self.rerank_factor
+        )
+        self._collections[name] = collection
+        return collection
+    
+    def get_collection(self, name: str) -> NumpyCollection:
+        """
+        Get an existing collection.
+        
+        Raises:
+            ValueError: If the collection does not exist
+        """
+        with self._lock:
+            if name in self._collections:
+                return self._collections[name]
+            if not os.path.exists(os.path.join(self.root, name, "collection.json")):
+                raise ValueError(f"Collection {name} does not exist.")
+            return self._open(name)
+    
+    def create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> NumpyCollection:
+        """
+        Create a new collection.
+        
+        Raises:
+            ValueError: If the collection already exists
+        """
+        with self._lock:
+            if name in self._collections or os.path.exists(os.path.join(self.root, name)):
+                raise ValueError(f"Collection {name} already exists.")
+            return self._open(name, metadata)
+    
+    def delete_collection(self, name: str):
+        """Delete a collection and its files."""
+        with self._lock:
+            self._collections.pop(name, None)
+            path = os.path.join(self.root, name)
+            if not os.path.exists(path):
+                raise ValueError(f"Collection {name} does not exist.")
+            shutil.rmtree(path)
+    
+    def rename_collection(self, name: str, new_name: str):
+        """
+        Rename a collection by moving its directory.
+        
+        Raises:
+            ValueError: If the target name already exists
+        """
+        with self._lock:
+            new_path = os.path.join(self.root, new_name)
+            if os.path.exists(new_path):
+                raise ValueError(f"Collection {new_name} already exists.")
+            self._collections.pop(name, None)
+            os.rename(os.path.join(self.root, name), new_path)
+            collection = self._open(new_name)
+            collection._write_meta()
+
+
+def create_vector_backend(name: str = VECTOR_BACKEND):
+    """
+    Create the configured vector backend.
+    
+    Args:
+        name: "chroma" or "numpy"
+        
+    Returns:
+        ChromaBackend or NumpyBackend
+        
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if name == "chroma":
+        return ChromaBackend()
+    if name == "numpy":
+        return NumpyBackend()
+    raise ValueError(f"Unsupported vector backend: {name}")
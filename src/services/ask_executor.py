@@ -0,0 +1,230 @@
+"""
+Bounded executor for Ask AI requests.
+Retrieval and the Claude call are blocking, so they run on a dedicated thread
+pool instead of the event loop. Identical questions already in flight for
+the same case share one upstream call, and excess load is rejected instead
+of queueing without limit. Streamed answers go through the same pool and
+limits; a caller joining a stream in flight first receives the events
+produced so far.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Iterable, List, Optional
+import asyncio
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Concurrent upstream Ask AI calls (embedding + vector search + Claude)
+ASK_MAX_WORKERS = int(os.getenv("ASK_MAX_WORKERS", "8"))
+# Distinct questions running or queued before new ones are rejected
+ASK_MAX_PENDING = int(os.getenv("ASK_MAX_PENDING", "64"))
+
+
+class AskOverloadedError(Exception):
+    """Raised when too many distinct questions are already pending."""
+    pass
+
+
+def question_key(case_id: str, question: str, **params: Any) -> Hashable:
+    """
+    Build the coalescing key for a question: same case, same wording up to
+    case and whitespace, same request parameters.
+    
+    Args:
+        case_id: Case identifier
+        question: User's question
+        **params: Other request parameters (filters, top_k, ...)
+        
+    Returns:
+        Hashable key
+    """
+    normalized = " ".join(question.lower().split())
+    return (case_id, normalized, json.dumps(params, sort_keys=True, default=str))
+
+
+class _Broadcast:
+    """
+    Items of one streaming call, produced in a worker thread and replayed to
+    every subscriber on the event loop.
+    """
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        """
+        Initialize an empty broadcast.
+        
+        Args:
+            loop: Event loop the subscribers run on
+        """
+        self.loop = loop
+        self.items: List[Any] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+    
+    def pump(self, fn: Callable[..., Iterable[Any]], args: tuple, kwargs: Dict[str, Any]):
+        """Iterate fn(*args, **kwargs) in a worker thread, handing items to the loop."""
+        for item in fn(*args, **kwargs):
+            self.loop.call_soon_threadsafe(self._append, item)
+    
+    def _append(self, item: Any):
+        """Store an item and wake subscribers."""
+        self.items.append(item)
+        self._notify()
+    
+    def finish(self, error: Optional[BaseException]):
+        """Mark the stream complete, with the error that ended it, if any."""
+        self.finished = True
+        self.error = error
+        self._notify()
+    
+    def _notify(self):
+        """Wake the current waiters; later waits use a fresh event."""
+        self._changed.set()
+        self._changed = asyncio.Event()
+    
+    async def subscribe(self) -> AsyncIterator[Any]:
+        """
+        Yield every item from the start of the stream until it finishes.
+        
+        Raises:
+            Exception: The error that ended the stream, if any
+        """
+        position = 0
+        while True:
+            changed = self._changed
+            while position < len(self.items):
+                yield self.items[position]
+                position += 1
+            if self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            await changed.wait()
+
+
+class AskExecutor:
+    """
+    Runs blocking Ask AI calls on a bounded thread pool with request coalescing.
+    Must be used from a single event loop.
+    """
+    
+    def __init__(self, max_workers: int = ASK_MAX_WORKERS, max_pending: int = ASK_MAX_PENDING):
+        """
+        Initialize the executor.
+        
+        Args:
+            max_workers: Worker threads, i.e. concurrent upstream calls
+            max_pending: Distinct calls running or queued before rejecting
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ask")
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._broadcasts: Dict[Hashable, _Broadcast] = {}
+        self._stats = {"submitted": 0, "coalesced": 0, "rejected": 0, "completed": 0, "failed": 0}
+    
+    async def run(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run fn(*args, **kwargs) on the pool, or join an identical call in flight.
+        
+        Args:
+            key: Coalescing key (see question_key)
+            fn: Blocking callable
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+            
+        Returns:
+            The result of fn
+            
+        Raises:
+            AskOverloadedError: If max_pending distinct calls are already pending
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self._stats["coalesced"] += 1
+        else:
+            if len(self._inflight) >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise AskOverloadedError(f"{len(self._inflight)} questions already pending")
+            
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+            self._inflight[key] = future
+            self._stats["submitted"] += 1
+            future.add_done_callback(partial(self._finished, key))
+        
+        # A disconnected caller must not cancel the call others are waiting on
+        return await asyncio.shield(future)
+    
+    def stream(self, key: Hashable, fn: Callable[..., Iterable[Any]], *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        """
+        Run the blocking generator fn(*args, **kwargs) on the pool, or join an
+        identical stream in flight. Admission happens when this is called (on
+        the event loop), so an overloaded executor is reported before any
+        response is started.
+        
+        Args:
+            key: Coalescing key (see question_key); separate from run() keys
+            fn: Blocking generator function
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+            
+        Returns:
+            Async iterator over every item of the stream, from the first
+            
+        Raises:
+            AskOverloadedError: If max_pending distinct calls are already pending
+        """
+        key = ("stream", key)
+        broadcast = self._broadcasts.get(key)
+        if broadcast is not None:
+            self._stats["coalesced"] += 1
+        else:
+            if len(self._inflight) >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise AskOverloadedError(f"{len(self._inflight)} questions already pending")
+            
+            # Runs to the end even if every subscriber disconnects
+            loop = asyncio.get_running_loop()
+            broadcast = _Broadcast(loop)
+            future = loop.run_in_executor(self._executor, broadcast.pump, fn, args, kwargs)
+            self._inflight[key] = future
+            self._broadcasts[key] = broadcast
+            self._stats["submitted"] += 1
+            future.add_done_callback(partial(self._finished, key))
+        
+        return broadcast.subscribe()
+    
+    def _finished(self, key: Hashable, future: asyncio.Future):
+        """Remove a completed call from the in-flight table."""
+        broadcast = None
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+            broadcast = self._broadcasts.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self._stats["completed"] += 1
+        else:
+            self._stats["failed"] += 1
+        if broadcast is not None:
+            # Items were queued on the loop before the future completed
+            broadcast.finish(None if future.cancelled() else future.exception())
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Get executor counters.
+        
+        Returns:
+            Dict with submitted, coalesced, rejected, completed, failed and in_flight
+        """
+        return {**self._stats, "in_flight": len(self._inflight)}
+    
+    def shutdown(self):
+        """Stop accepting work and wait for running calls."""
+        self._executor.shutdown(wait=True)
+
+
+# Singleton instance
+ask_executor = AskExecutor()
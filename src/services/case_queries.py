@@ -0,0 +1,255 @@
+"""
+Case-wide timeline and witness queries.
+Filtering, ordering, pagination and aggregation run in SQL: timeline pages
+use keyset pagination on (event_date, id), and the witness summary groups
+mentions per canonical witness with only the first N mentions aggregated.
+Cursors are opaque URL-safe strings.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import date
+import base64
+import json
+import os
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Timeline page sizes
+TIMELINE_PAGE_SIZE = int(os.getenv("TIMELINE_PAGE_SIZE", "500"))
+TIMELINE_MAX_PAGE_SIZE = int(os.getenv("TIMELINE_MAX_PAGE_SIZE", "5000"))
+# Witness page sizes and mentions returned per witness (the count covers all mentions)
+WITNESS_PAGE_SIZE = int(os.getenv("WITNESS_PAGE_SIZE", "100"))
+WITNESS_MAX_PAGE_SIZE = int(os.getenv("WITNESS_MAX_PAGE_SIZE", "1000"))
+WITNESS_MENTIONS_PER_WITNESS = int(os.getenv("WITNESS_MENTIONS_PER_WITNESS", "20"))
+
+SIGNIFICANCE_LEVELS = ("critical", "important", "notable", "minor")
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+    pass
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last row on a page as an opaque cursor.
+    
+    Args:
+        values: JSON-serializable sort key values
+        
+    Returns:
+        URL-safe cursor string
+    """
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+    
+    Args:
+        cursor: Cursor string
+        size: Expected number of sort key values
+        
+    Returns:
+        Sort key values
+        
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise InvalidCursorError("Malformed cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError("Malformed cursor")
+    return values
+
+
+def timeline_page(
+    db,
+    case_id: str,
+    limit: int = TIMELINE_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    significance: Optional[Iterable[str]] = None
+) -> Dict[str, Any]:
+    """
+    Get one page of a case's timeline, ordered by date.
+    
+    Filters and the keyset condition run against the (case_id, event_date,
+    id) and (case_id, significance, event_date, id) indexes, so a page costs
+    the same at any depth.
+    
+    Args:
+        db: Database session
+        case_id: Case identifier
+        limit: Maximum events on the page
+        cursor: next_cursor from the previous page
+        start_date: Earliest event date (inclusive)
+        end_date: Latest event date (inclusive)
+        significance: Significance levels to include
+        
+    Returns:
+        Dict with events, next_cursor (None on the last page) and
+        total_count (matching events; first page only, else None)
+        
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    from sqlalchemy import func, tuple_
+    from src.models.database import AgentTimelineEvent
+    
+    filters = [AgentTimelineEvent.case_id == case_id]
+    if start_date:
+        filters.append(AgentTimelineEvent.event_date >= start_date)
+    if end_date:
+        filters.append(AgentTimelineEvent.event_date <= end_date)
+    if significance:
+        filters.append(AgentTimelineEvent.significance.in_(list(significance)))
+    
+    query = db.query(
+        AgentTimelineEvent.id,
+        AgentTimelineEvent.event_date,
+        AgentTimelineEvent.event_description,
+        AgentTimelineEvent.document_id,
+        AgentTimelineEvent.source_page,
+        AgentTimelineEvent.significance,
+        AgentTimelineEvent.created_by
+    ).filter(*filters)
+    if cursor:
+        last_date, last_id = decode_cursor(cursor, 2)
+        try:
+            after = (date.fromisoformat(last_date), uuid.UUID(last_id))
+        except (TypeError, ValueError):
+            raise InvalidCursorError("Malformed cursor")
+        query = query.filter(tuple_(AgentTimelineEvent.event_date, AgentTimelineEvent.id) > after)
+    
+    rows = query.order_by(AgentTimelineEvent.event_date, AgentTimelineEvent.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    events = [
+        {
+            "id": str(row.id),
+            "date": row.event_date.isoformat(),
+            "event": row.event_description,
+            "document_id": str(row.document_id) if row.document_id else None,
+            "source_page": row.source_page,
+            "significance": row.significance,
+            "created_by": row.created_by
+        }
+        for row in rows
+    ]
+    total = None
+    if cursor is None:
+        total = len(events) if not has_more else db.query(func.count(AgentTimelineEvent.id)).filter(*filters).scalar()
+    
+    return {
+        "events": events,
+        "next_cursor": encode_cursor(rows[-1].event_date.isoformat(), str(rows[-1].id)) if has_more else None,
+        "total_count": total
+    }
+
+
+def witness_summary(
+    db,
+    case_id: str,
+    limit: int = WITNESS_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    mentions_per_witness: int = WITNESS_MENTIONS_PER_WITNESS
+) -> Dict[str, Any]:
+    """
+    Get one page of a case's witnesses, most mentioned first.
+    
+    Mentions are grouped by canonical witness (by name for mentions not yet
+    linked to the registry). Each witness carries its total mention count,
+    the name variants seen and only its first mentions_per_witness mentions,
+    aggregated with jsonb_agg in the same query.
+    
+    Args:
+        db: Database session
+        case_id: Case identifier
+        limit: Maximum witnesses on the page
+        cursor: next_cursor from the previous page
+        mentions_per_witness: Mentions returned per witness (oldest first)
+        
+    Returns:
+        Dict with witnesses, next_cursor (None on the last page) and
+        total_count (witnesses; first page only, else None)
+        
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    from sqlalchemy import String, cast, func, tuple_
+    from sqlalchemy.dialects.postgresql import aggregate_order_by
+    from src.models.database import CaseWitness, WitnessMention
+    
+    witness_key = func.coalesce(cast(WitnessMention.witness_id, String), WitnessMention.witness_name)
+    ranked = db.query(
+        witness_key.label("witness_key"),
+        WitnessMention.witness_id,
+        WitnessMention.witness_name,
+        WitnessMention.role,
+        WitnessMention.document_id,
+        WitnessMention.context,
+        WitnessMention.page_number,
+        func.row_number().over(
+            partition_by=witness_key,
+            order_by=(WitnessMention.created_at, WitnessMention.id)
+        ).label("position")
+    ).filter(WitnessMention.case_id == case_id).subquery()
+    
+    mention_count = func.count()
+    mention = func.jsonb_build_object(
+        "document_id", ranked.c.document_id,
+        "context", ranked.c.context,
+        "page", ranked.c.page_number
+    )
+    query = db.query(
+        ranked.c.witness_key,
+        func.min(CaseWitness.canonical_name).label("canonical_name"),
+        func.min(ranked.c.witness_name).label("witness_name"),
+        func.coalesce(func.min(CaseWitness.role), func.min(ranked.c.role)).label("role"),
+        func.array_agg(ranked.c.witness_name.distinct()).label("names"),
+        mention_count.label("mention_count"),
+        func.jsonb_agg(aggregate_order_by(mention, ranked.c.position)).filter(
+            ranked.c.position <= mentions_per_witness
+        ).label("mentions")
+    ).outerjoin(
+        CaseWitness, CaseWitness.id == ranked.c.witness_id
+    ).group_by(ranked.c.witness_key)
+    if cursor:
+        last_count, last_key = decode_cursor(cursor, 2)
+        if not isinstance(last_count, int) or not isinstance(last_key, str):
+            raise InvalidCursorError("Malformed cursor")
+        query = query.having(tuple_(mention_count, ranked.c.witness_key) < (last_count, last_key))
+    
+    rows = query.order_by(mention_count.desc(), ranked.c.witness_key.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    witnesses = []
+    for row in rows:
+        name = row.canonical_name or row.witness_name
+        witnesses.append({
+            "witness_id": row.witness_key if row.canonical_name else None,
+            "name": name,
+            "role": row.role,
+            "aliases": sorted(alias for alias in row.names if alias != name),
+            "mention_count": row.mention_count,
+            "mentions": row.mentions or []
+        })
+    total = None
+    if cursor is None:
+        total = len(witnesses) if not has_more else db.query(
+            func.count(witness_key.distinct())
+        ).filter(WitnessMention.case_id == case_id).scalar()
+    
+    return {
+        "witnesses": witnesses,
+        "next_cursor": encode_cursor(rows[-1].mention_count, rows[-1].witness_key) if has_more else None,
+        "total_count": total
+    }
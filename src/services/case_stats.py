@@ -0,0 +1,204 @@
+"""
+Materialized per-case analysis statistics.
+Each case has one case_stats row holding document, hot document,
+privilege recommendation and document type counts. The row is updated in
+the same transaction that stores an analysis result, so dashboards read
+counts with a primary-key lookup instead of scanning analysis_results.
+Only the latest result per document is counted: re-analyzing a document
+replaces its previous contribution.
+"""
+from typing import Any, Dict, Optional
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Witnesses returned with case stats (most mentioned first, from the witness registry)
+CASE_STATS_TOP_WITNESSES = int(os.getenv("CASE_STATS_TOP_WITNESSES", "10"))
+
+UNKNOWN = "unknown"
+
+
+def result_keys(result) -> Dict[str, Optional[str]]:
+    """
+    Get the count keys an analysis result contributes to.
+    
+    Args:
+        result: AnalysisResult (or a row with the same columns)
+        
+    Returns:
+        dict: Stats column -> key, None where the result does not count
+    """
+    severity = None
+    if result.is_hot_doc:
+        severity = result.hot_doc_severity or UNKNOWN
+    return {
+        "document_types": result.document_type or UNKNOWN,
+        "privilege_recommendations": result.privilege_recommendation or UNKNOWN,
+        "hot_doc_severities": severity
+    }
+
+
+def apply_delta(stats, keys: Dict[str, Optional[str]], count: int) -> None:
+    """
+    Add count documents with the given keys to a stats row (negative to remove).
+    
+    JSONB columns are replaced rather than mutated so the change is persisted.
+    
+    Args:
+        stats: CaseStats row
+        keys: Output of result_keys
+        count: Number of documents to add
+    """
+    stats.document_count = (stats.document_count or 0) + count
+    if keys["hot_doc_severities"] is not None:
+        stats.hot_doc_count = (stats.hot_doc_count or 0) + count
+    
+    for column, key in keys.items():
+        if key is None:
+            continue
+        counts = dict(getattr(stats, column) or {})
+        counts[key] = counts.get(key, 0) + count
+        if counts[key] <= 0:
+            del counts[key]
+        setattr(stats, column, counts)
+
+
+class CaseStatsService:
+    """
+    Maintains and reads the case_stats rows.
+    """
+    
+    def _lock(self, db, case_id: str):
+        """Create the case's stats row if needed and lock it for this transaction."""
+        from sqlalchemy.dialects.postgresql import insert
+        from src.models.database import CaseStats
+        
+        db.execute(
+            insert(CaseStats.__table__).values(case_id=case_id).on_conflict_do_nothing(index_elements=["case_id"])
+        )
+        return db.query(CaseStats).filter(CaseStats.case_id == case_id).with_for_update().one()
+    
+    def record(self, db, result) -> None:
+        """
+        Fold a new analysis result into its case's stats, in the caller's
+        transaction.
+        
+        Call before adding the result to the session: the document's
+        previous latest result, if any, is looked up and its contribution
+        replaced. The stats row lock serializes concurrent updates per case.
+        
+        Args:
+            db: Database session (committed by the caller)
+            result: AnalysisResult about to be stored
+        """
+        from src.models.database import AnalysisResult
+        
+        stats = self._lock(db, result.case_id)
+        previous = db.query(
+            AnalysisResult.document_type,
+            AnalysisResult.privilege_recommendation,
+            AnalysisResult.is_hot_doc,
+            AnalysisResult.hot_doc_severity
+        ).filter(
+            AnalysisResult.case_id == result.case_id,
+            AnalysisResult.document_id == result.document_id
+        ).order_by(AnalysisResult.created_at.desc()).first()
+        
+        if previous:
+            apply_delta(stats, result_keys(previous), -1)
+        apply_delta(stats, result_keys(result), 1)
+    
+    def rebuild(self, db, case_id: str):
+        """
+        Recompute a case's stats from its stored results.
+        
+        Args:
+            db: Database session (committed by the caller)
+            case_id: Case identifier
+            
+        Returns:
+            CaseStats: The rebuilt row
+        """
+        from sqlalchemy import func
+        from src.models.database import AnalysisResult
+        
+        stats = self._lock(db, case_id)
+        latest = db.query(
+            AnalysisResult.document_type,
+            AnalysisResult.privilege_recommendation,
+            AnalysisResult.is_hot_doc,
+            AnalysisResult.hot_doc_severity
+        ).filter(
+            AnalysisResult.case_id == case_id
+        ).distinct(AnalysisResult.document_id).order_by(
+            AnalysisResult.document_id, AnalysisResult.created_at.desc()
+        ).subquery()
+        groups = db.query(
+            latest.c.document_type,
+            latest.c.privilege_recommendation,
+            latest.c.is_hot_doc,
+            latest.c.hot_doc_severity,
+            func.count()
+        ).group_by(
+            latest.c.document_type,
+            latest.c.privilege_recommendation,
+            latest.c.is_hot_doc,
+            latest.c.hot_doc_severity
+        ).all()
+        
+        stats.document_count = 0
+        stats.hot_doc_count = 0
+        stats.document_types = {}
+        stats.privilege_recommendations = {}
+        stats.hot_doc_severities = {}
+        for row in groups:
+            apply_delta(stats, result_keys(row), row[-1])
+        return stats
+    
+    def get(self, db, case_id: str, top_witnesses: int = CASE_STATS_TOP_WITNESSES) -> Dict[str, Any]:
+        """
+        Read a case's stats.
+        
+        Args:
+            db: Database session
+            case_id: Case identifier
+            top_witnesses: Number of most mentioned witnesses to include
+            
+        Returns:
+            dict: Counts, top witnesses and updated_at (zero counts for a
+                  case with no stored results)
+        """
+        from src.models.database import CaseStats, CaseWitness
+        
+        stats = db.query(CaseStats).filter(CaseStats.case_id == case_id).first()
+        witnesses = db.query(
+            CaseWitness.id,
+            CaseWitness.canonical_name,
+            CaseWitness.role,
+            CaseWitness.mention_count
+        ).filter(
+            CaseWitness.case_id == case_id
+        ).order_by(CaseWitness.mention_count.desc(), CaseWitness.id).limit(top_witnesses).all()
+        
+        return {
+            "document_count": stats.document_count if stats else 0,
+            "hot_doc_count": stats.hot_doc_count if stats else 0,
+            "hot_docs_by_severity": (stats.hot_doc_severities if stats else None) or {},
+            "privilege_recommendations": (stats.privilege_recommendations if stats else None) or {},
+            "document_types": (stats.document_types if stats else None) or {},
+            "top_witnesses": [
+                {
+                    "witness_id": str(witness.id),
+                    "name": witness.canonical_name,
+                    "role": witness.role,
+                    "mention_count": witness.mention_count
+                }
+                for witness in witnesses
+            ],
+            "updated_at": stats.updated_at if stats else None
+        }
+
+
+# Singleton instance
+case_stats = CaseStatsService()
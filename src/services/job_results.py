@@ -0,0 +1,186 @@
+"""
+Job results loading with column projection.
+Each results section (classification, metadata, privilege, ...) maps to the
+analysis_results columns it is built from. Jobs and results are loaded in
+one joined query that selects only the columns of the requested sections,
+so list views asking for classification and hot-doc flags never read the
+large TEXT/JSONB columns.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Maximum job IDs per batch results request
+RESULTS_BATCH_MAX_JOBS = int(os.getenv("RESULTS_BATCH_MAX_JOBS", "500"))
+
+# Results section -> analysis_results attributes it is built from
+RESULT_SECTIONS = {
+    "classification": ("document_type", "classification_confidence", "classification_reasoning", "document_sub_type"),
+    "metadata": ("document_metadata",),
+    "privilege": ("privilege_flags", "privilege_confidence", "privilege_reasoning", "privilege_recommendation"),
+    "hot_doc": ("is_hot_doc", "hot_doc_score", "hot_doc_severity", "hot_doc_data"),
+    "analysis": ("summary", "key_facts", "legal_issues", "draft_narrative", "evidence_gaps"),
+    "cross_references": ("cross_references",)
+}
+
+READY_STATUSES = ("completed", "failed")
+
+
+class UnknownFieldError(ValueError):
+    """Raised when a fields projection names an unknown results section."""
+    pass
+
+
+def parse_fields(fields: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """
+    Parse a fields projection into results sections.
+    
+    Args:
+        fields: Section names, or comma-separated strings of them; None or
+                empty for every section
+                
+    Returns:
+        tuple: Requested sections, in response order
+        
+    Raises:
+        UnknownFieldError: If a name is not a results section
+    """
+    if isinstance(fields, str):
+        fields = [fields]
+    names = {name.strip() for value in fields or [] for name in value.split(",") if name.strip()}
+    unknown = names - set(RESULT_SECTIONS)
+    if unknown:
+        raise UnknownFieldError(
+            f"Unknown fields: {', '.join(sorted(unknown))}. Valid fields: {', '.join(RESULT_SECTIONS)}"
+        )
+    return tuple(section for section in RESULT_SECTIONS if not names or section in names)
+
+
+def load_results(db, job_ids: List[str], sections: Iterable[str]) -> Dict[str, Any]:
+    """
+    Load jobs and their results in one joined query.
+    
+    Args:
+        db: Database session
+        job_ids: Job identifiers
+        sections: Results sections to load columns for (from parse_fields)
+        
+    Returns:
+        dict: Job ID -> row with job columns, result_id (None when the job
+              has no stored result) and the sections' result columns; jobs
+              that do not exist are absent
+    """
+    from src.models.database import AnalysisJob, AnalysisResult
+    
+    columns = [
+        getattr(AnalysisResult, attribute).label(attribute)
+        for section in sections
+        for attribute in RESULT_SECTIONS[section]
+    ]
+    rows = db.query(
+        AnalysisJob.id,
+        AnalysisJob.case_id,
+        AnalysisJob.status,
+        AnalysisJob.started_at,
+        AnalysisJob.completed_at,
+        AnalysisResult.id.label("result_id"),
+        *columns
+    ).outerjoin(
+        AnalysisResult, AnalysisResult.job_id == AnalysisJob.id
+    ).filter(
+        AnalysisJob.id.in_(job_ids)
+    ).order_by(AnalysisJob.id, AnalysisResult.created_at.desc()).all()
+    
+    results = {}
+    for row in rows:
+        # Latest result wins if a job stored more than one
+        results.setdefault(str(row.id), row)
+    return results
+
+
+def build_response(row, sections: Iterable[str]):
+    """
+    Build a ResultsResponse from a load_results row.
+    
+    Args:
+        row: Row from load_results
+        sections: Results sections to include (the ones loaded)
+        
+    Returns:
+        ResultsResponse: Requested sections filled in, others None
+    """
+    from src.models.schemas import (
+        ResultsResponse, ClassificationResult, MetadataResult, PrivilegeResult,
+        HotDocResult, AnalysisResult, CrossReferenceResult
+    )
+    
+    sections = set(sections)
+    response = ResultsResponse(
+        job_id=str(row.id),
+        case_id=str(row.case_id),
+        status=row.status,
+        started_at=row.started_at,
+        completed_at=row.completed_at,
+        errors=[]
+    )
+    
+    # Add classification results
+    if "classification" in sections and row.document_type:
+        response.classification = ClassificationResult(
+            document_type=row.document_type,
+            confidence=row.classification_confidence or 0.0,
+            reasoning=row.classification_reasoning or "",
+            sub_type=row.document_sub_type
+        )
+    
+    # Add metadata results
+    if "metadata" in sections and row.document_metadata:
+        metadata = row.document_metadata if isinstance(row.document_metadata, dict) else {}
+        response.metadata = MetadataResult(
+            dates=metadata.get("dates", []),
+            people=metadata.get("people", []),
+            entities=metadata.get("entities", []),
+            locations=metadata.get("locations", [])
+        )
+    
+    # Add privilege results
+    if "privilege" in sections and row.privilege_flags:
+        response.privilege = PrivilegeResult(
+            flags=row.privilege_flags,
+            confidence=row.privilege_confidence or 0.0,
+            reasoning=row.privilege_reasoning or "",
+            recommendation=row.privilege_recommendation or "review_required",
+            excerpts=[]
+        )
+    
+    # Add hot doc results
+    if "hot_doc" in sections:
+        response.hot_doc = HotDocResult(
+            is_hot_doc=row.is_hot_doc,
+            score=row.hot_doc_score or 0.0,
+            severity=row.hot_doc_severity or "low",
+            flags=row.hot_doc_data.get("flags", []) if row.hot_doc_data else []
+        )
+    
+    # Add analysis results
+    if "analysis" in sections and row.summary:
+        response.analysis = AnalysisResult(
+            summary=row.summary,
+            key_facts=row.key_facts or [],
+            legal_issues=row.legal_issues or [],
+            draft_narrative=row.draft_narrative or "",
+            evidence_gaps=row.evidence_gaps or []
+        )
+    
+    # Add cross-reference results
+    if "cross_references" in sections and row.cross_references:
+        response.cross_references = CrossReferenceResult(
+            related_documents=row.cross_references.get("related_docs", []),
+            timeline_events=row.cross_references.get("timeline", []),
+            witness_mentions=row.cross_references.get("witnesses", []),
+            consistency_flags=row.cross_references.get("consistency_flags", [])
+        )
+    
+    return response
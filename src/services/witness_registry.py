@@ -0,0 +1,411 @@
+"""
+Incremental per-case witness registry.
+Resolves each witness name to a canonical case witness as mentions are
+stored: names are normalized ("SMITH, JOHN" -> "john smith"), candidates
+are blocked by the Soundex code of the surname, and a name joins an existing
+witness when surname and given names are compatible ("J. Smith", "John
+Smith", "Mike"/"Michael"). Mentions carry the canonical witness_id, so case
+witness maps aggregate over it in SQL.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from difflib import SequenceMatcher
+import re
+import unicodedata
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Minimum similarity for surnames/given names that differ but share a Soundex code ("Smyth"/"Smith")
+NAME_SIMILARITY = 0.8
+
+TITLES = {"mr", "mrs", "ms", "miss", "dr", "judge", "justice", "hon", "prof", "rev", "sir", "atty", "det", "officer"}
+SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "esq", "phd", "md", "jd", "cpa", "pe", "ret"}
+
+# Common nicknames, mapped to the given name they stand for
+NICKNAMES = {
+    "bill": "william", "will": "william", "billy": "william", "bob": "robert", "rob": "robert", "bobby": "robert",
+    "mike": "michael", "mick": "michael", "jim": "james", "jimmy": "james", "tom": "thomas", "tommy": "thomas",
+    "dick": "richard", "rick": "richard", "rich": "richard", "dave": "david", "dan": "daniel", "danny": "daniel",
+    "joe": "joseph", "chris": "christopher", "matt": "matthew", "steve": "steven", "tony": "anthony",
+    "ed": "edward", "ted": "edward", "andy": "andrew", "alex": "alexander", "sam": "samuel", "ben": "benjamin",
+    "nick": "nicholas", "pat": "patricia", "liz": "elizabeth", "beth": "elizabeth", "kate": "katherine",
+    "katie": "katherine", "jen": "jennifer", "jenny": "jennifer", "sue": "susan", "meg": "margaret",
+    "peggy": "margaret", "debbie": "deborah", "jon": "jonathan"
+}
+
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+    "l": "4", **dict.fromkeys("mn", "5"), "r": "6"
+}
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """
+    Normalize a person's name for matching.
+    
+    Strips accents, punctuation, titles and suffixes, puts "Last, First"
+    names in "first last" order and drops trailing credentials after a
+    comma ("John Smith, Esq.").
+    
+    Args:
+        name: Raw name
+        
+    Returns:
+        Lower-case space-separated tokens, or "" if nothing is left
+    """
+    if not name:
+        return ""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    parts = [part.strip() for part in name.split(",") if part.strip()]
+    if len(parts) >= 2:
+        rest = [part for part in parts[1:] if part.lower().strip(". ") not in SUFFIXES]
+        # "Smith, John" (single-word surname first) vs "John Smith, CEO"
+        name = " ".join(rest + [parts[0]]) if rest and " " not in parts[0] else parts[0]
+    tokens = re.findall(r"[a-z]+", name.lower().replace("'", "").replace("-", ""))
+    while tokens and tokens[0] in TITLES:
+        tokens = tokens[1:]
+    tokens = [token for token in tokens if token not in SUFFIXES]
+    return " ".join(tokens)
+
+
+def display_name(name: str) -> str:
+    """
+    Clean a raw name for display: "SMITH, JOHN" -> "John Smith".
+    
+    Args:
+        name: Raw name
+        
+    Returns:
+        Display form, in title case when the raw name was all upper or lower case
+    """
+    parts = [part.strip() for part in name.split(",") if part.strip()]
+    if len(parts) >= 2:
+        rest = [part for part in parts[1:] if part.lower().strip(". ") not in SUFFIXES]
+        name = " ".join(rest + [parts[0]]) if rest and " " not in parts[0] else parts[0]
+    name = " ".join(name.split())
+    if name.isupper() or name.islower():
+        name = name.title()
+    return name
+
+
+def soundex(word: str) -> str:
+    """
+    American Soundex code of a word ("smith" -> "S530").
+    
+    Args:
+        word: Lower-case word
+        
+    Returns:
+        Four-character code, or "" for an empty word
+    """
+    if not word:
+        return ""
+    code = word[0].upper()
+    previous = SOUNDEX_CODES.get(word[0], "")
+    for char in word[1:]:
+        digit = SOUNDEX_CODES.get(char, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # h and w do not separate letters with the same code; vowels do
+        if char not in "hw":
+            previous = digit
+    return code.ljust(4, "0")
+
+
+def block_key(normalized: str) -> str:
+    """
+    Blocking key for a normalized name: the Soundex code of its surname.
+    
+    Args:
+        normalized: Output of normalize_name
+        
+    Returns:
+        Blocking key, or "" for an empty name
+    """
+    tokens = normalized.split()
+    return soundex(tokens[-1]) if tokens else ""
+
+
+def _similar(a: str, b: str) -> float:
+    """Similarity of two name tokens (1.0 when equal)."""
+    return 1.0 if a == b else SequenceMatcher(None, a, b).ratio()
+
+
+def _given_score(a: str, b: str) -> float:
+    """Compatibility of two given names: exact, initial, nickname or near spelling."""
+    if a == b:
+        return 1.0
+    if len(a) == 1 or len(b) == 1:
+        return 0.9 if a[0] == b[0] else 0.0
+    if NICKNAMES.get(a, a) == NICKNAMES.get(b, b):
+        return 0.95
+    similarity = _similar(a, b)
+    return similarity if similarity >= NAME_SIMILARITY else 0.0
+
+
+def match_score(a: str, b: str) -> Tuple[float, bool]:
+    """
+    Score whether two normalized names can refer to the same person.
+    
+    Args:
+        a: Normalized name
+        b: Normalized name
+        
+    Returns:
+        (score in [0, 1], 0 when incompatible; whether the match is weak
+        because one name is a surname only)
+    """
+    a_tokens, b_tokens = a.split(), b.split()
+    if not a_tokens or not b_tokens:
+        return 0.0, False
+    
+    surname = _similar(a_tokens[-1], b_tokens[-1])
+    if surname < 1.0 and (surname < NAME_SIMILARITY or soundex(a_tokens[-1]) != soundex(b_tokens[-1])):
+        return 0.0, False
+    if len(a_tokens) == 1 or len(b_tokens) == 1:
+        return surname * 0.6, True
+    
+    given = _given_score(a_tokens[0], b_tokens[0])
+    # Conflicting middle names or initials ("John A. Smith" vs "John B. Smith")
+    if len(a_tokens) > 2 and len(b_tokens) > 2 and a_tokens[1][0] != b_tokens[1][0]:
+        return 0.0, False
+    return surname * given, False
+
+
+def completeness(normalized: str) -> Tuple[int, int]:
+    """How complete a name is, for choosing the canonical form: full-word tokens, then length."""
+    tokens = normalized.split()
+    return sum(1 for token in tokens if len(token) > 1), len(normalized)
+
+
+class WitnessIndex:
+    """
+    In-memory blocked index of a case's witnesses.
+    
+    Entries are any objects with canonical_name, normalized_name, block_key,
+    role, aliases and mention_count attributes (CaseWitness rows, or plain
+    objects in tests).
+    """
+    
+    def __init__(self):
+        self.blocks: Dict[str, List[Any]] = {}
+    
+    def add(self, witness: Any):
+        """
+        Add a witness to its block.
+        
+        Args:
+            witness: Witness with a normalized_name
+        """
+        self.blocks.setdefault(block_key(witness.normalized_name), []).append(witness)
+    
+    def rekey(self, witness: Any, old_normalized: str):
+        """
+        Move a witness after its normalized name changed.
+        
+        Args:
+            witness: Witness whose normalized_name was updated
+            old_normalized: Its previous normalized name
+        """
+        block = self.blocks.get(block_key(old_normalized), [])
+        if witness in block:
+            block.remove(witness)
+        self.add(witness)
+    
+    def match(self, normalized: str) -> Optional[Any]:
+        """
+        Find the witness a normalized name refers to.
+        
+        A surname-only name matches only when exactly one witness has a
+        compatible surname, and an ambiguous name ("J. Smith" with both John
+        and Jane Smith known) matches nothing.
+        
+        Args:
+            normalized: Output of normalize_name
+            
+        Returns:
+            The matching witness, or None
+        """
+        scored = []
+        for witness in self.blocks.get(block_key(normalized), []):
+            if witness.normalized_name == normalized:
+                return witness
+            score, weak = match_score(normalized, witness.normalized_name)
+            if score > 0:
+                scored.append((score, weak, witness))
+        if not scored:
+            return None
+        
+        strong = sorted((item for item in scored if not item[1]), key=lambda item: item[0], reverse=True)
+        if strong:
+            if len(strong) > 1 and strong[1][0] == strong[0][0]:
+                return None
+            return strong[0][2]
+        return scored[0][2] if len(scored) == 1 else None
+    
+    def resolve(self, name: str, role: Optional[str], mentions: int, create: Callable[[str, str, Optional[str]], Any]) -> Any:
+        """
+        Resolve a name to a witness, creating one when nothing matches.
+        
+        A matched witness records the new name form as an alias, and takes it
+        as its canonical name when it is more complete ("J. Smith" becomes
+        "John Smith").
+        
+        Args:
+            name: Raw witness name (must normalize to a non-empty name)
+            role: Role reported for this mention
+            mentions: Mentions to add to the witness's count
+            create: Factory for a new witness, called with (display name,
+                    normalized name, role)
+                    
+        Returns:
+            The resolved witness
+        """
+        normalized = normalize_name(name)
+        witness = self.match(normalized)
+        if witness is None:
+            witness = create(display_name(name), normalized, role)
+            self.add(witness)
+        else:
+            self._merge(witness, name, normalized, role)
+        witness.mention_count = (witness.mention_count or 0) + mentions
+        return witness
+    
+    def _merge(self, witness: Any, name: str, normalized: str, role: Optional[str]):
+        """Record a new name form on an existing witness."""
+        aliases = list(witness.aliases or [])
+        display = display_name(name)
+        if display != witness.canonical_name and display not in aliases:
+            aliases.append(display)
+        taken = any(
+            other is not witness and other.normalized_name == normalized
+            for other in self.blocks.get(block_key(normalized), [])
+        )
+        if completeness(normalized) > completeness(witness.normalized_name) and not taken:
+            old_normalized = witness.normalized_name
+            aliases = [alias for alias in aliases if alias != display]
+            if witness.canonical_name not in aliases:
+                aliases.append(witness.canonical_name)
+            witness.canonical_name = display
+            witness.normalized_name = normalized
+            witness.block_key = block_key(normalized)
+            self.rekey(witness, old_normalized)
+        witness.aliases = aliases
+        if role and not witness.role:
+            witness.role = role
+
+
+def witness_appearances(witness: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Get the appearances a witness entry is stored and counted with.
+    
+    Args:
+        witness: Cross-reference witness entry
+        
+    Returns:
+        list: The entry's appearances, or one without context or page when
+              none are listed (the witness was still mentioned once)
+    """
+    return list(witness.get("appearances") or []) or [{}]
+
+
+class WitnessRegistry:
+    """
+    Resolves witness names to canonical case witnesses in the database.
+    """
+    
+    def _release_document(self, db, case_id: str, document_id: str) -> None:
+        """Delete a document's stored mentions and subtract them from their witnesses' counts."""
+        from sqlalchemy import func
+        from src.models.database import CaseWitness, WitnessMention
+        
+        counts = dict(db.query(WitnessMention.witness_id, func.count()).filter(
+            WitnessMention.case_id == case_id,
+            WitnessMention.document_id == document_id,
+            WitnessMention.witness_id.isnot(None)
+        ).group_by(WitnessMention.witness_id).all())
+        if counts:
+            for row in db.query(CaseWitness).filter(CaseWitness.id.in_(list(counts))):
+                row.mention_count = max((row.mention_count or 0) - counts[row.id], 0)
+        
+        db.query(WitnessMention).filter(
+            WitnessMention.case_id == case_id,
+            WitnessMention.document_id == document_id
+        ).delete(synchronize_session=False)
+    
+    def resolve(
+        self,
+        db,
+        case_id: str,
+        witnesses: Iterable[Dict[str, Any]],
+        document_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Assign each witness name a canonical CaseWitness, creating or updating
+        registry rows in the caller's transaction.
+        
+        Only the blocks the document's names fall into are loaded, and
+        registry updates are serialized per case with a transaction-level
+        advisory lock, so concurrent analyses of the same case cannot create
+        duplicate witnesses. When document_id is given, the document's
+        previously stored mentions are deleted and subtracted from the
+        witness counts first, so re-analyzing a document replaces its
+        contribution; the caller then stores one WitnessMention per counted
+        appearance (see witness_appearances).
+        
+        Args:
+            db: Database session (committed by the caller)
+            case_id: Case identifier
+            witnesses: Cross-reference witness entries with name, role and
+                       appearances (or a mention_count)
+            document_id: Document whose mentions are about to be stored
+            
+        Returns:
+            dict: Raw witness name -> CaseWitness
+        """
+        from sqlalchemy import text
+        from src.models.database import CaseWitness
+        
+        entries = [witness for witness in witnesses if normalize_name(witness.get("name"))]
+        if not entries and document_id is None:
+            return {}
+        
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:case_id))"), {"case_id": str(case_id)})
+        if document_id is not None:
+            self._release_document(db, case_id, document_id)
+        if not entries:
+            return {}
+        
+        keys = {block_key(normalize_name(witness["name"])) for witness in entries}
+        index = WitnessIndex()
+        for row in db.query(CaseWitness).filter(CaseWitness.case_id == case_id, CaseWitness.block_key.in_(keys)):
+            index.add(row)
+        
+        def create(display: str, normalized: str, role: Optional[str]) -> CaseWitness:
+            row = CaseWitness(
+                id=uuid.uuid4(),
+                case_id=case_id,
+                canonical_name=display,
+                normalized_name=normalized,
+                block_key=block_key(normalized),
+                role=role,
+                aliases=[],
+                mention_count=0
+            )
+            db.add(row)
+            return row
+        
+        resolved = {}
+        for witness in entries:
+            mentions = witness.get("mention_count") or len(witness_appearances(witness))
+            resolved[witness["name"]] = index.resolve(witness["name"], witness.get("role"), mentions, create)
+        
+        logger.info(f"Resolved {len(entries)} witness names to {len({id(row) for row in resolved.values()})} case witnesses")
+        return resolved
+
+
+# Singleton instance
+witness_registry = WitnessRegistry()
@@ -1,6 +1,8 @@
 """
 LangGraph workflow orchestration for the document analysis pipeline.
-Coordinates all 6 agents in sequence.
+Coordinates all 6 agents in sequence. In "fused" mode Agents 2-4 share a
+single call (see FusedAnalyzer). A routing step after the classifier skips
+or downgrades agents for low-value documents (see routing.py).
 """
 from langgraph.graph import StateGraph, END
 from src.workflows.state import PipelineState
@@ -10,11 +12,31 @@ from src.agents.privilege_checker import PrivilegeChecker
 from src.agents.hot_doc_detector import HotDocDetector
 from src.agents.content_analyzer import ContentAnalyzer
 from src.agents.cross_reference import CrossReferenceEngine
+from src.agents.fused_analyzer import FusedAnalyzer
+from src.workflows.routing import route_document, skipped_outputs
 import logging
+import os
 from datetime import datetime
+from typing import Optional, List
 
 logger = logging.getLogger(__name__)
 
+PIPELINE_MODES = ("per_agent", "fused")
+# "per_agent": one call per agent; "fused": Agents 2-4 in one call
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "per_agent")
+# Model for downgraded agents on low-value documents
+MODEL_LIGHT = os.getenv("MODEL_LIGHT", "us.anthropic.claude-3-5-haiku-20241022-v1:0")
+
+# Routing agent name -> graph node
+AGENT_NODES = {
+    "metadata": "extract_metadata",
+    "privilege": "check_privilege",
+    "hot_doc": "detect_hot_docs",
+    "content": "analyze_content",
+    "cross_reference": "cross_reference"
+}
+FUSED_AGENTS = ("metadata", "privilege", "hot_doc")
+
 
 # Agent instances (singleton pattern)
 _classifier = None
@@ -23,6 +45,8 @@ _privilege_checker = None
 _hot_doc_detector = None
 _content_analyzer = None
 _cross_reference_engine = None
+_fused_analyzer = None
+_light_content_analyzer = None
 
 
 def get_agents(rag_retriever=None):
@@ -61,6 +85,79 @@ def get_agents(rag_retriever=None):
     )
 
 
+def get_fused_analyzer() -> FusedAnalyzer:
+    """
+    Get or create the fused Agents 2-4 instance.
+    
+    Returns:
+        FusedAnalyzer: Shares the individual agents for parsing and fallback
+    """
+    global _fused_analyzer
+    
+    if _fused_analyzer is None:
+        _, metadata_extractor, privilege_checker, hot_doc_detector, *_ = get_agents()
+        _fused_analyzer = FusedAnalyzer(metadata_extractor, privilege_checker, hot_doc_detector)
+    
+    return _fused_analyzer
+
+
+def get_light_content_analyzer() -> ContentAnalyzer:
+    """
+    Get or create the content analyzer used for downgraded documents.
+    
+    Returns:
+        ContentAnalyzer: Running on MODEL_LIGHT
+    """
+    global _light_content_analyzer
+    
+    if _light_content_analyzer is None:
+        _light_content_analyzer = ContentAnalyzer(model_id=MODEL_LIGHT)
+    
+    return _light_content_analyzer
+
+
+def models_used(state: dict) -> dict:
+    """
+    Record which model ran each agent for a job, and the routing decision.
+    
+    Args:
+        state: Final pipeline state
+        
+    Returns:
+        dict: Agent name -> model ID, "skipped" or "local_prescreen", plus
+              analysis_mode, routing and the privilege pre-screen outcome
+    """
+    classifier, metadata_extractor, privilege_checker, hot_doc_detector, content_analyzer, cross_reference_engine = get_agents()
+    routing = state.get("routing") or {}
+    models = {
+        "classifier": classifier.model_id,
+        "metadata": metadata_extractor.model_id,
+        "privilege": privilege_checker.model_id,
+        "hot_doc": hot_doc_detector.model_id,
+        "content": content_analyzer.model_id,
+        "cross_reference": cross_reference_engine.model_id
+    }
+    if state.get("analysis_mode") == "fused":
+        for agent in FUSED_AGENTS:
+            models[agent] = get_fused_analyzer().model_id
+    if "content" in routing.get("downgrade", []):
+        models["content"] = MODEL_LIGHT
+    screen = state.get("privilege_screen") or {}
+    if screen.get("fast_path"):
+        models["privilege"] = "local_prescreen"
+    for agent in routing.get("skip", []):
+        models[agent] = "skipped"
+    
+    return {
+        **models,
+        "analysis_mode": state.get("analysis_mode"),
+        "routing": {key: routing.get(key) for key in ("tier", "reasons", "signals")},
+        "privilege_screen": {
+            key: screen.get(key) for key in ("candidate", "hit_count", "fast_path", "needs_sampling", "sampled")
+        } if screen else None
+    }
+
+
 def classify_document(state: PipelineState) -> PipelineState:
     """
     Agent 1: Classify the document type.
@@ -93,6 +190,79 @@ def classify_document(state: PipelineState) -> PipelineState:
         return state
 
 
+def make_route_node(mode: str):
+    """
+    Build the routing node for a pipeline mode.
+    
+    Args:
+        mode: "per_agent" or "fused"
+        
+    Returns:
+        Node function that records the routing decision, fills in the
+        outputs of skipped agents and lists the graph nodes to skip
+    """
+    def route(state: PipelineState) -> PipelineState:
+        """
+        Pre-filter: decide which agents this document needs.
+        """
+        try:
+            decision = route_document(state)
+            skipped = {AGENT_NODES[agent] for agent in decision["skip"]}
+            if mode == "fused":
+                # Fuse only when all of Agents 2-4 run, otherwise run the survivors individually
+                if any(agent in decision["skip"] for agent in FUSED_AGENTS):
+                    skipped.add("fused_analysis")
+                    state["analysis_mode"] = "per_agent"
+                else:
+                    skipped.update(AGENT_NODES[agent] for agent in FUSED_AGENTS)
+            decision["skipped_nodes"] = sorted(skipped)
+            
+            state["routing"] = decision
+            state.update(skipped_outputs(decision))
+            
+            logger.info(
+                f"[{state['job_id']}] Routing: tier={decision['tier']}, "
+                f"skip={decision['skip']}, downgrade={decision['downgrade']} ({'; '.join(decision['reasons'])})"
+            )
+            return state
+            
+        except Exception as e:
+            # Routing is an optimization: on failure run everything
+            logger.error(f"[{state['job_id']}] Routing failed, running full pipeline: {str(e)}")
+            skipped_nodes = [AGENT_NODES[agent] for agent in FUSED_AGENTS] if mode == "fused" else []
+            state["routing"] = {
+                "tier": "full",
+                "skip": [],
+                "downgrade": [],
+                "reasons": [f"routing error: {str(e)}"],
+                "signals": {},
+                "skipped_nodes": skipped_nodes
+            }
+            return state
+    
+    return route
+
+
+def make_router(candidates: List[str]):
+    """
+    Build the conditional-edge function leaving a node.
+    
+    Args:
+        candidates: Nodes that may follow, in execution order
+        
+    Returns:
+        Function mapping state to the first candidate not skipped by routing
+    """
+    def next_node(state: PipelineState) -> str:
+        skipped = set((state.get("routing") or {}).get("skipped_nodes", []))
+        for node in candidates:
+            if node not in skipped:
+                return node
+        return candidates[-1]
+    
+    return next_node
+
+
 def extract_metadata(state: PipelineState) -> PipelineState:
     """
     Agent 2: Extract metadata (dates, people, entities, locations).
@@ -186,6 +356,37 @@ def detect_hot_docs(state: PipelineState) -> PipelineState:
         return state
 
 
+def fused_analysis(state: PipelineState) -> PipelineState:
+    """
+    Agents 2-4 fused: metadata, privilege and hot docs from one call.
+    """
+    try:
+        logger.info(f"[{state['job_id']}] Starting Agents 2-4: Fused Analyzer")
+        state["current_agent"] = "FusedAnalyzer"
+        state["progress_percent"] = 20
+        
+        result = get_fused_analyzer().run(state)
+        
+        state.update(result)
+        state["progress_percent"] = 65
+        
+        logger.info(
+            f"[{state['job_id']}] Agents 2-4 complete ({state.get('analysis_mode')}): "
+            f"{len(state.get('dates') or [])} dates, flags={state.get('privilege_flags', [])}, "
+            f"is_hot={state.get('is_hot_doc', False)}"
+        )
+        return state
+        
+    except Exception as e:
+        logger.error(f"[{state['job_id']}] Fused analysis failed: {str(e)}")
+        state["errors"].append({
+            "agent": "FusedAnalyzer",
+            "error": str(e),
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        return state
+
+
 def analyze_content(state: PipelineState) -> PipelineState:
     """
     Agent 5: Analyze content and generate narratives.
@@ -196,6 +397,8 @@ def analyze_content(state: PipelineState) -> PipelineState:
         state["progress_percent"] = 70
         
         _, _, _, _, content_analyzer, _ = get_agents()
+        if "content" in (state.get("routing") or {}).get("downgrade", []):
+            content_analyzer = get_light_content_analyzer()
         result = content_analyzer.run(state)
         
         state.update(result)
@@ -255,16 +458,34 @@ def cross_reference(state: PipelineState) -> PipelineState:
         return state
 
 
-def build_pipeline(rag_retriever=None):
+def finish_pipeline(state: PipelineState) -> PipelineState:
+    """
+    Complete a job whose routing skipped the Cross-Reference Engine.
+    """
+    state["status"] = "completed"
+    state["current_agent"] = None
+    state["progress_percent"] = 100
+    logger.info(f"[{state['job_id']}] Pipeline completed (tier={(state.get('routing') or {}).get('tier')})")
+    return state
+
+
+def build_pipeline(rag_retriever=None, mode: str = PIPELINE_MODE):
     """
     Build and compile the LangGraph workflow.
     
     Args:
         rag_retriever: Optional RAG retriever for Agent 6
+        mode: "per_agent" or "fused" (Agents 2-4 in one call)
         
     Returns:
         Compiled LangGraph workflow
+        
+    Raises:
+        ValueError: If the mode is unknown
     """
+    if mode not in PIPELINE_MODES:
+        raise ValueError(f"Unknown pipeline mode {mode!r}, expected one of {PIPELINE_MODES}")
+    
     # Initialize agents with RAG retriever
     get_agents(rag_retriever=rag_retriever)
     
@@ -273,24 +494,32 @@ def build_pipeline(rag_retriever=None):
     
     # Add agent nodes
     workflow.add_node("classify", classify_document)
+    workflow.add_node("route", make_route_node(mode))
     workflow.add_node("extract_metadata", extract_metadata)
     workflow.add_node("check_privilege", check_privilege)
     workflow.add_node("detect_hot_docs", detect_hot_docs)
     workflow.add_node("analyze_content", analyze_content)
     workflow.add_node("cross_reference", cross_reference)
+    workflow.add_node("finish", finish_pipeline)
     
     # Define edges — sequential pipeline
     # Phase 1: Sequential execution for simplicity and debuggability
     # Phase 2 can parallelize agents 2, 3, 4 since they're independent
+    # After classification, routing decides which of the remaining nodes run
+    order = ["extract_metadata", "check_privilege", "detect_hot_docs", "analyze_content", "cross_reference", "finish"]
+    if mode == "fused":
+        workflow.add_node("fused_analysis", fused_analysis)
+        order.insert(0, "fused_analysis")
+    
     workflow.set_entry_point("classify")
-    workflow.add_edge("classify", "extract_metadata")
-    workflow.add_edge("extract_metadata", "check_privilege")
-    workflow.add_edge("check_privilege", "detect_hot_docs")
-    workflow.add_edge("detect_hot_docs", "analyze_content")
-    workflow.add_edge("analyze_content", "cross_reference")
+    workflow.add_edge("classify", "route")
+    for node in ["route"] + order[:order.index("cross_reference")]:
+        candidates = order[order.index(node) + 1:] if node in order else order
+        workflow.add_conditional_edges(node, make_router(candidates), candidates)
     workflow.add_edge("cross_reference", END)
+    workflow.add_edge("finish", END)
     
-    logger.info("Pipeline workflow built successfully")
+    logger.info(f"Pipeline workflow built successfully ({mode})")
     return workflow.compile()
 
 
@@ -299,7 +528,9 @@ async def run_pipeline(
     case_id: str,
     job_id: str,
     raw_text: str,
-    rag_retriever=None
+    rag_retriever=None,
+    document_id: Optional[str] = None,
+    mode: Optional[str] = None
 ) -> PipelineState:
     """
     Run the complete document analysis pipeline.
@@ -310,22 +541,29 @@ async def run_pipeline(
         job_id: Job identifier
         raw_text: Extracted document text
         rag_retriever: Optional RAG retriever
+        document_id: Document identifier (used to exclude the document itself
+                     from related-document search)
+        mode: Pipeline mode override, defaults to PIPELINE_MODE
         
     Returns:
         Final pipeline state with all agent outputs
     """
-    logger.info(f"Starting pipeline for job {job_id}")
+    mode = mode or PIPELINE_MODE
+    logger.info(f"Starting pipeline for job {job_id} ({mode})")
     
     # Initialize state
     initial_state: PipelineState = {
         "document_url": document_url,
         "case_id": case_id,
         "job_id": job_id,
+        "document_id": document_id,
         "raw_text": raw_text,
         "status": "processing",
         "current_agent": None,
         "progress_percent": 0,
         "errors": [],
+        "analysis_mode": mode,
+        "routing": None,
         # All other fields will be populated by agents
         "document_type": None,
         "classification_confidence": None,
@@ -340,6 +578,7 @@ async def run_pipeline(
         "privilege_confidence": None,
         "privileged_excerpts": None,
         "privilege_recommendation": None,
+        "privilege_screen": None,
         "is_hot_doc": None,
         "hot_doc_reasons": None,
         "hot_doc_score": None,
@@ -356,7 +595,7 @@ async def run_pipeline(
     }
     
     # Build and run pipeline
-    pipeline = build_pipeline(rag_retriever=rag_retriever)
+    pipeline = build_pipeline(rag_retriever=rag_retriever, mode=mode)
     
     try:
         final_state = pipeline.invoke(initial_state)
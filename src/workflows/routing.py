@@ -0,0 +1,212 @@
+"""
+Pre-filter routing for the document analysis pipeline.
+Cheap local heuristics plus the classifier's output decide which of the
+expensive agents a document needs. Blank pages skip everything after the
+classifier; calendar invites, auto-replies, spam and boilerplate-heavy
+documents skip the Sonnet-backed privilege and hot doc agents and get a
+lighter model for content analysis. Quoted reply text is not boilerplate.
+Counsel/privilege terms always force the full pipeline, as does any hit of
+the privilege pre-screen (the case's attorney and firm names, law-firm
+email domains), so no document the screen would send to the model is
+marked not privileged unreviewed.
+"""
+from typing import Any, Dict, List, Optional
+from collections import Counter
+from src.workflows.state import DocumentType, PrivilegeFlag
+from src.agents.privilege_screen import privilege_screen, PRIVILEGE_SCREEN_ENABLED
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+ROUTING_ENABLED = os.getenv("ROUTING_ENABLED", "true").lower() == "true"
+# Documents shorter than this (non-whitespace characters) are treated as blank
+ROUTING_MIN_CHARS = int(os.getenv("ROUTING_MIN_CHARS", "200"))
+# Share of boilerplate lines (repeated footers, separators, bare links) among the
+# author's own lines that marks a low-value document; header and quoted reply
+# lines are left out, since reply threads quote substantive text
+ROUTING_BOILERPLATE_RATIO = float(os.getenv("ROUTING_BOILERPLATE_RATIO", "0.6"))
+# Junk markers only downgrade documents up to this many characters
+ROUTING_LIGHT_MAX_CHARS = int(os.getenv("ROUTING_LIGHT_MAX_CHARS", "8000"))
+
+TIER_FULL = "full"
+TIER_LIGHT = "light"
+TIER_SKIP = "skip"
+
+# Agents each tier skips, and agents it runs on the light model
+TIER_AGENTS = {
+    TIER_FULL: {"skip": [], "downgrade": []},
+    TIER_LIGHT: {"skip": ["privilege", "hot_doc"], "downgrade": ["content"]},
+    TIER_SKIP: {"skip": ["metadata", "privilege", "hot_doc", "content", "cross_reference"], "downgrade": []}
+}
+
+# Counsel and privilege vocabulary; any hit forces the full pipeline
+PRIVILEGE_TERMS = re.compile(
+    r"\b(attorney|attorneys|counsel|lawyer|law firm|esq\.?|legal advice|privilege[ds]?|"
+    r"work product|litigation|lawsuit|subpoena|settlement|general counsel)\b",
+    re.IGNORECASE
+)
+
+JUNK_PATTERNS = {
+    "calendar_invite": re.compile(
+        r"BEGIN:VCALENDAR|^\s*(updated )?invitation:|^\s*(accepted|declined|tentative):|"
+        r"join (zoom|microsoft teams|google meet|webex)|add to calendar",
+        re.IGNORECASE | re.MULTILINE
+    ),
+    "auto_reply": re.compile(
+        r"automatic reply|auto-?reply|out of (the )?office|i am currently (away|out)|"
+        r"delivery status notification|undeliverable|mail delivery (failed|subsystem)",
+        re.IGNORECASE
+    ),
+    "spam": re.compile(
+        r"unsubscribe|view (this email )?in (your )?browser|you are receiving this|"
+        r"manage (your )?(email )?preferences|limited time offer",
+        re.IGNORECASE
+    )
+}
+
+# Classifier sub-types that mark low-value documents
+JUNK_SUB_TYPES = ("calendar", "invite", "meeting_request", "auto_reply", "out_of_office", "newsletter", "spam", "marketing", "blank")
+
+# Substantive types are never downgraded, whatever their boilerplate
+SUBSTANTIVE_TYPES = (DocumentType.CONTRACT, DocumentType.DEPOSITION, DocumentType.PLEADING, DocumentType.DISCOVERY_RESPONSE)
+
+HEADER_LINE = re.compile(r"^\s*(from|to|cc|bcc|sent|date|subject|reply-to|importance)\s*:", re.IGNORECASE)
+
+
+def document_signals(raw_text: str) -> Dict[str, Any]:
+    """
+    Compute cheap local signals for routing.
+    
+    Args:
+        raw_text: Document text
+        
+    Returns:
+        Dict with chars (non-whitespace), lines, quoted_lines (headers and
+        quoted replies), boilerplate_ratio (among the other lines),
+        privilege_hits (matched terms) and junk (matched junk categories)
+    """
+    text = raw_text or ""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    own_lines = [line for line in lines if not (HEADER_LINE.match(line) or line.startswith(">"))]
+    counts = Counter(own_lines)
+    
+    boilerplate = 0
+    for line in own_lines:
+        if (
+            counts[line] > 1
+            or not any(ch.isalnum() for ch in line)
+            or re.fullmatch(r"(https?://|www\.)\S+", line)
+        ):
+            boilerplate += 1
+    
+    if own_lines:
+        boilerplate_ratio = round(boilerplate / len(own_lines), 3)
+    else:
+        # Only headers and quoted text (a bare forward): judge it by its content
+        boilerplate_ratio = 0.0 if lines else 1.0
+    
+    return {
+        "chars": sum(1 for ch in text if not ch.isspace()),
+        "lines": len(lines),
+        "quoted_lines": len(lines) - len(own_lines),
+        "boilerplate_ratio": boilerplate_ratio,
+        "privilege_hits": sorted({m.group(0).lower() for m in PRIVILEGE_TERMS.finditer(text)}),
+        "junk": [name for name, pattern in JUNK_PATTERNS.items() if pattern.search(text)]
+    }
+
+
+def route_document(state: dict, enabled: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Decide which agents a document needs.
+    
+    Args:
+        state: Pipeline state after classification (raw_text, case_id,
+               document_type, classification_confidence, document_sub_type)
+        enabled: Override ROUTING_ENABLED
+        
+    Returns:
+        Dict with tier ("full", "light" or "skip"), skip and downgrade
+        (agent names), reasons and signals (document_signals plus
+        screen_hits, the privilege pre-screen's matched terms)
+    """
+    enabled = ROUTING_ENABLED if enabled is None else enabled
+    signals = document_signals(state.get("raw_text", ""))
+    reasons: List[str] = []
+    
+    signals["screen_hits"] = []
+    if enabled and PRIVILEGE_SCREEN_ENABLED:
+        screen = privilege_screen.screen(state.get("raw_text", ""), state.get("case_id"))
+        signals["screen_hits"] = sorted({hit["term"] for hit in screen["hits"]})
+    
+    document_type = state.get("document_type")
+    sub_type = (state.get("document_sub_type") or "").lower()
+    junk_sub_type = any(marker in sub_type for marker in JUNK_SUB_TYPES)
+    
+    if not enabled:
+        tier = TIER_FULL
+        reasons.append("routing disabled")
+    elif signals["privilege_hits"]:
+        tier = TIER_FULL
+        reasons.append(f"privilege terms: {', '.join(signals['privilege_hits'][:5])}")
+    elif signals["screen_hits"]:
+        tier = TIER_FULL
+        reasons.append(f"privilege pre-screen: {', '.join(signals['screen_hits'][:5])}")
+    elif signals["chars"] < ROUTING_MIN_CHARS:
+        tier = TIER_SKIP
+        reasons.append(f"near-blank ({signals['chars']} characters)")
+    elif document_type in SUBSTANTIVE_TYPES:
+        tier = TIER_FULL
+        reasons.append(f"substantive type {getattr(document_type, 'value', document_type)}")
+    elif signals["chars"] <= ROUTING_LIGHT_MAX_CHARS and (
+        signals["junk"] or junk_sub_type or signals["boilerplate_ratio"] >= ROUTING_BOILERPLATE_RATIO
+    ):
+        tier = TIER_LIGHT
+        if signals["junk"]:
+            reasons.append(f"junk markers: {', '.join(signals['junk'])}")
+        if junk_sub_type:
+            reasons.append(f"classifier sub-type {sub_type}")
+        if signals["boilerplate_ratio"] >= ROUTING_BOILERPLATE_RATIO:
+            reasons.append(f"boilerplate ratio {signals['boilerplate_ratio']:.2f}")
+    else:
+        tier = TIER_FULL
+        reasons.append("no low-value signals")
+    
+    return {
+        "tier": tier,
+        "skip": list(TIER_AGENTS[tier]["skip"]),
+        "downgrade": list(TIER_AGENTS[tier]["downgrade"]),
+        "reasons": reasons,
+        "signals": signals
+    }
+
+
+def skipped_outputs(decision: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    State fields for the agents a routing decision skips.
+    
+    Args:
+        decision: Output of route_document
+        
+    Returns:
+        dict: Empty/default outputs of every skipped agent
+    """
+    note = f"Skipped by pre-filter routing ({decision['tier']}: {'; '.join(decision['reasons'])})"
+    defaults = {
+        "metadata": {"dates": [], "people": [], "entities": [], "locations": []},
+        "privilege": {
+            "privilege_flags": [PrivilegeFlag.NONE],
+            "privilege_reasoning": note,
+            "privilege_confidence": 0.0,
+            "privileged_excerpts": [],
+            "privilege_recommendation": "not_privileged"
+        },
+        "hot_doc": {"is_hot_doc": False, "hot_doc_reasons": [], "hot_doc_score": 0.0, "hot_doc_severity": "low"},
+        "content": {"summary": note, "key_facts": [], "legal_issues": [], "draft_narrative": "", "evidence_gaps": []},
+        "cross_reference": {"related_documents": [], "timeline_events": [], "witness_mentions": [], "consistency_flags": []}
+    }
+    outputs: Dict[str, Any] = {}
+    for agent in decision["skip"]:
+        outputs.update(defaults[agent])
+    return outputs
@@ -37,6 +37,7 @@ class PipelineState(TypedDict):
     document_url: str
     case_id: str
     job_id: str
+    document_id: Optional[str]
     raw_text: str
 
     # Agent 1 output: Document Classifier
@@ -57,6 +58,7 @@ class PipelineState(TypedDict):
     privilege_confidence: Optional[float]
     privileged_excerpts: Optional[list[dict]]  # [{text, type, page}]
     privilege_recommendation: Optional[str]
+    privilege_screen: Optional[dict]           # {candidate, hits, fast_path, needs_sampling, sampled, elapsed_us}
 
     # Agent 4 output: Hot Doc Detector
     is_hot_doc: Optional[bool]
@@ -82,3 +84,5 @@ class PipelineState(TypedDict):
     current_agent: Optional[str]
     progress_percent: int
     errors: list[dict]                         # [{agent, error, timestamp}]
+    analysis_mode: Optional[str]               # "per_agent", "fused", "fused_fallback"
+    routing: Optional[dict]                    # {tier, skip, downgrade, reasons, signals, skipped_nodes}
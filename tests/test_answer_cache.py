@@ -0,0 +1,60 @@
+"""
+Unit tests for the semantic Ask AI answer cache.
+"""
+import pytest
+from src.rag.answer_cache import SemanticAnswerCache, cache_key
+from src.rag.embedders import HashingEmbedder
+
+
+@pytest.fixture
+def cache():
+    """Empty cache with the default threshold."""
+    return SemanticAnswerCache(threshold=0.92, ttl_seconds=3600, max_entries=2)
+
+
+@pytest.fixture
+def result():
+    """A cached answer payload."""
+    return {"answer": "In March 2023.", "sources": [{"document_id": "doc_1"}], "confidence": 0.9}
+
+
+def test_rephrased_question_hits(cache, result):
+    """Case and punctuation differences embed identically and hit the cache."""
+    embedder = HashingEmbedder()
+    cache.store("case_1", "When did they know about the defect?", embedder.embed("When did they know about the defect?", 256), 1, result)
+    
+    hit = cache.lookup("case_1", embedder.embed("when did they know about the defect", 256), 1)
+    assert hit["result"] == result
+    assert hit["similarity"] == pytest.approx(1.0, abs=1e-5)
+    assert cache.lookup("case_1", embedder.embed("Who paid invoice ACME_00001234?", 256), 1) is None
+    assert cache.stats("case_1")["hit_rate"] == pytest.approx(0.5)
+
+
+def test_scoped_by_case_and_parameters(cache, result):
+    """Other cases and other filters never see an answer."""
+    key = cache_key(filters={"privileged": False}, top_k=10)
+    cache.store("case_1", "q", [1.0, 0.0], 1, result, key)
+    
+    assert cache.lookup("case_2", [1.0, 0.0], 1, key) is None
+    assert cache.lookup("case_1", [1.0, 0.0], 1, cache_key(filters=None, top_k=10)) is None
+    assert cache.lookup("case_1", [1.0, 0.0], 1, cache_key(top_k=10, filters={"privileged": False})) is not None
+
+
+def test_new_case_version_invalidates(cache, result):
+    """Entries from an older version of the case's documents are dropped."""
+    cache.store("case_1", "q", [1.0, 0.0], 1, result)
+    
+    assert cache.lookup("case_1", [1.0, 0.0], 2) is None
+    stats = cache.stats()
+    assert stats["invalidated"] == 1
+    assert stats["entries"] == 0
+
+
+def test_lru_bound(cache, result):
+    """Only max_entries answers are kept per case."""
+    cache.store("case_1", "a", [1.0, 0.0, 0.0], 1, result)
+    cache.store("case_1", "b", [0.0, 1.0, 0.0], 1, result)
+    cache.store("case_1", "c", [0.0, 0.0, 1.0], 1, result)
+    
+    assert cache.stats("case_1")["entries"] == 2
+    assert cache.lookup("case_1", [1.0, 0.0, 0.0], 1) is None
@@ -0,0 +1,126 @@
+"""
+Unit tests for the bounded Ask AI executor.
+"""
+import asyncio
+import threading
+import time
+import pytest
+from src.services.ask_executor import AskExecutor, AskOverloadedError, question_key
+
+
+def test_identical_questions_coalesce():
+    """Concurrent identical questions share one upstream call."""
+    calls = []
+    
+    def ask(question):
+        calls.append(question)
+        time.sleep(0.05)
+        return {"answer": question.upper()}
+    
+    async def scenario():
+        executor = AskExecutor(max_workers=2, max_pending=8)
+        key = question_key("case_1", "When did they know?")
+        same = question_key("case_1", "  when did   they know? ")
+        results = await asyncio.gather(
+            executor.run(key, ask, "when did they know?"),
+            executor.run(same, ask, "when did they know?"),
+            executor.run(question_key("case_2", "When did they know?"), ask, "other case")
+        )
+        executor.shutdown()
+        return results, executor.stats()
+    
+    results, stats = asyncio.run(scenario())
+    assert results[0] == results[1] == {"answer": "WHEN DID THEY KNOW?"}
+    assert len(calls) == 2
+    assert stats["coalesced"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_event_loop_stays_responsive():
+    """Blocking calls run off the loop, so other coroutines keep running."""
+    release = threading.Event()
+    
+    async def scenario():
+        executor = AskExecutor(max_workers=1, max_pending=8)
+        pending = asyncio.ensure_future(executor.run("k", release.wait, 5))
+        await asyncio.sleep(0.01)
+        # The loop keeps scheduling while the call is still blocked
+        await asyncio.sleep(0.01)
+        still_running = not pending.done()
+        release.set()
+        await pending
+        executor.shutdown()
+        return still_running
+    
+    assert asyncio.run(scenario()) is True
+
+
+def test_rejects_beyond_max_pending():
+    """Distinct questions beyond max_pending are rejected, not queued."""
+    release = threading.Event()
+    
+    async def scenario():
+        executor = AskExecutor(max_workers=1, max_pending=1)
+        first = asyncio.ensure_future(executor.run("a", release.wait, 5))
+        await asyncio.sleep(0)
+        with pytest.raises(AskOverloadedError):
+            await executor.run("b", release.wait, 5)
+        release.set()
+        await first
+        executor.shutdown()
+        return executor.stats()
+    
+    assert asyncio.run(scenario())["rejected"] == 1
+
+
+def test_identical_streams_coalesce_and_replay():
+    """A caller joining a stream in flight gets every item, including those already produced."""
+    calls = []
+    release = threading.Event()
+    
+    def stream(question):
+        calls.append(question)
+        yield "sources"
+        release.wait(5)
+        yield "token"
+        yield "done"
+    
+    async def consume(events):
+        return [item async for item in events]
+    
+    async def scenario():
+        executor = AskExecutor(max_workers=2, max_pending=8)
+        key = question_key("case_1", "When did they know?")
+        first = asyncio.ensure_future(consume(executor.stream(key, stream, "when")))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(consume(executor.stream(key, stream, "when")))
+        release.set()
+        results = await asyncio.gather(first, second)
+        executor.shutdown()
+        return results, executor.stats()
+    
+    results, stats = asyncio.run(scenario())
+    assert results[0] == results[1] == ["sources", "token", "done"]
+    assert len(calls) == 1
+    assert stats["coalesced"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_stream_errors_reach_subscribers():
+    """An exception in the stream is raised to its subscribers after the items before it."""
+    def stream():
+        yield "sources"
+        raise RuntimeError("upstream failed")
+    
+    async def scenario():
+        executor = AskExecutor(max_workers=1, max_pending=8)
+        items = []
+        with pytest.raises(RuntimeError, match="upstream failed"):
+            async for item in executor.stream("k", stream):
+                items.append(item)
+        executor.shutdown()
+        return items, executor.stats()
+    
+    items, stats = asyncio.run(scenario())
+    assert items == ["sources"]
+    assert stats["failed"] == 1
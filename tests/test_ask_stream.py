@@ -0,0 +1,155 @@
+"""
+Unit tests for streamed Ask AI answers: Bedrock stream parsing, answer
+assembly, SSE framing and the /ask/stream endpoint.
+"""
+import asyncio
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.agents.base import BaseAgent
+from src.api.dependencies import verify_api_key
+from src.api.routes import analyze
+from src.rag.retrieval import RAGRetriever
+from src.services.ask_executor import AskExecutor
+
+
+class FakeStreamingClient:
+    """Bedrock runtime client that streams canned Claude events."""
+    
+    def __init__(self, texts, error=None):
+        self.texts = texts
+        self.error = error
+    
+    def invoke_model_with_response_stream(self, modelId, body):
+        if self.error:
+            raise self.error
+        payloads = [{"type": "message_start"}]
+        payloads += [{"type": "content_block_delta", "delta": {"type": "text_delta", "text": t}} for t in self.texts]
+        payloads += [{"type": "message_stop"}, {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "late"}}]
+        return {"body": [{"chunk": {"bytes": json.dumps(p).encode()}} for p in payloads]}
+
+
+def parse_frames(body):
+    """Split an SSE body into (event, data) tuples."""
+    frames = []
+    for frame in body.strip().split("\n\n"):
+        event_line, data_line = frame.split("\n")
+        frames.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return frames
+
+
+def test_stream_claude_yields_text_deltas_until_stop():
+    """Only text deltas are yielded, and nothing after message_stop."""
+    agent = BaseAgent(name="test")
+    agent.client = FakeStreamingClient(["The valve ", "failed."])
+    
+    assert list(agent._stream_claude("system", "user")) == ["The valve ", "failed."]
+
+
+def test_stream_question_assembles_answer():
+    """Sources come first, then one token event per delta, then done; the full answer is cached."""
+    retriever = RAGRetriever()
+    retriever.agent.client = FakeStreamingClient(["The valve ", "failed ", "in March."])
+    retriever.vector_store.add_document_chunks("stream_case", [
+        {"text": "The valve failed pressure testing in March.", "document_id": "doc_1", "chunk_index": 0}
+    ])
+    
+    events = list(retriever.stream_question("stream_case", "When did the valve fail?", use_cache=False))
+    
+    assert [event for event, _ in events] == ["sources", "token", "token", "token", "done"]
+    assert events[0][1]["sources"][0]["document_id"] == "doc_1"
+    assert "".join(data["text"] for event, data in events if event == "token") == "The valve failed in March."
+
+
+def test_stream_question_reports_errors_as_events():
+    """A failed Claude call ends the stream with an error event instead of raising."""
+    retriever = RAGRetriever()
+    retriever.agent.client = FakeStreamingClient([], error=RuntimeError("throttled"))
+    retriever.vector_store.add_document_chunks("stream_case", [
+        {"text": "The valve failed pressure testing in March.", "document_id": "doc_1", "chunk_index": 0}
+    ])
+    
+    events = list(retriever.stream_question("stream_case", "When did the valve fail?", use_cache=False))
+    
+    assert events[0][0] == "sources"
+    assert events[-1][0] == "error"
+    assert "throttled" in events[-1][1]["detail"]
+
+
+def test_sse_framing_and_failure_frame():
+    """Each event becomes one frame; an exception mid-stream becomes a final error frame."""
+    async def events():
+        yield "sources", {"sources": [], "confidence": 0.5}
+        yield "token", {"text": "line one\nline two"}
+        raise RuntimeError("worker died")
+    
+    async def collect():
+        return [frame async for frame in analyze._sse_events(events())]
+    
+    frames = asyncio.run(collect())
+    
+    assert frames[0] == 'event: sources\ndata: {"sources": [], "confidence": 0.5}\n\n'
+    assert parse_frames("".join(frames)) == [
+        ("sources", {"sources": [], "confidence": 0.5}),
+        ("token", {"text": "line one\nline two"}),
+        ("error", {"detail": "An error occurred while processing your question: worker died"})
+    ]
+
+
+@pytest.fixture
+def client():
+    """Test client for the analysis router without API key checks."""
+    app = FastAPI()
+    app.include_router(analyze.router)
+    app.dependency_overrides[verify_api_key] = lambda: "test"
+    return TestClient(app)
+
+
+def test_ask_stream_endpoint(client, monkeypatch):
+    """The endpoint streams the retriever's events as SSE through the Ask AI executor."""
+    executor = AskExecutor(max_workers=1, max_pending=4)
+    monkeypatch.setattr(analyze, "ask_executor", executor)
+    
+    def stream_question(case_id, question, top_k, filters):
+        yield "sources", {"sources": [{"document_id": "doc_1"}], "confidence": 0.9}
+        yield "token", {"text": f"Answer for {case_id}"}
+        yield "done", {"confidence": 0.9}
+    
+    monkeypatch.setattr(analyze.rag_retriever, "stream_question", stream_question)
+    response = client.post("/api/v1/ask/stream", json={"case_id": "case_1", "question": "When?"})
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert parse_frames(response.text) == [
+        ("sources", {"sources": [{"document_id": "doc_1"}], "confidence": 0.9}),
+        ("token", {"text": "Answer for case_1"}),
+        ("done", {"confidence": 0.9})
+    ]
+    assert executor.stats()["submitted"] == 1
+    executor.shutdown()
+
+
+def test_ask_stream_rejects_when_overloaded(client, monkeypatch):
+    """With no pending capacity the endpoint answers 503 before streaming."""
+    executor = AskExecutor(max_workers=1, max_pending=0)
+    monkeypatch.setattr(analyze, "ask_executor", executor)
+    
+    response = client.post("/api/v1/ask/stream", json={"case_id": "case_1", "question": "When?"})
+    
+    assert response.status_code == 503
+    executor.shutdown()
+
+
+@pytest.mark.parametrize("path", ["/api/v1/ask", "/api/v1/ask/stream"])
+def test_ask_rejects_invalid_date_filters(client, monkeypatch, path):
+    """A non-ISO date filter is a 400, not a silent "no relevant documents" answer."""
+    def fail(*args, **kwargs):
+        raise AssertionError("retrieval must not run")
+    
+    monkeypatch.setattr(analyze.rag_retriever, "ask_question", fail)
+    monkeypatch.setattr(analyze.rag_retriever, "stream_question", fail)
+    response = client.post(path, json={"case_id": "case_1", "question": "When?", "filters": {"date_from": "03/01/2024"}})
+    
+    assert response.status_code == 400
+    assert "date_from" in response.json()["detail"]
@@ -0,0 +1,88 @@
+"""
+Unit tests for BaseAgent prompt caching and token usage accounting.
+"""
+import io
+import json
+from src.agents.base import BaseAgent
+
+
+class FakeBedrockClient:
+    """Bedrock runtime client that records request bodies and returns canned responses."""
+    
+    def __init__(self, usage=None):
+        self.usage = usage or {}
+        self.bodies = []
+    
+    def invoke_model(self, modelId, body):
+        self.bodies.append(json.loads(body))
+        response = {
+            "content": [
+                {"type": "text", "text": "Plain answer."},
+                {"type": "tool_use", "name": "structured_output", "input": {"document_type": "contract"}}
+            ],
+            "usage": self.usage
+        }
+        return {"body": io.BytesIO(json.dumps(response).encode())}
+
+
+def make_agent(model_id, usage=None):
+    """Agent with a fake Bedrock client."""
+    agent = BaseAgent(name="test", model_id=model_id)
+    agent.client = FakeBedrockClient(usage)
+    return agent
+
+
+def test_cache_control_marks_system_prompt():
+    """On caching models the system prompt is one cacheable block; the user message is not cached."""
+    agent = make_agent("anthropic.claude-sonnet-4-5-20250929-v1:0")
+    
+    assert agent._call_claude_structured("You classify documents.", "Document text", {"type": "object"}) == {
+        "document_type": "contract"
+    }
+    body = agent.client.bodies[0]
+    assert body["system"] == [
+        {"type": "text", "text": "You classify documents.", "cache_control": {"type": "ephemeral"}}
+    ]
+    assert body["messages"] == [{"role": "user", "content": "Document text"}]
+    assert "cache_control" not in json.dumps(body["tools"])
+
+
+def test_no_cache_control_on_other_models():
+    """Models without Bedrock prompt caching get the plain string system prompt."""
+    agent = make_agent("anthropic.claude-3-sonnet-20240229-v1:0")
+    
+    agent._call_claude_structured("You classify documents.", "Document text", {"type": "object"})
+    
+    assert agent.prompt_cache is False
+    assert agent.client.bodies[0]["system"] == "You classify documents."
+
+
+def test_record_usage_accumulates_cache_tokens():
+    """Each call's usage is kept as last_usage and added to the totals; missing fields count as zero."""
+    agent = make_agent("anthropic.claude-haiku-4-5-20251001-v1:0", usage={
+        "input_tokens": 120, "output_tokens": 40, "cache_read_input_tokens": 900, "cache_creation_input_tokens": None
+    })
+    
+    agent._call_claude("system", "first")
+    agent._call_claude_structured("system", "second", {"type": "object"})
+    
+    assert agent.last_usage == {
+        "input_tokens": 120, "output_tokens": 40, "cache_read_input_tokens": 900, "cache_creation_input_tokens": 0
+    }
+    usage = agent.get_usage()
+    assert usage == {
+        "calls": 2, "input_tokens": 240, "output_tokens": 80,
+        "cache_read_input_tokens": 1800, "cache_creation_input_tokens": 0
+    }
+    usage["calls"] = 99
+    assert agent.get_usage()["calls"] == 2
+
+
+def test_record_usage_without_usage_block():
+    """A response without usage still counts the call."""
+    agent = make_agent("anthropic.claude-3-sonnet-20240229-v1:0")
+    
+    agent._record_usage({"content": []})
+    
+    assert agent.get_usage()["calls"] == 1
+    assert agent.get_usage()["input_tokens"] == 0
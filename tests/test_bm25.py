@@ -0,0 +1,50 @@
+"""
+Unit tests for the BM25 lexical index and reciprocal rank fusion.
+"""
+import pytest
+from src.rag.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+@pytest.fixture
+def index():
+    """Index over a few chunks with exact-match identifiers."""
+    index = BM25Index()
+    index.add_many([
+        ("c1", "Invoice ACME_00001234 was paid late by the distributor."),
+        ("c2", "Section 4.2 limits liability to fees paid in the prior year."),
+        ("c3", "Ms. O'Brien testified that the valve failed in March."),
+        ("c4", "The distributor disputed the late payment terms.")
+    ])
+    return index
+
+
+def test_tokenize_keeps_identifiers_whole():
+    """Bates numbers, section numbers and apostrophised names stay single terms."""
+    assert tokenize("See ACME_00001234, Section 4.2 and O'Brien.") == [
+        "see", "acme_00001234", "section", "4.2", "and", "o'brien"
+    ]
+
+
+def test_exact_match_queries(index):
+    """Identifier queries rank the chunk containing them first."""
+    assert index.search("ACME_00001234")[0][0] == "c1"
+    assert index.search("what does section 4.2 say")[0][0] == "c2"
+    assert index.search("O'Brien")[0][0] == "c3"
+
+
+def test_incremental_remove(index):
+    """Removed chunks stop matching and statistics stay consistent."""
+    index.remove("c1")
+    
+    assert "c1" not in index
+    assert len(index) == 3
+    assert [chunk_id for chunk_id, _ in index.search("distributor")] == ["c4"]
+    assert index.search("ACME_00001234") == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    """An item ranked well by both retrievers beats one ranked first by only one."""
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]])
+    
+    assert fused[0][0] == "b"
+    assert {item_id for item_id, _ in fused} == {"a", "b", "c", "d"}
@@ -0,0 +1,40 @@
+"""
+Tests for case timeline and witness pagination cursors.
+"""
+import pytest
+from src.services.case_queries import (
+    encode_cursor, decode_cursor, InvalidCursorError,
+    TIMELINE_PAGE_SIZE, TIMELINE_MAX_PAGE_SIZE, WITNESS_PAGE_SIZE, WITNESS_MAX_PAGE_SIZE
+)
+
+
+def test_cursor_round_trip():
+    """A cursor decodes to the sort key it was built from."""
+    cursor = encode_cursor("2024-03-01", "5b7c1f9e-7a39-4a8e-9a43-0d2f0c4f1b2a")
+    assert decode_cursor(cursor, 2) == ["2024-03-01", "5b7c1f9e-7a39-4a8e-9a43-0d2f0c4f1b2a"]
+    assert decode_cursor(encode_cursor(42, "John Smith"), 2) == [42, "John Smith"]
+
+
+def test_cursor_is_url_safe():
+    """Cursors can be passed as query parameters without escaping."""
+    cursor = encode_cursor(7, "O'Brien/Núñez?&=+")
+    assert all(c.isalnum() or c in "-_" for c in cursor)
+    assert decode_cursor(cursor, 2) == [7, "O'Brien/Núñez?&=+"]
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "!!!", encode_cursor(1), encode_cursor(1, 2, 3)])
+def test_malformed_cursor(cursor):
+    """Garbage and wrong-length cursors raise InvalidCursorError."""
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, 2)
+
+
+def test_invalid_cursor_is_value_error():
+    """InvalidCursorError can be handled as a ValueError."""
+    assert issubclass(InvalidCursorError, ValueError)
+
+
+def test_page_size_limits():
+    """Default page sizes are within their maximums."""
+    assert 0 < TIMELINE_PAGE_SIZE <= TIMELINE_MAX_PAGE_SIZE
+    assert 0 < WITNESS_PAGE_SIZE <= WITNESS_MAX_PAGE_SIZE
@@ -0,0 +1,97 @@
+"""
+Tests for incremental case stats counting.
+"""
+import pytest
+from types import SimpleNamespace
+from src.services.case_stats import result_keys, apply_delta
+
+
+class Stats:
+    """Stand-in for a CaseStats row."""
+    
+    def __init__(self):
+        self.document_count = 0
+        self.hot_doc_count = 0
+        self.hot_doc_severities = None
+        self.privilege_recommendations = None
+        self.document_types = None
+
+
+def result(document_type="email", privilege_recommendation="not_privileged", is_hot_doc=False, hot_doc_severity=None):
+    """Analysis result with the counted columns."""
+    return SimpleNamespace(
+        document_type=document_type,
+        privilege_recommendation=privilege_recommendation,
+        is_hot_doc=is_hot_doc,
+        hot_doc_severity=hot_doc_severity
+    )
+
+
+@pytest.fixture
+def stats():
+    """Empty case stats row."""
+    return Stats()
+
+
+def test_result_keys():
+    """Severity only counts for hot documents; missing values count as unknown."""
+    assert result_keys(result()) == {
+        "document_types": "email",
+        "privilege_recommendations": "not_privileged",
+        "hot_doc_severities": None
+    }
+    assert result_keys(result(is_hot_doc=True, hot_doc_severity="critical"))["hot_doc_severities"] == "critical"
+    assert result_keys(result(None, None, True, None)) == {
+        "document_types": "unknown",
+        "privilege_recommendations": "unknown",
+        "hot_doc_severities": "unknown"
+    }
+
+
+def test_counts_accumulate(stats):
+    """Each stored result adds to the document, type, privilege and severity counts."""
+    apply_delta(stats, result_keys(result()), 1)
+    apply_delta(stats, result_keys(result("contract", "privileged", True, "high")), 1)
+    apply_delta(stats, result_keys(result("email", "needs_review", True, "high")), 1)
+    
+    assert stats.document_count == 3
+    assert stats.hot_doc_count == 2
+    assert stats.hot_doc_severities == {"high": 2}
+    assert stats.privilege_recommendations == {"not_privileged": 1, "privileged": 1, "needs_review": 1}
+    assert stats.document_types == {"email": 2, "contract": 1}
+
+
+def test_reanalysis_replaces_previous_result(stats):
+    """Removing the previous result and adding the new one leaves one document counted."""
+    previous = result("email", "needs_review", True, "medium")
+    apply_delta(stats, result_keys(previous), 1)
+    
+    apply_delta(stats, result_keys(previous), -1)
+    apply_delta(stats, result_keys(result("email", "privileged")), 1)
+    
+    assert stats.document_count == 1
+    assert stats.hot_doc_count == 0
+    assert stats.hot_doc_severities == {}
+    assert stats.privilege_recommendations == {"privileged": 1}
+    assert stats.document_types == {"email": 1}
+
+
+def test_grouped_counts(stats):
+    """A rebuild applies grouped rows with their document counts."""
+    apply_delta(stats, result_keys(result("memo")), 40)
+    apply_delta(stats, result_keys(result("memo", "privileged", True, "critical")), 2)
+    
+    assert stats.document_count == 42
+    assert stats.hot_doc_count == 2
+    assert stats.document_types == {"memo": 42}
+    assert stats.hot_doc_severities == {"critical": 2}
+
+
+def test_json_columns_are_replaced(stats):
+    """JSONB columns get new dicts so the ORM sees the change."""
+    apply_delta(stats, result_keys(result()), 1)
+    before = stats.document_types
+    apply_delta(stats, result_keys(result()), 1)
+    
+    assert stats.document_types is not before
+    assert before == {"email": 1}
@@ -0,0 +1,170 @@
+"""
+Unit tests for legal-document-aware chunking.
+"""
+import pytest
+from src.rag.chunking import DocumentChunker
+
+
+@pytest.fixture
+def chunker():
+    """Chunker with the default production settings."""
+    return DocumentChunker()
+
+
+@pytest.fixture
+def sample_contract_text():
+    """Contract with articles, numbered sections and lettered subsections."""
+    return """MASTER SUPPLY AGREEMENT
+This Agreement is made between Acme Corporation and Beta LLC.
+
+ARTICLE I - DEFINITIONS
+1.1 Products. "Products" means the widgets listed in Exhibit A.
+1.2 Territory. "Territory" means the United States.
+
+ARTICLE II
+TERM AND TERMINATION
+2.1 Term. This Agreement lasts five years.
+2.2 Termination. Either party may terminate:
+(a) for material breach, after thirty days notice;
+(b) for insolvency, immediately.
+"""
+
+
+def test_contract_keeps_section_headers(chunker, sample_contract_text):
+    """Section header text, including the first letter of the title, stays in the chunk."""
+    chunks = chunker.chunk_document(sample_contract_text, "contract", "doc_1", "case_1")
+
+    texts = [c["text"] for c in chunks]
+    assert any(t.startswith("1.2 Territory.") for t in texts)
+    assert any("2.2 Termination." in t for t in texts)
+    assert any("ARTICLE I - DEFINITIONS" in t for t in texts)
+
+
+def test_contract_section_path_metadata(chunker, sample_contract_text):
+    """Chunks carry the real Article -> Section path instead of a split index."""
+    chunks = chunker.chunk_document(sample_contract_text, "contract", "doc_1", "case_1")
+    by_number = {c["section_number"]: c for c in chunks}
+
+    assert chunks[0]["section"] == "Preamble"
+    assert by_number["1.1"]["section"] == "Article I > Section 1.1"
+    assert by_number["1.1"]["section_title"] == "Products"
+    assert by_number["2.2"]["section"] == "Article II > Section 2.2"
+    assert by_number["2.2"]["article"] == "II"
+    # Subsections fit in the budget, so they stay with their parent clause
+    assert "(b) for insolvency" in by_number["2.2"]["text"]
+
+
+def test_contract_splits_subsections_when_over_budget(sample_contract_text):
+    """An oversized section is broken down at its subsection boundaries."""
+    chunks = DocumentChunker(chunk_size=15).chunk_document(
+        sample_contract_text, "contract", "doc_1", "case_1"
+    )
+    sections = [c["section"] for c in chunks]
+
+    assert "Article II > Section 2.2 > (a)" in sections
+    assert "Article II > Section 2.2 > (b)" in sections
+
+
+@pytest.fixture
+def sample_deposition_text():
+    """Two transcript pages with margin line numbers and Q./A. markers."""
+    return (
+        "                                                  Page 12\n"
+        " 1        EXAMINATION BY MR. JONES:\n"
+        " 2   Q.   Where were you on March 3?\n"
+        " 3   A.   At the plant.\n"
+        " 4   Q.   Who else was there?\n"
+        " 5             MR. SMITH: Objection, form.\n"
+        " 6   A.   The night supervisor.\n"
+        "                                                  Page 13\n"
+        " 1   Q.   Did you inspect the valve?\n"
+        " 2   A.   Yes.\n"
+    )
+
+
+def test_deposition_page_line_citations(chunker, sample_deposition_text):
+    """Chunks are cited by transcript page:line range."""
+    chunks = chunker.chunk_document(sample_deposition_text, "deposition", "doc_1", "case_1")
+
+    assert len(chunks) == 1
+    assert chunks[0]["citation"] == "12:1-13:2"
+    assert chunks[0]["page"] == 12
+    assert chunks[0]["page_end"] == 13
+    assert chunks[0]["examined_by"] == "Mr. Jones"
+    assert "Q: Where were you on March 3?\nA: At the plant." in chunks[0]["text"]
+
+
+def test_deposition_keeps_qa_pairs_together(sample_deposition_text):
+    """Small budgets split between exchanges, never between a question and its answer."""
+    chunks = DocumentChunker(chunk_size=20).chunk_document(
+        sample_deposition_text, "deposition", "doc_1", "case_1"
+    )
+
+    assert [c["citation"] for c in chunks] == ["12:1-12:3", "12:4-12:6", "13:1-13:2"]
+    assert chunks[1]["text"] == (
+        "Q: Who else was there?\nMR. SMITH: Objection, form.\nA: The night supervisor."
+    )
+
+
+def test_deposition_without_qa_falls_back(chunker):
+    """Text with no Q/A markers is chunked by paragraph rather than dropped."""
+    chunks = chunker.chunk_document("Errata sheet.\n\nNo changes.", "deposition", "doc_1", "case_1")
+
+    assert len(chunks) == 1
+    assert chunks[0]["document_type"] == "deposition"
+
+
+@pytest.fixture
+def sample_email_thread():
+    """Top-posted reply with quoted history and a duplicated original message."""
+    return """From: Bob Lee <bob@acme.com>
+Sent: Tuesday, March 5, 2024 10:02 AM
+To: Jane Doe <jane@acme.com>
+Subject: RE: Valve defect
+
+Jane, I already told engineering. We knew about this in January.
+
+Best regards,
+Bob Lee
+VP Operations
+
+On Mon, Mar 4, 2024 at 9:12 AM, Jane Doe <jane@acme.com> wrote:
+> Bob - did anyone flag the valve issue?
+>
+> Thanks,
+> Jane
+
+-----Original Message-----
+From: Jane Doe <jane@acme.com>
+Sent: Monday, March 4, 2024 9:12 AM
+To: Bob Lee <bob@acme.com>
+Subject: Valve defect
+
+Bob - did anyone flag the valve issue?
+
+Thanks,
+Jane
+"""
+
+
+def test_email_embeds_only_novel_content(chunker, sample_email_thread):
+    """Quoted history, signatures and duplicate messages are not embedded again."""
+    chunks = chunker.chunk_document(sample_email_thread, "email", "doc_1", "case_1")
+    
+    assert len(chunks) == 2
+    assert "We knew about this in January." in chunks[0]["text"]
+    assert "did anyone flag" not in chunks[0]["text"]
+    assert "VP Operations" not in chunks[0]["text"]
+    assert chunks[1]["text"].endswith("Bob - did anyone flag the valve issue?")
+
+
+def test_email_thread_metadata(chunker, sample_email_thread):
+    """Each message links to the message it replies to within one thread."""
+    chunks = chunker.chunk_document(sample_email_thread, "email", "doc_1", "case_1")
+    
+    assert chunks[0]["parent_message_id"] == chunks[1]["message_id"]
+    assert chunks[1]["parent_message_id"] is None
+    assert chunks[0]["thread_id"] == chunks[1]["thread_id"]
+    assert chunks[0]["email_from"] == "Bob Lee <bob@acme.com>"
+    assert chunks[0]["subject"] == "RE: Valve defect"
+    assert chunks[1]["subject"] == "Valve defect"
@@ -0,0 +1,46 @@
+"""
+Unit tests for document-level aggregation and MMR diversification.
+"""
+import pytest
+from src.rag.diversity import aggregate_by_document, mmr_select
+
+
+@pytest.fixture
+def chunks():
+    """Hits where one long document dominates the chunk ranking."""
+    def hit(doc_id, distance):
+        return {"id": f"{doc_id}_{distance}", "text": doc_id, "metadata": {"document_id": doc_id}, "distance": distance}
+    return [hit("long", 0.2), hit("long", 0.3), hit("long", 0.4), hit("long", 0.5), hit("short", 0.35), hit("other", 0.6)]
+
+
+def test_max_scoring_keeps_distinct_documents(chunks):
+    """Each document appears once, scored by its best chunk."""
+    documents = aggregate_by_document(chunks, scoring="max")
+    
+    assert [d["document_id"] for d in documents] == ["long", "short", "other"]
+    assert documents[0]["matched_chunks"] == 4
+    assert documents[0]["score"] == pytest.approx(0.9)
+    assert documents[0]["best_chunk"]["distance"] == 0.2
+
+
+def test_sum_scoring_rewards_repeated_matches(chunks):
+    """Sum scoring adds up chunk relevance; relevance stays the best chunk."""
+    documents = aggregate_by_document(chunks, scoring="sum")
+    
+    assert documents[0]["score"] == pytest.approx(0.9 + 0.85 + 0.8 + 0.75)
+    assert documents[0]["relevance"] == pytest.approx(0.9)
+    with pytest.raises(ValueError):
+        aggregate_by_document(chunks, scoring="mean")
+
+
+def test_mmr_skips_near_duplicates():
+    """A near-duplicate of the top document loses to a less similar one."""
+    documents = [
+        {"document_id": "a", "score": 0.9},
+        {"document_id": "a_copy", "score": 0.88},
+        {"document_id": "b", "score": 0.8}
+    ]
+    embeddings = {"a": [1.0, 0.0], "a_copy": [0.99, 0.05], "b": [0.0, 1.0]}
+    
+    assert [d["document_id"] for d in mmr_select(documents, embeddings, 2, lambda_mult=0.5)] == ["a", "b"]
+    assert [d["document_id"] for d in mmr_select(documents, embeddings, 2, lambda_mult=1.0)] == ["a", "a_copy"]
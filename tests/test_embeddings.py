@@ -0,0 +1,336 @@
+"""
+Unit tests for the vector store with the local embedder and NumPy backend.
+"""
+import pytest
+from src.rag.embedders import HashingEmbedder, EmbeddingError, EmbedderMismatchError, model_dimensions, default_dimensions
+from src.rag.embeddings import VectorStore
+from src.rag.vector_backends import NumpyBackend
+
+
+class OtherLocalEmbedder(HashingEmbedder):
+    """A second embedder identity, to check collections refuse mixed vectors."""
+    name = "local:other"
+
+
+class WideLocalEmbedder(HashingEmbedder):
+    """An embedder whose default dimension differs from Titan v2's."""
+    name = "local:wide"
+    default_dimensions = 1536
+
+
+class RecordingEmbedder(HashingEmbedder):
+    """Hashing embedder that records the texts it embeds and can be made to fail."""
+    
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+        self.fail = False
+    
+    def embed(self, text, dimensions, normalize=True):
+        if self.fail:
+            raise EmbeddingError("Bedrock throttled")
+        self.texts.append(text)
+        return super().embed(text, dimensions, normalize)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Vector store on a temporary NumPy backend."""
+    return VectorStore(backend=NumpyBackend(root=str(tmp_path)), embedder=HashingEmbedder())
+
+
+@pytest.fixture
+def chunks():
+    """Chunks from two documents."""
+    return [
+        {"text": "The valve failed pressure testing in March.", "document_id": "doc_1", "chunk_index": 0},
+        {"text": "Invoice ACME_00001234 was paid sixty days late.", "document_id": "doc_2", "chunk_index": 0}
+    ]
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    """Same text, same vector; vectors are unit length."""
+    embedder = HashingEmbedder()
+    first = embedder.embed("Section 4.2 limits liability", 256)
+    
+    assert first == embedder.embed("Section 4.2 limits liability", 256)
+    assert sum(v * v for v in first) == pytest.approx(1.0)
+
+
+def test_model_dimension_table():
+    """Dimensions come from the model ID; fixed-size models only allow their own."""
+    assert model_dimensions("amazon.titan-embed-text-v2:0") == (256, 512, 1024)
+    assert model_dimensions("amazon.titan-embed-text-v1") == (1536,)
+    assert model_dimensions("vendor.unknown-embedder") is None
+    assert default_dimensions("amazon.titan-embed-text-v1") == 1536
+    assert default_dimensions("amazon.titan-embed-text-v2:0") == 1024
+    assert default_dimensions("cohere.embed-english-v3") == 1024
+
+
+def test_new_collections_use_embedder_default_dimension(tmp_path, chunks):
+    """Without EMBEDDING_DIMENSIONS, new cases take the embedder's default dimension."""
+    store = VectorStore(backend=NumpyBackend(root=str(tmp_path)), embedder=WideLocalEmbedder())
+    assert store.add_document_chunks("case_1", chunks)
+    
+    assert store.get_embedding_settings("case_1")["embedding_dimensions"] == 1536
+    assert store.backend.get_collection(store._get_collection_name("case_1")).dim == 1536
+
+
+def test_collection_records_embedder(store, chunks):
+    """Collections carry the embedder and settings that produced their vectors."""
+    assert store.add_document_chunks("case_1", chunks)
+    
+    assert store.get_embedding_settings("case_1") == {
+        "embedder": "local:hashing-v1",
+        "embedding_dimensions": 1024,
+        "embedding_normalize": True
+    }
+    results = store.search_similar_chunks("case_1", "did the valve fail pressure testing", top_k=1)
+    assert results[0]["metadata"]["document_id"] == "doc_1"
+
+
+def test_mixed_embedders_are_refused(store, chunks, tmp_path):
+    """A store with a different embedder cannot write to or query an existing case."""
+    assert store.add_document_chunks("case_1", chunks)
+    other = VectorStore(backend=NumpyBackend(root=str(tmp_path)), embedder=OtherLocalEmbedder())
+    
+    with pytest.raises(EmbedderMismatchError):
+        other.add_document_chunks("case_1", [{"text": "New text.", "document_id": "doc_3"}])
+    with pytest.raises(EmbedderMismatchError):
+        other.search_similar_chunks("case_1", "valve")
+
+
+@pytest.fixture
+def recording_store(tmp_path):
+    """Vector store whose embedder records every text it embeds."""
+    return VectorStore(backend=NumpyBackend(root=str(tmp_path)), embedder=RecordingEmbedder())
+
+
+def document(*texts):
+    """Chunks of one document, in order."""
+    return [{"text": text, "document_id": "doc_1", "chunk_index": i} for i, text in enumerate(texts)]
+
+
+def stored_ids(store):
+    """Chunk IDs stored for doc_1."""
+    return set(store._get_or_create_collection("case_1").get(where={"document_id": "doc_1"}, include=[])["ids"])
+
+
+def test_identical_rerun_embeds_nothing(recording_store):
+    """Re-indexing an unchanged document makes no embedding calls and keeps its IDs."""
+    chunks = document("The valve failed in March.", "Testing resumed in April.")
+    assert recording_store.add_document_chunks("case_1", chunks)
+    ids = stored_ids(recording_store)
+    recording_store.embedder.texts.clear()
+    
+    assert recording_store.add_document_chunks("case_1", chunks)
+    assert recording_store.embedder.texts == []
+    assert stored_ids(recording_store) == ids
+
+
+def test_edit_embeds_only_the_delta(recording_store):
+    """Only the changed chunk is embedded; unchanged chunks get refreshed metadata."""
+    recording_store.add_document_chunks("case_1", document("The valve failed in March.", "Testing resumed in April."))
+    recording_store.embedder.texts.clear()
+    
+    edited = document("Preface added.", "The valve failed in March.", "Testing resumed in May.")
+    assert recording_store.add_document_chunks("case_1", edited)
+    
+    assert recording_store.embedder.texts == ["Preface added.", "Testing resumed in May."]
+    results = recording_store.search_similar_chunks("case_1", "valve failed march", top_k=1)
+    assert results[0]["metadata"]["chunk_index"] == 1
+
+
+def test_removed_chunks_are_deleted(recording_store):
+    """Chunks no longer in the document are deleted from the collection and BM25 index."""
+    recording_store.add_document_chunks("case_1", document("The valve failed in March.", "Testing resumed in April."))
+    before = stored_ids(recording_store)
+    
+    assert recording_store.add_document_chunks("case_1", document("The valve failed in March."))
+    after = stored_ids(recording_store)
+    
+    assert len(before) == 2 and len(after) == 1 and after < before
+    removed = (before - after).pop()
+    assert removed not in {chunk_id for chunk_id, _ in recording_store._get_lexical_index("case_1").search("April", 5)}
+
+
+def test_embedding_failure_is_raised(recording_store):
+    """An embedding failure surfaces as EmbeddingError instead of a bare False, and writes nothing."""
+    recording_store.embedder.fail = True
+    
+    with pytest.raises(EmbeddingError):
+        recording_store.add_document_chunks("case_1", document("The valve failed in March."))
+    assert stored_ids(recording_store) == set()
+
+
+def test_case_version_changes_on_writes(store, chunks, tmp_path):
+    """Adding or deleting documents changes the case version that caches key on; it survives a restart."""
+    start = store.case_version("case_1")
+    store.add_document_chunks("case_1", chunks)
+    after_add = store.case_version("case_1")
+    store.delete_document("case_1", "doc_1")
+    after_delete = store.case_version("case_1")
+    
+    assert len({start, after_add, after_delete}) == 3
+    assert store.case_version("case_2") == ""
+    restarted = VectorStore(backend=NumpyBackend(root=str(tmp_path)), embedder=HashingEmbedder())
+    assert restarted.case_version("case_1") == after_delete
+    
+    store.delete_case_collection("case_1")
+    assert store.case_version("case_1") == ""
+
+
+def test_lexical_index_follows_other_writers(store, chunks):
+    """Writes from another process change the case version and rebuild the BM25 index; own writes do not."""
+    store.add_document_chunks("case_1", chunks)
+    index = store._get_lexical_index("case_1")
+    store.delete_document("case_1", "doc_2")
+    assert store._get_lexical_index("case_1") is index
+    
+    # Another writer (a seeding script, a second worker) adds a chunk and bumps the version
+    other = VectorStore(backend=store.backend, embedder=HashingEmbedder())
+    other.add_document_chunks("case_1", [
+        {"text": "Turbine inspection records were shredded.", "document_id": "doc_3", "chunk_index": 0}
+    ])
+    
+    rebuilt = store._get_lexical_index("case_1")
+    assert rebuilt is not index
+    assert [chunk_id.split("_")[:2] for chunk_id, _ in rebuilt.search("turbine shredded", 5)] == [["doc", "3"]]
+    results = store.hybrid_search("case_1", "turbine shredded", top_k=1)
+    assert results[0]["metadata"]["document_id"] == "doc_3" and results[0]["lexical_rank"] == 1
+
+
+def test_excluded_document_filtered_in_query(store, chunks):
+    """A $ne where-clause removes a document before the top-k cut."""
+    store.add_document_chunks("case_1", chunks)
+    
+    results = store.search_similar_chunks(
+        "case_1", "valve pressure testing", top_k=1,
+        filter_metadata={"document_id": {"$ne": "doc_1"}}
+    )
+    assert [r["metadata"]["document_id"] for r in results] == ["doc_2"]
+    assert set(store.get_chunk_embeddings("case_1", [r["id"] for r in results])) == {results[0]["id"]}
+
+
+def test_summary_index(store, chunks):
+    """One summary vector per document: lookup, search with exclusion, delete."""
+    store.add_document_chunks("case_1", chunks)
+    assert store.upsert_document_summary("case_1", "doc_1", "Valve failure during pressure testing.", {"document_type": "report"})
+    assert store.upsert_document_summary("case_1", "doc_2", "Late payment of invoice ACME_00001234.")
+    
+    assert store.get_document_summary("case_1", "doc_1")["summary"] == "Valve failure during pressure testing."
+    hits = store.search_document_summaries("case_1", "valve pressure testing", top_k=5)
+    assert [h["document_id"] for h in hits] == ["doc_1", "doc_2"]
+    hits = store.search_document_summaries(
+        "case_1", "valve pressure testing", top_k=5,
+        filter_metadata={"document_id": {"$ne": "doc_1"}}
+    )
+    assert [h["document_id"] for h in hits] == ["doc_2"]
+    
+    store.delete_document("case_1", "doc_1")
+    assert store.get_document_summary("case_1", "doc_1") is None
+    assert store.get_document_summary("case_2", "doc_1") is None
+
+
+def test_migration_reembeds_summaries(store, chunks):
+    """Migrating a case moves chunks and summaries to the new dimension together."""
+    store.add_document_chunks("case_1", chunks)
+    store.upsert_document_summary("case_1", "doc_1", "Valve failure during pressure testing.")
+    
+    assert store.configure_case_embeddings("case_1", 256) == "migration_required"
+    assert store.migrate_case_embeddings("case_1", 256)
+    
+    assert store.get_embedding_settings("case_1")["embedding_dimensions"] == 256
+    embedding = store.get_summary_embeddings("case_1", ["doc_1"])["doc_1"]
+    assert len(embedding) == 256
+    hits = store.search_document_summaries("case_1", "valve", query_embedding=store.embed_query("case_1", "valve"))
+    assert hits[0]["document_id"] == "doc_1"
+
+
+def test_copy_reembedded_copies_given_ids(store, chunks):
+    """Only the listed chunks are copied, with their text and metadata, at the target dimension."""
+    store.add_document_chunks("case_1", chunks)
+    source = store._get_or_create_collection("case_1")
+    target = store.backend.create_collection("target")
+    doc_1_ids = source.get(where={"document_id": "doc_1"}, include=[])["ids"]
+    
+    store._copy_reembedded(source, target, doc_1_ids, 256, True, batch_size=1)
+    
+    copied = target.get(include=["documents", "metadatas", "embeddings"])
+    assert copied["ids"] == doc_1_ids
+    assert copied["documents"] == ["The valve failed pressure testing in March."]
+    assert copied["metadatas"][0]["document_id"] == "doc_1"
+    assert len(copied["embeddings"][0]) == 256
+
+
+def test_migration_swaps_before_deleting(store, chunks):
+    """Migration replaces the live collection and leaves no shadow or retired copies behind."""
+    store.add_document_chunks("case_1", chunks)
+    name = store._get_collection_name("case_1")
+    
+    assert store.migrate_case_embeddings("case_1", 512, batch_size=1)
+    
+    collection = store.backend.get_collection(name)
+    assert collection.count() == 2
+    assert collection.dim == 512
+    for leftover in (store._shadow_name(name, 512, True), f"{name}__retired"):
+        with pytest.raises(ValueError):
+            store.backend.get_collection(leftover)
+    results = store.search_similar_chunks("case_1", "did the valve fail pressure testing", top_k=1)
+    assert results[0]["metadata"]["document_id"] == "doc_1"
+
+
+def test_failed_swap_keeps_live_collection(store, chunks, monkeypatch):
+    """If the shadow cannot take over the name, the original collection is restored intact."""
+    store.add_document_chunks("case_1", chunks)
+    rename = store.backend.rename_collection
+    
+    def failing_rename(name, new_name):
+        if "__migrating" in name:
+            raise OSError("disk full")
+        rename(name, new_name)
+    
+    monkeypatch.setattr(store.backend, "rename_collection", failing_rename)
+    assert not store.migrate_case_embeddings("case_1", 512)
+    
+    assert store.get_embedding_settings("case_1")["embedding_dimensions"] == 1024
+    assert store._get_or_create_collection("case_1").count() == 2
+    results = store.search_similar_chunks("case_1", "did the valve fail pressure testing", top_k=1)
+    assert results[0]["metadata"]["document_id"] == "doc_1"
+    assert store._active_migration(store._get_or_create_collection("case_1")) is None
+
+
+def test_concurrent_migration_is_refused(store, chunks, monkeypatch):
+    """While a migration runs, configuring reports "migrating" and a second migration does not start."""
+    store.add_document_chunks("case_1", chunks)
+    started = []
+    copy = store._copy_reembedded
+    
+    def copy_and_retry(source, target, ids, dimensions, normalize, batch_size):
+        if not started:
+            started.append(target.name)
+            assert store.configure_case_embeddings("case_1", 256) == "migrating"
+            assert not store.migrate_case_embeddings("case_1", 256)
+        copy(source, target, ids, dimensions, normalize, batch_size)
+    
+    monkeypatch.setattr(store, "_copy_reembedded", copy_and_retry)
+    assert store.migrate_case_embeddings("case_1", 512)
+    
+    assert started == [store._shadow_name(store._get_collection_name("case_1"), 512, True)]
+    live = store._get_or_create_collection("case_1")
+    assert store.get_embedding_settings("case_1")["embedding_dimensions"] == 512
+    assert store._active_migration(live) is None
+    assert store.configure_case_embeddings("case_1", 256) == "migration_required"
+
+
+def test_abandoned_migration_marker_expires(store, chunks, monkeypatch):
+    """A marker left by a worker that died stops blocking migrations after the timeout."""
+    from src.rag import embeddings
+    
+    store.add_document_chunks("case_1", chunks)
+    assert store._claim_migration("case_1")
+    assert store.configure_case_embeddings("case_1", 512) == "migrating"
+    
+    monkeypatch.setattr(embeddings, "MIGRATION_TIMEOUT_SECONDS", -1)
+    assert store.configure_case_embeddings("case_1", 512) == "migration_required"
+    assert store.migrate_case_embeddings("case_1", 512)
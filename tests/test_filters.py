@@ -0,0 +1,103 @@
+"""
+Unit tests for typed chunk metadata and the vector search filter DSL.
+"""
+import pytest
+from src.rag.filters import build_where, combine_where, to_chroma_metadata, analysis_chunk_metadata, matches_where
+from src.workflows.state import PrivilegeFlag
+
+
+def test_metadata_keeps_native_types():
+    """Numbers and booleans stay filterable; None is dropped, lists are JSON."""
+    metadata = to_chroma_metadata({
+        "chunk_index": 3,
+        "hot_doc_score": 0.8,
+        "privileged": False,
+        "section": None,
+        "flags": ["a", "b"],
+        "privilege_flag": PrivilegeFlag.WORK_PRODUCT
+    })
+    
+    assert metadata == {
+        "chunk_index": 3,
+        "hot_doc_score": 0.8,
+        "privileged": False,
+        "flags": '["a", "b"]',
+        "privilege_flag": "work_product"
+    }
+
+
+def test_analysis_chunk_metadata():
+    """Privilege, hot-doc and date-range fields are derived from pipeline output."""
+    metadata = analysis_chunk_metadata({
+        "privilege_flags": [PrivilegeFlag.ATTORNEY_CLIENT],
+        "is_hot_doc": True,
+        "hot_doc_score": 0.91,
+        "dates": [{"date": "2023-03-04"}, {"date": "2022-11-30"}, {"date": "unknown"}]
+    })
+    
+    assert metadata["privileged"] is True
+    assert metadata["hot_doc_score"] == 0.91
+    assert metadata["date_start"] == 20221130
+    assert metadata["date_end"] == 20230304
+
+
+def test_build_where_dsl():
+    """Suffix operators and date shortcuts translate to ChromaDB operators."""
+    where = build_where({
+        "privileged": False,
+        "hot_doc_score__gte": 0.7,
+        "date_from": "2023-01-01",
+        "date_to": "2023-12-31"
+    })
+    
+    assert where == {"$and": [
+        {"privileged": {"$eq": False}},
+        {"hot_doc_score": {"$gte": 0.7}},
+        {"date_end": {"$gte": 20230101}},
+        {"date_start": {"$lte": 20231231}}
+    ]}
+    assert build_where({"page__between": [2, 5]}) == {"$and": [{"page": {"$gte": 2}}, {"page": {"$lte": 5}}]}
+    assert build_where({"document_type__in": ("email",)}) == {"document_type": {"$in": ["email"]}}
+    assert build_where(None) is None
+    
+    with pytest.raises(ValueError):
+        build_where({"page__near": 3})
+
+
+@pytest.mark.parametrize("filters", [
+    {"date_from": "03/01/2024"},
+    {"date_to": "2024-13-45"},
+    {"date_from": None},
+    {"date_start__between": ["2024-01-01", "soon"]},
+    {"date_end__gte": 20240231}
+])
+def test_build_where_rejects_invalid_dates(filters):
+    """Dates that are not real ISO dates raise instead of becoming None or nonsense operands."""
+    with pytest.raises(ValueError, match="Invalid date"):
+        build_where(filters)
+
+
+def test_build_where_accepts_date_values():
+    """date objects, ISO strings and valid YYYYMMDD integers are all accepted."""
+    from datetime import date
+    
+    assert build_where({"date_from": date(2024, 3, 1)}) == {"date_end": {"$gte": 20240301}}
+    assert build_where({"date_to": " 2024-02-29 "}) == {"date_start": {"$lte": 20240229}}
+    assert build_where({"date_end__gte": 20240301}) == {"date_end": {"$gte": 20240301}}
+
+
+def test_combine_where():
+    """Raw where-clauses and DSL clauses are ANDed without nesting single terms."""
+    assert combine_where({"document_id": "d1"}, None) == {"document_id": "d1"}
+    assert combine_where({"document_id": "d1"}, {"$and": [{"a": 1}, {"b": 2}]}) == {
+        "$and": [{"document_id": "d1"}, {"a": 1}, {"b": 2}]
+    }
+
+
+def test_matches_where_evaluates_dsl_output():
+    """Python evaluation of where-clauses agrees with the DSL's intent."""
+    where = build_where({"privileged": False, "hot_doc_score__gte": 0.7, "date_from": "2023-01-01"})
+    
+    assert matches_where({"privileged": False, "hot_doc_score": 0.9, "date_end": 20230301}, where)
+    assert not matches_where({"privileged": True, "hot_doc_score": 0.9, "date_end": 20230301}, where)
+    assert not matches_where({"privileged": False, "hot_doc_score": 0.9}, where)
@@ -0,0 +1,98 @@
+"""
+Unit tests for the fused Agents 2-4 analyzer: output validation and the
+fall-back to the individual agents.
+"""
+import io
+import json
+import pytest
+from src.agents.fused_analyzer import FusedAnalyzer, FusedOutputError, validate_fused_output
+from src.agents.hot_doc_detector import HotDocDetector
+from src.agents.metadata_extractor import MetadataExtractor
+from src.agents.privilege_checker import PrivilegeChecker
+from src.workflows.state import PrivilegeFlag
+
+METADATA = {"dates": [], "people": [{"name": "J. Doe", "role": "engineer", "mentions": 2}], "entities": [], "locations": []}
+PRIVILEGE = {"privilege_flags": ["none"], "confidence": 0.9, "reasoning": "Operational email.", "recommendation": "not_privileged"}
+HOT_DOC = {"is_hot_doc": True, "score": 0.8, "severity": "high", "flags": [{"type": "admission", "excerpt": "we knew", "reasoning": "Admits knowledge."}]}
+
+
+class FakeBedrockClient:
+    """Bedrock runtime client that answers every structured call with the same tool input."""
+    
+    def __init__(self, tool_input):
+        self.tool_input = tool_input
+        self.calls = 0
+    
+    def invoke_model(self, modelId, body):
+        self.calls += 1
+        response = {"content": [{"type": "tool_use", "name": "structured_output", "input": self.tool_input}]}
+        return {"body": io.BytesIO(json.dumps(response).encode())}
+
+
+def make_analyzer(fused_output):
+    """Fused analyzer whose fused call returns fused_output and whose agents return valid sections."""
+    metadata_extractor, privilege_checker, hot_doc_detector = MetadataExtractor(), PrivilegeChecker(), HotDocDetector()
+    metadata_extractor.client = FakeBedrockClient(METADATA)
+    privilege_checker.client = FakeBedrockClient(PRIVILEGE)
+    hot_doc_detector.client = FakeBedrockClient(HOT_DOC)
+    analyzer = FusedAnalyzer(metadata_extractor, privilege_checker, hot_doc_detector)
+    analyzer.client = FakeBedrockClient(fused_output)
+    return analyzer
+
+
+@pytest.fixture
+def state():
+    """Pipeline state after classification; the attorney mention sends the privilege agent to the model."""
+    return {
+        "job_id": "job_1",
+        "case_id": "",
+        "document_type": "email",
+        "raw_text": "per our attorney the shipment was late again and we knew it"
+    }
+
+
+def test_validate_accepts_complete_output():
+    """All three sections with their required fields pass."""
+    validate_fused_output({"metadata": METADATA, "privilege": PRIVILEGE, "hot_doc": HOT_DOC})
+
+
+@pytest.mark.parametrize("result, message", [
+    ({"metadata": METADATA, "privilege": PRIVILEGE}, "Missing section 'hot_doc'"),
+    ({"metadata": METADATA, "privilege": "none", "hot_doc": HOT_DOC}, "Missing section 'privilege'"),
+    ({"metadata": METADATA, "privilege": PRIVILEGE, "hot_doc": {"is_hot_doc": True}}, "missing required fields ['score', 'severity']"),
+    ({}, "Missing section 'metadata'")
+])
+def test_validate_rejects_malformed_and_partial_output(result, message):
+    """Missing sections, non-object sections and missing required fields are rejected."""
+    with pytest.raises(FusedOutputError, match=message.replace("[", r"\[").replace("]", r"\]")):
+        validate_fused_output(result)
+
+
+def test_fused_call_fills_all_three_agents(state):
+    """A valid fused output is parsed by each agent's parse_output, with one Bedrock call."""
+    analyzer = make_analyzer({"metadata": METADATA, "privilege": PRIVILEGE, "hot_doc": HOT_DOC})
+    
+    result = analyzer.run(state)
+    
+    assert result["analysis_mode"] == "fused"
+    assert result["people"] == METADATA["people"]
+    assert result["privilege_flags"] == [PrivilegeFlag.NONE]
+    assert result["hot_doc_severity"] == "high"
+    assert analyzer.client.calls == 1
+    assert analyzer.privilege_checker.client.calls == 0
+
+
+@pytest.mark.parametrize("fused_output", [
+    {"metadata": METADATA, "privilege": PRIVILEGE},
+    {"metadata": METADATA, "privilege": {**PRIVILEGE, "privilege_flags": ["not_a_flag"]}, "hot_doc": HOT_DOC}
+])
+def test_falls_back_to_individual_agents(state, fused_output):
+    """Partial output, or a section with invalid values, re-runs Agents 2-4 separately."""
+    analyzer = make_analyzer(fused_output)
+    
+    result = analyzer.run(state)
+    
+    assert result["analysis_mode"] == "fused_fallback"
+    assert result["privilege_recommendation"] == "not_privileged"
+    assert result["is_hot_doc"] is True
+    assert [agent.client.calls for agent in (analyzer.privilege_checker, analyzer.hot_doc_detector)] == [1, 1]
@@ -0,0 +1,84 @@
+"""
+Tests for job results field projection.
+"""
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from src.services.job_results import parse_fields, build_response, RESULT_SECTIONS, UnknownFieldError
+
+
+def row(sections, **values):
+    """load_results row carrying only the columns of the given sections."""
+    columns = {
+        "id": "550e8400-e29b-41d4-a716-446655440000",
+        "case_id": "6fa459ea-ee8a-4ca4-894e-db77e160355e",
+        "status": "completed",
+        "started_at": datetime(2024, 1, 15, 10, 30),
+        "completed_at": datetime(2024, 1, 15, 10, 31),
+        "result_id": "7c9e6679-7425-40de-944b-e07fc1f90ae7"
+    }
+    for section in sections:
+        columns.update({attribute: None for attribute in RESULT_SECTIONS[section]})
+    columns.update(values)
+    return SimpleNamespace(**columns)
+
+
+def test_parse_fields_defaults_to_all_sections():
+    """No projection returns every section in response order."""
+    assert parse_fields(None) == tuple(RESULT_SECTIONS)
+    assert parse_fields("") == tuple(RESULT_SECTIONS)
+    assert parse_fields([]) == tuple(RESULT_SECTIONS)
+
+
+def test_parse_fields_projection():
+    """Comma-separated and list projections select sections in response order."""
+    assert parse_fields("hot_doc,classification") == ("classification", "hot_doc")
+    assert parse_fields(["hot_doc", " classification "]) == ("classification", "hot_doc")
+    assert parse_fields(["privilege,analysis", "privilege"]) == ("privilege", "analysis")
+
+
+def test_parse_fields_unknown():
+    """Unknown section names are rejected."""
+    with pytest.raises(UnknownFieldError, match="draft_narrative"):
+        parse_fields("classification,draft_narrative")
+
+
+def test_build_response_reads_only_projected_columns():
+    """A projected row without the large columns builds the requested sections only."""
+    sections = parse_fields("classification,hot_doc")
+    response = build_response(row(
+        sections,
+        document_type="email",
+        classification_confidence=0.9,
+        is_hot_doc=True,
+        hot_doc_score=0.8,
+        hot_doc_severity="high",
+        hot_doc_data={"flags": [{"type": "admission"}]}
+    ), sections)
+    
+    assert response.classification.document_type == "email"
+    assert response.classification.reasoning == ""
+    assert response.hot_doc.is_hot_doc and response.hot_doc.severity == "high"
+    assert response.hot_doc.flags == [{"type": "admission"}]
+    assert response.metadata is None and response.analysis is None and response.cross_references is None
+
+
+def test_build_response_all_sections():
+    """Without a projection every stored section is returned."""
+    sections = parse_fields(None)
+    response = build_response(row(
+        sections,
+        document_type="correspondence",
+        document_metadata={"people": [{"name": "John Smith"}]},
+        privilege_flags=["attorney_client"],
+        privilege_recommendation="privileged",
+        is_hot_doc=False,
+        summary="Board memo",
+        cross_references={"related_docs": [{"document_id": "d1"}]}
+    ), sections)
+    
+    assert response.metadata.people == [{"name": "John Smith"}] and response.metadata.dates == []
+    assert response.privilege.recommendation == "privileged"
+    assert response.hot_doc.is_hot_doc is False and response.hot_doc.severity == "low"
+    assert response.analysis.summary == "Board memo"
+    assert response.cross_references.related_documents == [{"document_id": "d1"}]
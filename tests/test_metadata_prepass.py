@@ -0,0 +1,149 @@
+"""
+Tests for the local metadata pre-pass.
+"""
+import pytest
+from src.agents import metadata_extractor as metadata_extractor_module
+from src.agents.metadata_extractor import MetadataExtractor
+from src.agents.metadata_prepass import MetadataPrepass, merge_annotations, clean_name, format_spans
+
+
+@pytest.fixture
+def prepass():
+    """Pre-pass with a gazetteer registered for case_a."""
+    prepass = MetadataPrepass()
+    prepass.register_case_entities("case_a", people=["Robert Martinez"], locations=["Superior Court of California"])
+    return prepass
+
+
+@pytest.fixture
+def email_text():
+    """Email with headers, a signature and dates in several formats."""
+    return """From: Sarah Johnson <sjohnson@acmecorp.com>
+To: CHEN, Mike <mchen@acmecorp.com>; Dr. Lena Fischer <lfischer@acmecorp.com>
+Sent: Monday, March 6, 2023 9:14 AM
+Subject: Valve Recall Timeline
+
+Mike,
+
+The first complaint came in on 2/10/2023 and testing finished 1 March 2023.
+Global Manufacturing Inc. wants an answer by 2023-03-31. Robert Martinez is
+handling the filing in the Superior Court of California. The quality team
+flagged 13/45/2023 as a typo in the log.
+
+Sarah Johnson
+VP of Product Safety
+"""
+
+
+def test_dates_are_normalized(prepass, email_text):
+    """Dates in ISO, US numeric, month-first and day-first formats become ISO; invalid dates are ignored."""
+    spans = prepass.extract(email_text)
+    dates = {item["date"]: item for item in spans["dates"]}
+    
+    assert set(dates) == {"2023-03-06", "2023-02-10", "2023-03-01", "2023-03-31"}
+    assert dates["2023-03-06"]["date_type"] == "sent"
+    assert dates["2023-02-10"]["text"] == "2/10/2023"
+    assert [item["id"] for item in spans["dates"]] == ["D1", "D2", "D3", "D4"]
+
+
+def test_email_headers_and_names(prepass, email_text):
+    """Header participants get roles and emails; headings and role words are not names."""
+    people = {item["name"]: item for item in prepass.extract(email_text)["people"]}
+    
+    assert people["Sarah Johnson"]["role"] == "sender"
+    assert people["Sarah Johnson"]["mentions"] == 2
+    assert people["Mike CHEN"]["email"] == "mchen@acmecorp.com"
+    assert people["Lena Fischer"]["title"] == "Dr."
+    assert "Robert Martinez" in people
+    assert "Valve Recall Timeline" not in people and "Product Safety" not in people
+    assert clean_name("SMITH, John") == "John SMITH"
+    assert clean_name("Mike Chen, CEO") == "Mike Chen"
+
+
+def test_entities_and_gazetteer(prepass, email_text):
+    """Corporate suffixes mark organizations; the case gazetteer adds known locations and roles."""
+    spans = prepass.extract(email_text, case_id="case_a")
+    
+    assert [(item["name"], item["type"]) for item in spans["entities"]] == [("Global Manufacturing Inc.", "corporation")]
+    assert [item["name"] for item in spans["locations"]] == ["Superior Court of California"]
+    assert spans["locations"][0]["id"] == "L1"
+    assert not prepass.extract(email_text)["locations"]
+    assert "LOCATIONS:\nL1 Superior Court of California" in format_spans(spans)
+
+
+def test_merge_annotations(prepass, email_text):
+    """Model annotations fill spans by id, drops remove spans, additional items are appended once."""
+    spans = prepass.extract(email_text, case_id="case_a")
+    people = {item["name"]: item["id"] for item in spans["people"]}
+    result = {
+        "dates": [{"id": "D1", "context": "Email sent", "date_type": "correspondence"}],
+        "people": [{"id": people["Robert Martinez"], "role": "attorney"}],
+        "entities": [],
+        "locations": [{"id": "L1", "context": "Venue", "location_type": "venue"}],
+        "drop": [people["Lena Fischer"]],
+        "additional": {
+            "people": [{"name": "Sarah Johnson", "role": "sender", "mentions": 2}, {"name": "Mr. Okafor", "role": "witness", "mentions": 1}],
+            "locations": [{"name": "dock 4", "context": "Shipping"}]
+        }
+    }
+    merged = merge_annotations(spans, result)
+    names = [item["name"] for item in merged["people"]]
+    
+    assert merged["dates"][0] == {"date": "2023-03-06", "context": "Email sent", "date_type": "correspondence", "source_page": None}
+    assert merged["dates"][1]["context"].startswith("The first complaint")
+    assert {item["name"]: item["role"] for item in merged["people"]}["Robert Martinez"] == "attorney"
+    assert "Lena Fischer" not in names
+    assert names.count("Sarah Johnson") == 1 and "Mr. Okafor" in names
+    assert merged["entities"][0]["role"] == "unknown"
+    assert [item["context"] for item in merged["locations"]] == ["Venue", "Shipping"]
+
+
+def test_empty_text_and_model_failure():
+    """Empty documents give no spans; an empty model result keeps the local values."""
+    prepass = MetadataPrepass()
+    spans = prepass.extract("")
+    
+    assert spans["count"] == 0
+    assert merge_annotations(spans, {}) == {"dates": [], "people": [], "entities": [], "locations": []}
+    
+    spans = prepass.extract("Signed on 2024-01-05 by Jane Doe for Acme Holdings.")
+    merged = merge_annotations(spans, {})
+    assert merged["dates"][0]["date"] == "2024-01-05"
+    assert merged["people"] == [{"role": "unknown", "title": None, "name": "Jane Doe", "mentions": 1, "first_appearance": "line 1"}]
+
+
+class FailingBedrockClient:
+    """Bedrock runtime client whose calls always fail."""
+    
+    def invoke_model(self, modelId, body):
+        raise RuntimeError("ThrottlingException")
+
+
+def test_annotation_failure_keeps_local_values(email_text):
+    """A failed annotation call returns the pre-extracted spans instead of empty metadata."""
+    extractor = MetadataExtractor()
+    extractor.client = FailingBedrockClient()
+    
+    output = extractor.run({"job_id": "job_1", "raw_text": email_text, "document_type": "email"})
+    
+    assert "2023-03-31" in [item["date"] for item in output["dates"]]
+    assert "Sarah Johnson" in [item["name"] for item in output["people"]]
+
+
+def test_prepass_failure_falls_back_to_full_extraction(monkeypatch, email_text):
+    """If the pre-pass itself raises, the full model extraction still runs."""
+    class BrokenPrepass:
+        def extract(self, text, case_id=None):
+            raise ValueError("bad gazetteer")
+    
+    calls = []
+    extractor = MetadataExtractor()
+    monkeypatch.setattr(metadata_extractor_module, "metadata_prepass", BrokenPrepass())
+    monkeypatch.setattr(extractor, "_call_claude_structured", lambda **kwargs: calls.append(kwargs) or {
+        "dates": [], "people": [{"name": "Sarah Johnson", "role": "sender"}], "entities": [], "locations": []
+    })
+    
+    output = extractor.run({"job_id": "job_1", "raw_text": email_text, "document_type": "email"})
+    
+    assert len(calls) == 1 and calls[0]["schema"] is metadata_extractor_module.METADATA_SCHEMA
+    assert [item["name"] for item in output["people"]] == ["Sarah Johnson"]
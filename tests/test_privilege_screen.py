@@ -0,0 +1,69 @@
+"""
+Tests for the local privilege pre-screen.
+"""
+import json
+import pytest
+from src.agents.privilege_screen import PrivilegeScreen, KeywordAutomaton
+
+
+@pytest.fixture
+def screen(tmp_path):
+    """Screen with a per-case term list registered for case_a."""
+    screen = PrivilegeScreen(terms_dir=str(tmp_path))
+    screen.register_case_terms("case_a", attorneys=["Jane Doe"], firms=["Harlow Brandt"], domains=["@hbpartners.com"])
+    return screen
+
+
+def test_generic_markers_flag_candidates(screen):
+    """Privilege banners, counsel vocabulary and firm domains are hits without any case list."""
+    banner = screen.screen("PRIVILEGED & CONFIDENTIAL\nPlease review the draft.")
+    counsel = screen.screen("Looping in general counsel before we respond.")
+    domain = screen.screen("From: r.ames@ameslaw.com\nSee attached.")
+    
+    assert banner["candidate"] and banner["hits"][0]["kind"] == "banner"
+    assert counsel["candidate"]
+    assert {hit["kind"] for hit in domain["hits"]} == {"domain"}
+
+
+def test_case_terms_match_on_word_boundaries(screen):
+    """Registered names match across whitespace and case, but not inside other words."""
+    hit = screen.screen("Call JANE\n  DOE about the shipment. Cc: ops@hbpartners.com", case_id="case_a")
+    near_miss = screen.screen("Janet Doe and Jane Doerr approved the shipment.", case_id="case_a")
+    other_case = screen.screen("Call Jane Doe about the shipment.", case_id="case_b")
+    
+    assert [h["term"] for h in hit["hits"]] == ["jane doe", "hbpartners.com"]
+    assert [h["kind"] for h in hit["hits"]] == ["attorney", "domain"]
+    assert not near_miss["candidate"]
+    assert not other_case["candidate"]
+
+
+def test_zero_hit_document_is_not_a_candidate(screen):
+    """Ordinary business text gets no hits."""
+    result = screen.screen("Invoice 1042: 200 valves shipped to Northwind, payment due in 30 days.", case_id="case_a")
+    
+    assert not result["candidate"]
+    assert result["hit_count"] == 0 and result["hits"] == []
+    assert result["elapsed_us"] >= 0
+
+
+def test_terms_file_and_invalidation(screen, tmp_path):
+    """Per-case JSON term lists are loaded, and reloaded after invalidate."""
+    assert not screen.screen("Per Mark Okafor's note, hold shipments.", case_id="case_c")["candidate"]
+    
+    (tmp_path / "case_c.json").write_text(json.dumps({"attorneys": ["Mark Okafor"], "firms": [], "domains": []}))
+    screen.invalidate("case_c")
+    
+    assert screen.screen("Per Mark Okafor's note, hold shipments.", case_id="case_c")["candidate"]
+
+
+def test_sampling_is_deterministic():
+    """QC sampling depends only on the key and the rate."""
+    screen = PrivilegeScreen()
+    keys = [f"doc_{i}" for i in range(2000)]
+    picked = [key for key in keys if screen.sampled(key, rate=0.1)]
+    
+    assert picked == [key for key in keys if screen.sampled(key, rate=0.1)]
+    assert 120 < len(picked) < 280
+    assert not screen.sampled("doc_1", rate=0.0)
+    assert all(screen.sampled(key, rate=1.0) for key in keys[:50])
+    assert KeywordAutomaton([]).find("anything") == []
@@ -0,0 +1,50 @@
+"""
+Unit tests for Ask AI re-ranking and context packing.
+"""
+import pytest
+from src.rag.rerank import Reranker, pack_context, estimate_tokens
+
+
+@pytest.fixture
+def candidates():
+    """Hybrid candidates in fused order; the best answer is fused last."""
+    return [
+        {"id": "c1", "text": "The distributor disputed the late payment terms.", "distance": 0.8, "rrf_score": 0.033},
+        {"id": "c2", "text": "Quarterly sales figures for the northern region.", "distance": 0.9, "rrf_score": 0.032},
+        {"id": "c3", "text": "Ms. O'Brien testified the valve failed in March after the recall notice.", "distance": 1.0, "rrf_score": 0.016}
+    ]
+
+
+def test_rerank_promotes_query_coverage(candidates):
+    """The chunk covering the query terms and phrases moves to the top."""
+    result = Reranker().rerank("when did the valve failed after the recall notice", candidates)
+    
+    assert result["degraded"] is False
+    assert result["reranked"] == 3
+    assert result["chunks"][0]["id"] == "c3"
+    assert all("rerank_score" in c for c in result["chunks"])
+
+
+def test_rerank_deadline_keeps_fused_order(candidates):
+    """An exhausted deadline degrades to the fused order instead of failing."""
+    result = Reranker().rerank("valve recall", candidates, deadline_ms=-1)
+    
+    assert result["degraded"] is True
+    assert result["reranked"] == 0
+    assert [c["id"] for c in result["chunks"]] == ["c1", "c2", "c3"]
+
+
+def test_pack_context_respects_budget():
+    """Packing skips chunks that do not fit, drops duplicates and honours max_chunks."""
+    chunks = [
+        {"id": "big", "text": "x" * 400},
+        {"id": "small", "text": "y" * 40},
+        {"id": "dup", "text": "y" * 40},
+        {"id": "other", "text": "z" * 40}
+    ]
+    
+    packed = pack_context(chunks, token_budget=25)
+    assert [c["id"] for c in packed] == ["small", "other"]
+    assert sum(estimate_tokens(c["text"]) for c in packed) <= 25
+    
+    assert [c["id"] for c in pack_context(chunks, token_budget=1000, max_chunks=1)] == ["big"]
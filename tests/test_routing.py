@@ -0,0 +1,150 @@
+"""
+Tests for pre-filter routing of low-value documents.
+"""
+import pytest
+from src.agents.privilege_screen import privilege_screen
+from src.workflows.routing import document_signals, route_document, skipped_outputs, ROUTING_MIN_CHARS
+from src.workflows.state import DocumentType, PrivilegeFlag
+
+
+@pytest.fixture
+def calendar_invite_text():
+    """Calendar invite with no substantive content."""
+    return """
+    From: Dana Whitfield <dwhitfield@acme.com>
+    To: Engineering Leads
+    Sent: Monday, March 6, 2023 9:14 AM
+    Subject: Invitation: Weekly valve sync @ Tue Mar 7, 2023 10am - 10:30am
+    
+    Invitation: Weekly valve sync
+    When: Tuesday, March 7, 2023 10:00 AM-10:30 AM (Eastern Time)
+    Where: Conference Room B
+    Join Zoom Meeting https://acme.zoom.us/j/123456789
+    Meeting ID: 123 456 789
+    Add to calendar: Google / Outlook / Yahoo
+    """
+
+
+@pytest.fixture
+def counsel_email_text():
+    """Short email that mentions counsel and privilege."""
+    return """
+    From: Dana Whitfield <dwhitfield@acme.com>
+    To: Mark Okafor <mokafor@acme.com>
+    Subject: Automatic reply: test results
+    
+    I am currently out of the office. Before you forward the January test results,
+    please check with outside counsel - this is privileged and part of our litigation hold.
+    """
+
+
+def test_blank_document_skips_agents():
+    """Near-blank documents skip every agent after the classifier."""
+    decision = route_document({"raw_text": "Page 14\n\n\n   \n", "document_type": DocumentType.OTHER})
+    
+    assert decision["tier"] == "skip"
+    assert set(decision["skip"]) == {"metadata", "privilege", "hot_doc", "content", "cross_reference"}
+    assert document_signals("x" * (ROUTING_MIN_CHARS - 1))["chars"] < ROUTING_MIN_CHARS
+
+
+def test_calendar_invite_is_downgraded(calendar_invite_text):
+    """Junk markers skip the Sonnet agents and downgrade content analysis."""
+    state = {"raw_text": calendar_invite_text, "document_type": DocumentType.CORRESPONDENCE, "document_sub_type": "meeting_invite"}
+    decision = route_document(state)
+    
+    assert decision["tier"] == "light"
+    assert decision["skip"] == ["privilege", "hot_doc"]
+    assert decision["downgrade"] == ["content"]
+    assert "calendar_invite" in decision["signals"]["junk"]
+    
+    outputs = skipped_outputs(decision)
+    assert outputs["privilege_flags"] == [PrivilegeFlag.NONE]
+    assert outputs["privilege_recommendation"] == "not_privileged"
+    assert outputs["is_hot_doc"] is False
+    assert "summary" not in outputs
+
+
+def test_privilege_terms_force_full_pipeline(counsel_email_text):
+    """Counsel/privilege vocabulary overrides junk markers."""
+    decision = route_document({"raw_text": counsel_email_text, "document_type": DocumentType.EMAIL})
+    
+    assert "auto_reply" in decision["signals"]["junk"]
+    assert decision["tier"] == "full"
+    assert decision["skip"] == []
+    assert {"counsel", "privileged", "litigation"} <= set(decision["signals"]["privilege_hits"])
+
+
+def test_privilege_screen_hits_force_full_pipeline(calendar_invite_text):
+    """An invite from outside counsel's domain, or naming a case attorney, is not downgraded."""
+    state = {"raw_text": calendar_invite_text, "document_type": DocumentType.CORRESPONDENCE}
+    assert route_document(state)["signals"]["screen_hits"] == []
+    
+    from_firm = calendar_invite_text.replace("dwhitfield@acme.com", "dwhitfield@whitfieldlaw.com")
+    decision = route_document({**state, "raw_text": from_firm})
+    assert decision["signals"]["privilege_hits"] == []
+    assert decision["tier"] == "full"
+    assert decision["signals"]["screen_hits"] == ["@whitfieldlaw.com"]
+    
+    privilege_screen.register_case_terms("case_routing", attorneys=["Dana Whitfield"])
+    try:
+        decision = route_document({**state, "case_id": "case_routing"})
+    finally:
+        privilege_screen._registered.pop("case_routing", None)
+        privilege_screen.invalidate("case_routing")
+    assert decision["tier"] == "full"
+    assert any("pre-screen" in reason for reason in decision["reasons"])
+
+
+def test_substantive_types_and_disabled_routing(calendar_invite_text):
+    """Substantive document types and disabled routing always run everything."""
+    contract = route_document({"raw_text": calendar_invite_text, "document_type": DocumentType.CONTRACT})
+    disabled = route_document({"raw_text": "", "document_type": DocumentType.OTHER}, enabled=False)
+    
+    assert contract["tier"] == "full"
+    assert disabled["tier"] == "full"
+    assert skipped_outputs(disabled) == {}
+
+
+def test_boilerplate_ratio():
+    """Repeated footers count as boilerplate; headers and quoted replies are left out of the ratio."""
+    text = "\n".join([
+        "From: a@acme.com",
+        "To: b@acme.com",
+        "Subject: Re: lunch",
+        "> see below",
+        "Sounds good, see you at noon.",
+        "Acme Corp | 1 Main St",
+        "Acme Corp | 1 Main St"
+    ])
+    signals = document_signals(text)
+    
+    assert signals["lines"] == 7
+    assert signals["quoted_lines"] == 4
+    assert signals["boilerplate_ratio"] == pytest.approx(2 / 3, abs=1e-3)
+
+
+def test_reply_thread_runs_full_pipeline():
+    """A short reply quoting a substantive thread is not downgraded by its headers and quotes."""
+    quoted = [
+        "> From: Dana Whitfield <dwhitfield@acme.com>",
+        "> Sent: Friday, January 13, 2023 4:02 PM",
+        "> Subject: Valve test results",
+        "> The January pressure tests failed at 1,200 psi on three of five units.",
+        "> We shipped the remaining units to the customer anyway to hit the quarter.",
+        "> Please do not circulate the test report outside the team."
+    ]
+    text = "\n".join([
+        "From: Mark Okafor <mokafor@acme.com>",
+        "To: Dana Whitfield <dwhitfield@acme.com>",
+        "Subject: RE: Valve test results",
+        "Understood. I will hold the report until we talk on Monday.",
+        *quoted * 3
+    ])
+    decision = route_document({"raw_text": text, "document_type": DocumentType.EMAIL})
+    
+    assert decision["signals"]["boilerplate_ratio"] == 0.0
+    assert decision["tier"] == "full"
+    assert "hot_doc" not in decision["skip"]
+    
+    forward = document_signals("\n".join(quoted))
+    assert forward["boilerplate_ratio"] == 0.0
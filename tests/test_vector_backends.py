@@ -0,0 +1,158 @@
+"""
+Unit tests for the file-backed NumPy vector backend.
+"""
+import numpy as np
+import pytest
+from src.rag.vector_backends import NumpyBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    """NumPy backend in a temporary directory, IVF disabled."""
+    return NumpyBackend(root=str(tmp_path), ivf_min_rows=0)
+
+
+@pytest.fixture
+def vectors():
+    """Random unit vectors."""
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(50, 16)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def test_query_returns_nearest_with_filters(backend, vectors):
+    """Exact search honours where-clauses and returns Chroma-shaped results."""
+    collection = backend.create_collection("case_a", metadata={"case_id": "a"})
+    collection.upsert(
+        ids=[f"c{i}" for i in range(50)],
+        embeddings=vectors.tolist(),
+        documents=[f"text {i}" for i in range(50)],
+        metadatas=[{"page": i} for i in range(50)]
+    )
+    
+    results = collection.query(query_embeddings=[vectors[7].tolist()], n_results=3)
+    assert results["ids"][0][0] == "c7"
+    assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+    
+    filtered = collection.query(query_embeddings=[vectors[7].tolist()], n_results=3, where={"page": {"$gte": 10}})
+    assert "c7" not in filtered["ids"][0]
+    assert all(m["page"] >= 10 for m in filtered["metadatas"][0])
+
+
+def test_tombstones_compaction_and_reload(backend, vectors, tmp_path):
+    """Deletes and re-upserts survive compaction and reopening from disk."""
+    collection = backend.create_collection("case_a")
+    collection.upsert(ids=[f"c{i}" for i in range(10)], embeddings=vectors[:10].tolist())
+    collection.delete(ids=["c0", "c1", "c2"])
+    collection.upsert(ids=["c3"], embeddings=[vectors[20].tolist()], documents=["moved"])
+    collection.update(ids=["c4"], metadatas=[{"page": 4}])
+    
+    reopened = NumpyBackend(root=str(tmp_path), ivf_min_rows=0).get_collection("case_a")
+    assert reopened.count() == 7
+    assert reopened.get(ids=["c0"])["ids"] == []
+    assert reopened.get(ids=["c4"])["metadatas"] == [{"page": 4}]
+    assert reopened.query(query_embeddings=[vectors[20].tolist()], n_results=1)["ids"] == [["c3"]]
+
+
+def test_ivf_recall(tmp_path):
+    """IVF search finds the exact nearest neighbour of clustered data."""
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(8, 16))
+    matrix = (centers[rng.integers(0, 8, 2000)] + 0.1 * rng.normal(size=(2000, 16))).astype(np.float32)
+    
+    collection = NumpyBackend(root=str(tmp_path), ivf_min_rows=1000, nprobe=4).create_collection("case_big")
+    collection.upsert(ids=[f"c{i}" for i in range(2000)], embeddings=matrix.tolist())
+    
+    hits = sum(
+        collection.query(query_embeddings=[matrix[i].tolist()], n_results=1)["ids"][0][0] == f"c{i}"
+        for i in range(0, 2000, 100)
+    )
+    assert collection._ivf is not None
+    assert hits == 20
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8"])
+def test_quantized_search_reranks_at_full_precision(tmp_path, vectors, quantization):
+    """Quantized collections return the same neighbours with exact float32 distances."""
+    backend = NumpyBackend(root=str(tmp_path), ivf_min_rows=0, quantization=quantization)
+    collection = backend.create_collection("case_q")
+    collection.upsert(ids=[f"c{i}" for i in range(50)], embeddings=vectors.tolist())
+    collection.delete(ids=[f"c{i}" for i in range(20)])  # triggers compaction
+    
+    exact = np.argsort(-(vectors[20:] @ vectors[30]))[:5] + 20
+    results = collection.query(query_embeddings=[vectors[30].tolist()], n_results=5)
+    assert results["ids"][0] == [f"c{i}" for i in exact]
+    assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+    
+    reopened = NumpyBackend(root=str(tmp_path)).get_collection("case_q")
+    assert reopened.quantization == quantization
+    assert reopened.query(query_embeddings=[vectors[30].tolist()], n_results=1)["ids"] == [["c30"]]
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8"])
+def test_reload_truncates_torn_vector_tail(tmp_path, vectors, quantization):
+    """Vectors written without their log entries are cut off before the next append."""
+    backend = NumpyBackend(root=str(tmp_path), ivf_min_rows=0, quantization=quantization)
+    collection = backend.create_collection("case_t")
+    collection.upsert(ids=["a", "b", "c"], embeddings=vectors[:3].tolist())
+    # Crash between writing vectors and logging them
+    collection._write_vectors(vectors[10:12])
+    
+    reopened = NumpyBackend(root=str(tmp_path), ivf_min_rows=0).get_collection("case_t")
+    reopened.upsert(ids=["d"], embeddings=[vectors[3].tolist()])
+    
+    for i, chunk_id in enumerate(["a", "b", "c", "d"]):
+        results = reopened.query(query_embeddings=[vectors[i].tolist()], n_results=1)
+        assert results["ids"] == [[chunk_id]]
+        assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+
+
+@pytest.mark.parametrize("tail", [b'{"op": "add", "id": "d", "docu', b'{"op": "add", "id": "d"}', b'{"op": "add", "id\n'])
+def test_reload_truncates_torn_log_line(tmp_path, vectors, tail):
+    """A half-written final log line is cut off with its vectors instead of failing the load."""
+    backend = NumpyBackend(root=str(tmp_path), ivf_min_rows=0)
+    collection = backend.create_collection("case_t")
+    collection.upsert(ids=["a", "b", "c"], embeddings=vectors[:3].tolist())
+    # Crash after writing the vector but partway through its log line
+    collection._write_vectors(vectors[10:11])
+    with open(collection._log_path, "ab") as f:
+        f.write(tail)
+    
+    reopened = NumpyBackend(root=str(tmp_path), ivf_min_rows=0).get_collection("case_t")
+    assert reopened.count() == 3
+    reopened.upsert(ids=["d"], embeddings=[vectors[3].tolist()])
+    
+    again = NumpyBackend(root=str(tmp_path), ivf_min_rows=0).get_collection("case_t")
+    assert again.count() == 4
+    for i, chunk_id in enumerate(["a", "b", "c", "d"]):
+        assert again.query(query_embeddings=[vectors[i].tolist()], n_results=1)["ids"] == [[chunk_id]]
+
+
+def test_reload_refuses_corrupt_log_middle(tmp_path, vectors):
+    """An undecodable line followed by more entries is corruption, not a torn append."""
+    backend = NumpyBackend(root=str(tmp_path), ivf_min_rows=0)
+    collection = backend.create_collection("case_t")
+    collection.upsert(ids=["a"], embeddings=vectors[:1].tolist())
+    with open(collection._log_path, "ab") as f:
+        f.write(b'{"op": "ad\n{"op": "delete", "id": "a"}\n')
+    
+    with pytest.raises(ValueError, match="corrupt"):
+        NumpyBackend(root=str(tmp_path), ivf_min_rows=0).get_collection("case_t")
+
+
+def test_rename_collection(backend, vectors):
+    """A renamed collection keeps its rows under the new name; taken names are refused."""
+    collection = backend.create_collection("case_a", metadata={"case_id": "a"})
+    collection.upsert(ids=["c0", "c1"], embeddings=vectors[:2].tolist(), documents=["zero", "one"])
+    backend.create_collection("case_b")
+    
+    with pytest.raises(ValueError):
+        backend.rename_collection("case_a", "case_b")
+    backend.rename_collection("case_a", "case_c")
+    
+    with pytest.raises(ValueError):
+        backend.get_collection("case_a")
+    renamed = backend.get_collection("case_c")
+    assert renamed.name == "case_c"
+    assert renamed.metadata == {"case_id": "a"}
+    assert renamed.get(ids=["c1"])["documents"] == ["one"]
@@ -0,0 +1,96 @@
+"""
+Tests for witness name normalization and case witness resolution.
+"""
+import pytest
+from src.services.witness_registry import (
+    WitnessIndex, normalize_name, display_name, soundex, block_key, match_score, witness_appearances
+)
+
+
+class Witness:
+    """Stand-in for a CaseWitness row."""
+    
+    def __init__(self, canonical_name, normalized_name, role):
+        self.canonical_name = canonical_name
+        self.normalized_name = normalized_name
+        self.block_key = block_key(normalized_name)
+        self.role = role
+        self.aliases = []
+        self.mention_count = 0
+
+
+@pytest.fixture
+def index():
+    """Empty witness index."""
+    return WitnessIndex()
+
+
+def resolve(index, name, role=None):
+    """Resolve a name, creating Witness objects for new people."""
+    return index.resolve(name, role, 1, Witness)
+
+
+def test_normalize_and_display():
+    """Order, case, punctuation, titles and suffixes do not affect the normalized name."""
+    assert normalize_name("SMITH, JOHN") == "john smith"
+    assert normalize_name("Dr. John Smith, Jr.") == "john smith"
+    assert normalize_name("John Smith, Esq.") == "john smith"
+    assert normalize_name("O'Brien, Mary-Kate") == "marykate obrien"
+    assert normalize_name("José Núñez") == "jose nunez"
+    assert normalize_name("  ") == "" and normalize_name(None) == ""
+    assert display_name("SMITH, JOHN") == "John Smith"
+    assert display_name("Mike Chen, CEO") == "Mike Chen"
+
+
+def test_soundex_blocking():
+    """Spelling variants of a surname share a block; different surnames do not."""
+    assert [soundex(word) for word in ("robert", "rupert", "ashcraft", "tymczak", "pfister")] == [
+        "R163", "R163", "A261", "T522", "P236"
+    ]
+    assert block_key("john smith") == block_key("jon smyth") == "S530"
+    assert block_key("john smith") != block_key("john jones")
+
+
+def test_match_score():
+    """Initials, nicknames and near spellings are compatible; different people are not."""
+    assert match_score("j smith", "john smith")[0] > 0
+    assert match_score("mike chen", "michael chen")[0] > 0
+    assert match_score("john smyth", "john smith")[0] > 0
+    assert match_score("jane smith", "john smith")[0] == 0
+    assert match_score("john a smith", "john b smith")[0] == 0
+    assert match_score("smith", "john smith") == (pytest.approx(0.6), True)
+
+
+def test_variants_resolve_to_one_witness(index):
+    """"J. Smith", "John Smith" and "SMITH, JOHN" become one witness with the most complete name."""
+    first = resolve(index, "J. Smith", "witness")
+    assert resolve(index, "John Smith") is first
+    assert resolve(index, "SMITH, JOHN") is first
+    
+    assert first.canonical_name == "John Smith"
+    assert first.normalized_name == "john smith"
+    assert first.aliases == ["J. Smith"]
+    assert first.role == "witness"
+    assert first.mention_count == 3
+
+
+def test_distinct_and_ambiguous_names(index):
+    """Different given names stay separate; ambiguous initials and surnames create new entries."""
+    john = resolve(index, "John Smith")
+    jane = resolve(index, "Jane Smith")
+    michael = resolve(index, "Michael Chen")
+    
+    assert jane is not john
+    assert resolve(index, "Mike Chen") is michael
+    assert resolve(index, "Chen") is michael
+    assert resolve(index, "J. Smith") not in (john, jane)
+    assert resolve(index, "Smith") not in (john, jane)
+
+
+def test_witness_appearances_match_counted_mentions():
+    """A witness without listed appearances is stored and counted as one mention."""
+    assert witness_appearances({"name": "John Smith"}) == [{}]
+    assert witness_appearances({"name": "John Smith", "appearances": []}) == [{}]
+    
+    appearances = [{"context": "signed the memo", "page": 2}, {"context": "cc'd", "page": 5}]
+    assert witness_appearances({"name": "John Smith", "appearances": appearances}) == appearances